@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
-from threading import Lock
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Event, Lock
 
 from one_dragon.base.conditional_operation.atomic_op import AtomicOp
 from one_dragon.utils import thread_utils
@@ -27,6 +27,7 @@ class OperationExecutor:
         self.running: bool = False
         self._current_op: AtomicOp | None = None  # 当前执行的指令
         self._async_ops: list[AtomicOp] = []  # 执行过异步操作
+        self._op_done_event: Event | None = None  # 当前指令执行完毕 或 被stop时设置
         self._op_lock: Lock = Lock()  # 操作锁 用于保证stop里的一定是最后执行的op
 
     def run_async(self) -> Future:
@@ -52,20 +53,16 @@ class OperationExecutor:
                 self._current_op = self.op_list[idx]
                 if self._current_op.async_op:
                     self._async_ops.append(self._current_op)
+                done_event = Event()
+                self._op_done_event = done_event
                 future: Future = _od_op_task_executor.submit(self._current_op.execute)
                 future.add_done_callback(thread_utils.handle_future_result)
+                future.add_done_callback(lambda _: done_event.set())
 
-            # 使用短超时循环等待，以便能响应 stop()
-            while not future.done():
-                if not self.running:
-                    break
-                try:
-                    future.result(timeout=0.05)
-                except TimeoutError:
-                    continue
-                except Exception:
-                    log.error('指令执行出错', exc_info=True)
-                    break
+            # 等待指令完成 stop() 时会被唤醒
+            done_event.wait()
+            if future.done() and not future.cancelled() and future.exception() is not None:
+                log.error('指令执行出错', exc_info=future.exception())
 
             with self._op_lock:
                 if not self.running:
@@ -91,6 +88,8 @@ class OperationExecutor:
                 return True
 
             self.running = False
+            if self._op_done_event is not None:
+                self._op_done_event.set()
             if self._current_op is not None:
                 self._current_op.stop()
                 self._current_op = None
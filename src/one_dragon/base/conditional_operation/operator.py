@@ -2,7 +2,7 @@ import time
 from abc import abstractmethod
 from concurrent.futures import Future, ThreadPoolExecutor
 from functools import cached_property
-from threading import Lock
+from threading import Condition, Lock
 from typing import Optional
 
 from one_dragon.base.conditional_operation.atomic_op import AtomicOp
@@ -22,6 +22,9 @@ from one_dragon.utils.log_utils import log
 # 当前运行的场景一个 打断的新场景一个 处理事件更新状态一个
 _od_conditional_op_executor = ThreadPoolExecutor(thread_name_prefix='od_conditional_op', max_workers=4)
 
+# 主循环单次等待的最长时间 兜底系统时间被调整等无法被唤醒的情况
+_NORMAL_SCENE_MAX_WAIT_SECONDS: float = 1
+
 
 class ConditionalOperator(ConditionalOperatorLoader):
 
@@ -55,6 +58,8 @@ class ConditionalOperator(ConditionalOperatorLoader):
         
         self._inited: bool = False
         self._task_lock: Lock = Lock()
+        # 主循环在这里等待 任务结束、状态更新、停止运行时唤醒 需要在 _task_lock 内使用
+        self._task_condition: Condition = Condition(self._task_lock)
 
     def init(self) -> None:
         """
@@ -127,56 +132,55 @@ class ConditionalOperator(ConditionalOperatorLoader):
     def _normal_scene_loop(self) -> None:
         """
         主循环
+        不会轮询 只在以下情况被唤醒后重新判断
+        - 其它场景的任务结束或被停止
+        - 场景的间隔时间已过
+        - 状态有更新 或 有时间限制的状态判断 结果到期
         :return:
         """
         normal_scene_id = id(self.normal_scene)
-        while self.is_running:
-            if self.running_executor_cnt.get() > 0:
-                # 有其它场景在运行 等待
-                time.sleep(0.02)
-                continue
-
-            # log.debug('开始等待新的主循环')
-            to_sleep: Optional[float] = None
-
-            # 上锁后确保运行状态不会被篡改
-            with self._task_lock:
-                if not self.is_running:
-                    # 已经被stop_running中断了 不继续
-                    break
+        # 上锁后确保运行状态不会被篡改 等待时会释放锁
+        with self._task_condition:
+            while self.is_running:
+                if self.running_executor_cnt.get() > 0:
+                    # 有其它场景在运行 等待任务结束
+                    self._task_condition.wait(_NORMAL_SCENE_MAX_WAIT_SECONDS)
+                    continue
 
                 trigger_time = time.time()
                 last_trigger_time = self.last_trigger_time.get(normal_scene_id, 0)
                 past_time = trigger_time - last_trigger_time
                 if past_time < self.normal_scene.interval_seconds:
-                    to_sleep = self.normal_scene.interval_seconds - past_time
-                else:
-                    new_execution_info = self.normal_scene.match_execution(trigger_time)
-                    if new_execution_info is not None:
-                        log.debug(f'当前场景 主循环 当前条件 {new_execution_info.expr_display}')
-                        new_execution_info.priority = self.normal_scene.priority
-                        self._emit_overlay_decision(
-                            trigger="主循环",
-                            expression=new_execution_info.expr_display,
-                            status="MATCHED",
-                            execution_info=new_execution_info,
-                        )
-
-                        self.current_execution_info = new_execution_info
-                        self.running_executor = OperationExecutor(
-                            op_list=new_execution_info.op_list,
-                            trigger_time=trigger_time,
-                        )
-                        self.last_trigger_time[normal_scene_id] = trigger_time
-                        self.running_executor_cnt.inc()
-                        future = self.running_executor.run_async()
-                        future.add_done_callback(self._on_task_done)
-
-            if to_sleep is not None:
-                # 等待时间不能写在锁里 要尽快释放锁
-                time.sleep(to_sleep)
-            else:  # 没有命中的状态 或者 提交执行了 那就自旋等待
-                time.sleep(0.02)
+                    self._task_condition.wait(min(self.normal_scene.interval_seconds - past_time,
+                                                  _NORMAL_SCENE_MAX_WAIT_SECONDS))
+                    continue
+
+                new_execution_info = self.normal_scene.match_execution(trigger_time)
+                if new_execution_info is None:
+                    # 没有命中的状态 等待状态更新 或 状态判断的结果到期
+                    to_wait = self.normal_scene.get_next_change_time() - time.time()
+                    if to_wait > 0:
+                        self._task_condition.wait(min(to_wait, _NORMAL_SCENE_MAX_WAIT_SECONDS))
+                    continue
+
+                log.debug(f'当前场景 主循环 当前条件 {new_execution_info.expr_display}')
+                new_execution_info.priority = self.normal_scene.priority
+                self._emit_overlay_decision(
+                    trigger="主循环",
+                    expression=new_execution_info.expr_display,
+                    status="MATCHED",
+                    execution_info=new_execution_info,
+                )
+
+                self.current_execution_info = new_execution_info
+                self.running_executor = OperationExecutor(
+                    op_list=new_execution_info.op_list,
+                    trigger_time=trigger_time,
+                )
+                self.last_trigger_time[normal_scene_id] = trigger_time
+                self.running_executor_cnt.inc()
+                future = self.running_executor.run_async()
+                future.add_done_callback(self._on_task_done)
 
     def _trigger_scene(self, state_name: str) -> None:
         """
@@ -249,6 +253,7 @@ class ConditionalOperator(ConditionalOperatorLoader):
         with self._task_lock:
             self.is_running = False
             self._stop_running_task()
+            self._task_condition.notify_all()
 
     def _stop_running_task(self) -> None:
         """
@@ -262,6 +267,7 @@ class ConditionalOperator(ConditionalOperatorLoader):
                 # 如果 finish=True 则计数器已经在 _on_task_done 减少了 这里就不减了
                 # 如果 finish=False 则代表还有操作在继续。在这里要减少计数器而不是等_on_task_done 让无触发器场景尽早运行
                 self.running_executor_cnt.dec()
+                self._task_condition.notify_all()
             self.running_executor = None
 
     def _on_task_done(self, future: Future) -> None:
@@ -273,6 +279,7 @@ class ConditionalOperator(ConditionalOperatorLoader):
                 result = future.result()
                 if result:  # 顺利执行完毕
                     self.running_executor_cnt.dec()
+                    self._task_condition.notify_all()
             except Exception:  # run_async里有callback打印日志
                 pass
 
@@ -292,6 +299,27 @@ class ConditionalOperator(ConditionalOperatorLoader):
                 states = states.union(scene.usage_states)
         return states
 
+    def _is_observed_by_normal_scene(self, state_records: list[StateRecord]) -> bool:
+        """
+        更新的状态 以及因互斥被清除的状态 是否有主场景用到的
+        Args:
+            state_records: 状态记录列表
+
+        Returns:
+            bool: 是否有主场景用到的状态
+        """
+        observed = self.normal_scene.usage_states
+        for state_record in state_records:
+            if state_record.state_name in observed:
+                return True
+            if state_record.is_clear:
+                continue
+            state_recorder = self.state_record_service.get_state_recorder(state_record.state_name)
+            if state_recorder is not None and state_recorder.mutex_list is not None:
+                if any(mutex_state in observed for mutex_state in state_recorder.mutex_list):
+                    return True
+        return False
+
     def batch_update_states(self, state_records: list[StateRecord]) -> None:
         """
         批量更新多个状态后的回调
@@ -305,6 +333,11 @@ class ConditionalOperator(ConditionalOperatorLoader):
         if not self.is_running:
             return
 
+        if self.normal_scene is not None and self._is_observed_by_normal_scene(state_records):
+            # 主场景用到的状态有更新 唤醒主循环重新判断
+            with self._task_lock:
+                self._task_condition.notify_all()
+
         top_priority_scene: Optional[Scene] = None
         top_priority_state: Optional[str] = None
 
@@ -346,7 +379,7 @@ class ConditionalOperator(ConditionalOperatorLoader):
                 if (self.running_executor is not None and self.running_executor.running
                         and self.current_execution_info.interrupt_cal_tree is not None):
                     now = time.time()
-                    if self.current_execution_info.interrupt_cal_tree.in_time_range(now):
+                    if self.current_execution_info.interrupt_cal_tree.evaluator.in_time_range(now):
                         interrupt = True
                         log.debug('复合中断条件满足，执行中断')
                 if interrupt:
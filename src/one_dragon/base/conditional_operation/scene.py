@@ -1,3 +1,4 @@
+import math
 from functools import cached_property
 from typing import Any, Callable
 
@@ -79,4 +80,13 @@ class Scene:
         for handler in self.handlers:
             info = handler.match_execution(trigger_time)
             if info is not None:
-                return info
\ No newline at end of file
+                return info
+
+    def get_next_change_time(self) -> float:
+        """
+        上一次 match_execution 没有匹配时 在状态记录不变化的前提下 匹配结果最早可能变化的时间
+
+        Returns:
+            最早可能变化的时间 不会变化时为 inf
+        """
+        return min((handler.get_next_change_time() for handler in self.handlers), default=math.inf)
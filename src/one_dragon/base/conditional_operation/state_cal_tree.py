@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+import math
 from enum import IntEnum
 from functools import cached_property
 from typing import Callable, Optional
 
-from one_dragon.base.conditional_operation.state_recorder import StateRecorder
+from one_dragon.base.conditional_operation.state_recorder import StateRecorder, StateRecord
 from one_dragon.utils.log_utils import log
 
 
+# 状态即将进入或离开时间区间时 提前这么多秒重新计算 避免浮点误差导致使用了过期的结果
+_ENTER_RANGE_EPS: float = 1e-6
+
+# 编译后的计算函数 输入当前时间 返回 (结果, 结果的有效期) 在有效期之前且依赖的状态没有变化时 结果不变
+CompiledStateCal = Callable[[float], tuple[bool, float]]
+
+
 class StateCalNodeType(IntEnum):
 
     OP = 0
@@ -102,6 +110,13 @@ class StateCalNode:
 
         return False
 
+    @cached_property
+    def evaluator(self) -> StateCalEvaluator:
+        """
+        编译后的计算器 结果与 in_time_range 一致 依赖的状态没有变化时复用上一次的结果
+        """
+        return StateCalEvaluator(self)
+
     @cached_property
     def usage_states(self) -> set[str]:
         """
@@ -131,6 +146,128 @@ class StateCalNode:
             self.state_recorder.dispose()
 
 
+class StateCalEvaluator:
+
+    def __init__(self, root: StateCalNode):
+        """
+        状态判断树编译成的计算器
+        - 树只在创建时遍历一次 编译成嵌套的函数 计算时不需要再判断节点类型和运算符
+        - 每个状态节点只在 [记录时间 + 区间最小值, 记录时间 + 区间最大值] 内有效 所以整棵树的结果只会在这些时间点变化
+          计算时同时得到结果的有效期 有效期内、且依赖的状态记录都没有变化 (StateRecorder.version) 时直接返回上一次的结果
+          主循环每 20ms 判断一次 大部分时候都不需要重新计算
+        :param root: 状态判断树的根节点
+        """
+        self.root: StateCalNode = root
+        self.recorder_list: list[StateRecorder] = []  # 依赖的状态记录器 不重复
+        self._func: CompiledStateCal = self._compile(root)
+        # 上一次的结果 (依赖的状态版本, 计算时间, 有效期, 结果) 整体赋值 多线程读写时不会拿到不一致的内容
+        self._cache: tuple[tuple[int, ...], float, float, bool] | None = None
+        self.cal_cnt: int = 0  # 实际计算的次数
+        self.hit_cnt: int = 0  # 复用结果的次数
+
+    def _compile(self, node: StateCalNode) -> CompiledStateCal:
+        """
+        把一个节点编译成计算函数
+        短路计算时 结果只取决于已经计算的子节点 有效期也只取这些子节点的
+        """
+        if node.node_type == StateCalNodeType.OP:
+            left = self._compile(node.left_child)
+            if node.op_type == StateCalOpType.NOT:
+                def cal_not(now: float) -> tuple[bool, float]:
+                    value, expire_time = left(now)
+                    return not value, expire_time
+                return cal_not
+
+            right = self._compile(node.right_child)
+            if node.op_type == StateCalOpType.AND:
+                def cal_and(now: float) -> tuple[bool, float]:
+                    left_value, left_expire_time = left(now)
+                    if not left_value:
+                        return False, left_expire_time
+                    right_value, right_expire_time = right(now)
+                    return right_value, min(left_expire_time, right_expire_time)
+                return cal_and
+            elif node.op_type == StateCalOpType.OR:
+                def cal_or(now: float) -> tuple[bool, float]:
+                    left_value, left_expire_time = left(now)
+                    if left_value:
+                        return True, left_expire_time
+                    right_value, right_expire_time = right(now)
+                    return right_value, min(left_expire_time, right_expire_time)
+                return cal_or
+        elif node.node_type == StateCalNodeType.STATE:
+            return self._compile_state(node)
+        elif node.node_type == StateCalNodeType.TRUE:
+            return lambda now: (True, math.inf)
+
+        return lambda now: (False, math.inf)
+
+    def _compile_state(self, node: StateCalNode) -> CompiledStateCal:
+        """
+        编译状态节点 判断逻辑与 StateCalNode.in_time_range 一致
+        """
+        recorder = node.state_recorder
+        if all(i is not recorder for i in self.recorder_list):
+            self.recorder_list.append(recorder)
+
+        time_min = node.state_time_range_min
+        time_max = node.state_time_range_max
+        check_value = node.state_value_range_min is not None and node.state_value_range_max is not None
+        value_min = node.state_value_range_min
+        value_max = node.state_value_range_max
+
+        def cal_state(now: float) -> tuple[bool, float]:
+            record_time = recorder.last_record_time
+            if check_value:
+                value = recorder.last_value
+                if value is None or not value_min <= value <= value_max:
+                    return False, math.inf  # 值只会随着状态记录变化
+
+            diff = now - record_time
+            if diff < time_min:
+                return False, record_time + time_min - _ENTER_RANGE_EPS
+            elif diff <= time_max:
+                return True, record_time + time_max - _ENTER_RANGE_EPS
+            else:
+                return False, math.inf
+
+        return cal_state
+
+    @property
+    def last_result(self) -> bool:
+        """
+        上一次计算的结果 未计算过时为 False
+        """
+        cache = self._cache
+        return cache is not None and cache[3]
+
+    @property
+    def expire_time(self) -> float:
+        """
+        上一次计算结果的有效期 在这之前只有状态记录变化时 结果才会变化
+        未计算过时为 0
+        """
+        cache = self._cache
+        return 0 if cache is None else cache[2]
+
+    def in_time_range(self, now: float) -> bool:
+        """
+        根据当前时间 判断是否在状态的生效时间范围内
+        :param now: 当前时间
+        :return:
+        """
+        version_list = tuple([i.version for i in self.recorder_list])
+        cache = self._cache
+        if cache is not None and cache[0] == version_list and cache[1] <= now < cache[2]:
+            self.hit_cnt += 1
+            return cache[3]
+
+        value, expire_time = self._func(now)
+        self._cache = (version_list, now, expire_time, value)
+        self.cal_cnt += 1
+        return value
+
+
 def construct_state_cal_tree(
     expr_str: str,
     state_getter: Callable[[str], StateRecorder],
@@ -278,3 +415,73 @@ def construct_state_cal_tree(
         raise ValueError('有多段表达式 未使用运算符连接')
     else:
         return node_stack[0]
+
+
+def __debug():
+    """
+    使用 config/auto_battle 下合并后的配置 对比逐层遍历和编译后计算的耗时
+    模拟主循环 每 20ms 判断一次全部状态树 期间随机更新状态
+    """
+    import os
+    import random
+    import time
+
+    from one_dragon.base.conditional_operation.loader import ConditionalOperatorLoader
+    from one_dragon.base.conditional_operation.state_handler import StateHandler
+    from one_dragon.utils import os_utils
+
+    def collect(handler: StateHandler, tree_list: list[StateCalNode]) -> None:
+        tree_list.append(handler.state_cal_tree)
+        if handler.interrupt_states_cal_tree is not None:
+            tree_list.append(handler.interrupt_states_cal_tree)
+        for sub_handler in handler.sub_handlers:
+            collect(sub_handler, tree_list)
+
+    config_dir = os_utils.get_path_under_work_dir('config', 'auto_battle')
+    for file_name in sorted(os.listdir(config_dir)):
+        if not file_name.endswith('.merged.yml'):
+            continue
+        loader = ConditionalOperatorLoader(
+            sub_dir=['auto_battle'],
+            template_name=file_name[:-len('.merged.yml')],
+            operation_template_sub_dir=['auto_battle_operation'],
+            state_handler_template_sub_dir=['auto_battle_state_handler'],
+            read_from_merged=True,
+        )
+        loader.load()
+
+        recorder_map: dict[str, StateRecorder] = {}
+        tree_list: list[StateCalNode] = []
+        for scene in loader.scenes:
+            for handler in scene.handlers:
+                handler.build(lambda name: recorder_map.setdefault(name, StateRecorder(name)), lambda op: None)
+                collect(handler, tree_list)
+
+        rng = random.Random(0)
+        recorder_list = list(recorder_map.values())
+        tree_cost = evaluator_cost = 0
+        now = 1000.0
+        for _ in range(5000):
+            now += 0.02
+            for recorder in rng.sample(recorder_list, k=min(2, len(recorder_list))):
+                if rng.random() < 0.5:
+                    recorder.update_state_record(StateRecord(recorder.state_name, now, value=rng.randint(0, 3)))
+
+            t1 = time.perf_counter()
+            expected = [tree.in_time_range(now) for tree in tree_list]
+            t2 = time.perf_counter()
+            actual = [tree.evaluator.in_time_range(now) for tree in tree_list]
+            t3 = time.perf_counter()
+            assert expected == actual
+            tree_cost += t2 - t1
+            evaluator_cost += t3 - t2
+
+        hit_cnt = sum(tree.evaluator.hit_cnt for tree in tree_list)
+        cal_cnt = sum(tree.evaluator.cal_cnt for tree in tree_list)
+        print('%s 状态树 %d 状态 %d 遍历 %.2fms 编译 %.2fms 复用 %.1f%%' % (
+            loader.get_template_name(), len(tree_list), len(recorder_list),
+            tree_cost * 1000, evaluator_cost * 1000, hit_cnt * 100.0 / (hit_cnt + cal_cnt)))
+
+
+if __name__ == '__main__':
+    __debug()
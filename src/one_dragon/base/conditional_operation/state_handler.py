@@ -154,7 +154,7 @@ class StateHandler:
         Returns:
             符合条件的场景下的执行信息
         """
-        if self.state_cal_tree.in_time_range(trigger_time):
+        if self.state_cal_tree.evaluator.in_time_range(trigger_time):
             if self.sub_handlers is not None and len(self.sub_handlers) > 0:
                 for sub_handler in self.sub_handlers:
                     info = sub_handler.match_execution(trigger_time)
@@ -167,3 +167,18 @@ class StateHandler:
                 return info
 
         return None
+
+    def get_next_change_time(self) -> float:
+        """
+        上一次 match_execution 没有匹配时 在状态记录不变化的前提下 匹配结果最早可能变化的时间
+        即本次计算过的状态判断中 最早的有效期
+
+        Returns:
+            最早可能变化的时间 不会变化时为 inf
+        """
+        evaluator = self.state_cal_tree.evaluator
+        next_change_time = evaluator.expire_time
+        if evaluator.last_result and self.sub_handlers is not None:
+            for sub_handler in self.sub_handlers:
+                next_change_time = min(next_change_time, sub_handler.get_next_change_time())
+        return next_change_time
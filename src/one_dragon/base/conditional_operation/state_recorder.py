@@ -31,6 +31,7 @@ class StateRecorder:
 
         self.last_record_time: float = -1  # 上次记录这个状态的时间 -1代表还没有触发过 0代表被清除
         self.last_value: Optional[int] = None  # 上一次记录的值
+        self.version: int = 0  # 每次记录变化都会增加 用于判断依赖这个状态的计算结果是否需要重新计算
 
     def update_state_record(self, record: StateRecord) -> None:
         """
@@ -54,6 +55,8 @@ class StateRecorder:
         if record.value_add is not None:
             self.last_value += record.value_add
 
+        self.version += 1
+
     def clear_state_record(self) -> None:
         """
         互斥事件发生时 清空
@@ -63,6 +66,7 @@ class StateRecorder:
             return
         self.last_record_time = 0
         self.last_value = None
+        self.version += 1
 
     def reset_to_initial(self) -> None:
         """
@@ -70,6 +74,7 @@ class StateRecorder:
         """
         self.last_record_time = -1
         self.last_value = None
+        self.version += 1
 
     def dispose(self) -> None:
         """
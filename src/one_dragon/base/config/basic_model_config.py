@@ -26,6 +26,28 @@ class BasicModelConfig(YamlConfig):
     def ocr_gpu(self, new_value: bool) -> None:
         self.update('ocr_gpu', new_value)
 
+    @property
+    def onnx_intra_op_num_threads(self) -> int:
+        """
+        模型推理时单个算子内的并行线程数 0为使用onnxruntime默认值
+        """
+        return self.get('onnx_intra_op_num_threads', 0)
+
+    @onnx_intra_op_num_threads.setter
+    def onnx_intra_op_num_threads(self, new_value: int) -> None:
+        self.update('onnx_intra_op_num_threads', new_value)
+
+    @property
+    def onnx_cache_optimized_model(self) -> bool:
+        """
+        是否保存图优化后的模型 下次直接加载 仅CPU下生效
+        """
+        return self.get('onnx_cache_optimized_model', False)
+
+    @onnx_cache_optimized_model.setter
+    def onnx_cache_optimized_model(self, new_value: bool) -> None:
+        self.update('onnx_cache_optimized_model', new_value)
+
     def using_old_model(self) -> bool:
         """
         是否在使用旧模型
@@ -2,6 +2,8 @@ import time
 
 from cv2.typing import MatLike
 
+from one_dragon.base.controller.screenshot_recorder import ScreenshotRecorder
+from one_dragon.base.controller.screenshot_ring_buffer import ScreenshotRingBuffer
 from one_dragon.base.geometry.point import Point
 
 
@@ -19,10 +21,63 @@ class ControllerBase:
                  max_screenshot_cnt: int = 0):
         """
         基础控制器的定义
+        :param screenshot_alive_seconds: 截图在内存的存活时间
+        :param max_screenshot_cnt: 内存中最多保持的截图数量 每张截图都需要复制一次 默认0不保存 需要使用截图历史时再开启
         """
-        self.screenshot_history: list[ScreenshotWithTime] = []
+        self.screenshot_ring: ScreenshotRingBuffer = ScreenshotRingBuffer(max_screenshot_cnt)  # 内存中的截图历史
         self.screenshot_alive_seconds: float = screenshot_alive_seconds  # 截图在内存的存活时间
-        self.max_screenshot_cnt: int = max_screenshot_cnt  # 内存中最多保持的截图数量
+        self.screenshot_recorder: ScreenshotRecorder | None = None  # 录制截图 用于之后回放
+
+    @property
+    def max_screenshot_cnt(self) -> int:
+        """
+        内存中最多保持的截图数量
+        """
+        return self.screenshot_ring.capacity
+
+    @max_screenshot_cnt.setter
+    def max_screenshot_cnt(self, value: int) -> None:
+        self.screenshot_ring.set_capacity(value)
+
+    @property
+    def screenshot_history(self) -> list[ScreenshotWithTime]:
+        """
+        内存中的截图 按时间从旧到新排列
+        截图是只读视图 之后的截图会覆盖其内容 需要长期保存时自行复制
+        """
+        return [ScreenshotWithTime(image, create_time) for create_time, image in self.screenshot_ring.get_all()]
+
+    def get_screenshot_by_time(self, target_time: float) -> ScreenshotWithTime | None:
+        """
+        获取内存中某个时间点时的截图 即不晚于该时间的最新截图
+        :param target_time: 时间
+        :return: 截图 是只读视图
+        """
+        item = self.screenshot_ring.get_by_time(target_time)
+        if item is None:
+            return None
+        return ScreenshotWithTime(item[1], item[0])
+
+    def start_recording(self, save_dir: str, video: bool = False) -> None:
+        """
+        开始录制截图 录制的目录可以使用 ReplayController 回放
+        :param save_dir: 保存的目录
+        :param video: 是否保存为视频
+        """
+        self.stop_recording()
+        recorder = ScreenshotRecorder(save_dir, video=video)
+        recorder.start()
+        self.screenshot_recorder = recorder
+
+    def stop_recording(self) -> None:
+        """
+        停止录制截图
+        """
+        recorder = self.screenshot_recorder
+        if recorder is None:
+            return
+        self.screenshot_recorder = None
+        recorder.stop()
 
     def init_before_context_run(self) -> bool:
         """
@@ -35,7 +90,7 @@ class ControllerBase:
         """
         清理资源
         """
-        pass
+        self.stop_recording()
 
     @property
     def is_game_window_ready(self) -> bool:
@@ -67,14 +122,13 @@ class ControllerBase:
             return screenshot_time, None
         fix_screen = self.fill_uid_black(screen)
 
-        if self.max_screenshot_cnt > 0:
-            self.screenshot_history.append(ScreenshotWithTime(fix_screen, screenshot_time))
-            while len(self.screenshot_history) > self.max_screenshot_cnt:
-                self.screenshot_history.pop(0)
+        if self.screenshot_ring.capacity > 0:
+            self.screenshot_ring.push(fix_screen, screenshot_time)
+            self.screenshot_ring.expire(screenshot_time - self.screenshot_alive_seconds)
 
-            while (len(self.screenshot_history) > 0
-                and screenshot_time - self.screenshot_history[0].create_time > self.screenshot_alive_seconds):
-                self.screenshot_history.pop(0)
+        recorder = self.screenshot_recorder
+        if recorder is not None:
+            recorder.record(fix_screen, screenshot_time)
 
         return screenshot_time, fix_screen
 
@@ -88,13 +142,14 @@ class ControllerBase:
         """
         截图 如果分辨率和默认不一样则进行缩放
         由子类实现 做具体的截图
-        :return: 缩放到默认分辨率的截图
+        :return: 缩放到默认分辨率的截图 每次都需要是新的图片 之后会直接在上面遮挡UID
         """
         pass
 
     def fill_uid_black(self, screen: MatLike) -> MatLike:
         """
         遮挡UID 由子类实现
+        截图是每次新生成的 可以直接在原图上修改
         """
         return screen
 
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import bisect
+import csv
+import os
+import re
+import threading
+import time
+from typing import TYPE_CHECKING
+
+import cv2
+from cv2.typing import MatLike
+
+from one_dragon.base.controller.pc_screenshot.screencapper_base import ScreencapperBase
+from one_dragon.base.geometry.rectangle import Rect
+from one_dragon.utils import cv2_utils
+from one_dragon.utils.log_utils import log
+
+if TYPE_CHECKING:
+    from one_dragon.base.controller.pc_game_window import PcGameWindow
+
+REPLAY_INDEX_FILE_NAME: str = 'frames.csv'  # 录制时保存每帧时间的文件
+REPLAY_VIDEO_FILE_NAME: str = 'frames.mp4'  # 录制成视频时的文件名
+_IMAGE_SUFFIX: tuple[str, ...] = ('.png', '.jpg', '.jpeg', '.webp', '.bmp')
+_VIDEO_SUFFIX: tuple[str, ...] = ('.mp4', '.avi', '.mkv', '.mov')
+
+
+class ReplayFrameSource:
+
+    def __init__(self, source_path: str):
+        """
+        回放用的帧来源 支持图片目录和视频文件
+        - 图片目录 有 frames.csv 时按里面的顺序和时间 否则文件名都是数字时按数字作为时间排序 不是时按自然排序和 30fps 计算时间
+        - 视频文件 同名的 csv 或同目录的 frames.csv 存在时使用里面的时间 否则按视频帧率计算
+        图片按需读取 视频按顺序解码 不会一次加载所有帧到内存
+        :param source_path: 图片目录 或 视频文件路径 或 包含 frames.mp4 的录制目录
+        """
+        self.source_path: str = source_path
+        self.image_path_list: list[str] = []  # 图片目录时 每帧的图片路径
+        self.video_path: str | None = None  # 视频时 视频路径
+        self.time_list: list[float] = []  # 每帧的时间 秒 从小到大
+
+        self._video: cv2.VideoCapture | None = None
+        self._video_next_idx: int = 0  # 视频下一次 grab 得到的帧下标
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.time_list)
+
+    def open(self) -> bool:
+        """
+        读取帧列表
+        :return: 是否有可以回放的帧
+        """
+        self.close()
+        self.image_path_list = []
+        self.video_path = None
+        self.time_list = []
+
+        if os.path.isdir(self.source_path):
+            video_path = os.path.join(self.source_path, REPLAY_VIDEO_FILE_NAME)
+            if os.path.exists(video_path):
+                self._open_video(video_path, os.path.join(self.source_path, REPLAY_INDEX_FILE_NAME))
+            else:
+                self._open_image_dir(self.source_path)
+        elif os.path.isfile(self.source_path) and self.source_path.lower().endswith(_VIDEO_SUFFIX):
+            self._open_video(self.source_path, os.path.splitext(self.source_path)[0] + '.csv')
+        else:
+            log.error('回放来源不存在或不支持 %s', self.source_path)
+
+        return self.frame_count > 0
+
+    def _open_image_dir(self, dir_path: str) -> None:
+        index_path = os.path.join(dir_path, REPLAY_INDEX_FILE_NAME)
+        if os.path.exists(index_path):
+            for file_name, frame_time in _read_index(index_path):
+                self.image_path_list.append(os.path.join(dir_path, file_name))
+                self.time_list.append(frame_time)
+            return
+
+        file_name_list = [i for i in os.listdir(dir_path) if i.lower().endswith(_IMAGE_SUFFIX)]
+        time_list = [_parse_time_from_file_name(i) for i in file_name_list]
+        if any(i is None for i in time_list):  # 按文件名中的数字大小排序 时间按 30fps 计算
+            file_name_list.sort(key=lambda i: (_natural_sort_key(i), i))
+            time_list = [idx / 30.0 for idx in range(len(file_name_list))]
+        else:  # 文件名都是时间 按时间排序
+            order = sorted(range(len(file_name_list)), key=lambda idx: (time_list[idx], file_name_list[idx]))
+            file_name_list = [file_name_list[idx] for idx in order]
+            time_list = [time_list[idx] for idx in order]
+        self.image_path_list = [os.path.join(dir_path, i) for i in file_name_list]
+        self.time_list = time_list
+
+    def _open_video(self, video_path: str, index_path: str) -> None:
+        video = cv2.VideoCapture(video_path)
+        if not video.isOpened():
+            log.error('无法打开回放视频 %s', video_path)
+            return
+        self.video_path = video_path
+        self._video = video
+        self._video_next_idx = 0
+
+        if os.path.exists(index_path):
+            self.time_list = [frame_time for _, frame_time in _read_index(index_path)]
+        else:
+            fps = video.get(cv2.CAP_PROP_FPS)
+            fps = fps if fps > 0 else 30.0
+            frame_count = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+            self.time_list = [idx / fps for idx in range(frame_count)]
+
+    def read(self, idx: int) -> MatLike | None:
+        """
+        读取一帧
+        :param idx: 帧下标
+        :return: RGB图片
+        """
+        if idx < 0 or idx >= self.frame_count:
+            return None
+        if self.video_path is None:
+            return cv2_utils.read_image(self.image_path_list[idx])
+
+        if self._video is None or idx < self._video_next_idx:  # 视频只能往后读 需要重新打开
+            if self._video is not None:
+                self._video.release()
+            self._video = cv2.VideoCapture(self.video_path)
+            self._video_next_idx = 0
+
+        while self._video_next_idx < idx:  # 跳过的帧不解码
+            if not self._video.grab():
+                return None
+            self._video_next_idx += 1
+
+        ok, frame = self._video.read()
+        if not ok:
+            return None
+        self._video_next_idx += 1
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    def close(self) -> None:
+        if self._video is not None:
+            self._video.release()
+            self._video = None
+
+
+class ReplayScreencapper(ScreencapperBase):
+
+    def __init__(self, game_win: PcGameWindow | None, standard_width: int, standard_height: int,
+                 source_path: str, realtime: bool = True, speed: float = 1.0, loop: bool = False):
+        """
+        回放录制好的截图 不需要游戏窗口 用于在没有游戏的环境下测试识别的耗时和吞吐量
+        :param game_win: 游戏窗口 回放时不使用 可以为None
+        :param standard_width: 标准宽度 尺寸不同的帧会缩放
+        :param standard_height: 标准高度
+        :param source_path: 回放来源 见 ReplayFrameSource
+        :param realtime: True 时按录制时的时间回放 识别太慢时会跳帧 False 时每次截图返回下一帧
+        :param speed: 按时间回放时的速度倍率
+        :param loop: 回放结束后是否从头开始 否则一直返回最后一帧
+        """
+        ScreencapperBase.__init__(self, game_win, standard_width, standard_height)
+        self.source: ReplayFrameSource = ReplayFrameSource(source_path)
+        self.realtime: bool = realtime
+        self.speed: float = speed
+        self.loop: bool = loop
+
+        self.frame_idx: int = -1  # 上一次截图返回的帧下标
+        self.finished: bool = False  # 是否已经回放结束
+        self.capture_cnt: int = 0  # 截图次数
+        self.skip_cnt: int = 0  # 按时间回放时跳过的帧数
+
+        self._start_time: float | None = None  # 开始回放的时间
+        self._frame: MatLike | None = None  # 当前帧
+        self._lock = threading.Lock()
+
+    def init(self) -> bool:
+        with self._lock:
+            self.reset()
+            return self.source.open()
+
+    def reset(self) -> None:
+        """
+        从头开始回放
+        """
+        self.frame_idx = -1
+        self.finished = False
+        self.capture_cnt = 0
+        self.skip_cnt = 0
+        self._start_time = None
+        self._frame = None
+
+    @property
+    def frame_time(self) -> float | None:
+        """
+        当前帧录制时的时间
+        """
+        if 0 <= self.frame_idx < self.source.frame_count:
+            return self.source.time_list[self.frame_idx]
+        return None
+
+    def capture(self, rect: Rect | None = None, independent: bool = False) -> MatLike | None:
+        with self._lock:
+            if self.source.frame_count == 0:
+                return None
+
+            next_idx = self._get_next_idx()
+            if next_idx != self.frame_idx or self._frame is None:
+                if self.frame_idx >= 0 and next_idx > self.frame_idx + 1:
+                    self.skip_cnt += next_idx - self.frame_idx - 1
+                frame = self.source.read(next_idx)
+                if frame is None:
+                    return None
+                if frame.shape[1] != self.standard_width or frame.shape[0] != self.standard_height:
+                    frame = cv2.resize(frame, (self.standard_width, self.standard_height))
+                self.frame_idx = next_idx
+                self._frame = frame
+
+            self.capture_cnt += 1
+            # 截图之后会被直接修改 每次都返回新的图片
+            return self._frame.copy()
+
+    def _get_next_idx(self) -> int:
+        """
+        本次截图应该返回的帧下标
+        """
+        frame_count = self.source.frame_count
+        if not self.realtime:
+            next_idx = self.frame_idx + 1
+            if next_idx >= frame_count:
+                if self.loop:
+                    return 0
+                self.finished = True
+                return frame_count - 1
+            if next_idx == frame_count - 1 and not self.loop:  # 已经是最后一帧
+                self.finished = True
+            return next_idx
+
+        now = time.perf_counter()
+        if self._start_time is None:
+            self._start_time = now
+        time_list = self.source.time_list
+        target_time = time_list[0] + (now - self._start_time) * self.speed
+        if target_time > time_list[-1]:
+            if self.loop:
+                self._start_time = now
+                return 0
+            self.finished = True
+            return frame_count - 1
+        return max(bisect.bisect_right(time_list, target_time) - 1, 0)
+
+    def cleanup(self):
+        with self._lock:
+            self.source.close()
+            self._frame = None
+
+
+def _read_index(index_path: str) -> list[tuple[str, float]]:
+    """
+    读取录制时保存的每帧时间
+    :return: (文件名, 时间)
+    """
+    result = []
+    with open(index_path, 'r', encoding='utf-8', newline='') as file:
+        for row in csv.reader(file):
+            if len(row) < 2:
+                continue
+            try:
+                result.append((row[0], float(row[1])))
+            except ValueError:  # 表头
+                continue
+    return result
+
+
+def _natural_sort_key(file_name: str) -> list[tuple[int, int | str]]:
+    """
+    自然排序的key 文件名中的数字按大小比较 例如 frame_2.png 在 frame_10.png 之前
+    """
+    return [(0, int(part)) if part.isdigit() else (1, part) for part in re.split(r'(\d+)', file_name)]
+
+
+def _parse_time_from_file_name(file_name: str) -> float | None:
+    """
+    从文件名中解析时间 例如 1700000000.123.png
+    """
+    try:
+        return float(os.path.splitext(file_name)[0])
+    except ValueError:
+        return None
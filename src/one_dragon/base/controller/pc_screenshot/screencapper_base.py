@@ -1,10 +1,16 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
 
 from cv2.typing import MatLike
 
-from one_dragon.base.controller.pc_game_window import PcGameWindow
 from one_dragon.base.geometry.rectangle import Rect
 
+if TYPE_CHECKING:
+    # 窗口相关的依赖只在Windows下可用 回放截图时不需要
+    from one_dragon.base.controller.pc_game_window import PcGameWindow
+
 
 class ScreencapperBase(ABC):
     """截图方法的抽象基类"""
@@ -0,0 +1,170 @@
+import threading
+import time
+
+from cv2.typing import MatLike
+
+from one_dragon.base.controller.controller_base import ControllerBase
+from one_dragon.base.controller.pc_screenshot.replay_screencapper import ReplayScreencapper
+from one_dragon.base.geometry.point import Point
+
+
+class ReplayAction:
+
+    def __init__(self, controller: 'ReplayController', name: str):
+        """
+        回放时的游戏操作 只记录不执行
+        支持链式访问 例如 controller.btn_controller.tap('a')
+        """
+        self._controller: ReplayController = controller
+        self._name: str = name
+
+    def __call__(self, *args, **kwargs):
+        self._controller.record_action(self._name)
+        return None
+
+    def __getattr__(self, item: str) -> 'ReplayAction':
+        if item.startswith('_'):
+            raise AttributeError(item)
+        return ReplayAction(self._controller, f'{self._name}.{item}')
+
+
+# 回放时只记录的游戏操作 其它不存在的属性照常报错 避免把拼写错误或属性读取当成操作
+REPLAY_ACTION_NAME_SET: frozenset[str] = frozenset([
+    # 战斗
+    'dodge', 'switch_next', 'switch_prev', 'normal_attack', 'special_attack', 'ultimate',
+    'chain_left', 'chain_right', 'chain_cancel', 'lock', 'interact',
+    # 移动和视角
+    'move_w', 'move_s', 'move_a', 'move_d', 'start_moving_forward', 'stop_moving_forward',
+    'turn_by_distance', 'turn_vertical_by_distance', 'turn_by_angle_diff', 'mouse_move', 'move_mouse_relative',
+    # 按键
+    'btn_tap', 'btn_press', 'btn_release', 'btn_controller', 'keyboard_controller',
+    # 窗口和输入方式
+    'active_window', 'enable_keyboard', 'enable_xbox', 'enable_ds4',
+])
+
+
+class ReplayController(ControllerBase):
+
+    def __init__(self, source_path: str,
+                 standard_width: int = 1920,
+                 standard_height: int = 1080,
+                 realtime: bool = True,
+                 speed: float = 1.0,
+                 loop: bool = False):
+        """
+        回放录制好的截图的控制器 不需要游戏窗口
+        点击、按键等操作只记录次数 用于在没有游戏的环境下对识别流程进行端到端的耗时和吞吐量测试
+        :param source_path: 回放来源 见 ReplayFrameSource
+        :param standard_width: 标准宽度
+        :param standard_height: 标准高度
+        :param realtime: True 时按录制时的时间回放 False 时每次截图返回下一帧
+        :param speed: 按时间回放时的速度倍率
+        :param loop: 回放结束后是否从头开始
+        """
+        ControllerBase.__init__(self)
+        self.standard_width: int = standard_width
+        self.standard_height: int = standard_height
+        self.game_win = None
+
+        self.screencapper: ReplayScreencapper = ReplayScreencapper(
+            None, standard_width, standard_height,
+            source_path=source_path, realtime=realtime, speed=speed, loop=loop,
+        )
+
+        self._action_lock = threading.Lock()
+        self.action_cnt: dict[str, int] = {}  # 每种操作的次数
+        self.action_history: list[tuple[float, str]] = []  # 操作记录 (时间, 操作)
+
+    def __getattr__(self, item: str) -> ReplayAction:
+        """
+        游戏特有的操作 例如闪避、切人 都只记录 不在 REPLAY_ACTION_NAME_SET 中的属性不存在
+        """
+        if item not in REPLAY_ACTION_NAME_SET:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{item}'")
+        return ReplayAction(self, item)
+
+    def record_action(self, name: str) -> None:
+        """
+        记录一次操作
+        :param name: 操作名称
+        """
+        with self._action_lock:
+            self.action_cnt[name] = self.action_cnt.get(name, 0) + 1
+            self.action_history.append((time.time(), name))
+
+    def init_before_context_run(self) -> bool:
+        return self.screencapper.init()
+
+    def cleanup_after_app_shutdown(self) -> None:
+        ControllerBase.cleanup_after_app_shutdown(self)
+        self.screencapper.cleanup()
+
+    @property
+    def is_game_window_ready(self) -> bool:
+        return True
+
+    @property
+    def finished(self) -> bool:
+        """
+        是否已经回放结束
+        """
+        return self.screencapper.finished
+
+    def get_screenshot(self, independent: bool = False) -> MatLike | None:
+        return self.screencapper.capture(None, independent)
+
+    def click(self, pos: Point = None, press_time: float = 0, pc_alt: bool = False, gamepad_key: str | None = None) -> bool:
+        self.record_action('click')
+        return True
+
+    def scroll(self, down: int, pos: Point = None):
+        self.record_action('scroll')
+
+    def drag_to(self, end: Point, start: Point = None, duration: float = 0.5):
+        self.record_action('drag_to')
+
+    def close_game(self):
+        self.record_action('close_game')
+
+    def input_str(self, to_input: str, interval: float = 0.1):
+        self.record_action('input_str')
+
+    def delete_all_input(self):
+        self.record_action('delete_all_input')
+
+    def get_stats(self) -> dict:
+        """
+        :return: 回放统计
+        """
+        with self._action_lock:
+            action_cnt = dict(self.action_cnt)
+        return {
+            'frame_count': self.screencapper.source.frame_count,
+            'frame_idx': self.screencapper.frame_idx,
+            'capture_cnt': self.screencapper.capture_cnt,
+            'skip_cnt': self.screencapper.skip_cnt,
+            'finished': self.screencapper.finished,
+            'action_cnt': action_cnt,
+        }
+
+
+def __debug(source_path: str):
+    """
+    测试回放的截图吞吐量
+    """
+    controller = ReplayController(source_path, realtime=False)
+    if not controller.init_before_context_run():
+        print('无法加载回放来源')
+        return
+    start_time = time.perf_counter()
+    while not controller.finished:
+        controller.screenshot()
+    elapsed = time.perf_counter() - start_time
+    stats = controller.get_stats()
+    print(f'{stats["capture_cnt"]} 帧 耗时 {elapsed:.2f}s 平均 {stats["capture_cnt"] / max(elapsed, 1e-6):.1f} fps')
+    controller.cleanup_after_app_shutdown()
+
+
+if __name__ == '__main__':
+    import sys
+    __debug(sys.argv[1])
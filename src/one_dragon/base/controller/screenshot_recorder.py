@@ -0,0 +1,129 @@
+import csv
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+from cv2.typing import MatLike
+
+from one_dragon.base.controller.pc_screenshot.replay_screencapper import (
+    REPLAY_INDEX_FILE_NAME,
+    REPLAY_VIDEO_FILE_NAME,
+)
+from one_dragon.utils import cv2_utils
+from one_dragon.utils.log_utils import log
+
+_screenshot_recorder_executor = ThreadPoolExecutor(thread_name_prefix='od_screenshot_recorder', max_workers=1)
+
+
+class ScreenshotRecorder:
+
+    def __init__(self, save_dir: str, video: bool = False, fps: float = 30, max_pending: int = 30):
+        """
+        录制截图 保存的目录可以直接用 ReplayScreencapper 回放
+        - 图片模式 每帧保存为png 文件名为序号
+        - 视频模式 保存为 frames.mp4 有损压缩 但占用空间小很多
+        两种模式都会在 frames.csv 中记录每帧的截图时间
+        写文件在后台线程进行 积压太多时丢弃新的帧
+        :param save_dir: 保存的目录
+        :param video: 是否保存为视频
+        :param fps: 视频的帧率 只影响播放器 回放时使用 frames.csv 中的时间
+        :param max_pending: 最多积压的帧数
+        """
+        self.save_dir: str = save_dir
+        self.video: bool = video
+        self.fps: float = fps
+        self.max_pending: int = max_pending
+
+        self.record_cnt: int = 0  # 已提交的帧数
+        self.drop_cnt: int = 0  # 积压太多丢弃的帧数
+
+        self._lock = threading.Lock()
+        self._pending: int = 0
+        self._running: bool = False
+        self._index_file = None
+        self._index_writer = None
+        self._video_writer: cv2.VideoWriter | None = None
+
+    def start(self) -> None:
+        """
+        开始录制
+        """
+        with self._lock:
+            if self._running:
+                return
+            os.makedirs(self.save_dir, exist_ok=True)
+            self._index_file = open(os.path.join(self.save_dir, REPLAY_INDEX_FILE_NAME), 'w', encoding='utf-8', newline='')
+            self._index_writer = csv.writer(self._index_file)
+            self._index_writer.writerow(['file', 'time'])
+            self.record_cnt = 0
+            self.drop_cnt = 0
+            self._running = True
+        log.info('开始录制截图 %s', self.save_dir)
+
+    def record(self, image: MatLike, create_time: float) -> None:
+        """
+        录制一帧 截图会先复制一份再交给后台线程写入 之后调用方可以继续修改或复用原截图
+        :param image: RGB截图
+        :param create_time: 截图时间
+        """
+        with self._lock:
+            if not self._running:
+                return
+            if self._pending >= self.max_pending:
+                self.drop_cnt += 1
+                return
+            self._pending += 1
+            idx = self.record_cnt
+            self.record_cnt += 1
+        # 截图可能是截图历史中会被覆盖的视图 或者之后会被原地修改
+        _screenshot_recorder_executor.submit(self._write, idx, image.copy(), create_time)
+
+    def _write(self, idx: int, image: MatLike, create_time: float) -> None:
+        """
+        写入一帧 只在后台的单个线程中运行 写文件时不需要持有锁
+        """
+        try:
+            if self.video:
+                if self._video_writer is None:
+                    self._video_writer = cv2.VideoWriter(
+                        os.path.join(self.save_dir, REPLAY_VIDEO_FILE_NAME),
+                        cv2.VideoWriter_fourcc(*'mp4v'),
+                        self.fps,
+                        (image.shape[1], image.shape[0]),
+                    )
+                self._video_writer.write(cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+                file_name = str(idx)
+            else:
+                file_name = f'{idx:06d}.png'
+                cv2_utils.save_image(image, os.path.join(self.save_dir, file_name))
+            self._index_writer.writerow([file_name, f'{create_time:.6f}'])
+        except Exception:
+            log.error('录制截图失败', exc_info=True)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stop(self) -> None:
+        """
+        停止录制 等待已提交的帧写入完成
+        """
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+
+        _screenshot_recorder_executor.submit(self._close).result()
+        log.info('结束录制截图 %s 共 %d 帧 丢弃 %d 帧', self.save_dir, self.record_cnt, self.drop_cnt)
+
+    def _close(self) -> None:
+        """
+        关闭文件 在后台线程中运行 保证在所有帧写入之后
+        """
+        if self._video_writer is not None:
+            self._video_writer.release()
+            self._video_writer = None
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+            self._index_writer = None
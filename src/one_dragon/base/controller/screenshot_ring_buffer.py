@@ -0,0 +1,160 @@
+import bisect
+import threading
+
+import numpy as np
+from cv2.typing import MatLike
+
+
+class ScreenshotRingBuffer:
+
+    def __init__(self, capacity: int = 0):
+        """
+        固定容量的截图历史
+        每个位置预先分配好图片内存 新截图复制到最旧的位置中 不会反复申请整张截图大小的内存
+        取出的截图是只读视图 位置被新截图覆盖后内容会改变 需要长期保存时自行复制
+        :param capacity: 最多保存的截图数量 0为不保存
+        """
+        self._lock = threading.Lock()
+        self._capacity: int = 0
+        self._slot_list: list[np.ndarray | None] = []
+        self._time_list: list[float] = []  # 每个位置的截图时间
+        self._start: int = 0  # 最旧截图的位置
+        self._size: int = 0  # 当前保存的截图数量
+        self.set_capacity(capacity)
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def set_capacity(self, capacity: int) -> None:
+        """
+        修改容量 保留最新的截图 已分配的内存尽量复用
+        :param capacity: 最多保存的截图数量 0为不保存并释放内存
+        """
+        capacity = max(capacity, 0)
+        with self._lock:
+            if capacity == self._capacity:
+                return
+            order = [(self._start + i) % self._capacity for i in range(self._size)] if self._capacity > 0 else []
+            keep = order[max(len(order) - capacity, 0):]
+            slot_list = [self._slot_list[i] for i in keep]
+            time_list = [self._time_list[i] for i in keep]
+
+            if capacity > 0:
+                # 被丢弃的位置的内存 留给之后的截图使用
+                spare_list = [self._slot_list[i] for i in range(self._capacity) if i not in keep]
+                spare_list = spare_list[:capacity - len(slot_list)]
+                self._size = len(slot_list)
+                slot_list.extend(spare_list)
+                slot_list.extend([None] * (capacity - len(slot_list)))
+                time_list.extend([0.0] * (capacity - len(time_list)))
+            else:
+                self._size = 0
+                slot_list = []
+                time_list = []
+
+            self._capacity = capacity
+            self._slot_list = slot_list
+            self._time_list = time_list
+            self._start = 0
+
+    def push(self, image: MatLike, create_time: float) -> MatLike | None:
+        """
+        保存一张截图 容量已满时覆盖最旧的
+        :param image: 截图
+        :param create_time: 截图时间 需要不早于已保存的截图
+        :return: 保存后的只读视图 容量为0时返回None
+        """
+        with self._lock:
+            if self._capacity == 0:
+                return None
+            if self._size < self._capacity:
+                idx = (self._start + self._size) % self._capacity
+                self._size += 1
+            else:
+                idx = self._start
+                self._start = (self._start + 1) % self._capacity
+
+            slot = self._slot_list[idx]
+            if slot is None or slot.shape != image.shape or slot.dtype != image.dtype:
+                slot = np.empty_like(image)
+                self._slot_list[idx] = slot
+            np.copyto(slot, image)
+            self._time_list[idx] = create_time
+            return _read_only(slot)
+
+    def expire(self, before_time: float) -> None:
+        """
+        丢弃早于某个时间的截图 内存保留给之后使用
+        :param before_time: 截图时间早于这个时间的会被丢弃
+        """
+        with self._lock:
+            while self._size > 0 and self._time_list[self._start] < before_time:
+                self._start = (self._start + 1) % self._capacity
+                self._size -= 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._start = 0
+            self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get_all(self) -> list[tuple[float, MatLike]]:
+        """
+        :return: 所有截图 按时间从旧到新排列 (截图时间, 截图)
+        """
+        with self._lock:
+            return [(self._time_list[i], _read_only(self._slot_list[i])) for i in self._ordered_idx()]
+
+    def get_latest(self) -> tuple[float, MatLike] | None:
+        """
+        :return: 最新的截图 (截图时间, 截图) 没有时返回None
+        """
+        with self._lock:
+            if self._size == 0:
+                return None
+            idx = (self._start + self._size - 1) % self._capacity
+            return self._time_list[idx], _read_only(self._slot_list[idx])
+
+    def get_by_time(self, target_time: float) -> tuple[float, MatLike] | None:
+        """
+        获取某个时间点时的截图 即不晚于该时间的最新截图
+        :param target_time: 时间
+        :return: (截图时间, 截图) 没有时返回None
+        """
+        with self._lock:
+            ordered_idx = self._ordered_idx()
+            time_list = [self._time_list[i] for i in ordered_idx]
+            pos = bisect.bisect_right(time_list, target_time) - 1
+            if pos < 0:
+                return None
+            idx = ordered_idx[pos]
+            return self._time_list[idx], _read_only(self._slot_list[idx])
+
+    def get_by_time_range(self, start_time: float, end_time: float) -> list[tuple[float, MatLike]]:
+        """
+        获取时间范围内的截图
+        :param start_time: 开始时间 包含
+        :param end_time: 结束时间 包含
+        :return: 按时间从旧到新排列 (截图时间, 截图)
+        """
+        with self._lock:
+            return [(self._time_list[i], _read_only(self._slot_list[i])) for i in self._ordered_idx()
+                    if start_time <= self._time_list[i] <= end_time]
+
+    def _ordered_idx(self) -> list[int]:
+        """
+        按时间从旧到新排列的位置 调用方需要持有锁
+        """
+        return [(self._start + i) % self._capacity for i in range(self._size)]
+
+
+def _read_only(image: np.ndarray) -> np.ndarray:
+    """
+    不复制内存的只读视图
+    """
+    view = image.view()
+    view.flags.writeable = False
+    return view
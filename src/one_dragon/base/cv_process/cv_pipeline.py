@@ -6,6 +6,7 @@ from one_dragon.base.cv_process.cv_step import CvStep, CvPipelineContext
 
 if TYPE_CHECKING:
     from one_dragon.base.cv_process.cv_service import CvService
+    from one_dragon.base.cv_process.frame_image_cache import FrameImageCache
 
 
 class CvPipeline:
@@ -16,7 +17,8 @@ class CvPipeline:
     def __init__(self):
         self.steps: List[CvStep] = []
 
-    def execute(self, source_image: np.ndarray, service: 'CvService | None' = None, debug_mode: bool = True, start_time: float | None = None, timeout: float | None = None) -> CvPipelineContext:
+    def execute(self, source_image: np.ndarray, service: 'CvService | None' = None, debug_mode: bool = True, start_time: float | None = None, timeout: float | None = None,
+                frame_cache: 'FrameImageCache | None' = None, frame_time: float | None = None) -> CvPipelineContext:
         """
         按顺序执行流水线中的所有步骤，并记录时间
         :param source_image: 原始输入图像
@@ -24,9 +26,12 @@ class CvPipeline:
         :param debug_mode: 是否为调试模式
         :param start_time: 流水线开始执行的时间
         :param timeout: 允许的执行时间（秒），None表示无限制
+        :param frame_cache: 同一帧截图的派生图片缓存
+        :param frame_time: 截图时间
         :return: 包含所有结果的上下文
         """
-        context = CvPipelineContext(source_image, service=service, debug_mode=debug_mode, start_time=start_time, timeout=timeout)
+        context = CvPipelineContext(source_image, service=service, debug_mode=debug_mode, start_time=start_time, timeout=timeout,
+                                    frame_cache=frame_cache, frame_time=frame_time)
         pipeline_start_time = context.start_time  # 使用context的开始时间
 
         for _, step in enumerate(self.steps):
@@ -0,0 +1,168 @@
+# coding: utf-8
+import copy
+import time
+from typing import List, Optional, TYPE_CHECKING
+
+import numpy as np
+
+from one_dragon.base.cv_process.cv_pipeline import CvPipeline
+from one_dragon.base.cv_process.cv_step import CvPipelineContext, CvStep
+from one_dragon.utils.log_utils import log
+
+if TYPE_CHECKING:
+    from one_dragon.base.cv_process.cv_service import CvService
+    from one_dragon.base.cv_process.frame_image_cache import FrameImageCache
+
+
+class _CvStepNode:
+
+    def __init__(self, step: Optional[CvStep]):
+        """
+        前缀树的一个节点 代表多条流水线共有的一个步骤
+        :param step: 步骤 根节点为None
+        """
+        self.step: Optional[CvStep] = step
+        self.children: List['_CvStepNode'] = []
+        self.end_idx_list: List[int] = []  # 在这个步骤结束的流水线下标
+
+    def get_child(self, step: CvStep) -> '_CvStepNode':
+        """
+        获取相同步骤的子节点 没有时新建
+        """
+        signature = _get_step_signature(step)
+        for child in self.children:
+            if _get_step_signature(child.step) == signature:
+                return child
+        child = _CvStepNode(step)
+        self.children.append(child)
+        return child
+
+
+class CvPipelineBatch:
+
+    def __init__(self, pipeline_list: List[CvPipeline]):
+        """
+        在同一张图片上批量执行多条流水线
+        开头相同的步骤 (类型和参数都相同 例如同一个区域的裁剪、同一个颜色范围的过滤) 组成前缀树 只执行一次
+        分叉时复制上下文 各条流水线再继续执行自己的步骤
+        分叉出来的上下文共用 display_image 的转换结果 例如同一个裁剪区域的不同颜色过滤 只转换一次HSV
+
+        步骤在非调试模式下不会原地修改图片 所以分叉时不需要复制图片
+        调试模式下会在图片上绘制 每条流水线单独执行
+
+        每条流水线单独计算超时 只计入它经过的步骤的耗时 (共用的步骤计入每条经过它的流水线) 与单独执行时一致
+        一个步骤出错时 只有经过这个步骤的流水线失败
+        :param pipeline_list: 流水线列表 创建后不能再修改
+        """
+        self.pipeline_list: List[CvPipeline] = pipeline_list
+        self.root: _CvStepNode = _CvStepNode(None)
+        self.shared_step_cnt: int = 0  # 因为共用而少执行的步骤数量
+
+        total_step_cnt: int = 0
+        for idx, pipeline in enumerate(pipeline_list):
+            node = self.root
+            for step in pipeline.steps:
+                node = node.get_child(step)
+            node.end_idx_list.append(idx)
+            total_step_cnt += len(pipeline.steps)
+        self.shared_step_cnt = total_step_cnt - self._count_nodes(self.root)
+
+    def _count_nodes(self, node: _CvStepNode) -> int:
+        return sum(1 + self._count_nodes(child) for child in node.children)
+
+    def execute(self, source_image: np.ndarray, service: 'CvService | None' = None, debug_mode: bool = False,
+                start_time: float | None = None, timeout: float | None = None,
+                frame_cache: 'FrameImageCache | None' = None, frame_time: float | None = None) -> List[CvPipelineContext]:
+        """
+        执行所有流水线
+        :param source_image: 原始输入图像
+        :param service: CvService 的引用
+        :param debug_mode: 是否为调试模式 是的话每条流水线单独执行
+        :param start_time: 流水线开始执行的时间 之前的等待时间计入每条流水线
+        :param timeout: 每条流水线允许的执行时间（秒），None表示无限制
+        :param frame_cache: 同一帧截图的派生图片缓存
+        :param frame_time: 截图时间
+        :return: 每条流水线的结果 顺序与 pipeline_list 一致
+        """
+        if debug_mode:
+            batch_start_time = time.time()
+            return [
+                pipeline.execute(source_image, service=service, debug_mode=debug_mode,
+                                 start_time=None if start_time is None else start_time + (time.time() - batch_start_time),
+                                 timeout=timeout, frame_cache=frame_cache, frame_time=frame_time)
+                for pipeline in self.pipeline_list
+            ]
+
+        result_list: List[Optional[CvPipelineContext]] = [None] * len(self.pipeline_list)
+        context = CvPipelineContext(source_image, service=service, debug_mode=debug_mode, start_time=start_time, timeout=timeout,
+                                    frame_cache=frame_cache, frame_time=frame_time)
+        self._execute_node(self.root, context, result_list)
+        return result_list
+
+    def _execute_node(self, node: _CvStepNode, context: CvPipelineContext,
+                      result_list: List[Optional[CvPipelineContext]]) -> None:
+        """
+        执行一个节点之后的所有步骤
+        :param node: 已经执行完的节点
+        :param context: 执行完这个节点后的上下文 只有一个去向时直接使用 否则复制后使用
+        :param result_list: 结果列表
+        """
+        node_done_time = time.time()
+        branch_cnt = len(node.end_idx_list) + len(node.children)
+        for idx in node.end_idx_list:
+            result = context if branch_cnt == 1 else _fork_context(context, node_done_time)
+            result.total_execution_time = (time.time() - result.start_time) * 1000
+            result_list[idx] = result
+
+        for child in node.children:
+            child_context = context if branch_cnt == 1 else _fork_context(context, node_done_time)
+            if child_context.check_timeout():
+                child_context.error_str = f"流水线执行超时 (限制 {child_context.timeout} 秒)"
+                child_context.success = False
+                self._finish_with_error(child, child_context, result_list)
+                continue
+
+            step_start_time = time.time()
+            try:
+                child.step.execute(child_context)
+            except Exception as e:
+                log.error('流水线步骤执行失败 %s', child.step.name, exc_info=True)
+                child_context.error_str = f"步骤 {child.step.name} 执行失败: {e}"
+                child_context.success = False
+                self._finish_with_error(child, child_context, result_list)
+                continue
+            child_context.step_execution_times.append((child.step.name, (time.time() - step_start_time) * 1000))
+            self._execute_node(child, child_context, result_list)
+
+    def _finish_with_error(self, node: _CvStepNode, context: CvPipelineContext,
+                           result_list: List[Optional[CvPipelineContext]]) -> None:
+        """
+        超时或出错后 经过这个节点的流水线都不再执行 直接返回失败的上下文
+        """
+        for idx in node.end_idx_list:
+            result = _fork_context(context, time.time())
+            result.total_execution_time = (time.time() - result.start_time) * 1000
+            result_list[idx] = result
+        for child in node.children:
+            self._finish_with_error(child, context, result_list)
+
+
+def _get_step_signature(step: CvStep) -> tuple:
+    """
+    步骤的唯一标识 类型和参数都相同时视为同一个步骤
+    """
+    return type(step), repr(sorted(step.params.items()))
+
+
+def _fork_context(context: CvPipelineContext, done_time: float) -> CvPipelineContext:
+    """
+    复制上下文 图片和轮廓共用 会被追加内容的列表单独复制
+    开始时间往后顺延 不计入 done_time 之后其它分支的耗时
+    :param context: 原上下文
+    :param done_time: 原上下文执行完最后一个步骤的时间
+    """
+    forked = copy.copy(context)
+    forked.start_time = context.start_time + (time.time() - done_time)
+    forked.analysis_results = list(context.analysis_results)
+    forked.step_execution_times = list(context.step_execution_times)
+    return forked
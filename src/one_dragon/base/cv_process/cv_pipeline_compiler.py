@@ -0,0 +1,511 @@
+# coding: utf-8
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, TYPE_CHECKING
+
+import cv2
+import numpy as np
+
+from one_dragon.base.cv_process.cv_pipeline import CvPipeline
+from one_dragon.base.cv_process.cv_step import CvPipelineContext, CvStep
+from one_dragon.base.cv_process.steps import (
+    CvStepFilterByRGB, CvStepFilterByHSV, CvErodeStep, CvDilateStep,
+    CvMorphologyExStep, CvFindContoursStep, CvStepFilterByArea,
+    CvStepFilterByArcLength, CvStepFilterByRadius, CvContourPropertiesStep,
+    CvStepFilterByAspectRatio, CvStepCropByArea
+)
+from one_dragon.utils import cv2_utils
+
+if TYPE_CHECKING:
+    from one_dragon.base.cv_process.cv_service import CvService
+    from one_dragon.base.cv_process.frame_image_cache import FrameImageCache
+
+# 编译后的流水线默认输出的字段 调用方基本只使用这些
+DEFAULT_COMPILED_OUTPUTS: tuple[str, ...] = ('contours', 'ocr_result', 'match_result')
+
+# 可以指定的输出字段 crop_offset、success、error_str 总是会设置
+COMPILED_OUTPUT_FIELDS: frozenset[str] = frozenset(['display_image', 'mask_image', 'contours', 'ocr_result', 'match_result'])
+
+# 融合步骤的执行函数 (上下文, 当前线程的缓冲区) 返回False时中断后续融合步骤
+FusedOp = Callable[[CvPipelineContext, '_BufferPool'], bool]
+
+
+class _BufferPool:
+
+    def __init__(self):
+        """
+        中间结果的缓冲区 图片尺寸不变时每次执行都复用同一块内存
+        每个线程一个 避免并发执行同一条流水线时互相覆盖
+        """
+        self._buffer_map: dict[str, np.ndarray] = {}
+
+    def get(self, key: str, shape: tuple[int, ...]) -> np.ndarray:
+        """
+        获取缓冲区 尺寸不同时重新分配
+        :param key: 缓冲区名称
+        :param shape: 需要的尺寸
+        :return: 内容未初始化的 uint8 数组
+        """
+        buffer = self._buffer_map.get(key)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.uint8)
+            self._buffer_map[key] = buffer
+        return buffer
+
+
+class _CompiledStage:
+
+    def __init__(self, name: str, op_list: List[FusedOp]):
+        """
+        编译后的一个阶段 由多个连续步骤融合而成 或是一个无法融合、按原样执行的步骤
+        :param name: 阶段名称 记录耗时使用
+        :param op_list: 按顺序执行的函数
+        """
+        self.name: str = name
+        self.op_list: List[FusedOp] = op_list
+
+
+class CompiledCvPipeline:
+
+    def __init__(self, pipeline: CvPipeline, outputs: Iterable[str] = DEFAULT_COMPILED_OUTPUTS):
+        """
+        编译后的流水线 与 CvPipeline.execute 的用法相同
+        - 裁剪、颜色过滤、形态学、查找轮廓、轮廓过滤 等连续步骤融合成一个阶段 参数在编译时解析好
+        - 中间的 HSV 图和掩码使用复用的缓冲区
+        - 只计算 outputs 和后续步骤需要的结果 例如不需要 display_image 时跳过 bitwise_and
+          不需要 contours 时跳过查找轮廓和轮廓过滤 这些步骤的失败也不会再影响 is_success
+        - 不记录 analysis_results
+        - 无法融合的步骤按原样执行
+        调试模式下直接使用原流水线执行 保留每一步的耗时和绘制结果
+
+        编译时会复制步骤参数 原流水线修改后需要重新编译
+        :param pipeline: 原流水线
+        :param outputs: 需要的输出字段 见 COMPILED_OUTPUT_FIELDS
+        """
+        self.pipeline: CvPipeline = pipeline
+        self.outputs: frozenset[str] = frozenset(outputs)
+        unknown = self.outputs - COMPILED_OUTPUT_FIELDS
+        if len(unknown) > 0:
+            raise ValueError(f'未知的输出字段 {unknown}')
+
+        self.stage_list: List[_CompiledStage] = CvPipelineCompiler(pipeline.steps, self.outputs).compile()
+        self._local = threading.local()
+
+    def _get_buffer_pool(self) -> _BufferPool:
+        pool = getattr(self._local, 'pool', None)
+        if pool is None:
+            pool = _BufferPool()
+            self._local.pool = pool
+        return pool
+
+    def execute(self, source_image: np.ndarray, service: 'CvService | None' = None, debug_mode: bool = False, start_time: float | None = None, timeout: float | None = None,
+                frame_cache: 'FrameImageCache | None' = None, frame_time: float | None = None) -> CvPipelineContext:
+        """
+        执行编译后的流水线
+        :param source_image: 原始输入图像
+        :param service: CvService 的引用
+        :param debug_mode: 是否为调试模式 是的话使用原流水线执行
+        :param start_time: 流水线开始执行的时间
+        :param timeout: 允许的执行时间（秒），None表示无限制
+        :param frame_cache: 同一帧截图的派生图片缓存
+        :param frame_time: 截图时间
+        :return: 包含所有结果的上下文 只保证 outputs 中的字段与原流水线一致
+        """
+        if debug_mode:
+            return self.pipeline.execute(source_image, service=service, debug_mode=debug_mode, start_time=start_time, timeout=timeout,
+                                         frame_cache=frame_cache, frame_time=frame_time)
+
+        context = CvPipelineContext(source_image, service=service, debug_mode=False, start_time=start_time, timeout=timeout,
+                                    frame_cache=frame_cache, frame_time=frame_time)
+        pool = self._get_buffer_pool()
+
+        for stage in self.stage_list:
+            if context.check_timeout():
+                context.error_str = f"流水线执行超时 (限制 {context.timeout} 秒)"
+                context.success = False
+                break
+
+            stage_start_time = time.time()
+            for op in stage.op_list:
+                if not op(context, pool):
+                    break
+            context.step_execution_times.append((stage.name, (time.time() - stage_start_time) * 1000))
+
+        if 'mask_image' not in self.outputs:
+            # 可能是复用的缓冲区 下次执行时会被覆盖
+            context.mask_image = None
+
+        context.total_execution_time = (time.time() - context.start_time) * 1000
+        return context
+
+
+class CvPipelineCompiler:
+
+    # 可以融合的步骤类型
+    FUSABLE_STEP_TYPES: tuple[type, ...] = (
+        CvStepCropByArea, CvStepFilterByHSV, CvStepFilterByRGB,
+        CvErodeStep, CvDilateStep, CvMorphologyExStep,
+        CvFindContoursStep, CvStepFilterByArea, CvStepFilterByArcLength,
+        CvStepFilterByAspectRatio, CvStepFilterByRadius, CvContourPropertiesStep,
+    )
+
+    # 只读取并修改 mask_image 的步骤类型 display_image 按需跟着更新
+    MASK_STEP_TYPES: tuple[type, ...] = (CvErodeStep, CvDilateStep, CvMorphologyExStep)
+
+    # 只读取并修改 contours 的步骤类型
+    CONTOUR_FILTER_STEP_TYPES: tuple[type, ...] = (
+        CvStepFilterByArea, CvStepFilterByArcLength, CvStepFilterByAspectRatio, CvStepFilterByRadius,
+    )
+
+    def __init__(self, steps: List[CvStep], outputs: frozenset[str]):
+        """
+        把流水线的步骤编译成若干个阶段
+        :param steps: 流水线步骤
+        :param outputs: 需要的输出字段
+        """
+        self.steps: List[CvStep] = steps
+        self.outputs: frozenset[str] = outputs
+
+        # 每个步骤执行之后 后续是否还需要对应的字段 由 _analyse_liveness 计算
+        self._display_needed: List[bool] = []
+        self._mask_needed: List[bool] = []
+        self._contours_needed: List[bool] = []
+
+        self._mask_slot: int = 0  # 下一个写入掩码的缓冲区 在两个之间交替 避免输入输出是同一块内存
+        self._last_mask_writer: int = -1  # 最后一个写入 mask_image 的步骤下标
+
+    def compile(self) -> List[_CompiledStage]:
+        self._analyse_liveness()
+
+        stage_list: List[_CompiledStage] = []
+        fused_name_list: List[str] = []
+        fused_op_list: List[FusedOp] = []
+
+        for idx, step in enumerate(self.steps):
+            if isinstance(step, self.FUSABLE_STEP_TYPES):
+                op = self._compile_step(idx, step)
+                if op is not None:
+                    fused_name_list.append(step.name)
+                    fused_op_list.append(op)
+                continue
+
+            if len(fused_op_list) > 0:
+                stage_list.append(_CompiledStage('+'.join(fused_name_list), fused_op_list))
+                fused_name_list, fused_op_list = [], []
+            stage_list.append(_CompiledStage(step.name, [_make_interpreted_op(step)]))
+
+        if len(fused_op_list) > 0:
+            stage_list.append(_CompiledStage('+'.join(fused_name_list), fused_op_list))
+
+        return stage_list
+
+    def _analyse_liveness(self) -> None:
+        """
+        从后往前 计算每个步骤执行后 后续步骤或输出是否还需要 display_image、mask_image、contours
+        无法融合的步骤可能读取任何字段 都视为需要
+        """
+        step_cnt = len(self.steps)
+        display_needed = 'display_image' in self.outputs
+        mask_needed = 'mask_image' in self.outputs
+        contours_needed = 'contours' in self.outputs
+        mask_output_pending = 'mask_image' in self.outputs  # 还没找到最后一个写入 mask_image 的步骤
+
+        self._display_needed = [False] * step_cnt
+        self._mask_needed = [False] * step_cnt
+        self._contours_needed = [False] * step_cnt
+        self._last_mask_writer = -1
+
+        for idx in range(step_cnt - 1, -1, -1):
+            step = self.steps[idx]
+            self._display_needed[idx] = display_needed
+            self._mask_needed[idx] = mask_needed
+            self._contours_needed[idx] = contours_needed
+
+            if isinstance(step, CvStepCropByArea):
+                display_needed = True
+            elif isinstance(step, (CvStepFilterByHSV, CvStepFilterByRGB)):
+                if display_needed or mask_needed:
+                    if mask_output_pending:
+                        self._last_mask_writer = idx
+                        mask_output_pending = False
+                    display_needed = True
+                    mask_needed = False
+            elif isinstance(step, self.MASK_STEP_TYPES):
+                if display_needed or mask_needed:
+                    if mask_output_pending:
+                        self._last_mask_writer = idx
+                        mask_output_pending = False
+                    mask_needed = True
+            elif isinstance(step, CvFindContoursStep):
+                if contours_needed:
+                    mask_needed = True
+                    contours_needed = False
+            elif isinstance(step, self.CONTOUR_FILTER_STEP_TYPES):
+                pass
+            elif isinstance(step, CvContourPropertiesStep):
+                pass  # 非调试模式下不做任何事情
+            else:
+                display_needed = True
+                mask_needed = True
+                contours_needed = True
+
+    def _compile_step(self, idx: int, step: CvStep) -> Optional[FusedOp]:
+        """
+        编译一个可以融合的步骤
+        :return: 执行函数 不需要执行时返回None
+        """
+        params = dict(step.params)
+        display_needed = self._display_needed[idx]
+        mask_needed = self._mask_needed[idx]
+        contours_needed = self._contours_needed[idx]
+
+        if isinstance(step, CvStepCropByArea):
+            return _make_crop_by_area_op(params.get('screen_name', ''), params.get('area_name', ''))
+        elif isinstance(step, (CvStepFilterByHSV, CvStepFilterByRGB)):
+            if not display_needed and not mask_needed:
+                return None
+            if isinstance(step, CvStepFilterByHSV):
+                hsv_color, hsv_diff = params.get('hsv_color'), params.get('hsv_diff')
+                range_list = None if hsv_color is None or hsv_diff is None else cv2_utils.get_hsv_range_list(hsv_color, hsv_diff)
+                to_hsv = True
+            else:
+                lower_rgb, upper_rgb = params.get('lower_rgb'), params.get('upper_rgb')
+                range_list = None if lower_rgb is None or upper_rgb is None else [
+                    (np.array(lower_rgb, dtype=np.uint8), np.array(upper_rgb, dtype=np.uint8))
+                ]
+                to_hsv = False
+            return _make_color_filter_op(range_list, to_hsv, self._next_mask_key(idx), display_needed)
+        elif isinstance(step, self.MASK_STEP_TYPES):
+            if not display_needed and not mask_needed:
+                return None
+            kernel_size = params.get('kernel_size', 3)
+            kernel = np.ones((kernel_size, kernel_size), np.uint8)
+            if isinstance(step, CvErodeStep):
+                morph = _make_iterated_morph(cv2.erode, kernel, params.get('iterations', 1))
+            elif isinstance(step, CvDilateStep):
+                morph = _make_iterated_morph(cv2.dilate, kernel, params.get('iterations', 1))
+            else:
+                cv2_op = step.op_map.get(params.get('op'))
+                if cv2_op is None:
+                    return None
+                morph = _make_morphology_ex(cv2_op, kernel)
+            return _make_mask_op(morph, self._next_mask_key(idx), display_needed)
+        elif isinstance(step, CvFindContoursStep):
+            if not contours_needed:
+                return None
+            cv2_mode = step.mode_map.get(params.get('mode'))
+            cv2_method = step.method_map.get(params.get('method'))
+            if cv2_mode is None or cv2_method is None:
+                return None
+            return _make_find_contours_op(cv2_mode, cv2_method)
+        elif isinstance(step, self.CONTOUR_FILTER_STEP_TYPES):
+            if not contours_needed:
+                return None
+            return _make_contour_filter_op(_make_contour_predicate(step, params))
+        else:
+            return None
+
+    def _next_mask_key(self, idx: int) -> Optional[str]:
+        """
+        :return: 写入掩码使用的缓冲区名称 结果需要输出时返回None 即每次分配新的内存
+        """
+        if idx == self._last_mask_writer:
+            return None
+        key = f'mask_{self._mask_slot}'
+        self._mask_slot = 1 - self._mask_slot
+        return key
+
+
+def _make_interpreted_op(step: CvStep) -> FusedOp:
+    """
+    无法融合的步骤 按原样执行
+    """
+    def op(context: CvPipelineContext, pool: _BufferPool) -> bool:
+        step.execute(context)
+        return True
+    return op
+
+
+def _make_crop_by_area_op(screen_name: str, area_name: str) -> FusedOp:
+    """
+    按区域裁剪 区域每次执行时再获取 画面配置被修改后也能生效
+    """
+    def op(context: CvPipelineContext, pool: _BufferPool) -> bool:
+        od_ctx = context.od_ctx
+        if od_ctx is None or od_ctx.screen_loader is None:
+            context.error_str = "错误: 缺少画面加载器 (ScreenLoader)"
+            context.success = False
+            return False
+
+        if not screen_name or not area_name:
+            context.error_str = "错误: 未选择画面名称或区域名称"
+            context.success = False
+            return False
+
+        area = od_ctx.screen_loader.get_area(screen_name, area_name)
+        if area is None:
+            context.error_str = f"错误: 在画面 '{screen_name}' 中未找到区域 '{area_name}'"
+            context.success = False
+            return False
+
+        rect = area.rect
+        context.display_image = cv2_utils.crop_image_only(context.display_image, rect)
+        context.crop_offset = (context.crop_offset[0] + rect.x1, context.crop_offset[1] + rect.y1)
+        return True
+    return op
+
+
+def _make_color_filter_op(range_list: Optional[List[tuple[np.ndarray, np.ndarray]]], to_hsv: bool,
+                          mask_key: Optional[str], display_needed: bool) -> FusedOp:
+    """
+    HSV 或 RGB 范围过滤
+    :param range_list: inRange 的范围 多个时取并集 为None时结果为全黑
+    :param to_hsv: 是否需要先转换到HSV
+    :param mask_key: 掩码使用的缓冲区 None时分配新的内存
+    :param display_needed: 后续是否需要 display_image
+    """
+    def op(context: CvPipelineContext, pool: _BufferPool) -> bool:
+        image = context.display_image
+        mask_shape = image.shape[:2]
+        mask = np.empty(mask_shape, dtype=np.uint8) if mask_key is None else pool.get(mask_key, mask_shape)
+
+        if range_list is None:
+            mask.fill(0)
+        else:
+            if to_hsv and context.frame_cache is not None:  # 与同一帧的其它识别共用转换结果
+                image = context.get_hsv_image()
+            elif to_hsv:
+                image = cv2.cvtColor(image, cv2.COLOR_RGB2HSV, dst=pool.get('hsv', image.shape))
+            cv2.inRange(image, range_list[0][0], range_list[0][1], dst=mask)
+            if len(range_list) > 1:
+                extra_mask = cv2.inRange(image, range_list[1][0], range_list[1][1], dst=pool.get('mask_extra', mask_shape))
+                cv2.bitwise_or(mask, extra_mask, dst=mask)
+
+        context.mask_image = mask
+        if display_needed:
+            context.display_image = cv2.bitwise_and(context.display_image, context.display_image, mask=mask)
+        return True
+    return op
+
+
+def _make_iterated_morph(func: Callable, kernel: np.ndarray, iterations: int) -> Callable:
+    def morph(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+        return func(src, kernel, dst=dst, iterations=iterations)
+    return morph
+
+
+def _make_morphology_ex(cv2_op: int, kernel: np.ndarray) -> Callable:
+    def morph(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+        return cv2.morphologyEx(src, cv2_op, kernel, dst=dst)
+    return morph
+
+
+def _make_mask_op(morph: Callable, mask_key: Optional[str], display_needed: bool) -> FusedOp:
+    """
+    腐蚀、膨胀、形态学
+    :param morph: 形态学计算 (输入, 输出) -> 输出
+    :param mask_key: 掩码使用的缓冲区 None时分配新的内存
+    :param display_needed: 后续是否需要 display_image
+    """
+    def op(context: CvPipelineContext, pool: _BufferPool) -> bool:
+        src = context.mask_image
+        if src is None:
+            return True
+        dst = np.empty_like(src) if mask_key is None else pool.get(mask_key, src.shape)
+        mask = morph(src, dst)
+        context.mask_image = mask
+        if display_needed:
+            context.display_image = cv2.bitwise_and(context.display_image, context.display_image, mask=mask)
+        return True
+    return op
+
+
+def _make_find_contours_op(cv2_mode: int, cv2_method: int) -> FusedOp:
+    def op(context: CvPipelineContext, pool: _BufferPool) -> bool:
+        mask = context.mask_image
+        if mask is None:
+            return True
+        if mask.size == 0:
+            context.error_str = "错误：输入图像尺寸为0"
+            context.success = False
+            return False
+        contours, _ = cv2.findContours(mask, cv2_mode, cv2_method)
+        context.contours = contours
+        if not contours:
+            context.success = False
+        return True
+    return op
+
+
+def _make_contour_predicate(step: CvStep, params: dict) -> Callable[[np.ndarray], bool]:
+    """
+    轮廓过滤步骤的判断条件 与各个步骤的 _execute 一致
+    """
+    if isinstance(step, CvStepFilterByArea):
+        min_area, max_area = params.get('min_area', 0), params.get('max_area', 10000)
+        return lambda contour: min_area <= cv2.contourArea(contour) <= max_area
+    elif isinstance(step, CvStepFilterByArcLength):
+        closed = params.get('closed', True)
+        min_length, max_length = params.get('min_length', 0), params.get('max_length', 1000)
+        return lambda contour: min_length <= cv2.arcLength(contour, closed) <= max_length
+    elif isinstance(step, CvStepFilterByAspectRatio):
+        min_ratio, max_ratio = params.get('min_ratio', 0.0), params.get('max_ratio', 10.0)
+
+        def aspect_ratio_in_range(contour: np.ndarray) -> bool:
+            _, _, w, h = cv2.boundingRect(contour)
+            return min_ratio <= (w / h if h > 0 else 0) <= max_ratio
+        return aspect_ratio_in_range
+    else:
+        min_radius, max_radius = params.get('min_radius', 0), params.get('max_radius', 100)
+        return lambda contour: min_radius <= cv2.minEnclosingCircle(contour)[1] <= max_radius
+
+
+def _make_contour_filter_op(predicate: Callable[[np.ndarray], bool]) -> FusedOp:
+    def op(context: CvPipelineContext, pool: _BufferPool) -> bool:
+        if not context.contours:
+            return True
+        filtered_contours = [contour for contour in context.contours if predicate(contour)]
+        context.contours = filtered_contours
+        if not filtered_contours:
+            context.success = False
+        return True
+    return op
+
+
+def __debug(image_name: str, rounds: int = 200):
+    """
+    在所有内置的流水线上 对比解释执行和编译后执行的耗时和结果
+    :param image_name: .debug/images 下的截图名称
+    :param rounds: 每条流水线执行的次数
+    """
+    from one_dragon.utils import debug_utils
+    from zzz_od.context.zzz_context import ZContext
+
+    ctx = ZContext()
+    ctx.init_by_config()
+    service = ctx.cv_service
+    image = debug_utils.get_debug_image(image_name)
+
+    for name in service.get_pipeline_names():
+        pipeline = service.get_pipeline(name)
+        if pipeline is None:
+            continue
+        compiled = CompiledCvPipeline(pipeline)
+
+        t1 = time.perf_counter()
+        for _ in range(rounds):
+            expected = pipeline.execute(image, service=service, debug_mode=False)
+        t2 = time.perf_counter()
+        for _ in range(rounds):
+            actual = compiled.execute(image, service=service, debug_mode=False)
+        t3 = time.perf_counter()
+
+        same = (expected.is_success == actual.is_success
+                and expected.get_absolute_rects() == actual.get_absolute_rects())
+        print(f'{name} 解释执行 {(t2 - t1) * 1000 / rounds:.3f}ms 编译执行 {(t3 - t2) * 1000 / rounds:.3f}ms '
+              f'阶段 {[i.name for i in compiled.stage_list]} 结果一致 {same}')
+
+
+if __name__ == '__main__':
+    import sys
+    __debug(sys.argv[1])
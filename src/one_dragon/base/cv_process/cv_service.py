@@ -1,5 +1,6 @@
 # coding: utf-8
 import os
+import threading
 from typing import List, Dict, Type
 
 import cv2
@@ -7,7 +8,10 @@ import numpy as np
 import yaml
 
 from one_dragon.base.cv_process.cv_pipeline import CvPipeline, CvPipelineContext
+from one_dragon.base.cv_process.cv_pipeline_batch import CvPipelineBatch
+from one_dragon.base.cv_process.cv_pipeline_compiler import CompiledCvPipeline, DEFAULT_COMPILED_OUTPUTS
 from one_dragon.base.cv_process.cv_step import CvStep
+from one_dragon.base.cv_process.frame_image_cache import FrameImageCache
 from one_dragon.base.cv_process.steps import (
     CvStepFilterByRGB, CvStepFilterByHSV, CvErodeStep, CvDilateStep,
     CvMorphologyExStep, CvFindContoursStep, CvStepFilterByArea, CvStepFilterByArcLength,
@@ -61,12 +65,24 @@ class CvService:
             'OCR识别': CvStepOcr,
         }
 
+        # 运行时使用的流水线缓存 key=流水线名称 value=(文件修改时间, 流水线)
+        self._pipeline_cache: Dict[str, tuple[int, CvPipeline]] = {}
+        self._pipeline_cache_lock = threading.Lock()
+
+        # 非调试模式下使用编译后执行的流水线 key=流水线名称 value=需要的输出字段
+        self._compiled_outputs: Dict[str, tuple[str, ...]] = {}
+        # 编译后的流水线缓存 key=流水线名称 value=(编译时使用的流水线, 编译后的流水线)
+        self._compiled_cache: Dict[str, tuple[CvPipeline, CompiledCvPipeline]] = {}
+        # 批量执行的缓存 key=流水线名称 value=(使用的流水线, 批量执行器)
+        self._batch_cache: Dict[tuple[str, ...], tuple[tuple[CvPipeline, ...], CvPipelineBatch]] = {}
+
         if not os.path.exists(self.PIPELINE_DIR):
             os.makedirs(self.PIPELINE_DIR)
         if not os.path.exists(self.TEMPLATE_DIR):
             os.makedirs(self.TEMPLATE_DIR)
 
-    def run_pipeline(self, pipeline_name: str, image: np.ndarray, debug_mode: bool = False, start_time: float | None = None, timeout: float | None = None) -> CvPipelineContext:
+    def run_pipeline(self, pipeline_name: str, image: np.ndarray, debug_mode: bool = False, start_time: float | None = None, timeout: float | None = None,
+                     frame_cache: FrameImageCache | None = None, frame_time: float | None = None) -> CvPipelineContext:
         """
         加载并运行指定的流水线
         :param pipeline_name: 流水线名称
@@ -74,18 +90,74 @@ class CvService:
         :param debug_mode: 是否为调试模式
         :param start_time: 流水线开始执行的时间
         :param timeout: 允许的执行时间（秒），None表示无限制
+        :param frame_cache: 同一帧截图的派生图片缓存 多个识别使用同一帧时传入 相同区域的颜色转换只计算一次
+        :param frame_time: 截图时间 连续截图识别时传入 GPU识别时会取消同一个步骤还在排队的旧截图任务
         :return: 包含所有结果的上下文
         """
-        pipeline = self.load_pipeline(pipeline_name)
+        pipeline = self.get_pipeline(pipeline_name)
         if pipeline is None:
             ctx = CvPipelineContext(image, service=self, debug_mode=debug_mode, start_time=start_time, timeout=timeout)
             ctx.error_str = f"流水线 {pipeline_name} 加载失败"
             return ctx
 
-        result = pipeline.execute(image, service=self, debug_mode=debug_mode, start_time=start_time, timeout=timeout)
+        if not debug_mode and pipeline_name in self._compiled_outputs:
+            compiled = self._get_compiled_pipeline(pipeline_name, pipeline)
+            result = compiled.execute(image, service=self, debug_mode=debug_mode, start_time=start_time, timeout=timeout,
+                                      frame_cache=frame_cache, frame_time=frame_time)
+        else:
+            result = pipeline.execute(image, service=self, debug_mode=debug_mode, start_time=start_time, timeout=timeout,
+                                      frame_cache=frame_cache, frame_time=frame_time)
         self._emit_overlay_vision(pipeline_name, result)
         return result
 
+    def run_pipelines(self, pipeline_name_list: List[str], image: np.ndarray, debug_mode: bool = False, start_time: float | None = None, timeout: float | None = None,
+                      frame_cache: FrameImageCache | None = None, frame_time: float | None = None) -> List[CvPipelineContext]:
+        """
+        在同一张图片上运行多条流水线 相同的开头步骤只执行一次 见 CvPipelineBatch
+        :param pipeline_name_list: 流水线名称列表
+        :param image: RGB图像
+        :param debug_mode: 是否为调试模式
+        :param start_time: 流水线开始执行的时间
+        :param timeout: 每条流水线允许的执行时间（秒） 各自计算 只计入该流水线经过的步骤 None表示无限制
+        :param frame_cache: 同一帧截图的派生图片缓存
+        :param frame_time: 截图时间
+        :return: 每条流水线的结果 顺序与 pipeline_name_list 一致
+        """
+        if len(pipeline_name_list) == 1:
+            return [self.run_pipeline(pipeline_name_list[0], image, debug_mode=debug_mode, start_time=start_time, timeout=timeout,
+                                      frame_cache=frame_cache, frame_time=frame_time)]
+
+        key = tuple(pipeline_name_list)
+        pipeline_list = tuple(self.get_pipeline(name) for name in key)
+        result_list: List[CvPipelineContext | None] = [None] * len(key)
+
+        valid_idx_list = [idx for idx, pipeline in enumerate(pipeline_list) if pipeline is not None]
+        if len(valid_idx_list) > 0:
+            valid_pipeline_list = tuple(pipeline_list[idx] for idx in valid_idx_list)
+            with self._pipeline_cache_lock:
+                cached = self._batch_cache.get(key)
+            if cached is not None and len(cached[0]) == len(valid_pipeline_list) and all(a is b for a, b in zip(cached[0], valid_pipeline_list)):
+                batch = cached[1]
+            else:
+                batch = CvPipelineBatch(list(valid_pipeline_list))
+                with self._pipeline_cache_lock:
+                    self._batch_cache[key] = (valid_pipeline_list, batch)
+
+            batch_result_list = batch.execute(image, service=self, debug_mode=debug_mode, start_time=start_time, timeout=timeout,
+                                              frame_cache=frame_cache, frame_time=frame_time)
+            for idx, result in zip(valid_idx_list, batch_result_list):
+                result_list[idx] = result
+
+        for idx, name in enumerate(key):
+            if result_list[idx] is None:
+                result = CvPipelineContext(image, service=self, debug_mode=debug_mode, start_time=start_time, timeout=timeout)
+                result.error_str = f"流水线 {name} 加载失败"
+                result_list[idx] = result
+            else:
+                self._emit_overlay_vision(name, result_list[idx])
+
+        return result_list
+
     def _emit_overlay_vision(self, pipeline_name: str, context: CvPipelineContext) -> None:
         bus = getattr(self.od_ctx, "overlay_debug_bus", None)
         if bus is None or context is None:
@@ -205,9 +277,88 @@ class CvService:
         file_path = os.path.join(self.PIPELINE_DIR, f"{name}.yml")
         with open(file_path, 'w', encoding='utf-8') as f:
             yaml.dump(data_to_save, f, allow_unicode=True, sort_keys=False)
+        self.invalidate_pipeline(name)
 
         return True
 
+    def get_pipeline(self, name: str) -> CvPipeline | None:
+        """
+        获取运行用的流水线 文件没有变化时复用之前加载的
+        返回的流水线是共用的 不能修改 需要编辑时使用 load_pipeline
+        :param name: 流水线名称
+        """
+        file_path = os.path.join(self.PIPELINE_DIR, f"{name}.yml")
+        try:
+            mtime = os.stat(file_path).st_mtime_ns
+        except OSError:
+            self.invalidate_pipeline(name)
+            return None
+
+        with self._pipeline_cache_lock:
+            cached = self._pipeline_cache.get(name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        pipeline = self.load_pipeline(name)
+        if pipeline is not None:
+            with self._pipeline_cache_lock:
+                self._pipeline_cache[name] = (mtime, pipeline)
+        return pipeline
+
+    def invalidate_pipeline(self, name: str | None = None) -> None:
+        """
+        清除流水线缓存 流水线被保存、重命名、删除后调用
+        :param name: 流水线名称 为None时清除全部
+        """
+        with self._pipeline_cache_lock:
+            if name is None:
+                self._pipeline_cache.clear()
+                self._compiled_cache.clear()
+                self._batch_cache.clear()
+            else:
+                self._pipeline_cache.pop(name, None)
+                self._compiled_cache.pop(name, None)
+                for key in [i for i in self._batch_cache if name in i]:
+                    self._batch_cache.pop(key, None)
+
+    def enable_compiled_pipeline(self, name: str, outputs: tuple[str, ...] = DEFAULT_COMPILED_OUTPUTS) -> None:
+        """
+        非调试模式下 使用编译后的流水线执行 见 CompiledCvPipeline
+        :param name: 流水线名称
+        :param outputs: 调用方需要的输出字段 只保证这些字段与原流水线的结果一致
+        """
+        with self._pipeline_cache_lock:
+            if self._compiled_outputs.get(name) == tuple(outputs):
+                return
+            self._compiled_outputs[name] = tuple(outputs)
+            self._compiled_cache.pop(name, None)
+
+    def disable_compiled_pipeline(self, name: str) -> None:
+        """
+        恢复使用原流水线逐步执行
+        :param name: 流水线名称
+        """
+        with self._pipeline_cache_lock:
+            self._compiled_outputs.pop(name, None)
+            self._compiled_cache.pop(name, None)
+
+    def _get_compiled_pipeline(self, name: str, pipeline: CvPipeline) -> CompiledCvPipeline:
+        """
+        获取编译后的流水线 流水线重新加载后重新编译
+        :param name: 流水线名称
+        :param pipeline: 当前使用的流水线
+        """
+        with self._pipeline_cache_lock:
+            cached = self._compiled_cache.get(name)
+            outputs = self._compiled_outputs.get(name, DEFAULT_COMPILED_OUTPUTS)
+        if cached is not None and cached[0] is pipeline:
+            return cached[1]
+
+        compiled = CompiledCvPipeline(pipeline, outputs)
+        with self._pipeline_cache_lock:
+            self._compiled_cache[name] = (pipeline, compiled)
+        return compiled
+
     def load_pipeline(self, name: str) -> CvPipeline | None:
         """
         从文件加载流水线
@@ -245,6 +396,7 @@ class CvService:
         file_path = os.path.join(self.PIPELINE_DIR, f"{name}.yml")
         if os.path.exists(file_path):
             os.remove(file_path)
+        self.invalidate_pipeline(name)
 
     def rename_pipeline(self, old_name: str, new_name: str):
         """
@@ -260,6 +412,8 @@ class CvService:
 
         if os.path.exists(old_file_path) and not os.path.exists(new_file_path):
             os.rename(old_file_path, new_file_path)
+        self.invalidate_pipeline(old_name)
+        self.invalidate_pipeline(new_name)
 
     def get_template_names(self) -> List[str]:
         """
@@ -8,17 +8,19 @@ from one_dragon.utils import cv2_utils
 
 if TYPE_CHECKING:
     from one_dragon.base.cv_process.cv_service import CvService
+    from one_dragon.base.cv_process.frame_image_cache import FrameImageCache
 
 
 class CvPipelineContext:
     """
     一个图像处理流水线的上下文
     """
-    def __init__(self, source_image: np.ndarray, service: 'CvService | None' = None, debug_mode: bool = True, start_time: float | None = None, timeout: float | None = None):
+    def __init__(self, source_image: np.ndarray, service: 'CvService | None' = None, debug_mode: bool = True, start_time: float | None = None, timeout: float | None = None,
+                 frame_cache: 'FrameImageCache | None' = None, frame_time: float | None = None):
         self.source_image: np.ndarray = source_image  # 原始输入图像 (只读)
         self.service: 'CvService' = service
         self.debug_mode: bool = debug_mode  # 是否为调试模式
-        self.display_image: np.ndarray = source_image.copy()  # 用于UI显示的主图像，可被修改
+        self.display_image: np.ndarray = source_image  # 用于UI显示的主图像 与原图共用内存 需要原地修改时先调用 get_writable_display_image
         self.crop_offset: tuple[int, int] = (0, 0)  # display_image 左上角相对于 source_image 的坐标偏移
         self.mask_image: np.ndarray = None  # 二值掩码图像
         self.contours: List[np.ndarray] = []  # 检测到的轮廓列表
@@ -29,6 +31,13 @@ class CvPipelineContext:
         self.total_execution_time: float = 0.0
         self.error_str: str = None  # 致命错误信息
         self.success: bool = True  # 流水线逻辑是否成功
+        # 由 display_image 转换得到的图片 key=(转换类型, id(display_image)) value=(display_image, 转换结果)
+        # 批量执行时 分叉出来的上下文共用同一个字典 相同图片只转换一次
+        self._derived_image_cache: Dict[tuple[str, int], tuple[np.ndarray, np.ndarray]] = {}
+        # 同一帧截图的派生图片缓存 display_image 是截图的裁剪时 与同一帧的其它识别共用转换结果
+        self.frame_cache: 'FrameImageCache | None' = frame_cache if frame_cache is not None and frame_cache.image is source_image else None
+        # 截图时间 提交到GPU执行器时 同一个步骤还在排队的旧截图任务会被取消
+        self.frame_time: float | None = frame_time
 
         # 超时控制相关
         self.start_time: float = start_time if start_time is not None else time.time()
@@ -58,6 +67,34 @@ class CvPipelineContext:
     def ocr(self):
         return self.service.ocr if self.service else None
 
+    def get_writable_display_image(self) -> np.ndarray:
+        """
+        获取可以原地修改的 display_image
+        大部分步骤都会生成新图片 只有在原图上绘制时才需要复制 避免每次执行流水线都复制整张截图
+        :return: 与 source_image 不共用内存的 display_image
+        """
+        if not self.display_image.flags.writeable or np.may_share_memory(self.display_image, self.source_image):
+            self.display_image = self.display_image.copy()
+        return self.display_image
+
+    def get_hsv_image(self) -> np.ndarray:
+        """
+        获取 display_image 的HSV图片 同一张图片只转换一次
+        :return: HSV图片 不能修改
+        """
+        if self.frame_cache is not None:
+            rect = self.frame_cache.get_crop_rect(self.display_image)
+            if rect is not None:
+                return self.frame_cache.hsv(rect)
+
+        key = ('hsv', id(self.display_image))
+        cached = self._derived_image_cache.get(key)
+        if cached is not None and cached[0] is self.display_image:
+            return cached[1]
+        hsv_image = cv2.cvtColor(self.display_image, cv2.COLOR_RGB2HSV)
+        self._derived_image_cache[key] = (self.display_image, hsv_image)
+        return hsv_image
+
     def check_timeout(self) -> bool:
         """
         检查是否已经超时
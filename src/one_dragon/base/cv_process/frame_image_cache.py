@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from typing import Callable, Sequence
+
+import cv2
+import numpy as np
+
+from one_dragon.base.geometry.rectangle import Rect
+from one_dragon.utils import cv2_utils
+
+
+class FrameImageCache:
+
+    def __init__(self, image: np.ndarray):
+        """
+        同一帧截图上的派生图片缓存 裁剪、颜色空间转换、inRange 掩码 按 (区域, 操作, 参数) 只计算一次
+        由每帧的识别入口创建 传给各个识别 这一帧识别完后丢弃 不需要主动清理
+        多个线程同时使用时 可能会重复计算同一个结果 但结果一致 不加锁
+        返回的图片都是共用的 不能修改
+        :param image: 截图 RGB
+        """
+        self.image: np.ndarray = image
+        self._cache: dict[tuple, np.ndarray] = {}
+
+        self.cal_cnt: int = 0  # 实际计算的次数
+        self.hit_cnt: int = 0  # 使用缓存的次数
+
+    def _get(self, key: tuple, cal: Callable[[], np.ndarray]) -> np.ndarray:
+        cached = self._cache.get(key)
+        if cached is not None:
+            self.hit_cnt += 1
+            return cached
+        self.cal_cnt += 1
+        return self._cache.setdefault(key, cal())
+
+    def crop(self, rect: Rect | None) -> np.ndarray:
+        """
+        裁剪区域 与 cv2_utils.crop_image_only 一致
+        :param rect: 区域 为 None 时返回整张截图
+        :return: 截图上的视图
+        """
+        if rect is None:
+            return self.image
+        return self._get(('crop', _rect_key(rect)),
+                         lambda: cv2_utils.crop_image_only(self.image, rect))
+
+    def hsv(self, rect: Rect | None = None) -> np.ndarray:
+        """
+        区域的HSV图片
+        """
+        return self._get(('hsv', _rect_key(rect)),
+                         lambda: cv2.cvtColor(self.crop(rect), cv2.COLOR_RGB2HSV))
+
+    def gray(self, rect: Rect | None = None) -> np.ndarray:
+        """
+        区域的灰度图片
+        """
+        return self._get(('gray', _rect_key(rect)),
+                         lambda: cv2.cvtColor(self.crop(rect), cv2.COLOR_RGB2GRAY))
+
+    def in_range(self, rect: Rect | None, lower: Sequence[int], upper: Sequence[int], hsv: bool = False) -> np.ndarray:
+        """
+        区域在颜色范围内的掩码
+        :param rect: 区域
+        :param lower: 下限
+        :param upper: 上限 与下限的形状一致
+        :param hsv: 范围是否为HSV 否则为RGB
+        :return: 掩码
+        """
+        # 与 cv2_utils.filter_by_color 一致 转换成 uint8 数组后传入
+        _lower = np.array(lower, dtype=np.uint8)
+        _upper = np.array(upper, dtype=np.uint8)
+        return self._get(
+            ('in_range', _rect_key(rect), hsv, _lower.tobytes(), _upper.tobytes(), _lower.shape),
+            lambda: cv2.inRange(self.hsv(rect) if hsv else self.crop(rect), _lower, _upper)
+        )
+
+    def filter_hsv(self, rect: Rect | None, hsv_color: Sequence[int], hsv_diff: Sequence[int]) -> np.ndarray:
+        """
+        区域按HSV颜色过滤的掩码 与 cv2_utils.filter_by_color 的 hsv 模式一致 能处理H通道的循环
+        :param rect: 区域
+        :param hsv_color: HSV基准颜色
+        :param hsv_diff: HSV颜色容差
+        :return: 掩码
+        """
+        range_list = cv2_utils.get_hsv_range_list(hsv_color, hsv_diff)
+        if len(range_list) == 1:
+            return self.in_range(rect, range_list[0][0], range_list[0][1], hsv=True)
+        return self._get(
+            ('filter_hsv', _rect_key(rect), tuple(int(i) for i in hsv_color), tuple(int(i) for i in hsv_diff)),
+            lambda: cv2.bitwise_or(*[self.in_range(rect, lower, upper, hsv=True) for lower, upper in range_list])
+        )
+
+    def get_crop_rect(self, image: np.ndarray) -> Rect | None:
+        """
+        判断图片是否为截图上直接裁剪出来的视图 (没有被复制或修改)
+        :param image: 图片
+        :return: 是的话返回裁剪区域 否则返回 None
+        """
+        source = self.image
+        if image is source:
+            return Rect(0, 0, source.shape[1], source.shape[0])
+        if image.ndim != source.ndim or image.strides != source.strides or image.shape[2:] != source.shape[2:]:
+            return None
+
+        offset = image.__array_interface__['data'][0] - source.__array_interface__['data'][0]
+        if offset < 0:
+            return None
+        y, rest = divmod(offset, source.strides[0])
+        x, rest = divmod(rest, source.strides[1])
+        if rest != 0 or y + image.shape[0] > source.shape[0] or x + image.shape[1] > source.shape[1]:
+            return None
+        return Rect(x, y, x + image.shape[1], y + image.shape[0])
+
+
+def _rect_key(rect: Rect | None) -> tuple[int, int, int, int] | None:
+    return None if rect is None else (rect.x1, rect.y1, rect.x2, rect.y2)
@@ -20,6 +20,9 @@ class CvStepFilterByHSV(CvStep):
         return "根据 HSV 颜色过滤图像。 `hsv_color` 参数指定要匹配的中心颜色，`hsv_diff` 参数指定 H, S, V 三个通道的容差范围。"
 
     def _execute(self, context: CvPipelineContext, hsv_color: tuple = (0, 0, 0), hsv_diff: tuple = (10, 255, 255), **kwargs):
-        mask = cv2_utils.filter_by_color(context.display_image, mode='hsv', hsv_color=hsv_color, hsv_diff=hsv_diff)
+        if hsv_color is None or hsv_diff is None:
+            mask = cv2_utils.filter_by_color(context.display_image, mode='hsv', hsv_color=hsv_color, hsv_diff=hsv_diff)
+        else:
+            mask = cv2_utils.filter_hsv_image(context.get_hsv_image(), hsv_color=hsv_color, hsv_diff=hsv_diff)
         context.mask_image = mask
         context.display_image = cv2.bitwise_and(context.display_image, context.display_image, mask=mask)
\ No newline at end of file
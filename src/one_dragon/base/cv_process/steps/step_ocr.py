@@ -1,8 +1,10 @@
 # coding: utf-8
+from concurrent.futures import CancelledError
 from typing import Dict, Any
 import cv2
 from one_dragon.base.cv_process.cv_step import CvStep, CvPipelineContext
 from one_dragon.utils import gpu_executor
+from one_dragon.utils.gpu_executor import GpuTaskPriority
 
 
 class CvStepOcr(CvStep):
@@ -69,8 +71,22 @@ class CvStepOcr(CvStep):
 
         # 执行OCR
         if context.ocr.is_use_gpu():
-            f = gpu_executor.submit(context.ocr.run_ocr, image=context.display_image)
-            ocr_results = f.result()
+            # 同一个步骤有更新的截图时 还在排队的旧截图识别会被取消
+            # 识别同一张图片时 (例如共用同一帧的裁剪结果) 与排队中的任务合并
+            f = gpu_executor.submit_with_priority(
+                GpuTaskPriority.NORMAL,
+                context.ocr.run_ocr,
+                image=context.display_image,
+                stale_key=self,
+                frame_time=context.frame_time,
+                coalesce_key=(id(context.ocr), id(context.display_image)),
+            )
+            try:
+                ocr_results = f.result()
+            except CancelledError:
+                context.analysis_results.append("OCR 已取消: 有更新的截图")
+                context.success = False
+                return
         else:
             ocr_results = context.ocr.run_ocr(context.display_image)
         context.ocr_result = ocr_results
@@ -78,11 +94,13 @@ class CvStepOcr(CvStep):
             context.success = False
         context.analysis_results.append(f"OCR 识别到 {len(ocr_results)} 个文本项:")
 
-        # 绘制结果
-        display_with_ocr = context.display_image.copy()
+        # 绘制结果 非调试模式下不需要复制图片
+        draw = context.debug_mode and draw_text_box
+        display_with_ocr = context.display_image.copy() if draw else None
         for text, match_list in ocr_results.items():
             for match in match_list:
                 context.analysis_results.append(f"  - '{match.data}' (置信度: {match.confidence:.2f}) at {match.rect}")
-                if context.debug_mode and draw_text_box:
+                if draw:
                     cv2.rectangle(display_with_ocr, (match.rect.x1, match.rect.y1), (match.rect.x2, match.rect.y2), (255, 0, 255), 2)
-        context.display_image = display_with_ocr
\ No newline at end of file
+        if draw:
+            context.display_image = display_with_ocr
\ No newline at end of file
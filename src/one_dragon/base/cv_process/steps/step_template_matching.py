@@ -48,7 +48,8 @@ class CvTemplateMatchingStep(CvStep):
             bottom_right = (top_left[0] + w, top_left[1] + h)
             
             # 在显示图像上绘制矩形
-            cv2.rectangle(context.display_image, top_left, bottom_right, (0, 255, 255), 2)
+            if context.debug_mode:
+                cv2.rectangle(context.get_writable_display_image(), top_left, bottom_right, (0, 255, 255), 2)
             context.analysis_results.append(f"找到匹配，置信度 {max_val:.4f} at {top_left}")
         else:
             context.analysis_results.append(f"未找到足够置信度的匹配 (最高 {max_val:.4f})")
\ No newline at end of file
@@ -81,6 +81,42 @@ class OcrMatcher:
         """
         raise NotImplementedError('由具体的OCR实现提供')
 
+    def ocr_without_det(self, image_list: list[MatLike]) -> list[tuple[str, float]]:
+        """
+        不进行文本检测 将每张图片当作一行文本直接识别
+
+        Args:
+            image_list: 文本行图片列表
+
+        Returns:
+            每张图片对应的 (识别文本, 置信度)
+        """
+        raise NotImplementedError('由具体的OCR实现提供')
+
+    def ocr_batch(
+            self,
+            image_list: list[MatLike],
+            region_list: list[tuple[int, Rect | None]],
+            threshold: float = 0,
+    ) -> list[list[OcrMatchResult]]:
+        """
+        对多个区域进行OCR 默认实现为逐个区域裁剪后识别 具体实现可以合并检测和识别
+
+        Args:
+            image_list: 图片列表
+            region_list: 区域列表 每个元素为 (图片下标, 区域) 区域为None时代表整张图片
+            threshold: 匹配阈值
+
+        Returns:
+            每个区域对应的识别结果列表 坐标相对区域左上角
+        """
+        from one_dragon.utils import cv2_utils
+        result_list: list[list[OcrMatchResult]] = []
+        for image_idx, rect in region_list:
+            part = cv2_utils.crop_image_only(image_list[image_idx], rect)
+            result_list.append(self.ocr(part, threshold))
+        return result_list
+
     def crop_and_run_ocr(
             self,
             image: MatLike,
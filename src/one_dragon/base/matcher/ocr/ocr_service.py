@@ -1,10 +1,16 @@
+import hashlib
+import threading
 import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Hashable
 from dataclasses import dataclass
 
 import cv2
 import numpy as np
 from cv2.typing import MatLike
 
+from one_dragon.base.geometry.point import Point
 from one_dragon.base.geometry.rectangle import Rect
 from one_dragon.base.matcher.match_result import MatchResultList
 from one_dragon.base.matcher.ocr.ocr_match_result import OcrMatchResult
@@ -17,8 +23,7 @@ from one_dragon.utils.log_utils import log
 @dataclass(frozen=True)
 class OcrCacheEntry:
     """OCR缓存条目"""
-    image_id: int  # 图片在内存中的ID
-    image: MatLike  # 将图片也缓存起来 防止旧图片没引用被回收 导致出现新图片ID与旧图片重复
+    cache_key: tuple  # 缓存键 由识别图片内容哈希和识别参数组成
     ocr_result_list: list[OcrMatchResult]  # OCR识别结果
     create_time: float  # 创建时间
     color_range: list[list[int]] | None  # 颜色范围
@@ -26,11 +31,42 @@ class OcrCacheEntry:
     crop_first: bool = True  # 先裁剪再识别 用于从连续文本中只提取特定区域的文本
 
 
+@dataclass(frozen=True)
+class OcrRequest:
+    """批量OCR中的单个识别请求 参数含义与 OcrService.get_ocr_result_list 相同"""
+    image: MatLike  # 输入图片
+    rect: Rect | None = None  # 指定区域
+    color_range: list[list[int]] | None = None  # 颜色范围过滤 [[lower], [upper]]
+    crop_first: bool = True  # 先裁剪再识别
+    threshold: float = 0  # OCR阈值
+
+
+@dataclass(frozen=True)
+class _ImageKeyMemo:
+    """同一张图片对象的缓存键记录 避免同一张截图多次计算哈希"""
+    image_ref: weakref.ref  # 图片的弱引用 用于确认图片ID没有被新图片复用 同时不阻止旧截图被回收
+    cache_key: tuple  # 对应的缓存键
+    crop_rect: Rect | None  # 实际的裁剪区域
+
+
+class _TextLineRecord:
+    """固定布局区域的文本行记录"""
+
+    def __init__(self):
+        self.line_rect_list: list[Rect] | None = None  # 已确认的文本行位置
+        self.candidate_rect_list: list[Rect] | None = None  # 上一次文本检测得到的文本行位置
+        self.stable_times: int = 0  # 连续检测得到相同文本行位置的次数
+        self.fast_times: int = 0  # 连续跳过文本检测的次数
+        self.fail_times: int = 0  # 预设的文本行位置 连续识别失败的次数
+        self.backoff_times: int = 0  # 预设的文本行位置识别失败后 剩余需要使用完整识别的次数
+
+
 class OcrService:
     """
     OCR服务
-    - 提供缓存
-    - 提供并发识别 (未实现)
+    - 提供缓存 按识别区域的图片内容哈希缓存 画面不变时新截图也可以命中
+    - 提供批量识别 同一张图片的多个区域只进行一次文字检测 所有文本行合并成一批识别
+    - 提供固定文本行识别 位置固定的文本区域跳过文字检测 只进行识别
 
     缺点：
     - 全图识别后，识别得到的文本无法按选定区域进行精准切割。
@@ -40,42 +76,62 @@ class OcrService:
     def __init__(
         self,
         ocr_matcher: OcrMatcher,
-        max_cache_size: int = 5,
+        max_cache_size: int = 32,
+        cache_ttl: float = 10,
+        text_line_stable_times: int = 3,
+        text_line_min_confidence: float = 0.8,
+        text_line_recheck_times: int = 30,
     ):
         """
         初始化OCR服务
 
         Args:
             ocr_matcher: OCR匹配器实例
-            max_cache_size: 最大缓存条目数
+            max_cache_size: 最大缓存条目数 超出后按最近最少使用淘汰
+            cache_ttl: 缓存有效时间(秒) <=0 时不过期
+            text_line_stable_times: 固定文本行识别 连续多少次检测到相同的文本行位置后 开始跳过文字检测
+            text_line_min_confidence: 固定文本行识别 识别置信度低于该值时 回退到完整的检测+识别
+            text_line_recheck_times: 固定文本行识别 连续跳过文字检测多少次后 重新进行一次完整的检测+识别
         """
         self.ocr_matcher = ocr_matcher
         self.max_cache_size = max_cache_size
+        self.cache_ttl = cache_ttl
 
-        # 缓存存储：key=图片ID，value为缓存条目
-        self._cache: dict[int, list[OcrCacheEntry]] = {}
-        self._cache_list: list[OcrCacheEntry] = []
+        # 缓存存储：key=图片内容哈希+识别参数，value为缓存条目 按使用顺序排列
+        self._cache: OrderedDict[tuple, OcrCacheEntry] = OrderedDict()
+        # 图片对象ID -> 缓存键 同一张截图的重复请求不需要重新计算哈希
+        self._image_key_memo: OrderedDict[tuple, _ImageKeyMemo] = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        self.cache_hit_count: int = 0  # 缓存命中次数
+        self.cache_miss_count: int = 0  # 缓存未命中次数
+
+        self.text_line_stable_times: int = text_line_stable_times
+        self.text_line_min_confidence: float = text_line_min_confidence
+        self.text_line_recheck_times: int = text_line_recheck_times
+        self._text_line_record_map: dict[Hashable, _TextLineRecord] = {}
 
     def _clean_expired_cache(self) -> None:
         """
-        清除过期缓存
+        清除过期和超出数量的缓存 需要在持有锁时调用
         Returns:
 
         """
-        while len(self._cache_list) > self.max_cache_size:
-            oldest_entry = self._cache_list.pop(0)
-            image_id = oldest_entry.image_id
-
-            if image_id in self._cache:
-                # 从与 image_id 关联的列表中移除特定的条目
-                try:
-                    self._cache[image_id].remove(oldest_entry)
-                    # 如果这个 image_id 的列表现在为空，则从字典中移除该键
-                    if not self._cache[image_id]:
-                        self._cache.pop(image_id)
-                except ValueError:
-                    # 在罕见的并发场景下，如果条目已经被移除，可能会发生这种情况，但可以安全地忽略。
-                    pass
+        if self.cache_ttl > 0:
+            expire_time = time.time() - self.cache_ttl
+            # 按使用顺序排列 但过期时间按创建时间 所以需要全部检查一次
+            expired_key_list = [
+                key for key, entry in self._cache.items()
+                if entry.create_time < expire_time
+            ]
+            for key in expired_key_list:
+                self._cache.pop(key, None)
+
+        while len(self._cache) > self.max_cache_size:
+            self._cache.popitem(last=False)
+
+        while len(self._image_key_memo) > self.max_cache_size:
+            self._image_key_memo.popitem(last=False)
 
     def _apply_color_filter(self, image: MatLike, color_range: list[list[int]]) -> MatLike:
         """
@@ -96,40 +152,117 @@ class OcrService:
         mask = cv2.inRange(image, np.array(color_range[0]), np.array(color_range[1]))
         return cv2.cvtColor(mask, cv2.COLOR_GRAY2RGB)
 
-    def _get_ocr_result_list_from_cache(
+    @staticmethod
+    def _hash_image(image: MatLike) -> bytes:
+        """
+        计算图片内容的哈希
+
+        Args:
+            image: 图片
+
+        Returns:
+            内容哈希
+        """
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(str(image.shape).encode())
+        hasher.update(np.ascontiguousarray(image).data)
+        return hasher.digest()
+
+    def _get_image_key(
         self,
         image: MatLike,
         color_range: list[list[int]] | None = None,
         rect: Rect | None = None,
         crop_first: bool = True,
-    ) -> OcrCacheEntry | None:
+    ) -> tuple[tuple, MatLike | None, Rect | None]:
         """
-        从缓存中获取OCR结果
+        获取本次识别的缓存键 以及用于识别的图片
+
+        缓存键使用 颜色过滤和裁剪后 的图片内容哈希，
+        因此只要识别区域的像素不变，即使是新的截图也能命中缓存。
+
         Args:
             image: 输入图片
             color_range: 颜色范围过滤 [[lower], [upper]]
-            rect: 指定区域。识别结果后，筛选在指定区域中出现的结果，即文本所在的矩形有70%以上在指定区域内
-            crop_first: 先裁剪再识别 用于从连续文本中只提取特定区域的文本
+            rect: 指定区域
+            crop_first: 先裁剪再识别
 
         Returns:
-            缓存条目
+            缓存键, 用于识别的图片(同一张图片已计算过缓存键时为None), 实际的裁剪区域
         """
-        image_id = id(image)
-        cache_list = self._cache.get(image_id)
-        if cache_list is None:
-            return None
+        crop_rect_key = (rect.x1, rect.y1, rect.x2, rect.y2) if crop_first and rect is not None else None
+        color_key = None if color_range is None else tuple(tuple(i) for i in color_range)
+        memo_key = (id(image), color_key, crop_rect_key)
+
+        with self._cache_lock:
+            memo = self._image_key_memo.get(memo_key)
+            if memo is not None and memo.image_ref() is image:
+                self._image_key_memo.move_to_end(memo_key)
+                return memo.cache_key, None, memo.crop_rect
+
+        processed_image, crop_rect = self._process_image(image, color_range, rect, crop_first)
+        cache_key = (
+            self._hash_image(processed_image),
+            None if crop_rect is None else (crop_rect.x1, crop_rect.y1),
+        )
+        with self._cache_lock:
+            self._image_key_memo[memo_key] = _ImageKeyMemo(
+                image_ref=weakref.ref(image),
+                cache_key=cache_key,
+                crop_rect=crop_rect,
+            )
+            self._clean_expired_cache()
+        return cache_key, processed_image, crop_rect
 
-        for cache_entry in cache_list:
-            # Python 的列表 == 操作符会自动处理嵌套结构和值的比较 包括None
-            if cache_entry.color_range != color_range:
-                continue
-            if cache_entry.crop_first != crop_first:
-                continue
-            if crop_first and cache_entry.rect != rect:
-                continue
-            return cache_entry
+    def _process_image(
+        self,
+        image: MatLike,
+        color_range: list[list[int]] | None = None,
+        rect: Rect | None = None,
+        crop_first: bool = True,
+    ) -> tuple[MatLike, Rect | None]:
+        """
+        裁剪和颜色过滤 得到用于识别的图片
+
+        Args:
+            image: 输入图片
+            color_range: 颜色范围过滤 [[lower], [upper]]
+            rect: 指定区域
+            crop_first: 先裁剪再识别
+
+        Returns:
+            用于识别的图片, 实际的裁剪区域
+        """
+        crop_rect: Rect | None = None
+        if crop_first and rect is not None:
+            # 颜色过滤是逐像素的 先裁剪再过滤可以减少计算量
+            processed_image, crop_rect = cv2_utils.crop_image(image, rect)
+        else:
+            processed_image = image
+        return self._apply_color_filter(processed_image, color_range), crop_rect
 
-        return None
+    def _get_ocr_result_list_from_cache(self, cache_key: tuple) -> OcrCacheEntry | None:
+        """
+        从缓存中获取OCR结果
+        Args:
+            cache_key: 缓存键
+
+        Returns:
+            缓存条目
+        """
+        with self._cache_lock:
+            cache_entry = self._cache.get(cache_key)
+            if cache_entry is not None and 0 < self.cache_ttl < time.time() - cache_entry.create_time:
+                self._cache.pop(cache_key, None)
+                cache_entry = None
+
+            if cache_entry is None:
+                self.cache_miss_count += 1
+                return None
+
+            self._cache.move_to_end(cache_key)
+            self.cache_hit_count += 1
+            return cache_entry
 
     def get_ocr_result_list(
         self,
@@ -154,31 +287,30 @@ class OcrService:
         Returns:
             ocr_result_list: OCR识别结果列表
         """
-        # 生成缓存键
-        image_id = id(image)
-
-        cache_entity = self._get_ocr_result_list_from_cache(
+        image_key, processed_image, crop_rect = self._get_image_key(
             image=image,
             color_range=color_range,
             rect=rect,
             crop_first=crop_first,
         )
+        cache_key = image_key + (threshold, merge_line_distance)
+
+        cache_entity = self._get_ocr_result_list_from_cache(cache_key)
 
         # 检查缓存
         if cache_entity is not None:
             ocr_result_list = cache_entity.ocr_result_list
         else:
-            # 应用颜色过滤
-            processed_image = self._apply_color_filter(image, color_range)
+            if processed_image is None:
+                processed_image, crop_rect = self._process_image(image, color_range, rect, crop_first)
 
             # 执行OCR
-            if crop_first and rect is not None:
-                crop_image, crop_rect = cv2_utils.crop_image(processed_image, rect)
+            if crop_rect is not None:
                 bus = getattr(self.ocr_matcher, 'overlay_debug_bus', None)
                 if bus is not None:
                     bus.set_crop_offset(crop_rect.x1, crop_rect.y1)
                 ocr_result_list = self.ocr_matcher.ocr(
-                    crop_image,
+                    processed_image,
                     threshold,
                     merge_line_distance,
                 )
@@ -191,33 +323,310 @@ class OcrService:
 
             # 存储到缓存
             cache_entry = OcrCacheEntry(
+                cache_key=cache_key,
                 ocr_result_list=ocr_result_list,
                 create_time=time.time(),
                 color_range=color_range,
-                image_id=image_id,
-                image=image,
                 rect=rect,
                 crop_first=crop_first,
             )
-            if image_id not in self._cache:
-                self._cache[image_id] = []
-            self._cache[image_id].append(cache_entry)
-            self._cache_list.append(cache_entry)
-            self._clean_expired_cache()
+            with self._cache_lock:
+                self._cache[cache_key] = cache_entry
+                self._clean_expired_cache()
 
-        if rect is not None:
-            # 过滤出指定区域内的结果
-            area_result_list: list[OcrMatchResult] = []
+        return self._filter_by_rect(ocr_result_list, rect)
 
-            for ocr_result in ocr_result_list:
-                # 检查匹配结果是否和指定区域重叠
-                if cal_utils.cal_overlap_percent(ocr_result.rect, rect, base=ocr_result.rect) > 0.7:
-                    area_result_list.append(ocr_result)
+    def get_ocr_result_list_by_text_line(
+        self,
+        image: MatLike,
+        rect: Rect,
+        line_key: Hashable,
+        color_range: list[list[int]] | None = None,
+        line_rect_list: list[Rect] | None = None,
+        threshold: float = 0,
+    ) -> list[OcrMatchResult]:
+        """
+        固定布局区域的OCR 先裁剪再识别
 
-            return area_result_list
-        else:
+        - 传入了 line_rect_list 时 直接对这些文本行进行识别 跳过文字检测
+        - 否则使用完整的检测+识别 连续多次检测得到相同的文本行位置后 记录下来并开始跳过文字检测
+        - 跳过文字检测时 识别置信度过低 说明布局发生了变化 回退到完整的检测+识别 并重新学习文本行位置
+        - 预设的文本行位置识别失败后 按失败次数指数退避 期间只使用完整的检测+识别 避免每次都识别两遍
+
+        Args:
+            image: 输入图片
+            rect: 识别区域
+            line_key: 区域的唯一标识 用于记录学习到的文本行位置
+            color_range: 颜色范围过滤 [[lower], [upper]]
+            line_rect_list: 预设的文本行位置
+            threshold: OCR阈值
+
+        Returns:
+            ocr_result_list: OCR识别结果列表
+        """
+        with self._cache_lock:
+            record = self._text_line_record_map.get(line_key)
+            if record is None:
+                record = _TextLineRecord()
+                self._text_line_record_map[line_key] = record
+
+        fixed_rect_list = line_rect_list if line_rect_list is not None else record.line_rect_list
+        if line_rect_list is not None and record.backoff_times > 0:
+            record.backoff_times -= 1
+            fixed_rect_list = None
+        if fixed_rect_list is not None and record.fast_times < self.text_line_recheck_times:
+            image_key, _, _ = self._get_image_key(image=image, color_range=color_range, rect=rect)
+            cache_key = image_key + (threshold, -1, 'text_line')
+            cache_entity = self._get_ocr_result_list_from_cache(cache_key)
+            if cache_entity is not None:
+                return self._filter_by_rect(cache_entity.ocr_result_list, rect)
+
+            ocr_result_list = self._ocr_text_line(image, color_range, fixed_rect_list)
+            if ocr_result_list is not None:
+                record.fast_times += 1
+                record.fail_times = 0
+                ocr_result_list = [i for i in ocr_result_list if i.confidence >= threshold]
+                cache_entry = OcrCacheEntry(
+                    cache_key=cache_key,
+                    ocr_result_list=ocr_result_list,
+                    create_time=time.time(),
+                    color_range=color_range,
+                    rect=rect,
+                )
+                with self._cache_lock:
+                    self._cache[cache_key] = cache_entry
+                    self._clean_expired_cache()
+                return self._filter_by_rect(ocr_result_list, rect)
+
+            # 识别置信度过低 重新学习文本行位置
+            if line_rect_list is not None:
+                record.fail_times += 1
+                record.backoff_times = min(2 ** record.fail_times, self.text_line_recheck_times)
+            record.line_rect_list = None
+            record.candidate_rect_list = None
+            record.stable_times = 0
+
+        record.fast_times = 0
+        ocr_result_list = self.get_ocr_result_list(
+            image=image,
+            color_range=color_range,
+            rect=rect,
+            crop_first=True,
+            threshold=threshold,
+        )
+
+        if line_rect_list is None:
+            new_rect_list = [i.rect for i in ocr_result_list]
+            if len(new_rect_list) > 0 and self._is_same_rect_list(new_rect_list, record.candidate_rect_list):
+                record.stable_times += 1
+            else:
+                record.candidate_rect_list = new_rect_list
+                record.stable_times = 1 if len(new_rect_list) > 0 else 0
+            if record.stable_times >= self.text_line_stable_times:
+                record.line_rect_list = record.candidate_rect_list
+
+        return ocr_result_list
+
+    def _ocr_text_line(
+        self,
+        image: MatLike,
+        color_range: list[list[int]] | None,
+        line_rect_list: list[Rect],
+    ) -> list[OcrMatchResult] | None:
+        """
+        跳过文字检测 直接识别各个文本行
+
+        Args:
+            image: 输入图片
+            color_range: 颜色范围过滤 [[lower], [upper]]
+            line_rect_list: 文本行位置
+
+        Returns:
+            ocr_result_list: OCR识别结果列表 有文本行的置信度过低时返回None
+        """
+        line_image_list: list[MatLike] = []
+        valid_rect_list: list[Rect] = []
+        for line_rect in line_rect_list:
+            line_image, crop_rect = self._process_image(image, color_range, line_rect)
+            if crop_rect.width <= 0 or crop_rect.height <= 0:
+                return None
+            line_image_list.append(line_image)
+            valid_rect_list.append(crop_rect)
+
+        rec_result_list = self.ocr_matcher.ocr_without_det(line_image_list)
+        if len(rec_result_list) != len(valid_rect_list):
+            return None
+
+        ocr_result_list: list[OcrMatchResult] = []
+        for line_rect, (text, score) in zip(valid_rect_list, rec_result_list):
+            if len(text) == 0 or score < self.text_line_min_confidence:
+                return None
+            ocr_result_list.append(
+                OcrMatchResult(
+                    score,
+                    line_rect.x1,
+                    line_rect.y1,
+                    line_rect.width,
+                    line_rect.height,
+                    data=text,
+                )
+            )
+        return ocr_result_list
+
+    @staticmethod
+    def _is_same_rect_list(
+        rect_list: list[Rect],
+        other_rect_list: list[Rect] | None,
+        tolerance: int = 2,
+    ) -> bool:
+        """
+        两组文本行位置是否相同
+
+        Args:
+            rect_list: 文本行位置
+            other_rect_list: 另一组文本行位置
+            tolerance: 允许的像素误差
+
+        Returns:
+            是否相同
+        """
+        if other_rect_list is None or len(rect_list) != len(other_rect_list):
+            return False
+        for r1, r2 in zip(rect_list, other_rect_list):
+            if (
+                abs(r1.x1 - r2.x1) > tolerance
+                or abs(r1.y1 - r2.y1) > tolerance
+                or abs(r1.x2 - r2.x2) > tolerance
+                or abs(r1.y2 - r2.y2) > tolerance
+            ):
+                return False
+        return True
+
+    def get_ocr_result_list_batch(self, request_list: list[OcrRequest]) -> list[list[OcrMatchResult]]:
+        """
+        批量获取OCR结果，优先从缓存获取
+        未命中缓存的请求中，每个区域与单独识别一样裁剪后各自进行文字检测，
+        所有区域的文本行合并成一批进行识别，减少识别模型的调用次数。
+        合并识别时文本行的填充宽度与单独识别不同 置信度可能有细微差异 因此使用单独的缓存。
+
+        Args:
+            request_list: 识别请求列表
+
+        Returns:
+            每个请求对应的OCR识别结果列表 格式与 get_ocr_result_list 的返回一致
+        """
+        result_list: list[list[OcrMatchResult] | None] = [None] * len(request_list)
+
+        # 先从缓存获取 相同的请求只识别一次
+        miss_map: dict[tuple, list[int]] = {}
+        for idx, request in enumerate(request_list):
+            image_key, _, _ = self._get_image_key(
+                image=request.image,
+                color_range=request.color_range,
+                rect=request.rect,
+                crop_first=request.crop_first,
+            )
+            # 批量识别时文本行合并识别 置信度与单独识别不一定相同 不能共用缓存
+            cache_key = image_key + (request.threshold, -1, 'batch')
+            if cache_key in miss_map:
+                miss_map[cache_key].append(idx)
+                continue
+            cache_entity = self._get_ocr_result_list_from_cache(cache_key)
+            if cache_entity is not None:
+                result_list[idx] = cache_entity.ocr_result_list
+            else:
+                miss_map[cache_key] = [idx]
+
+        if len(miss_map) > 0:
+            # 每个区域单独裁剪和检测 与单独识别一致 只有文本行识别合并成一批
+            image_list: list[MatLike] = []
+            region_list: list[tuple[int, Rect | None]] = []
+            region_owner_list: list[tuple[tuple, OcrRequest, Point]] = []  # 缓存键, 请求, 结果偏移
+            empty_key_list: list[tuple[tuple, OcrRequest]] = []  # 区域在图片外的请求
+            for cache_key, idx_list in miss_map.items():
+                request = request_list[idx_list[0]]
+                processed_image, crop_rect = self._process_image(
+                    request.image, request.color_range, request.rect, request.crop_first
+                )
+                if crop_rect is not None and (crop_rect.width <= 0 or crop_rect.height <= 0):
+                    empty_key_list.append((cache_key, request))
+                    continue
+                image_list.append(processed_image)
+                region_list.append((len(image_list) - 1, None))
+                region_owner_list.append((cache_key, request, Point(0, 0) if crop_rect is None else crop_rect.left_top))
+
+            batch_result_list = self.ocr_matcher.ocr_batch(image_list, region_list) if len(region_list) > 0 else []
+
+            new_entry_list: list[OcrCacheEntry] = []
+            for (cache_key, request, offset), ocr_result_list in zip(region_owner_list, batch_result_list):
+                ocr_result_list = [i for i in ocr_result_list if i.confidence >= request.threshold]
+                for ocr_result in ocr_result_list:
+                    ocr_result.add_offset(offset)
+                new_entry_list.append(self._new_cache_entry(cache_key, ocr_result_list, request))
+            for cache_key, request in empty_key_list:
+                new_entry_list.append(self._new_cache_entry(cache_key, [], request))
+
+            with self._cache_lock:
+                for cache_entry in new_entry_list:
+                    self._cache[cache_entry.cache_key] = cache_entry
+                    for idx in miss_map[cache_entry.cache_key]:
+                        result_list[idx] = cache_entry.ocr_result_list
+                self._clean_expired_cache()
+
+        return [
+            self._filter_by_rect(ocr_result_list, request.rect)
+            for ocr_result_list, request in zip(result_list, request_list)
+        ]
+
+    @staticmethod
+    def _new_cache_entry(
+        cache_key: tuple,
+        ocr_result_list: list[OcrMatchResult],
+        request: OcrRequest,
+    ) -> OcrCacheEntry:
+        """
+        创建批量识别请求的缓存条目
+
+        Args:
+            cache_key: 缓存键
+            ocr_result_list: OCR识别结果
+            request: 识别请求
+
+        Returns:
+            缓存条目
+        """
+        return OcrCacheEntry(
+            cache_key=cache_key,
+            ocr_result_list=ocr_result_list,
+            create_time=time.time(),
+            color_range=request.color_range,
+            rect=request.rect,
+            crop_first=request.crop_first,
+        )
+
+    @staticmethod
+    def _filter_by_rect(ocr_result_list: list[OcrMatchResult], rect: Rect | None) -> list[OcrMatchResult]:
+        """
+        过滤出指定区域内的结果 即文本所在的矩形有70%以上在指定区域内
+
+        Args:
+            ocr_result_list: OCR识别结果列表
+            rect: 指定区域 为None时不过滤
+
+        Returns:
+            指定区域内的结果
+        """
+        if rect is None:
             return ocr_result_list
 
+        area_result_list: list[OcrMatchResult] = []
+        for ocr_result in ocr_result_list:
+            # 检查匹配结果是否和指定区域重叠
+            if cal_utils.cal_overlap_percent(ocr_result.rect, rect, base=ocr_result.rect) > 0.7:
+                area_result_list.append(ocr_result)
+
+        return area_result_list
+
     def get_ocr_result_map(
         self,
         image: MatLike,
@@ -303,7 +712,28 @@ class OcrService:
         target_idx = str_utils.find_best_match_by_difflib(target_word, ocr_word_list, cutoff=threshold)
         return target_idx is not None and target_idx >= 0
 
+    def get_cache_stats(self) -> dict[str, float]:
+        """
+        获取缓存统计
+
+        Returns:
+            统计信息 包含命中次数、未命中次数、命中率、当前缓存条目数
+        """
+        with self._cache_lock:
+            total = self.cache_hit_count + self.cache_miss_count
+            return {
+                'hit': self.cache_hit_count,
+                'miss': self.cache_miss_count,
+                'hit_rate': self.cache_hit_count / total if total > 0 else 0,
+                'size': len(self._cache),
+            }
+
     def clear_cache(self) -> None:
         """清空所有缓存"""
-        self._cache.clear()
+        with self._cache_lock:
+            self._cache.clear()
+            self._image_key_memo.clear()
+            self.cache_hit_count = 0
+            self.cache_miss_count = 0
+            self._text_line_record_map.clear()
         log.debug("OCR缓存已清空")
@@ -5,6 +5,7 @@ from typing import Callable, List, Optional
 
 from cv2.typing import MatLike
 
+from one_dragon.base.geometry.rectangle import Rect
 from one_dragon.base.matcher.match_result import MatchResult, MatchResultList
 from one_dragon.base.matcher.ocr import ocr_utils
 from one_dragon.base.matcher.ocr.ocr_match_result import OcrMatchResult
@@ -446,6 +447,101 @@ class OnnxOcrMatcher(OcrMatcher, ZipDownloader):
 
         return ocr_result_list
 
+    def ocr_without_det(self, image_list: list[MatLike]) -> list[tuple[str, float]]:
+        """
+        不进行文本检测 将每张图片当作一行文本直接识别
+
+        Args:
+            image_list: 文本行图片列表
+
+        Returns:
+            每张图片对应的 (识别文本, 置信度)
+        """
+        if len(image_list) == 0:
+            return []
+        if self._model is None and not self.init_model():
+            return [('', 0.0) for _ in image_list]
+
+        start_time = time.time()
+        scan_result: list = self._model.ocr(
+            image_list,
+            det=False,
+            rec=True,
+            cls=self._ocr_param.use_angle_cls
+        )
+        if len(scan_result) == 0:
+            return [('', 0.0) for _ in image_list]
+
+        result_list = [(text, float(score)) for text, score in scan_result[0]]
+        elapsed_ms = (time.time() - start_time) * 1000.0
+        self._emit_overlay_perf_and_timeline(elapsed_ms, len(result_list))
+
+        if log.isEnabledFor(DEBUG):
+            log.debug('OCR结果(无检测) %s 耗时 %.2f', result_list, time.time() - start_time)
+        return result_list
+
+    def ocr_batch(
+            self,
+            image_list: list[MatLike],
+            region_list: list[tuple[int, Rect | None]],
+            threshold: float = 0,
+    ) -> list[list[OcrMatchResult]]:
+        """
+        对多个区域进行OCR
+        每张图片只进行一次文字检测，所有区域的文本行合并成一批进行识别
+
+        Args:
+            image_list: 图片列表
+            region_list: 区域列表 每个元素为 (图片下标, 区域) 区域为None时代表整张图片
+            threshold: 匹配阈值
+
+        Returns:
+            每个区域对应的识别结果列表 坐标相对区域左上角
+        """
+        if self._model is None and not self.init_model():
+            return [[] for _ in region_list]
+
+        start_time = time.time()
+        scan_result_list: list = self._model.ocr_regions(
+            image_list,
+            [
+                (image_idx, None if rect is None else (rect.x1, rect.y1, rect.x2, rect.y2))
+                for image_idx, rect in region_list
+            ],
+            cls=self._ocr_param.use_angle_cls,
+        )
+
+        result_list: list[list[OcrMatchResult]] = []
+        item_count: int = 0
+        for scan_result in scan_result_list:
+            ocr_result_list: list[OcrMatchResult] = []
+            for anchor_position, (anchor_text, anchor_score) in scan_result:
+                if anchor_score < threshold:
+                    continue
+                rect = self._rect_from_anchor(anchor_position)
+                if rect is None:
+                    continue
+                ocr_result_list.append(
+                    OcrMatchResult(
+                        anchor_score,
+                        rect[0],
+                        rect[1],
+                        rect[2],
+                        rect[3],
+                        data=anchor_text,
+                    )
+                )
+            item_count += len(ocr_result_list)
+            result_list.append(ocr_result_list)
+
+        elapsed_ms = (time.time() - start_time) * 1000.0
+        self._emit_overlay_perf_and_timeline(elapsed_ms, item_count)
+
+        if log.isEnabledFor(DEBUG):
+            log.debug('批量OCR %d个区域 耗时 %.2f', len(region_list), time.time() - start_time)
+
+        return result_list
+
     def _emit_overlay_vision(
         self,
         result_map: dict[str, MatchResultList],
@@ -0,0 +1,171 @@
+import threading
+
+import numpy as np
+from cv2.typing import MatLike
+
+
+class _TemplateGroup:
+
+    def __init__(self, idx_list: list[int], template_list: list[MatLike], mask: MatLike | None):
+        """
+        尺寸和掩码都相同的一组模板
+        预先计算好去均值后的模板 匹配时所有模板一起在频域计算相关
+        :param idx_list: 模板在 TemplateBank 中的下标
+        :param template_list: 模板图片 尺寸相同
+        :param mask: 共用的掩码 为None时使用全部像素
+        """
+        self.idx_arr: np.ndarray = np.array(idx_list, dtype=np.int64)
+        self.height: int = template_list[0].shape[0]
+        self.width: int = template_list[0].shape[1]
+
+        if mask is None:
+            self.mask: np.ndarray = np.ones((self.height, self.width), dtype=np.float64)
+        else:
+            self.mask: np.ndarray = (mask > 0).astype(np.float64)
+        self.mask_sum: float = float(self.mask.sum())
+
+        # [模板, 通道, 高, 宽] 掩码内减去各通道的均值 掩码外为0
+        stack = np.stack([_to_chw(i) for i in template_list]).astype(np.float64)
+        mean = (stack * self.mask).sum(axis=(2, 3), keepdims=True) / max(self.mask_sum, 1)
+        self.template_zero_mean: np.ndarray = (stack - mean) * self.mask
+        self.template_norm: np.ndarray = (self.template_zero_mean ** 2).sum(axis=(1, 2, 3))
+
+        # 按原图的尺寸缓存频谱 key=(fft高, fft宽)
+        self._spectrum_cache: dict[tuple[int, int], tuple[np.ndarray, np.ndarray]] = {}
+        self._spectrum_lock = threading.Lock()
+
+    def get_spectrum(self, fft_height: int, fft_width: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        获取模板和掩码频谱的共轭 用于计算相关
+        :param fft_height: fft的高度
+        :param fft_width: fft的宽度
+        :return: 模板频谱 [模板, 通道, 高, 宽] 掩码频谱 [高, 宽]
+        """
+        key = (fft_height, fft_width)
+        spectrum = self._spectrum_cache.get(key)
+        if spectrum is not None:
+            return spectrum
+
+        with self._spectrum_lock:
+            spectrum = self._spectrum_cache.get(key)
+            if spectrum is None:
+                template_spectrum = np.conj(np.fft.rfft2(self.template_zero_mean, s=key)).astype(np.complex64)
+                mask_spectrum = np.conj(np.fft.rfft2(self.mask, s=key))
+                spectrum = (template_spectrum, mask_spectrum)
+                self._spectrum_cache[key] = spectrum
+            return spectrum
+
+    def match(self, source: np.ndarray) -> np.ndarray:
+        """
+        计算原图和组内所有模板在每个位置的匹配度
+        :param source: 原图 [通道, 高, 宽] 已减去各通道均值
+        :return: 匹配度 [模板, 高, 宽] 和 cv2.TM_CCOEFF_NORMED 一致
+        """
+        _, source_height, source_width = source.shape
+        fft_size = (_get_fft_size(source_height), _get_fft_size(source_width))
+        result_height = source_height - self.height + 1
+        result_width = source_width - self.width + 1
+        template_spectrum, mask_spectrum = self.get_spectrum(*fft_size)
+
+        source_spectrum = np.fft.rfft2(source, s=fft_size)
+        source_sq_spectrum = np.fft.rfft2((source ** 2).sum(axis=0), s=fft_size)
+
+        # 分子 模板已去均值 原图窗口内的均值项为0
+        numerator = np.fft.irfft2(
+            (source_spectrum.astype(np.complex64)[np.newaxis] * template_spectrum).sum(axis=1),
+            s=fft_size
+        )[:, :result_height, :result_width]
+
+        # 分母 原图每个窗口在掩码内的方差
+        window_sum = np.fft.irfft2(source_spectrum * mask_spectrum, s=fft_size)[:, :result_height, :result_width]
+        window_sq_sum = np.fft.irfft2(source_sq_spectrum * mask_spectrum, s=fft_size)[:result_height, :result_width]
+        window_var = np.maximum(window_sq_sum - (window_sum ** 2).sum(axis=0) / self.mask_sum, 0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return numerator / np.sqrt(window_var[np.newaxis] * self.template_norm[:, np.newaxis, np.newaxis])
+
+
+class TemplateBank:
+
+    def __init__(self, template_id_list: list[str], image_list: list[MatLike], mask_list: list[MatLike | None]):
+        """
+        一组模板的预计算结果 一次调用就能得到原图和所有模板的匹配度
+        结果与逐个使用 cv2.matchTemplate(TM_CCOEFF_NORMED) 加模板掩码一致
+        尺寸和掩码相同的模板会合并成一组 在频域一起计算
+        :param template_id_list: 模板id
+        :param image_list: 模板图片 为None的模板不参与匹配 匹配度固定为 -inf
+        :param mask_list: 模板掩码 没有掩码时为None
+        """
+        self.template_id_list: list[str] = template_id_list
+        self._group_list: list[_TemplateGroup] = []
+
+        group_map: dict[tuple, tuple[list[int], list[MatLike], MatLike | None]] = {}
+        for idx, (image, mask) in enumerate(zip(image_list, mask_list)):
+            if image is None:
+                continue
+            key = (image.shape, None if mask is None else (mask > 0).tobytes())
+            if key not in group_map:
+                group_map[key] = ([], [], mask)
+            group_map[key][0].append(idx)
+            group_map[key][1].append(image)
+
+        for idx_list, group_image_list, mask in group_map.values():
+            self._group_list.append(_TemplateGroup(idx_list, group_image_list, mask))
+
+    def match(self, source: MatLike) -> np.ndarray:
+        """
+        计算原图和每个模板的最佳匹配度
+        :param source: 原图 通道数需要和模板一致
+        :return: 每个模板在所有位置中最高的匹配度 模板比原图大或无法计算时为 -inf
+        """
+        scores = np.full((len(self.template_id_list),), -np.inf, dtype=np.float64)
+        chw = _to_chw(source).astype(np.float64)
+        chw -= chw.mean(axis=(1, 2), keepdims=True)  # 减去均值不影响结果 可以减少fft的精度损失
+
+        for group in self._group_list:
+            if group.height > chw.shape[1] or group.width > chw.shape[2]:
+                continue
+            result = group.match(chw).reshape(len(group.idx_arr), -1)
+            result[~np.isfinite(result)] = -np.inf
+            scores[group.idx_arr] = result.max(axis=1)
+
+        return scores
+
+    def match_best(self, source: MatLike, threshold: float = 0.5) -> tuple[str | None, float]:
+        """
+        找出和原图最匹配的模板
+        :param source: 原图
+        :param threshold: 匹配阈值
+        :return: 最匹配的模板id和匹配度 没有达到阈值的模板时 模板id为None
+        """
+        scores = self.match(source)
+        if len(scores) == 0:
+            return None, 0
+        idx = int(np.argmax(scores))
+        score = float(scores[idx])
+        if score < threshold:
+            return None, score
+        return self.template_id_list[idx], score
+
+
+def _to_chw(image: MatLike) -> np.ndarray:
+    """
+    转化成 [通道, 高, 宽]
+    """
+    if image.ndim == 2:
+        return image[np.newaxis]
+    return image.transpose(2, 0, 1)
+
+
+def _get_fft_size(size: int) -> int:
+    """
+    不小于 size 的只包含 2 3 5 因子的长度 fft计算更快
+    """
+    while True:
+        n = size
+        for p in (2, 3, 5):
+            while n % p == 0:
+                n //= p
+        if n == 1:
+            return size
+        size += 1
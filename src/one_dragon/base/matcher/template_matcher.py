@@ -1,8 +1,12 @@
+import threading
+from collections import OrderedDict
+
 import cv2
 from cv2.typing import MatLike
 
 from one_dragon.base.geometry.rectangle import Rect
 from one_dragon.base.matcher.match_result import MatchResult, MatchResultList
+from one_dragon.base.matcher.template_bank import TemplateBank
 from one_dragon.base.screen.template_info import TemplateInfo
 from one_dragon.base.screen.template_loader import TemplateLoader
 from one_dragon.utils import cv2_utils
@@ -11,10 +15,14 @@ from one_dragon.utils.log_utils import log
 
 class TemplateMatcher:
 
-    def __init__(self, template_loader: TemplateLoader):
+    def __init__(self, template_loader: TemplateLoader, max_template_bank_size: int = 16):
         self.template_loader: TemplateLoader = template_loader
         self.overlay_debug_bus = None
 
+        self.max_template_bank_size: int = max_template_bank_size  # 最多缓存多少组模板
+        self._template_bank_cache: OrderedDict[tuple, TemplateBank] = OrderedDict()
+        self._template_bank_lock = threading.Lock()
+
     def match_template(self, source: MatLike,
                        template_sub_dir: str,
                        template_id: str,
@@ -52,6 +60,60 @@ class TemplateMatcher:
         self._emit_overlay_vision(template_sub_dir, template_id, result)
         return result
 
+    def get_template_bank(self, template_sub_dir: str, template_id_list: list[str]) -> TemplateBank:
+        """
+        获取一组模板的预计算结果 相同的模板列表会复用
+        未加载的模板不参与匹配
+        :param template_sub_dir: 模板的子文件夹
+        :param template_id_list: 模板id列表
+        :return:
+        """
+        key = (template_sub_dir, tuple(template_id_list))
+        with self._template_bank_lock:
+            bank = self._template_bank_cache.get(key)
+            if bank is not None:
+                self._template_bank_cache.move_to_end(key)
+                return bank
+
+        image_list: list[MatLike | None] = []
+        mask_list: list[MatLike | None] = []
+        for template_id in template_id_list:
+            template = self.template_loader.get_template(template_sub_dir, template_id)
+            if template is None:
+                log.error(f'未加载模板 {template_id}')
+            image_list.append(None if template is None else template.raw)
+            mask_list.append(None if template is None else template.mask)
+        bank = TemplateBank(list(template_id_list), image_list, mask_list)
+
+        with self._template_bank_lock:
+            self._template_bank_cache[key] = bank
+            while len(self._template_bank_cache) > self.max_template_bank_size:
+                self._template_bank_cache.popitem(last=False)
+        return bank
+
+    def match_template_bank(self, source: MatLike,
+                            template_sub_dir: str,
+                            template_id_list: list[str],
+                            threshold: float = 0.5) -> tuple[str | None, float]:
+        """
+        一次性匹配多个模板 返回最匹配的一个
+        结果和对每个模板使用 match_template 后取最高匹配度一致
+        :param source: 原图
+        :param template_sub_dir: 模板的子文件夹
+        :param template_id_list: 模板id列表
+        :param threshold: 匹配阈值
+        :return: 最匹配的模板id和匹配度 没有达到阈值的模板时 模板id为None
+        """
+        bank = self.get_template_bank(template_sub_dir, template_id_list)
+        return bank.match_best(source, threshold=threshold)
+
+    def clear_template_bank(self) -> None:
+        """
+        清除缓存的模板组 模板修改后使用
+        """
+        with self._template_bank_lock:
+            self._template_bank_cache.clear()
+
     def match_one_by_feature(self, source: MatLike,
                              template_sub_dir: str,
                              template_id: str,
@@ -110,7 +172,7 @@ class TemplateMatcher:
 
         # 对原图和模板都进行二值化处理
         source_binary = cv2_utils.to_binary(source, threshold=binary_threshold)
-        template_binary = cv2_utils.to_binary(template.raw, threshold=binary_threshold)
+        template_binary = template.get_binary(threshold=binary_threshold)
 
         # 处理掩码
         mask_usage: MatLike | None = None
@@ -36,7 +36,7 @@ from one_dragon.base.operation.one_dragon_env_context import (
 from one_dragon.base.push.push_service import PushService
 from one_dragon.base.screen.screen_loader import ScreenContext
 from one_dragon.base.screen.template_loader import TemplateLoader
-from one_dragon.utils import debug_utils, file_utils, i18_utils, log_utils, thread_utils
+from one_dragon.utils import debug_utils, file_utils, i18_utils, log_utils, os_utils, thread_utils
 from one_dragon.utils.log_utils import log
 
 
@@ -67,6 +67,7 @@ class OneDragonContext(ContextEventBus, OneDragonEnvContext):
         self.template_loader: TemplateLoader = TemplateLoader()
         self.tm: TemplateMatcher = TemplateMatcher(self.template_loader)
         self.tm.overlay_debug_bus = self.overlay_debug_bus
+        self.template_warm_up: bool = True  # 初始化时 是否在后台预加载画面中使用的模板
 
         self.ocr: OcrMatcher = OnnxOcrMatcher(
             OnnxOcrParam(
@@ -273,10 +274,13 @@ class OneDragonContext(ContextEventBus, OneDragonEnvContext):
                 self.app_group_manager.set_default_apps(self.run_context.default_group_apps)
                 self._application_registered = True
 
+            self.init_onnx_session_config()
             self.init_ocr()
 
             self.screen_loader.reload()
             self._load_plugin_screens()
+            if self.template_warm_up:
+                self.template_loader.warm_up_async(self.screen_loader.get_template_list())
 
             # 账号实例层级的配置 不是应用特有的配置
             self.reload_instance_config()
@@ -309,6 +313,30 @@ class OneDragonContext(ContextEventBus, OneDragonEnvContext):
         """
         pass
 
+    def init_replay_controller(self, source_path: str, realtime: bool = True,
+                               speed: float = 1.0, loop: bool = False) -> bool:
+        """
+        使用回放控制器代替游戏控制器 截图来自录制好的图片或视频
+        用于在没有游戏窗口的环境下测试识别流程的耗时
+        :param source_path: 回放来源 图片目录或视频文件
+        :param realtime: True 时按录制时的时间回放 False 时每次截图返回下一帧
+        :param speed: 按时间回放时的速度倍率
+        :param loop: 回放结束后是否从头开始
+        :return: 是否成功加载回放来源
+        """
+        from one_dragon.base.controller.replay_controller import ReplayController
+        if self.controller is not None:
+            self.controller.cleanup_after_app_shutdown()
+        self.controller = ReplayController(
+            source_path,
+            standard_width=self.project_config.screen_standard_width,
+            standard_height=self.project_config.screen_standard_height,
+            realtime=realtime,
+            speed=speed,
+            loop=loop,
+        )
+        return self.controller.init_before_context_run()
+
     def init_for_application(self) -> None:
         """
         执行应用前 还需要做的初始化
@@ -479,6 +507,21 @@ class OneDragonContext(ContextEventBus, OneDragonEnvContext):
             if prop in self.__dict__:
                 del self.__dict__[prop]
 
+    def init_onnx_session_config(self) -> None:
+        """
+        按模型配置更新创建ONNX session时的配置 只对之后新加载的模型生效
+        :return:
+        """
+        from one_dragon.utils import onnx_session_factory  # onnxruntime 在加载模型时才需要
+        onnx_session_factory.update_config(
+            intra_op_num_threads=self.model_config.onnx_intra_op_num_threads,
+            optimized_model_dir=(
+                os_utils.get_path_under_work_dir('.cache', 'onnx_optimized')
+                if self.model_config.onnx_cache_optimized_model
+                else None
+            ),
+        )
+
     def init_ocr(self) -> None:
         """
         初始化OCR
@@ -11,6 +11,7 @@ import numpy as np
 from cv2.typing import MatLike
 
 from one_dragon.base.geometry.point import Point
+from one_dragon.base.geometry.rectangle import Rect
 from one_dragon.base.matcher.match_result import MatchResultList
 from one_dragon.base.matcher.ocr import ocr_utils
 from one_dragon.base.operation.application.application_run_context import (
@@ -25,6 +26,7 @@ from one_dragon.base.operation.operation_round_result import (
     OperationRoundResultEnum,
 )
 from one_dragon.base.screen import screen_utils
+from one_dragon.base.screen.frame_change_detector import FrameChangeDetector
 from one_dragon.base.screen.screen_area import ScreenArea
 from one_dragon.base.screen.screen_utils import FindAreaResultEnum, OcrClickResultEnum
 from one_dragon.utils import debug_utils, str_utils
@@ -183,6 +185,9 @@ class Operation(OperationBase):
         self.node_status: dict[str, NodeStateProxy] = {}
         """已保存节点状态的字典"""
 
+        self.frame_change_detector: FrameChangeDetector = FrameChangeDetector()
+        """判断识别区域是否变化 节点开启 reuse_unchanged_frame 时使用"""
+
     def _init_before_execute(self):
         """在操作开始前初始化执行状态。
 
@@ -207,6 +212,7 @@ class Operation(OperationBase):
         self._current_node_start_time = now
         self._previous_round_result = None
         self.node_status.clear()
+        self.frame_change_detector.clear()
 
         # 监听事件
         self.ctx.run_context.event_bus.unlisten_all_event(self)
@@ -574,6 +580,7 @@ class Operation(OperationBase):
         self.node_retry_times = 0  # 每个节点都可以重试
         self._current_node_start_time = time.time()  # 每个节点单独计算耗时
         self.node_clicked = False  # 重置节点点击
+        self.frame_change_detector.clear()  # 识别结果只在同一个节点内复用
 
     def _on_pause(self, e=None):
         """操作暂停时触发的回调。
@@ -655,6 +662,43 @@ class Operation(OperationBase):
             prefix = self.__class__.__name__
         return debug_utils.save_debug_image(self.last_screenshot, prefix=prefix)
 
+    def run_on_changed_frame(self, key: tuple, screen: MatLike, rect: Rect | None, func: Callable[[], Any]) -> Any:
+        """在识别区域变化时才执行识别。
+
+        当前节点开启了 reuse_unchanged_frame 且区域与上一轮识别时完全一致时，
+        直接返回上一轮的识别结果，否则执行识别。
+
+        Args:
+            key: 识别方法和参数，相同key的结果才能复用。
+            screen: 截图图像。
+            rect: 识别使用的区域，为None时使用整张截图。
+            func: 识别方法。
+
+        Returns:
+            Any: 识别结果。
+        """
+        if self._current_node is None or not self._current_node.reuse_unchanged_frame or screen is None:
+            return func()
+        return self.frame_change_detector.get_or_run(key, screen, rect, func)
+
+    def _get_area_rect_for_reuse(self, screen_name: str, area_name: str, crop_first: bool) -> Rect | None:
+        """获取判断区域是否变化时使用的范围。
+
+        不先裁剪时识别的是整张截图，需要比较整张截图。
+
+        Args:
+            screen_name: 屏幕名称。
+            area_name: 区域名称。
+            crop_first: 是否先裁剪再进行识别。
+
+        Returns:
+            Rect | None: 比较的范围，为None时比较整张截图。
+        """
+        if not crop_first:
+            return None
+        area = self.ctx.screen_loader.get_area(screen_name, area_name)
+        return None if area is None else area.rect
+
     @cached_property
     def display_name(self) -> str:
         """获取此操作的显示名称。
@@ -774,6 +818,18 @@ class Operation(OperationBase):
             )
         )
 
+        if self._current_node is not None and self._current_node.reuse_unchanged_frame:
+            stats = self.frame_change_detector.get_stats()
+            bus.add_performance(
+                PerfMetricSample(
+                    metric="frame_reuse_rate",
+                    value=stats['hit_rate'] * 100,
+                    unit="%",
+                    ttl_seconds=20.0,
+                    meta={"operation": self.op_name, **stats},
+                )
+            )
+
     def round_success(self, status: str | None = None, data: Any = None,
                       wait: float | None = None, wait_round_time: float | None = None) -> OperationRoundResult:
         """创建成功的轮次结果。
@@ -1005,12 +1061,17 @@ class Operation(OperationBase):
         Returns:
             OperationRoundResult: 匹配结果。
         """
-        result = screen_utils.find_area(
-            ctx=self.ctx,
+        result = self.run_on_changed_frame(
+            key=('find_area', screen_name, area_name, crop_first),
             screen=screen,
-            screen_name=screen_name,
-            area_name=area_name,
-            crop_first=crop_first,
+            rect=self._get_area_rect_for_reuse(screen_name, area_name, crop_first),
+            func=lambda: screen_utils.find_area(
+                ctx=self.ctx,
+                screen=screen,
+                screen_name=screen_name,
+                area_name=area_name,
+                crop_first=crop_first,
+            ),
         )
         if result == FindAreaResultEnum.AREA_NO_CONFIG:
             return self.round_fail(status=f'区域未配置 {area_name}')
@@ -1048,13 +1109,18 @@ class Operation(OperationBase):
         Returns:
             OperationRoundResult: 匹配结果。
         """
-        result = screen_utils.find_area_binary(
-            ctx=self.ctx,
+        result = self.run_on_changed_frame(
+            key=('find_area_binary', screen_name, area_name, binary_threshold, crop_first),
             screen=screen,
-            screen_name=screen_name,
-            area_name=area_name,
-            binary_threshold=binary_threshold,
-            crop_first=crop_first,
+            rect=self._get_area_rect_for_reuse(screen_name, area_name, crop_first),
+            func=lambda: screen_utils.find_area_binary(
+                ctx=self.ctx,
+                screen=screen,
+                screen_name=screen_name,
+                area_name=area_name,
+                binary_threshold=binary_threshold,
+                crop_first=crop_first,
+            ),
         )
         if result == FindAreaResultEnum.AREA_NO_CONFIG:
             return self.round_fail(status=f'区域未配置 {area_name}')
@@ -1383,9 +1449,16 @@ class Operation(OperationBase):
         Returns:
             OperationRoundResult: 匹配结果。
         """
-        if screen_utils.find_by_ocr(self.ctx, screen, target_cn,
-                                    lcs_percent=lcs_percent,
-                                    area=area, color_range=color_range):
+        area_key = None if area is None else (area.x1, area.y1, area.x2, area.y2, area.lcs_percent, str(area.color_range))
+        found = self.run_on_changed_frame(
+            key=('find_by_ocr', target_cn, area_key, lcs_percent, str(color_range)),
+            screen=screen,
+            rect=None if area is None else area.rect,
+            func=lambda: screen_utils.find_by_ocr(self.ctx, screen, target_cn,
+                                                  lcs_percent=lcs_percent,
+                                                  area=area, color_range=color_range),
+        )
+        if found:
             return self.round_success(target_cn, wait=success_wait, wait_round_time=success_wait_round)
         else:
             return self.round_retry(f'找不到 {target_cn}', wait=retry_wait, wait_round_time=retry_wait_round)
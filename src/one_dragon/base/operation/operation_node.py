@@ -19,6 +19,7 @@ class OperationNode:
             mute: bool = False,
             screenshot_before_round: bool = True,
             save_status: bool = False,
+            reuse_unchanged_frame: bool = False,
     ):
         """
 
@@ -34,6 +35,7 @@ class OperationNode:
             mute: 是否不显示当前节点的结果日志
             screenshot_before_round: 当前节点每次运行前是否自动截图
             save_status: 是否保存当前状态到列表中
+            reuse_unchanged_frame: 识别区域和上一轮完全一致时 是否直接复用上一轮的识别结果 适合等待加载等画面长时间不变的节点
         """
 
         self.cn: str = cn
@@ -69,6 +71,9 @@ class OperationNode:
         self.save_status: bool = save_status
         """是否保存当前状态到列表中"""
 
+        self.reuse_unchanged_frame: bool = reuse_unchanged_frame
+        """识别区域和上一轮完全一致时 是否直接复用上一轮的识别结果"""
+
 def operation_node(
         name: str,
         retry_on_op_fail: bool = False,
@@ -79,6 +84,7 @@ def operation_node(
         mute: bool = False,
         screenshot_before_round: bool = True,
         save_status: bool = False,
+        reuse_unchanged_frame: bool = False,
 ):
     def decorator(func):
         # 直接将 node 对象作为函数的一个属性附加到函数上
@@ -93,6 +99,7 @@ def operation_node(
             mute=mute,
             screenshot_before_round=screenshot_before_round,
             save_status=save_status,
+            reuse_unchanged_frame=reuse_unchanged_frame,
         )
         setattr(func, 'operation_node_annotation', node)
         return func
@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+from cv2.typing import MatLike
+
+from one_dragon.base.geometry.rectangle import Rect
+
+
+class FrameChangeDetector:
+
+    def __init__(self, max_size: int = 32):
+        """
+        判断截图的区域和上次识别时是否完全一致 一致时直接复用上次的识别结果
+        用于加载画面等需要反复等待的节点 画面没有变化时不需要重复进行模板匹配和OCR
+        Args:
+            max_size: 最多保存多少个识别结果 超过时淘汰最久未使用的
+        """
+        self.max_size: int = max_size
+
+        # key=识别方法和参数 value=(识别时的区域图片, 识别结果)
+        self._cache: OrderedDict[tuple, tuple[np.ndarray, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 统计
+        self.hit_cnt: int = 0  # 复用结果的次数
+        self.miss_cnt: int = 0  # 需要重新识别的次数
+        self.compare_ms: float = 0  # 比较区域的总耗时
+
+    def get_or_run(self, key: tuple, screen: MatLike, rect: Rect | None, func: Callable[[], Any]) -> Any:
+        """
+        区域和上次一致时返回上次的结果 否则重新识别并记录
+        Args:
+            key: 识别方法和参数 相同key的结果才能复用
+            screen: 游戏截图
+            rect: 识别使用的区域 为None时使用整张截图
+            func: 识别方法
+
+        Returns:
+            Any: 识别结果
+        """
+        part = _crop(screen, rect)
+
+        start_time = time.perf_counter()
+        with self._lock:
+            item = self._cache.get(key)
+        unchanged = (item is not None
+                     and item[0].shape == part.shape
+                     and np.array_equal(item[0], part))
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+        with self._lock:
+            self.compare_ms += elapsed_ms
+            if unchanged:
+                self.hit_cnt += 1
+                self._cache.move_to_end(key)
+                return item[1]
+            self.miss_cnt += 1
+
+        result = func()
+
+        with self._lock:
+            # 截图可能来自复用的缓冲区 需要复制保存
+            self._cache[key] = (part.copy(), result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+        return result
+
+    def clear(self) -> None:
+        """
+        清除保存的识别结果 统计不清除
+        """
+        with self._lock:
+            self._cache.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hit_cnt + self.miss_cnt
+        return self.hit_cnt / total if total > 0 else 0
+
+    def get_stats(self) -> dict[str, float]:
+        """
+        Returns:
+            dict[str, float]: 复用统计 耗时单位毫秒
+        """
+        with self._lock:
+            return {
+                'hit': self.hit_cnt,
+                'miss': self.miss_cnt,
+                'hit_rate': self.hit_rate,
+                'compare_ms': self.compare_ms,
+            }
+
+
+def _crop(screen: MatLike, rect: Rect | None) -> np.ndarray:
+    """
+    截取区域 超出截图的部分会被忽略
+    """
+    if rect is None:
+        return screen
+    return screen[max(rect.y1, 0):max(rect.y2, 0), max(rect.x1, 0):max(rect.x2, 0)]
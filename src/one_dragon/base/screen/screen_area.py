@@ -20,6 +20,8 @@ class ScreenArea:
         goto_list: list[str] | None = None,
         color_range: list[list[int]] | None = None,
         gamepad_key: str | None = None,
+        fixed_text_line: bool = False,
+        text_line_rect_list: list[Rect] | None = None,
     ):
         self.area_name: str = area_name or ''
         self.pc_rect: Rect = pc_rect if pc_rect is not None else Rect(0, 0, 0, 0)
@@ -33,6 +35,16 @@ class ScreenArea:
         self.goto_list: list[str] = [] if goto_list is None else goto_list  # 交互后 可能会跳转的画面名称列表
         self.color_range: list[list[int]] | None = color_range  # 识别时候的筛选的颜色范围 文本时候有效
         self.gamepad_key: str | None = gamepad_key  # GamepadActionEnum 动作名 如 'menu', 'compendium'
+        self.fixed_text_line: bool = fixed_text_line  # 文本行位置固定 连续多次检测结果一致后跳过文本检测 只进行识别
+        self.text_line_rect_list: list[Rect] | None = text_line_rect_list  # 预设的文本行位置 存在时直接跳过文本检测
+
+    @property
+    def use_text_line_ocr(self) -> bool:
+        """
+        是否使用固定文本行识别
+        :return:
+        """
+        return self.is_text_area and (self.fixed_text_line or self.text_line_rect_list is not None)
 
     @property
     def rect(self) -> Rect:
@@ -118,5 +130,9 @@ class ScreenArea:
         order_dict['goto_list'] = self.goto_list
         if self.gamepad_key:
             order_dict['gamepad_key'] = self.gamepad_key
+        if self.fixed_text_line:
+            order_dict['fixed_text_line'] = self.fixed_text_line
+        if self.text_line_rect_list is not None:
+            order_dict['text_line_rect_list'] = [[r.x1, r.y1, r.x2, r.y2] for r in self.text_line_rect_list]
 
         return order_dict
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from cv2.typing import MatLike
+
+from one_dragon.base.matcher.ocr.ocr_match_result import OcrMatchResult
+from one_dragon.base.matcher.ocr.ocr_service import OcrRequest
+from one_dragon.base.screen import screen_utils
+from one_dragon.base.screen.screen_area import ScreenArea
+from one_dragon.base.screen.screen_info import ScreenInfo
+from one_dragon.utils import str_utils
+from one_dragon.utils.i18_utils import gt
+
+if TYPE_CHECKING:
+    from one_dragon.base.operation.one_dragon_context import OneDragonContext
+
+
+class ScreenMark:
+
+    def __init__(self, area: ScreenArea):
+        """
+        画面的一个标识区域 (id_mark)
+        Args:
+            area: 区域
+        """
+        self.area: ScreenArea = area
+        self.is_template: bool = area.is_template_area and not area.is_text_area
+        self.is_ocr: bool = area.is_text_area
+
+        # 相同的key只需要识别一次
+        if self.is_template:
+            self.key: tuple = ('template', area.template_sub_dir, area.template_id,
+                               area.x1, area.y1, area.x2, area.y2, area.template_match_threshold)
+        elif self.is_ocr:
+            self.key: tuple = ocr_region_key(area)
+        else:
+            self.key: tuple = ('none', id(area))
+
+        self.share_cnt: int = 1  # 使用相同key的画面数量 越少越能区分画面
+        self.check_cnt: int = 0  # 判断次数
+        self.fail_cnt: int = 0  # 判断不通过的次数
+
+    @property
+    def fail_rate(self) -> float:
+        return self.fail_cnt / self.check_cnt if self.check_cnt > 0 else 0
+
+
+class CompiledScreen:
+
+    def __init__(self, screen_info: ScreenInfo):
+        """
+        编译后的画面 标识区域按类型拆分
+        Args:
+            screen_info: 画面
+        """
+        self.screen_name: str = screen_info.screen_name
+        self.template_mark_list: list[ScreenMark] = []
+        self.ocr_mark_list: list[ScreenMark] = []
+        self.other_mark_list: list[ScreenMark] = []  # 既不是文本也不是模板 无法匹配
+
+        for area in screen_info.area_list:
+            if not area.id_mark:
+                continue
+            mark = ScreenMark(area)
+            if mark.is_template:
+                self.template_mark_list.append(mark)
+            elif mark.is_ocr:
+                self.ocr_mark_list.append(mark)
+            else:
+                self.other_mark_list.append(mark)
+
+        # 统计
+        self.check_cnt: int = 0  # 判断次数
+        self.match_cnt: int = 0  # 判断为该画面的次数
+        self.total_ms: float = 0  # 判断的总耗时
+        self.max_ms: float = 0  # 判断的最大耗时
+
+    @property
+    def has_mark(self) -> bool:
+        return len(self.template_mark_list) + len(self.ocr_mark_list) + len(self.other_mark_list) > 0
+
+
+class _FrameResult:
+
+    def __init__(self, ctx: OneDragonContext, screen: MatLike, crop_first: bool):
+        """
+        一帧画面的识别结果 相同的标识区域只识别一次
+        """
+        self.ctx: OneDragonContext = ctx
+        self.screen: MatLike = screen
+        self.crop_first: bool = crop_first
+        self.template_result: dict[tuple, bool] = {}
+        self.ocr_result: dict[tuple, list[OcrMatchResult]] = {}
+
+    def check_template(self, mark: ScreenMark) -> bool:
+        result = self.template_result.get(mark.key)
+        if result is None:
+            area = mark.area
+            mrl = self.ctx.tm.crop_and_match_template(self.screen, area.rect, area.template_sub_dir, area.template_id,
+                                                      threshold=area.template_match_threshold)
+            result = mrl.max is not None
+            self.template_result[mark.key] = result
+        return result
+
+    def prefetch_ocr(self, mark_list: list[ScreenMark]) -> None:
+        """
+        一个画面有多个还没识别的OCR标识时 合并成一次批量识别 各区域单独检测 文本行合并成一批识别
+        按文本行识别的区域有自己的识别方式 不参与合并
+        """
+        if not self.crop_first:
+            return
+        to_ocr_map: dict[tuple, ScreenMark] = {}
+        for mark in mark_list:
+            if mark.key in self.ocr_result or mark.area.use_text_line_ocr:
+                continue
+            to_ocr_map[mark.key] = mark
+        if len(to_ocr_map) < 2:
+            return
+
+        to_ocr_list = list(to_ocr_map.values())
+        result_list = self.ctx.ocr_service.get_ocr_result_list_batch([
+            OcrRequest(image=self.screen, rect=mark.area.rect, color_range=mark.area.color_range)
+            for mark in to_ocr_list
+        ])
+        for mark, ocr_result_list in zip(to_ocr_list, result_list):
+            self.ocr_result[mark.key] = ocr_result_list
+
+    def check_ocr(self, mark: ScreenMark) -> bool:
+        ocr_result_list = self.ocr_result.get(mark.key)
+        if ocr_result_list is None:
+            ocr_result_list = screen_utils.get_area_ocr_result_list(self.ctx, self.screen, mark.area, self.crop_first)
+            self.ocr_result[mark.key] = ocr_result_list
+
+        target = gt(mark.area.text, 'game')
+        for ocr_result in ocr_result_list:
+            if str_utils.find_by_lcs(target, ocr_result.data, percent=mark.area.lcs_percent):
+                return True
+        return False
+
+
+class ScreenClassifier:
+
+    def __init__(self, screen_info_list: list[ScreenInfo]):
+        """
+        根据所有画面的标识区域编译的画面识别器
+        - 按优先级逐个判断画面 匹配到就返回 后面的画面不再识别
+        - 每个画面先判断模板标识 它们比OCR便宜很多 可以提前排除大部分画面
+        - 相同区域的模板匹配和OCR只进行一次 结果给所有使用该区域的画面共用
+        - 模板标识都通过后 画面的多个OCR标识合并成一次批量识别
+        - 每个画面的OCR标识按区分能力排序 有一个不通过就提前结束
+        除批量识别的置信度可能有细微差异外 结果与按顺序对每个画面调用 screen_utils.is_target_screen 一致
+        Args:
+            screen_info_list: 画面列表
+        """
+        self.screen_map: dict[str, CompiledScreen] = {}
+        for screen_info in screen_info_list:
+            self.screen_map[screen_info.screen_name] = CompiledScreen(screen_info)
+
+        key_cnt: dict[tuple, int] = {}
+        for compiled in self.screen_map.values():
+            for mark in compiled.template_mark_list + compiled.ocr_mark_list:
+                key_cnt[mark.key] = key_cnt.get(mark.key, 0) + 1
+        for compiled in self.screen_map.values():
+            for mark in compiled.template_mark_list + compiled.ocr_mark_list:
+                mark.share_cnt = key_cnt[mark.key]
+
+        self._stats_lock = threading.Lock()
+
+    def match_first(
+        self,
+        ctx: OneDragonContext,
+        screen: MatLike,
+        screen_name_list: list[str],
+        crop_first: bool = True,
+    ) -> str | None:
+        """
+        按顺序找出第一个匹配的画面
+
+        Args:
+            ctx: 上下文
+            screen: 游戏截图
+            screen_name_list: 按优先级排列的候选画面
+            crop_first: 在传入区域时 是否先裁剪再进行文本识别
+
+        Returns:
+            str | None: 画面名称
+        """
+        frame = _FrameResult(ctx, screen, crop_first)
+
+        for screen_name in screen_name_list:
+            compiled = self.screen_map.get(screen_name)
+            if compiled is None or not compiled.has_mark or len(compiled.other_mark_list) > 0:
+                continue
+
+            start_time = time.perf_counter()
+            matched = self._check_screen(frame, compiled)
+            self._record(compiled, matched, (time.perf_counter() - start_time) * 1000)
+            if matched:
+                return compiled.screen_name
+
+        return None
+
+    def is_target_screen(
+        self,
+        ctx: OneDragonContext,
+        screen: MatLike,
+        screen_name: str,
+        crop_first: bool = True,
+    ) -> bool:
+        """
+        判断是否目标画面
+
+        Args:
+            ctx: 上下文
+            screen: 游戏截图
+            screen_name: 画面名称
+            crop_first: 在传入区域时 是否先裁剪再进行文本识别
+
+        Returns:
+            bool: 是否目标画面
+        """
+        return self.match_first(ctx, screen, [screen_name], crop_first=crop_first) is not None
+
+    def _check_screen(self, frame: _FrameResult, compiled: CompiledScreen) -> bool:
+        """
+        判断是否目标画面 有一个标识区域不通过就提前返回
+        """
+        for mark in compiled.template_mark_list:
+            matched = frame.check_template(mark)
+            self._record_mark(mark, matched)
+            if not matched:
+                return False
+
+        frame.prefetch_ocr(compiled.ocr_mark_list)
+        for mark in self._sort_ocr_mark_list(frame, compiled.ocr_mark_list):
+            matched = frame.check_ocr(mark)
+            self._record_mark(mark, matched)
+            if not matched:
+                return False
+
+        return True
+
+    @staticmethod
+    def _sort_ocr_mark_list(frame: _FrameResult, mark_list: list[ScreenMark]) -> list[ScreenMark]:
+        """
+        OCR标识的判断顺序
+        1. 本帧已经识别过的区域 不需要再进行OCR
+        2. 历史上更容易不通过的
+        3. 使用的画面更少的 更能区分画面
+        """
+        if len(mark_list) <= 1:
+            return mark_list
+        return sorted(mark_list, key=lambda mark: (mark.key not in frame.ocr_result, -mark.fail_rate, mark.share_cnt))
+
+    def _record_mark(self, mark: ScreenMark, matched: bool) -> None:
+        with self._stats_lock:
+            mark.check_cnt += 1
+            if not matched:
+                mark.fail_cnt += 1
+
+    def _record(self, compiled: CompiledScreen, matched: bool, elapsed_ms: float) -> None:
+        with self._stats_lock:
+            compiled.check_cnt += 1
+            if matched:
+                compiled.match_cnt += 1
+            compiled.total_ms += elapsed_ms
+            compiled.max_ms = max(compiled.max_ms, elapsed_ms)
+
+    def get_stats(self) -> dict[str, dict[str, float]]:
+        """
+        Returns:
+            dict[str, dict[str, float]]: 每个画面的判断统计 只包含判断过的画面 耗时单位毫秒
+        """
+        with self._stats_lock:
+            return {
+                compiled.screen_name: {
+                    'check_cnt': compiled.check_cnt,
+                    'match_cnt': compiled.match_cnt,
+                    'avg_ms': compiled.total_ms / compiled.check_cnt,
+                    'max_ms': compiled.max_ms,
+                }
+                for compiled in self.screen_map.values()
+                if compiled.check_cnt > 0
+            }
+
+
+def ocr_region_key(area: ScreenArea) -> tuple:
+    """
+    OCR区域的key 相同key的区域OCR结果相同
+    """
+    if area.use_text_line_ocr:  # 按文本行识别的区域 结果和区域名称相关
+        return ('ocr_line', area.area_name, area.x1, area.y1, area.x2, area.y2)
+    color_range = None if area.color_range is None else tuple(tuple(i) for i in area.color_range)
+    return ('ocr', area.x1, area.y1, area.x2, area.y2, color_range)
@@ -23,6 +23,7 @@ class ScreenInfo:
         data_area_list = data.get('area_list', [])
         for data_area in data_area_list:
             pc_rect = data_area.get('pc_rect')
+            text_line_rect_list = data_area.get('text_line_rect_list')
             area = ScreenArea(
                 area_name=data_area.get('area_name'),
                 pc_rect=Rect(pc_rect[0], pc_rect[1], pc_rect[2], pc_rect[3]),
@@ -36,6 +37,11 @@ class ScreenInfo:
                 id_mark=data_area.get('id_mark', False),
                 goto_list=data_area.get('goto_list', []),
                 gamepad_key=data_area.get('gamepad_key', ''),
+                fixed_text_line=data_area.get('fixed_text_line', False),
+                text_line_rect_list=(
+                    None if text_line_rect_list is None
+                    else [Rect(r[0], r[1], r[2], r[3]) for r in text_line_rect_list]
+                ),
             )
             self.area_list.append(area)
 
@@ -3,6 +3,7 @@ from pathlib import Path
 import yaml
 
 from one_dragon.base.screen.screen_area import ScreenArea
+from one_dragon.base.screen.screen_classifier import ScreenClassifier
 from one_dragon.base.screen.screen_info import ScreenInfo
 from one_dragon.utils import os_utils, yaml_utils
 from one_dragon.utils.log_utils import log
@@ -51,7 +52,9 @@ class ScreenContext:
         self._id_2_screen: dict[str, ScreenInfo] = {}
         self._extra_screen_ids: set[str] = set()
         self._extra_screen_file_path_map: dict[str, Path] = {}
-        self.screen_route_map: dict[str, dict[str, ScreenRoute]] = {}
+        self.screen_route_map: dict[str, dict[str, ScreenRoute]] = {}  # 已经计算过的路径 key=出发画面
+        self._screen_goto_map: dict[str, list[ScreenRouteNode]] = {}  # 每个画面可以直接前往的画面
+        self._screen_classifier: ScreenClassifier | None = None  # 画面变化后重新编译
 
         self.last_screen_name: str | None = None  # 上一个画面名字
         self.current_screen_name: str | None = None  # 当前的画面名字
@@ -61,6 +64,17 @@ class ScreenContext:
         self._local_screen_names: set[str] = set()
         self._scoped: bool = False
 
+    @property
+    def screen_classifier(self) -> ScreenClassifier:
+        """
+        根据当前所有画面编译的画面识别器
+        """
+        classifier = self._screen_classifier
+        if classifier is None:
+            classifier = ScreenClassifier(self.screen_info_list)
+            self._screen_classifier = classifier
+        return classifier
+
     @property
     def yml_file_dir(self) -> Path:
         return Path(os_utils.get_path_under_work_dir('assets', 'game_data', 'screen_info'))
@@ -165,7 +179,7 @@ class ScreenContext:
     def load_extra_screen_dir(self, dir_path: str, default_app_id: str = '') -> None:
         """从额外目录加载 screen YAML 并注册（用于插件 screen 注入）
 
-        加载后会重新计算路由和全局 screen 集合。
+        加载后会清除已计算的路由和重新计算全局 screen 集合。
 
         Args:
             dir_path: 包含 screen YAML 文件的目录路径
@@ -241,6 +255,26 @@ class ScreenContext:
         key = f'{screen_name}.{area_name}'
         return self._screen_area_map.get(key, None)
 
+    def get_template_list(self) -> list[tuple[str, str]]:
+        """
+        获取所有画面区域中使用到的模板 用于预加载
+
+        Returns:
+            list[tuple[str, str]]: (子文件夹, 模板id) 不重复
+        """
+        template_list: list[tuple[str, str]] = []
+        existed: set[tuple[str, str]] = set()
+        for screen_info in self.screen_info_list:
+            for area in screen_info.area_list:
+                if not area.is_template_area or len(area.template_sub_dir) == 0:
+                    continue
+                key = (area.template_sub_dir, area.template_id)
+                if key in existed:
+                    continue
+                existed.add(key)
+                template_list.append(key)
+        return template_list
+
     def save_screen(self, screen_info: ScreenInfo) -> None:
         """
         保存画面
@@ -340,73 +374,77 @@ class ScreenContext:
 
     def init_screen_route(self) -> None:
         """
-        初始化画面间的跳转路径
+        重置画面间的跳转路径 路径在使用时才计算
         :return:
         """
         self.screen_route_map.clear()
+        self._screen_goto_map.clear()
+        self._screen_classifier = None
 
-        # 先对任意两个画面之间做初始化
-        for screen_1 in self.screen_info_list:
-            self.screen_route_map[screen_1.screen_name] = {}
-            for screen_2 in self.screen_info_list:
-                self.screen_route_map[screen_1.screen_name][screen_2.screen_name] = ScreenRoute(
-                    from_screen=screen_1.screen_name,
-                    to_screen=screen_2.screen_name
-                )
+    def _get_screen_goto_list(self, screen_name: str) -> list[ScreenRouteNode]:
+        """
+        获取一个画面可以直接前往的画面 按区域顺序排列
+        :param screen_name: 画面名称
+        :return:
+        """
+        goto_list = self._screen_goto_map.get(screen_name)
+        if goto_list is not None:
+            return goto_list
 
-        # 根据画面的goto_list来初始化边
-        for screen_info in self.screen_info_list:
+        goto_list = []
+        screen_info = self.screen_info_map.get(screen_name)
+        if screen_info is not None:
             for area in screen_info.area_list:
                 if area.goto_list is None or len(area.goto_list) == 0:
                     continue
-                from_screen_route = self.screen_route_map[screen_info.screen_name]
-                if from_screen_route is None:
-                    log.error('画面路径没有初始化 %s', screen_info.screen_name)
-                    continue
                 for goto_screen_name in area.goto_list:
-                    if goto_screen_name not in from_screen_route:
-                        log.error('画面路径 %s -> %s 无法找到目标画面', screen_info.screen_name, goto_screen_name)
-                        continue
-                    from_screen_route[goto_screen_name].node_list.append(
-                        ScreenRouteNode(
-                            from_screen=screen_info.screen_name,
-                            from_area=area.area_name,
-                            to_screen=goto_screen_name
-                        )
-                    )
-
-        # Floyd算出任意两个画面之间的路径
-        screen_len = len(self.screen_info_list)
-        for k in range(screen_len):
-            screen_k = self.screen_info_list[k]
-            for i in range(screen_len):
-                if i == k:
+                    if goto_screen_name not in self.screen_info_map:
+                        log.error('画面路径 %s -> %s 无法找到目标画面', screen_name, goto_screen_name)
+                    goto_list.append(ScreenRouteNode(
+                        from_screen=screen_name,
+                        from_area=area.area_name,
+                        to_screen=goto_screen_name
+                    ))
+        self._screen_goto_map[screen_name] = goto_list
+        return goto_list
+
+    def _init_screen_route_from(self, from_screen: str) -> dict[str, ScreenRoute]:
+        """
+        广度优先搜索 计算从一个画面出发到其它所有画面的最短路径
+        :param from_screen: 出发的画面
+        :return: 到每个画面的路径 key=目标画面名称
+        """
+        # 记录从哪个节点到达 用于还原路径
+        prev_node_map: dict[str, ScreenRouteNode] = {}
+        bfs_list: list[str] = [from_screen]
+        bfs_idx = 0
+        while bfs_idx < len(bfs_list):
+            current_screen = bfs_list[bfs_idx]
+            bfs_idx += 1
+            for node in self._get_screen_goto_list(current_screen):
+                if node.to_screen in prev_node_map or node.to_screen not in self.screen_info_map:
                     continue
-                screen_i = self.screen_info_list[i]
-
-                route_ik: ScreenRoute = self.screen_route_map[screen_i.screen_name][screen_k.screen_name]
-                if not route_ik.can_go:  # 无法从 i 到 k
+                if node.to_screen == from_screen:  # 回到自身的只保留直达的
+                    if current_screen == from_screen:
+                        prev_node_map[from_screen] = node
                     continue
+                prev_node_map[node.to_screen] = node
+                bfs_list.append(node.to_screen)
 
-                for j in range(screen_len):
-                    if k == j or i == j:
-                        continue
-                    screen_j = self.screen_info_list[j]
-
-                    route_kj: ScreenRoute = self.screen_route_map[screen_k.screen_name][screen_j.screen_name]
-                    if not route_kj.can_go:  # 无法从 k 到 j
-                        continue
-
-                    route_ij: ScreenRoute = self.screen_route_map[screen_i.screen_name][screen_j.screen_name]
-
-                    if (not route_ij.can_go  # 当前无法从 i 到 j
-                        or len(route_ik.node_list) + len(route_kj.node_list) < len(route_ij.node_list)  # 新的更短
-                    ):
-                        route_ij.node_list = []
-                        for node_ik in route_ik.node_list:
-                            route_ij.node_list.append(node_ik)
-                        for node_kj in route_kj.node_list:
-                            route_ij.node_list.append(node_kj)
+        route_map: dict[str, ScreenRoute] = {}
+        for screen_info in self.screen_info_list:
+            route = ScreenRoute(from_screen=from_screen, to_screen=screen_info.screen_name)
+            to_screen = screen_info.screen_name
+            node = prev_node_map.get(to_screen)
+            while node is not None:
+                route.node_list.append(node)
+                if node.from_screen == from_screen:
+                    break
+                node = prev_node_map.get(node.from_screen)
+            route.node_list.reverse()
+            route_map[to_screen] = route
+
+        return route_map
 
     def get_screen_route(self, from_screen: str, to_screen: str) -> ScreenRoute | None:
         """
@@ -417,7 +455,10 @@ class ScreenContext:
         """
         from_route = self.screen_route_map.get(from_screen, None)
         if from_route is None:
-            return None
+            if from_screen not in self.screen_info_map:
+                return None
+            from_route = self._init_screen_route_from(from_screen)
+            self.screen_route_map[from_screen] = from_route
         return from_route.get(to_screen, None)
 
     def update_current_screen_name(self, screen_name: str) -> None:
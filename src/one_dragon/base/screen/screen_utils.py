@@ -7,6 +7,7 @@ from cv2.typing import MatLike
 
 from one_dragon.base.geometry.point import Point
 from one_dragon.base.matcher.match_result import MatchResult
+from one_dragon.base.matcher.ocr.ocr_match_result import OcrMatchResult
 from one_dragon.base.screen.screen_area import ScreenArea
 from one_dragon.base.screen.screen_info import ScreenInfo
 from one_dragon.utils import cv2_utils, str_utils
@@ -79,6 +80,41 @@ def find_area_binary(
     return find_area_in_screen_binary(ctx, screen, area, binary_threshold, crop_first)
 
 
+def get_area_ocr_result_list(
+    ctx: OneDragonContext,
+    screen: MatLike,
+    area: ScreenArea,
+    crop_first: bool = True,
+) -> list[OcrMatchResult]:
+    """
+    对文本区域进行OCR 文本行位置固定的区域会跳过文本检测
+
+    Args:
+        ctx: 上下文
+        screen: 游戏截图
+        area: 区域
+        crop_first: 在传入区域时 是否先裁剪再进行文本识别
+
+    Returns:
+        list[OcrMatchResult]: 区域内的识别结果
+    """
+    if crop_first and area.use_text_line_ocr:
+        return ctx.ocr_service.get_ocr_result_list_by_text_line(
+            image=screen,
+            rect=area.rect,
+            line_key=(area.area_name, area.x1, area.y1, area.x2, area.y2),
+            color_range=area.color_range,
+            line_rect_list=area.text_line_rect_list,
+        )
+
+    return ctx.ocr_service.get_ocr_result_list(
+        image=screen,
+        rect=area.rect,
+        color_range=area.color_range,
+        crop_first=crop_first,
+    )
+
+
 def find_area_in_screen_binary(
     ctx: OneDragonContext,
     screen: MatLike,
@@ -106,12 +142,7 @@ def find_area_in_screen_binary(
 
     find: bool = False
     if area.is_text_area:
-        ocr_result_list = ctx.ocr_service.get_ocr_result_list(
-            image=binary_screen,
-            rect=area.rect,
-            color_range=area.color_range,
-            crop_first=crop_first,
-        )
+        ocr_result_list = get_area_ocr_result_list(ctx, binary_screen, area, crop_first)
 
         for ocr_result in ocr_result_list:
             if str_utils.find_by_lcs(gt(area.text, 'game'), ocr_result.data, percent=area.lcs_percent):
@@ -158,12 +189,7 @@ def find_area_in_screen(
 
     find: bool = False
     if area.is_text_area:
-        ocr_result_list = ctx.ocr_service.get_ocr_result_list(
-            image=screen,
-            rect=area.rect,
-            color_range=area.color_range,
-            crop_first=crop_first,
-        )
+        ocr_result_list = get_area_ocr_result_list(ctx, screen, area, crop_first)
 
         for ocr_result in ocr_result_list:
             if str_utils.find_by_lcs(gt(area.text, 'game'), ocr_result.data, percent=area.lcs_percent):
@@ -252,12 +278,7 @@ def find_and_click_area(
     if area is None:
         return OcrClickResultEnum.AREA_NO_CONFIG
     if area.is_text_area:
-        ocr_result_list = ctx.ocr_service.get_ocr_result_list(
-            image=screen,
-            rect=area.rect,
-            color_range=area.color_range,
-            crop_first=crop_first,
-        )
+        ocr_result_list = get_area_ocr_result_list(ctx, screen, area, crop_first)
 
         for ocr_result in ocr_result_list:
             if str_utils.find_by_lcs(gt(area.text, 'game'), ocr_result.data, percent=area.lcs_percent):
@@ -351,19 +372,17 @@ def get_match_screen_name(
         str | None: 画面名称
     """
     if screen_name_list is not None:
-        for screen_info in ctx.screen_loader.screen_info_list:
-            if screen_info.screen_name not in screen_name_list:
-                continue
-            if is_target_screen(ctx, screen, screen_info=screen_info, crop_first=crop_first):
-                return screen_info.screen_name
+        to_check_list = [
+            screen_info.screen_name
+            for screen_info in ctx.screen_loader.screen_info_list
+            if screen_info.screen_name in screen_name_list
+        ]
     elif ctx.screen_loader.current_screen_name is not None or ctx.screen_loader.last_screen_name is not None:
         return get_match_screen_name_from_last(ctx, screen, crop_first=crop_first)
     else:
-        for screen_info in ctx.screen_loader.active_screen_info_list:
-            if is_target_screen(ctx, screen, screen_info=screen_info, crop_first=crop_first):
-                return screen_info.screen_name
+        to_check_list = [screen_info.screen_name for screen_info in ctx.screen_loader.active_screen_info_list]
 
-    return None
+    return ctx.screen_loader.screen_classifier.match_first(ctx, screen, to_check_list, crop_first=crop_first)
 
 
 def get_match_screen_name_from_last(
@@ -381,6 +400,24 @@ def get_match_screen_name_from_last(
     Returns:
         str | None: 画面名称
     """
+    to_check_list = get_screen_check_order_from_last(ctx)
+    if len(to_check_list) == 0:
+        return None
+
+    return ctx.screen_loader.screen_classifier.match_first(ctx, screen, to_check_list, crop_first=crop_first)
+
+
+def get_screen_check_order_from_last(ctx: OneDragonContext) -> list[str]:
+    """
+    从上次记录的画面开始 按画面跳转关系广度优先 得到判断画面的顺序
+    顺序只和画面配置有关 和画面识别的结果无关
+
+    Args:
+        ctx: 上下文
+
+    Returns:
+        list[str]: 需要判断的画面 按顺序排列
+    """
     active_names = ctx.screen_loader.active_screen_names  # set or None
 
     bfs_list = []
@@ -391,46 +428,38 @@ def get_match_screen_name_from_last(
         bfs_list.append(ctx.screen_loader.last_screen_name)
 
     if len(bfs_list) == 0:
-        return None
+        return []
+    bfs_set: set[str] = set(bfs_list)
 
+    to_check_list: list[str] = []
     bfs_idx = 0
     while bfs_idx < len(bfs_list):
         current_screen_name = bfs_list[bfs_idx]
         bfs_idx += 1
 
         # 在 scope 模式下 跳过非活跃 screen 的匹配（但仍展开其邻居以保持图连通性）
-        if active_names is not None and current_screen_name not in active_names:
-            screen_info = ctx.screen_loader.screen_info_map.get(current_screen_name)
-            if screen_info is not None:
-                for area in screen_info.area_list:
-                    if area.goto_list is None or len(area.goto_list) == 0:
-                        continue
-                    for goto_screen in area.goto_list:
-                        if goto_screen not in bfs_list:
-                            bfs_list.append(goto_screen)
-            continue
-
-        if is_target_screen(ctx, screen, screen_name=current_screen_name, crop_first=crop_first):
-            return current_screen_name
+        if active_names is None or current_screen_name in active_names:
+            to_check_list.append(current_screen_name)
 
-        screen_info = ctx.screen_loader.get_screen(current_screen_name)
+        screen_info = ctx.screen_loader.screen_info_map.get(current_screen_name)
         if screen_info is None:
             continue
         for area in screen_info.area_list:
             if area.goto_list is None or len(area.goto_list) == 0:
                 continue
             for goto_screen in area.goto_list:
-                if goto_screen not in bfs_list:
+                if goto_screen not in bfs_set:
                     bfs_list.append(goto_screen)
+                    bfs_set.add(goto_screen)
 
     # 最后 尝试搜索中没有出现的画面
     for screen_info in ctx.screen_loader.active_screen_info_list:
-        if screen_info.screen_name in bfs_list:
+        if screen_info.screen_name in bfs_set:
             continue
-        if is_target_screen(ctx, screen, screen_info=screen_info, crop_first=crop_first):
-            return screen_info.screen_name
+        to_check_list.append(screen_info.screen_name)
+
+    return to_check_list
 
-    return None
 
 def is_target_screen(
     ctx: OneDragonContext,
@@ -5,12 +5,13 @@ import shutil
 from cv2.typing import MatLike
 from enum import Enum
 from functools import lru_cache
-from typing import List, Optional, Tuple
+from typing import Any, Callable, List, Optional, Tuple
 
 from one_dragon.base.config.config_item import ConfigItem
 from one_dragon.base.config.yaml_operator import YamlOperator
 from one_dragon.base.geometry.point import Point
 from one_dragon.base.geometry.rectangle import Rect
+from one_dragon.base.screen.template_variant_cache import TemplateVariantCache
 from one_dragon.utils import os_utils, cal_utils, cv2_utils
 
 TEMPLATE_RAW_FILE_NAME = 'raw.png'
@@ -59,6 +60,7 @@ class TemplateInfo(YamlOperator):
         self._gray: MatLike = None  # 灰度图
         self._kps: List[cv2.KeyPoint] = None  # 关键点
         self._desc: MatLike = None  # 描述
+        self.variant_cache: Optional[TemplateVariantCache] = None  # 衍生图片的缓存 由 TemplateLoader 设置
 
     def get_yml_file_path(self) -> str:
         return get_template_config_path(self.sub_dir, self.template_id)
@@ -126,6 +128,24 @@ class TemplateInfo(YamlOperator):
         self._gray = cv2.cvtColor(self.raw, cv2.COLOR_RGB2GRAY)
         return self._gray
 
+    def _get_variant(self, key: tuple, builder: Callable[[], Any]) -> Any:
+        """
+        获取衍生图片 有缓存时使用缓存
+        """
+        if self.variant_cache is None:
+            return builder()
+        return self.variant_cache.get((self.sub_dir, self.template_id) + key, builder)
+
+    def get_binary(self, threshold: int = 127) -> Optional[MatLike]:
+        """
+        获取二值化后的模板原图
+        :param threshold: 二值化阈值
+        :return:
+        """
+        if self.raw is None:
+            return None
+        return self._get_variant(('binary', threshold), lambda: cv2_utils.to_binary(self.raw, threshold=threshold))
+
     @property
     def features(self) -> Tuple[List[cv2.KeyPoint], MatLike]:
         if self._kps is not None:
@@ -1,15 +1,21 @@
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
 from cv2.typing import MatLike
 from typing import List, Optional
 
 from one_dragon.base.screen.template_info import TemplateInfo, is_template_existed
-from one_dragon.utils import os_utils
+from one_dragon.base.screen.template_variant_cache import TemplateVariantCache
+from one_dragon.utils import os_utils, thread_utils
+from one_dragon.utils.log_utils import log
+
+_template_warm_up_executor = ThreadPoolExecutor(thread_name_prefix='od_template_warm_up', max_workers=1)
 
 
 class TemplateLoader:
 
-    def __init__(self):
+    def __init__(self, variant_cache_max_bytes: int = 64 * 1024 * 1024):
         self.template: dict[str, TemplateInfo] = {}
+        self.variant_cache: TemplateVariantCache = TemplateVariantCache(max_bytes=variant_cache_max_bytes)  # 模板衍生图片的缓存
 
     def get_all_template_info_from_disk(self, need_raw: bool = True, need_config: bool = False) -> List[TemplateInfo]:
         """
@@ -53,6 +59,8 @@ class TemplateLoader:
         if not is_template_existed(sub_dir, template_id, need_raw=not only_mask):
             return None
         template: TemplateInfo = TemplateInfo(sub_dir, template_id)
+        template.variant_cache = self.variant_cache
+        self.variant_cache.remove_by_prefix((sub_dir, template_id))  # 重新加载后 旧的衍生图片不再可用
 
         key = '%s:%s' % (sub_dir, template_id)
         self.template[key] = template
@@ -83,3 +91,31 @@ class TemplateLoader:
             return self.template[key].mask
         else:
             return self.load_template(sub_dir, template_id, only_mask=True).mask
+
+    def warm_up(self, template_list: List[tuple[str, str]]) -> None:
+        """
+        预先加载模板 避免第一次匹配时才读取文件
+        :param template_list: 需要加载的模板 (子文件夹, 模板id)
+        :return:
+        """
+        load_cnt: int = 0
+        for sub_dir, template_id in template_list:
+            key = '%s:%s' % (sub_dir, template_id)
+            if key in self.template:
+                continue
+            try:
+                if self.load_template(sub_dir, template_id) is not None:
+                    load_cnt += 1
+            except Exception:
+                log.error('预加载模板失败 %s', key, exc_info=True)
+        log.debug('预加载模板完成 共加载 %d 个', load_cnt)
+
+    def warm_up_async(self, template_list: List[tuple[str, str]]) -> Future:
+        """
+        在后台线程预先加载模板
+        :param template_list: 需要加载的模板 (子文件夹, 模板id)
+        :return:
+        """
+        future = _template_warm_up_executor.submit(self.warm_up, template_list)
+        future.add_done_callback(thread_utils.handle_future_result)
+        return future
@@ -0,0 +1,93 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+import numpy as np
+
+
+class TemplateVariantCache:
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        模板衍生图片的缓存 例如二值化图
+        所有模板共用 总占用超过上限时 淘汰最久未使用的
+        :param max_bytes: 最多占用的内存 字节
+        """
+        self.max_bytes: int = max_bytes
+        self.total_bytes: int = 0
+        self.hit_count: int = 0
+        self.miss_count: int = 0
+
+        self._cache: OrderedDict[tuple, tuple[Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, builder: Callable[[], Any]) -> Any:
+        """
+        获取缓存 不存在时使用 builder 生成并放入缓存
+        :param key: 缓存key 需要包含模板的标识
+        :param builder: 生成衍生图片的方法
+        :return: 衍生图片
+        """
+        with self._lock:
+            item = self._cache.get(key)
+            if item is not None:
+                self._cache.move_to_end(key)
+                self.hit_count += 1
+                return item[0]
+            self.miss_count += 1
+
+        value = builder()
+        size = _get_size(value)
+        if size > self.max_bytes:  # 太大的不缓存
+            return value
+
+        with self._lock:
+            old = self._cache.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self._cache[key] = (value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes and len(self._cache) > 0:
+                _, (_, evicted_size) = self._cache.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+        return value
+
+    def remove_by_prefix(self, prefix: tuple) -> None:
+        """
+        删除key以prefix开头的缓存 模板重新加载时使用
+        :param prefix: key的前缀
+        """
+        prefix_len = len(prefix)
+        with self._lock:
+            for key in [k for k in self._cache.keys() if k[:prefix_len] == prefix]:
+                _, size = self._cache.pop(key)
+                self.total_bytes -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self.total_bytes = 0
+
+    def get_stats(self) -> dict[str, int]:
+        """
+        :return: 缓存统计
+        """
+        with self._lock:
+            return {
+                'size': len(self._cache),
+                'bytes': self.total_bytes,
+                'hit': self.hit_count,
+                'miss': self.miss_count,
+            }
+
+
+def _get_size(value: Any) -> int:
+    """
+    估算缓存内容占用的内存
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(_get_size(i) for i in value)
+    return 0
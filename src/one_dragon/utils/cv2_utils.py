@@ -966,6 +966,66 @@ def find_character_avatar_center_with_offset(img: MatLike, area_offset: Tuple[in
     return (center_x, center_y)
 
 
+def get_hsv_range_list(
+    hsv_color: Union[List[int], Tuple[int, int, int], np.ndarray],
+    hsv_diff: Union[List[int], Tuple[int, int, int], np.ndarray]
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    根据HSV基准颜色和容差 计算 cv2.inRange 使用的范围
+    H通道超出 [0, 179] 时会回绕 拆分成两个范围
+    :param hsv_color:   HSV基准颜色
+    :param hsv_diff:    HSV颜色容差
+    :return:            [(下限, 上限)] 一个或两个范围 结果取并集
+    """
+    _hsv_color = np.array(hsv_color, dtype=np.int32)
+    _hsv_diff = np.array(hsv_diff, dtype=np.int32)
+
+    lower_s = np.clip(_hsv_color[1] - _hsv_diff[1], 0, 255)
+    upper_s = np.clip(_hsv_color[1] + _hsv_diff[1], 0, 255)
+    lower_v = np.clip(_hsv_color[2] - _hsv_diff[2], 0, 255)
+    upper_v = np.clip(_hsv_color[2] + _hsv_diff[2], 0, 255)
+
+    lower_h = _hsv_color[0] - _hsv_diff[0]
+    upper_h = _hsv_color[0] + _hsv_diff[0]
+
+    if lower_h < 0:
+        # H值回绕到180附近
+        return [
+            (np.array([lower_h + 180, lower_s, lower_v], dtype=np.uint8), np.array([179, upper_s, upper_v], dtype=np.uint8)),
+            (np.array([0, lower_s, lower_v], dtype=np.uint8), np.array([upper_h, upper_s, upper_v], dtype=np.uint8)),
+        ]
+    elif upper_h > 179:
+        # H值回绕到0附近
+        return [
+            (np.array([lower_h, lower_s, lower_v], dtype=np.uint8), np.array([179, upper_s, upper_v], dtype=np.uint8)),
+            (np.array([0, lower_s, lower_v], dtype=np.uint8), np.array([upper_h - 180, upper_s, upper_v], dtype=np.uint8)),
+        ]
+    else:
+        # H值没有回绕
+        return [
+            (np.array([lower_h, lower_s, lower_v], dtype=np.uint8), np.array([upper_h, upper_s, upper_v], dtype=np.uint8)),
+        ]
+
+
+def filter_hsv_image(
+    hsv_image: MatLike,
+    hsv_color: Union[List[int], Tuple[int, int, int], np.ndarray],
+    hsv_diff: Union[List[int], Tuple[int, int, int], np.ndarray]
+) -> MatLike:
+    """
+    对已经转换好的HSV图片进行颜色过滤 多次过滤同一张图片时可以只转换一次
+    :param hsv_image:   HSV格式的图像
+    :param hsv_color:   HSV基准颜色
+    :param hsv_diff:    HSV颜色容差
+    :return:            二值化的 mask 图像
+    """
+    range_list = get_hsv_range_list(hsv_color, hsv_diff)
+    mask = cv2.inRange(hsv_image, range_list[0][0], range_list[0][1])
+    if len(range_list) > 1:
+        mask = cv2.bitwise_or(mask, cv2.inRange(hsv_image, range_list[1][0], range_list[1][1]))
+    return mask
+
+
 def filter_by_color(
     image: MatLike,
     mode: str,
@@ -990,47 +1050,7 @@ def filter_by_color(
             return np.full((image.shape[0], image.shape[1]), 0, dtype=np.uint8)
 
         hsv_image = cv2.cvtColor(image, cv2.COLOR_RGB2HSV)
-
-        _hsv_color = np.array(hsv_color, dtype=np.int32)
-        _hsv_diff = np.array(hsv_diff, dtype=np.int32)
-
-        lower_s = np.clip(_hsv_color[1] - _hsv_diff[1], 0, 255)
-        upper_s = np.clip(_hsv_color[1] + _hsv_diff[1], 0, 255)
-        lower_v = np.clip(_hsv_color[2] - _hsv_diff[2], 0, 255)
-        upper_v = np.clip(_hsv_color[2] + _hsv_diff[2], 0, 255)
-
-        lower_h = _hsv_color[0] - _hsv_diff[0]
-        upper_h = _hsv_color[0] + _hsv_diff[0]
-
-        if lower_h < 0:
-            # H值回绕到180附近
-            lower1 = np.array([lower_h + 180, lower_s, lower_v], dtype=np.uint8)
-            upper1 = np.array([179, upper_s, upper_v], dtype=np.uint8)
-            mask1 = cv2.inRange(hsv_image, lower1, upper1)
-
-            lower2 = np.array([0, lower_s, lower_v], dtype=np.uint8)
-            upper2 = np.array([upper_h, upper_s, upper_v], dtype=np.uint8)
-            mask2 = cv2.inRange(hsv_image, lower2, upper2)
-
-            mask = cv2.bitwise_or(mask1, mask2)
-        elif upper_h > 179:
-            # H值回绕到0附近
-            lower1 = np.array([lower_h, lower_s, lower_v], dtype=np.uint8)
-            upper1 = np.array([179, upper_s, upper_v], dtype=np.uint8)
-            mask1 = cv2.inRange(hsv_image, lower1, upper1)
-
-            lower2 = np.array([0, lower_s, lower_v], dtype=np.uint8)
-            upper2 = np.array([upper_h - 180, upper_s, upper_v], dtype=np.uint8)
-            mask2 = cv2.inRange(hsv_image, lower2, upper2)
-
-            mask = cv2.bitwise_or(mask1, mask2)
-        else:
-            # H值没有回绕
-            lower = np.array([lower_h, lower_s, lower_v], dtype=np.uint8)
-            upper = np.array([upper_h, upper_s, upper_v], dtype=np.uint8)
-            mask = cv2.inRange(hsv_image, lower, upper)
-
-        return mask
+        return filter_hsv_image(hsv_image, hsv_color, hsv_diff)
     elif mode == 'rgb':
         if lower_rgb is None or upper_rgb is None:
             return np.full((image.shape[0], image.shape[1]), 0, dtype=np.uint8)
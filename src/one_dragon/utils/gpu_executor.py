@@ -1,17 +1,271 @@
-from concurrent.futures import ThreadPoolExecutor, Future
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from enum import IntEnum
+from typing import Any, Callable, Hashable
+
+import numpy as np
 
 from one_dragon.utils import thread_utils
 
-# 限制只能有一个方法访问gpu 避免gpu资源竞争崩溃
-_executor = ThreadPoolExecutor(thread_name_prefix='od_gpu', max_workers=1)
+
+class GpuTaskPriority(IntEnum):
+
+    LOW = 0  # 战斗结束、距离等 晚一点识别影响不大
+    NORMAL = 1  # 默认
+    HIGH = 2
+    CRITICAL = 3  # 闪避 排在所有等待的任务前面
+
+
+class _GpuTask:
+
+    def __init__(self, priority: GpuTaskPriority, seq: int, fn: Callable, args: tuple, kwargs: dict,
+                 stale_key: Any = None, frame_time: float | None = None, coalesce_key: Any = None):
+        self.priority: GpuTaskPriority = priority
+        self.seq: int = seq  # 提交顺序 同优先级先进先出
+        self.fn: Callable = fn
+        self.args: tuple = args
+        self.kwargs: dict = kwargs
+        self.stale_key: Any = stale_key
+        self.frame_time: float | None = frame_time
+        self.coalesce_key: Any = coalesce_key
+        self.future: Future = Future()
+        self.submit_perf_time: float = time.perf_counter()
+
+    def __lt__(self, other: _GpuTask) -> bool:
+        if self.priority != other.priority:
+            return self.priority > other.priority
+        return self.seq < other.seq
+
+
+class PriorityGpuExecutor:
+
+    def __init__(self, thread_name: str = 'od_gpu', recent_size: int = 200):
+        """
+        只有一个线程的优先级执行器 限制只能有一个方法访问gpu 避免gpu资源竞争崩溃
+        - 等待中的任务按优先级执行 同优先级先进先出 正在执行的任务不会被打断
+        - 提交时带上 stale_key 和 frame_time 的话 同一个 stale_key 下截图更旧的等待中任务会被取消
+        - 提交时带上 coalesce_key 的话 与等待中的同一个 coalesce_key 的任务合并 只执行一次 共用同一个结果
+        :param thread_name: 线程名称
+        :param recent_size: 统计分位数使用的最近次数
+        """
+        self.thread_name: str = thread_name
+
+        self._queue: list[_GpuTask] = []  # 等待中的任务 堆
+        self._stale_tasks: dict[Any, _GpuTask] = {}  # key=stale_key value=等待中的最新任务
+        self._coalesce_tasks: dict[Any, _GpuTask] = {}  # key=coalesce_key value=等待中的任务
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._shutdown: bool = False
+
+        self._submit_count: int = 0  # 提交次数
+        self._run_count: int = 0  # 执行次数
+        self._stale_count: int = 0  # 因为有更新的截图被取消的次数
+        self._coalesce_count: int = 0  # 被合并的次数
+        self._max_queue_depth: int = 0  # 最大等待数量
+        self._recent_wait_ms: deque[float] = deque(maxlen=recent_size)  # 最近从提交到开始执行的耗时
+        self._recent_run_ms: deque[float] = deque(maxlen=recent_size)  # 最近的执行耗时
+
+    def submit(self, priority: GpuTaskPriority, fn: Callable, args: tuple = (), kwargs: dict | None = None,
+               stale_key: Any = None, frame_time: float | None = None, coalesce_key: Any = None) -> Future:
+        """
+        提交一个任务
+        :param priority: 优先级
+        :param fn: 执行的方法
+        :param args: 方法的位置参数
+        :param kwargs: 方法的关键字参数
+        :param stale_key: 过期判断的分组 为 None 时不判断
+        :param frame_time: 任务使用的截图时间 同一个 stale_key 下有更新的截图时 本任务会被取消
+        :param coalesce_key: 合并的分组 为 None 时不合并 同一个分组内的任务需要是完全相同的计算
+        :return: 任务的 Future 被合并时返回等待中任务的 Future
+        """
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError('cannot schedule new futures after shutdown')
+
+            self._submit_count += 1
+            if coalesce_key is not None:
+                pending = self._coalesce_tasks.get(coalesce_key)
+                if pending is not None and not pending.future.done():
+                    self._coalesce_count += 1
+                    if priority > pending.priority:  # 合并后按更高的优先级执行
+                        pending.priority = priority
+                        heapq.heapify(self._queue)
+                    return pending.future
+
+            task = _GpuTask(priority, next(self._seq), fn, args, kwargs or {},
+                            stale_key=stale_key, frame_time=frame_time, coalesce_key=coalesce_key)
+
+            if stale_key is not None and frame_time is not None:
+                old = self._stale_tasks.get(stale_key)
+                if old is not None and old.frame_time is not None:
+                    if old.frame_time < frame_time:
+                        if old.future.cancel():  # 还在等待中才能取消 留在堆里 出队时跳过
+                            self._stale_count += 1
+                    elif old.frame_time > frame_time:  # 提交的截图比等待中的还旧 直接取消
+                        task.future.cancel()
+                        self._stale_count += 1
+                        return task.future
+                self._stale_tasks[stale_key] = task
+
+            if coalesce_key is not None:
+                self._coalesce_tasks[coalesce_key] = task
+
+            heapq.heappush(self._queue, task)
+            self._max_queue_depth = max(self._max_queue_depth, len(self._queue))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name=f'{self.thread_name}_0', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+        return task.future
+
+    def _worker(self) -> None:
+        while True:
+            with self._condition:
+                while len(self._queue) == 0 and not self._shutdown:
+                    self._condition.wait()
+                if len(self._queue) == 0:  # 已关闭 且没有剩余的任务
+                    return
+                task = heapq.heappop(self._queue)
+                self._remove_index(task)
+
+            if not task.future.set_running_or_notify_cancel():  # 已经被取消
+                continue
+
+            start = time.perf_counter()
+            try:
+                result = task.fn(*task.args, **task.kwargs)
+            except BaseException as e:
+                task.future.set_exception(e)
+            else:
+                task.future.set_result(result)
+            end = time.perf_counter()
+
+            with self._condition:
+                self._run_count += 1
+                self._recent_wait_ms.append((start - task.submit_perf_time) * 1000)
+                self._recent_run_ms.append((end - start) * 1000)
+
+    def _remove_index(self, task: _GpuTask) -> None:
+        """
+        任务出队后 从分组索引中移除 需要在锁内调用
+        """
+        if task.stale_key is not None and self._stale_tasks.get(task.stale_key) is task:
+            del self._stale_tasks[task.stale_key]
+        if task.coalesce_key is not None and self._coalesce_tasks.get(task.coalesce_key) is task:
+            del self._coalesce_tasks[task.coalesce_key]
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        当前等待中的任务数量 包括已取消但还没出队的
+        """
+        with self._condition:
+            return len(self._queue)
+
+    def get_stats(self) -> dict[str, float]:
+        """
+        Returns:
+            执行器的统计 耗时单位毫秒 分位数按最近的执行计算
+            wait 为从提交到开始执行的耗时
+        """
+        with self._condition:
+            queue_depth = len(self._queue)
+            submit_count = self._submit_count
+            run_count = self._run_count
+            stale_count = self._stale_count
+            coalesce_count = self._coalesce_count
+            max_queue_depth = self._max_queue_depth
+            wait_ms = np.array(self._recent_wait_ms, dtype=np.float64)
+            run_ms = np.array(self._recent_run_ms, dtype=np.float64)
+
+        has_data = len(run_ms) > 0
+        return {
+            'queue_depth': queue_depth,
+            'max_queue_depth': max_queue_depth,
+            'submitted': submit_count,
+            'count': run_count,
+            'stale': stale_count,
+            'coalesced': coalesce_count,
+            'wait_p50_ms': float(np.percentile(wait_ms, 50)) if has_data else 0,
+            'wait_p95_ms': float(np.percentile(wait_ms, 95)) if has_data else 0,
+            'run_p50_ms': float(np.percentile(run_ms, 50)) if has_data else 0,
+            'run_p95_ms': float(np.percentile(run_ms, 95)) if has_data else 0,
+        }
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        """
+        关闭执行器 不再接受新的任务
+        :param wait: 是否等待剩余的任务执行完
+        :param cancel_futures: 是否取消等待中的任务
+        """
+        with self._condition:
+            self._shutdown = True
+            if cancel_futures:
+                for task in self._queue:
+                    task.future.cancel()
+            self._condition.notify_all()
+            thread = self._thread
+
+        if wait and thread is not None:
+            thread.join()
+
+
+_executor = PriorityGpuExecutor(thread_name='od_gpu')
 
 
 def submit(fn, /, *args, **kwargs) -> Future:
-    f = _executor.submit(fn, *args, **kwargs)
+    """
+    以 NORMAL 优先级提交任务
+    """
+    f = _executor.submit(GpuTaskPriority.NORMAL, fn, args, kwargs)
     f.add_done_callback(thread_utils.handle_future_result)
 
     return f
 
 
+def submit_with_priority(
+        priority: GpuTaskPriority,
+        fn: Callable,
+        /,
+        *args,
+        stale_key: Hashable | None = None,
+        frame_time: float | None = None,
+        coalesce_key: Hashable | None = None,
+        **kwargs,
+) -> Future:
+    """
+    按优先级提交任务
+    :param priority: 优先级
+    :param fn: 执行的方法
+    :param args: 方法的位置参数
+    :param stale_key: 过期判断的分组 同一个分组下 截图更旧的等待中任务会被取消
+    :param frame_time: 任务使用的截图时间
+    :param coalesce_key: 合并的分组 与等待中的同一分组任务只执行一次 需要是完全相同的计算 例如同一个模型识别同一张截图
+    :param kwargs: 方法的关键字参数
+    :return: 任务的 Future
+    """
+    f = _executor.submit(priority, fn, args, kwargs,
+                         stale_key=stale_key, frame_time=frame_time, coalesce_key=coalesce_key)
+    f.add_done_callback(thread_utils.handle_future_result)
+
+    return f
+
+
+def get_stats() -> dict[str, float]:
+    """
+    Returns:
+        GPU执行器的排队统计 见 PriorityGpuExecutor.get_stats
+    """
+    return _executor.get_stats()
+
+
 def shutdown(wait: bool = True):
-    _executor.shutdown(wait=wait)
\ No newline at end of file
+    _executor.shutdown(wait=wait)
@@ -0,0 +1,237 @@
+import hashlib
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass, replace
+
+import numpy as np
+import onnxruntime as ort
+
+from one_dragon.utils.log_utils import log
+
+
+@dataclass(frozen=True)
+class OnnxSessionConfig:
+    """创建 InferenceSession 时使用的配置"""
+
+    intra_op_num_threads: int = 0  # 单个算子内的并行线程数 0为使用onnxruntime默认值
+    inter_op_num_threads: int = 0  # 算子间的并行线程数 0为使用onnxruntime默认值 仅在并行执行模式下生效
+    parallel_execution: bool = False  # 是否使用并行执行模式
+    graph_optimization_level: str = 'all'  # 图优化等级 disable/basic/extended/all
+    enable_cpu_mem_arena: bool = True  # 是否使用CPU内存池
+    enable_mem_pattern: bool = True  # 是否根据输入形状预先规划内存
+    optimized_model_dir: str | None = None  # 保存优化后模型的目录 为None时不保存 仅CPU下生效
+
+
+_GRAPH_OPTIMIZATION_LEVEL: dict[str, ort.GraphOptimizationLevel] = {
+    'disable': ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    'basic': ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    'extended': ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    'all': ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+
+class OnnxSession:
+    """
+    共享的 InferenceSession
+    - 记录每次推理的耗时
+    - 其它属性和方法直接使用 InferenceSession 的
+    """
+
+    def __init__(self, model_path: str, session: ort.InferenceSession, recent_size: int = 200):
+        self.model_path: str = model_path
+        self.session: ort.InferenceSession = session
+
+        self._stats_lock = threading.Lock()
+        self.run_count: int = 0  # 推理次数
+        self.total_ms: float = 0  # 推理总耗时
+        self.max_ms: float = 0  # 最大推理耗时
+        self._recent_ms: deque[float] = deque(maxlen=recent_size)  # 最近的推理耗时 用于计算分位数
+
+    def __getattr__(self, item):
+        return getattr(self.session, item)
+
+    def run(self, output_names, input_feed, run_options=None):
+        start_time = time.perf_counter()
+        outputs = self.session.run(output_names, input_feed, run_options)
+        self.record_latency((time.perf_counter() - start_time) * 1000)
+        return outputs
+
+    def run_with_iobinding(self, iobinding, run_options=None) -> None:
+        start_time = time.perf_counter()
+        self.session.run_with_iobinding(iobinding, run_options)
+        self.record_latency((time.perf_counter() - start_time) * 1000)
+
+    def record_latency(self, elapsed_ms: float) -> None:
+        """
+        记录一次推理耗时
+        Args:
+            elapsed_ms: 耗时 毫秒
+        """
+        with self._stats_lock:
+            self.run_count += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            self._recent_ms.append(elapsed_ms)
+
+    def get_stats(self) -> dict[str, float]:
+        """
+        Returns:
+            推理耗时统计 单位毫秒 分位数按最近的推理计算
+        """
+        with self._stats_lock:
+            recent = np.array(self._recent_ms, dtype=np.float64)
+            run_count = self.run_count
+            total_ms = self.total_ms
+            max_ms = self.max_ms
+
+        return {
+            'count': run_count,
+            'avg_ms': total_ms / run_count if run_count > 0 else 0,
+            'max_ms': max_ms,
+            'p50_ms': float(np.percentile(recent, 50)) if len(recent) > 0 else 0,
+            'p95_ms': float(np.percentile(recent, 95)) if len(recent) > 0 else 0,
+        }
+
+
+_config: OnnxSessionConfig = OnnxSessionConfig()
+# 只要还有使用方持有 就复用同一个session 所有使用方释放后自动回收
+_session_map: weakref.WeakValueDictionary[tuple, OnnxSession] = weakref.WeakValueDictionary()
+_lock = threading.Lock()
+
+
+def update_config(**kwargs) -> None:
+    """
+    更新创建session时的配置 只对之后新创建的session生效
+    Args:
+        **kwargs: OnnxSessionConfig 的字段
+    """
+    global _config
+    _config = replace(_config, **kwargs)
+
+
+def get_config() -> OnnxSessionConfig:
+    return _config
+
+
+def get_providers(gpu: bool) -> list[str]:
+    """
+    获取可用的执行提供程序
+    Args:
+        gpu: 是否使用GPU
+
+    Returns:
+        执行提供程序列表
+    """
+    if not gpu:
+        return ['CPUExecutionProvider']
+
+    availables = ort.get_available_providers()
+    if 'CUDAExecutionProvider' in availables:
+        return ['CUDAExecutionProvider']
+    elif 'DmlExecutionProvider' in availables:
+        return ['DmlExecutionProvider']
+    else:
+        log.warning('未找到GPU执行提供程序，回退到CPU')
+        return ['CPUExecutionProvider']
+
+
+def get_session(model_path: str, gpu: bool = False) -> OnnxSession:
+    """
+    获取模型的session 相同模型、相同执行提供程序、相同配置的使用方共享同一个session
+    Args:
+        model_path: onnx模型路径
+        gpu: 是否使用GPU
+
+    Returns:
+        session
+    """
+    providers = get_providers(gpu)
+    config = _config
+    key = (os.path.abspath(model_path), tuple(providers), config)
+
+    with _lock:
+        session = _session_map.get(key)
+        if session is None:
+            session = OnnxSession(model_path, _create_session(model_path, providers, config))
+            _session_map[key] = session
+        return session
+
+
+def _create_session(model_path: str, providers: list[str], config: OnnxSessionConfig) -> ort.InferenceSession:
+    """
+    创建 InferenceSession
+    Args:
+        model_path: onnx模型路径
+        providers: 执行提供程序
+        config: 配置
+
+    Returns:
+        InferenceSession
+    """
+    options = ort.SessionOptions()
+    if config.intra_op_num_threads > 0:
+        options.intra_op_num_threads = config.intra_op_num_threads
+    if config.inter_op_num_threads > 0:
+        options.inter_op_num_threads = config.inter_op_num_threads
+    if config.parallel_execution:
+        options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+    options.graph_optimization_level = _GRAPH_OPTIMIZATION_LEVEL.get(
+        config.graph_optimization_level, ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    )
+    options.enable_cpu_mem_arena = config.enable_cpu_mem_arena
+    options.enable_mem_pattern = config.enable_mem_pattern
+
+    load_path = model_path
+    # 优化后的模型和硬件相关 只在CPU下缓存
+    if config.optimized_model_dir is not None and providers == ['CPUExecutionProvider']:
+        optimized_path = _get_optimized_model_path(model_path, config)
+        if os.path.exists(optimized_path):
+            load_path = optimized_path
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        else:
+            os.makedirs(config.optimized_model_dir, exist_ok=True)
+            options.optimized_model_filepath = optimized_path
+
+    log.info('加载模型 %s', load_path)
+    try:
+        return ort.InferenceSession(load_path, sess_options=options, providers=providers)
+    except Exception:
+        if load_path == model_path:
+            raise
+        # 缓存的优化模型损坏时 使用原模型
+        log.warning('加载优化后的模型失败 使用原模型 %s', model_path, exc_info=True)
+        options.graph_optimization_level = _GRAPH_OPTIMIZATION_LEVEL.get(
+            config.graph_optimization_level, ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+        return ort.InferenceSession(model_path, sess_options=options, providers=providers)
+
+
+def _get_optimized_model_path(model_path: str, config: OnnxSessionConfig) -> str:
+    """
+    优化后模型的保存路径 原模型或onnxruntime版本变化后使用新的文件
+    Args:
+        model_path: onnx模型路径
+        config: 配置
+
+    Returns:
+        保存路径
+    """
+    stat = os.stat(model_path)
+    key = f'{os.path.abspath(model_path)}|{stat.st_size}|{stat.st_mtime_ns}|{ort.__version__}|{config.graph_optimization_level}'
+    digest = hashlib.md5(key.encode('utf-8')).hexdigest()[:16]
+    model_name = os.path.splitext(os.path.basename(model_path))[0]
+    parent_name = os.path.basename(os.path.dirname(os.path.abspath(model_path)))
+    return os.path.join(config.optimized_model_dir, f'{parent_name}-{model_name}-{digest}.onnx')
+
+
+def get_all_session_stats() -> dict[str, dict[str, float]]:
+    """
+    Returns:
+        所有存活session的推理耗时统计 key=模型路径
+    """
+    with _lock:
+        session_list = list(_session_map.values())
+    return {session.model_path: session.get_stats() for session in session_list}
@@ -4,6 +4,8 @@ from one_dragon.utils.log_utils import log
 
 
 def handle_future_result(future: Future):
+    if future.cancelled():  # 关闭执行器 或 任务过期被取消 不需要报错
+        return
     try:
         future.result()
     except Exception:
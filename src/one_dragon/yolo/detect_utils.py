@@ -102,15 +102,34 @@ class DetectObjectResult:
         return self.y2 - self.y1
 
 
+# 一帧识别结果的结构化数组 坐标为 xyxy
+DETECT_RESULT_DTYPE = np.dtype([
+    ('x1', np.float32),
+    ('y1', np.float32),
+    ('x2', np.float32),
+    ('y2', np.float32),
+    ('score', np.float32),
+    ('class_id', np.int32),
+])
+
+
 class DetectFrameResult:
 
     def __init__(self,
                  raw_image: MatLike,
-                 results: List[DetectObjectResult],
+                 results: Optional[List[DetectObjectResult]] = None,
                  run_time: Optional[float] = None,
+                 result_array: Optional[np.ndarray] = None,
+                 idx_2_class: Optional[dict[int, DetectClass]] = None,
                  ):
         """
         一帧画面的识别结果
+        可以只传入结构化数组 results 在第一次使用时才会构建
+        :param raw_image: 识别的原始图片
+        :param results: 识别的结果
+        :param run_time: 识别时间
+        :param result_array: 识别结果的结构化数组 dtype=DETECT_RESULT_DTYPE
+        :param idx_2_class: 类别下标到类别的映射 使用 result_array 时需要传入
         """
         self.run_time: float = time.time() if run_time is None else run_time
         """识别时间"""
@@ -118,8 +137,55 @@ class DetectFrameResult:
         self.raw_image: MatLike = raw_image
         """识别的原始图片"""
 
-        self.results: List[DetectObjectResult] = results
-        """识别的结果"""
+        self._results: Optional[List[DetectObjectResult]] = results
+        self._result_array: Optional[np.ndarray] = result_array
+        self._idx_2_class: Optional[dict[int, DetectClass]] = idx_2_class
+
+    @property
+    def results(self) -> List[DetectObjectResult]:
+        """
+        识别的结果
+        """
+        if self._results is None:
+            self._results = [
+                DetectObjectResult(
+                    rect=[row['x1'], row['y1'], row['x2'], row['y2']],
+                    score=float(row['score']),
+                    detect_class=self._idx_2_class[int(row['class_id'])]
+                )
+                for row in self._result_array
+            ] if self._result_array is not None else []
+        return self._results
+
+    @results.setter
+    def results(self, value: List[DetectObjectResult]) -> None:
+        self._results = value
+        self._result_array = None
+
+    @property
+    def result_array(self) -> np.ndarray:
+        """
+        识别结果的结构化数组 dtype=DETECT_RESULT_DTYPE
+        """
+        if self._result_array is None:
+            results = self._results if self._results is not None else []
+            self._result_array = np.array(
+                [(i.x1, i.y1, i.x2, i.y2, i.score, i.detect_class.class_id) for i in results],
+                dtype=DETECT_RESULT_DTYPE
+            )
+        return self._result_array
+
+    @property
+    def result_count(self) -> int:
+        """
+        识别结果的数量 不会构建 results
+        """
+        if self._results is not None:
+            return len(self._results)
+        elif self._result_array is not None:
+            return len(self._result_array)
+        else:
+            return 0
 
 
 def nms(boxes, scores, iou_threshold):
@@ -145,19 +211,59 @@ def nms(boxes, scores, iou_threshold):
 
 
 def multiclass_nms(boxes, scores, class_ids, iou_threshold):
+    """
+    按类别分别进行NMS 返回的下标先按类别升序 同类别内按得分降序
+    """
+    keep = batched_nms(boxes, scores, class_ids, iou_threshold)
+    if len(keep) == 0:
+        return []
 
-    unique_class_ids = np.unique(class_ids)
+    # 结果按类别分组 和逐个类别进行NMS的顺序保持一致
+    keep = keep[np.argsort(np.asarray(class_ids)[keep], kind='stable')]
+    return keep.tolist()
 
-    keep_boxes = []
-    for class_id in unique_class_ids:
-        class_indices = np.where(class_ids == class_id)[0]
-        class_boxes = boxes[class_indices,:]
-        class_scores = scores[class_indices]
 
-        class_keep_boxes = nms(class_boxes, class_scores, iou_threshold)
-        keep_boxes.extend(class_indices[class_keep_boxes])
+def batched_nms(boxes: np.ndarray, scores: np.ndarray, class_ids: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """
+    所有类别一次性进行NMS
+    每个类别的框平移到互不相交的区域 不同类别之间IOU为0 就不会互相抑制
+    :param boxes: 框 xyxy
+    :param scores: 得分
+    :param class_ids: 类别
+    :param iou_threshold: IOU阈值 和保留的框IOU达到阈值的会被去掉
+    :return: 保留的框的下标 按得分降序
+    """
+    boxes = np.asarray(boxes, dtype=np.float64)
+    if len(boxes) == 0:
+        return np.zeros((0,), dtype=np.int64)
+    scores = np.asarray(scores)
+    class_ids = np.asarray(class_ids)
 
-    return keep_boxes
+    offset = class_ids.astype(np.float64) * (boxes.max() - boxes.min() + 1)
+    order = np.argsort(-scores, kind='stable')
+    offset_boxes = boxes[order] + offset[order, np.newaxis]
+
+    x1, y1, x2, y2 = offset_boxes[:, 0], offset_boxes[:, 1], offset_boxes[:, 2], offset_boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+
+    keep = []
+    rest = np.arange(len(order))
+    while rest.size > 0:
+        i = rest[0]
+        keep.append(i)
+        rest = rest[1:]
+
+        xx1 = np.maximum(x1[i], x1[rest])
+        yy1 = np.maximum(y1[i], y1[rest])
+        xx2 = np.minimum(x2[i], x2[rest])
+        yy2 = np.minimum(y2[i], y2[rest])
+        intersection = np.maximum(0, xx2 - xx1) * np.maximum(0, yy2 - yy1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            iou = intersection / (areas[i] + areas[rest] - intersection)
+
+        rest = rest[~(iou >= iou_threshold)]
+
+    return order[keep]
 
 
 def compute_iou(box, boxes):
@@ -249,3 +355,59 @@ def draw_masks(image: np.ndarray, results: List[DetectObjectResult], mask_alpha:
         cv2.rectangle(mask_img, (result.x1, result.y1), (result.x2, result.y2), color, -1)
 
     return cv2.addWeighted(mask_img, mask_alpha, image, 1 - mask_alpha, 0)
+
+
+def __debug():
+    """
+    比较逐个类别NMS和一次性NMS的耗时 使用随机生成的检测框
+    """
+    rng = np.random.default_rng(0)
+    object_cnt = 30
+    candidate_per_object = 20  # 模型对同一个目标会输出多个相近的候选框
+    box_cnt = object_cnt * candidate_per_object
+    class_cnt = 20
+    centers = rng.uniform(100, 1800, size=(object_cnt, 2))
+    sizes = rng.uniform(30, 200, size=(object_cnt, 2))
+    xywh = np.repeat(np.concatenate([centers, sizes], axis=1), candidate_per_object, axis=0)
+    xywh += rng.normal(0, 5, size=xywh.shape)
+    boxes = xywh2xyxy(xywh).astype(np.float32)
+    scores = rng.uniform(0.5, 1, size=box_cnt).astype(np.float32)
+    class_ids = np.repeat(rng.integers(0, class_cnt, size=object_cnt), candidate_per_object)
+    detect_classes = {i: DetectClass(i, f'class_{i}') for i in range(class_cnt)}
+
+    def loop_multiclass_nms():
+        keep_boxes = []
+        for class_id in np.unique(class_ids):
+            class_indices = np.where(class_ids == class_id)[0]
+            class_keep_boxes = nms(boxes[class_indices, :], scores[class_indices], 0.5)
+            keep_boxes.extend(class_indices[class_keep_boxes])
+        return keep_boxes
+
+    repeat = 50
+    t1 = time.perf_counter()
+    for _ in range(repeat):
+        loop_multiclass_nms()
+    t2 = time.perf_counter()
+    for _ in range(repeat):
+        multiclass_nms(boxes, scores, class_ids, 0.5)
+    t3 = time.perf_counter()
+    print(f'{box_cnt}个框 逐个类别NMS {(t2 - t1) / repeat * 1000:.2f}ms 一次性NMS {(t3 - t2) / repeat * 1000:.2f}ms')
+
+    indices = multiclass_nms(boxes, scores, class_ids, 0.5)
+    t1 = time.perf_counter()
+    for _ in range(repeat):
+        [DetectObjectResult(rect=boxes[i].tolist(), score=float(scores[i]), detect_class=detect_classes[int(class_ids[i])])
+         for i in indices]
+    t2 = time.perf_counter()
+    for _ in range(repeat):
+        result_array = np.empty((len(indices),), dtype=DETECT_RESULT_DTYPE)
+        result_array['x1'], result_array['y1'] = boxes[indices, 0], boxes[indices, 1]
+        result_array['x2'], result_array['y2'] = boxes[indices, 2], boxes[indices, 3]
+        result_array['score'] = scores[indices]
+        result_array['class_id'] = class_ids[indices]
+    t3 = time.perf_counter()
+    print(f'{len(indices)}个结果 构建对象 {(t2 - t1) / repeat * 1000:.2f}ms 结构化数组 {(t3 - t2) / repeat * 1000:.2f}ms')
+
+
+if __name__ == '__main__':
+    __debug()
@@ -1,11 +1,15 @@
 import os
+import threading
 import time
 import urllib.request
 import zipfile
 from typing import Optional, List
 
-import onnxruntime as ort
+import numpy as np
 
+from one_dragon.utils import onnx_session_factory
+from one_dragon.utils.onnx_session_factory import OnnxSession
+from one_dragon.yolo import onnx_utils
 from one_dragon.yolo.log_utils import log
 
 _GH_PROXY_URL = 'https://ghfast.top'
@@ -34,12 +38,18 @@ class OnnxModelLoader:
         self.gpu: bool = gpu  # 是否使用GPU加速
 
         # 从模型中读取到的输入输出信息
-        self.session: ort.InferenceSession = None
+        self.session: OnnxSession | None = None
         self.input_names: List[str] = []
         self.onnx_input_width: int = 0
         self.onnx_input_height: int = 0
         self.output_names: List[str] = []
 
+        # 推理时复用的输入输出内存
+        self.run_lock: threading.Lock = threading.Lock()  # 预分配的内存同一时间只能给一次推理使用
+        self.input_buffer: onnx_utils.ScaleInputBuffer | None = None
+        self.io_binding = None
+        self.output_buffers: List[np.ndarray] | None = None  # 输出形状固定时 预分配的输出
+
         if not self.check_and_download_model():  # 新模型不ok
             log.error(f'模型 {self.model_name} 未下载成功 请尝试更换代理下载')
             log.info(f'尝试使用备用模型 {self.backup_model_name}')
@@ -123,31 +133,14 @@ class OnnxModelLoader:
 
     def load_model(self) -> None:
         """
-        加载模型
+        加载模型 相同模型的使用方共享同一个session
         :return:
         """
-        availables = ort.get_available_providers()
-
-        if self.gpu:
-            if 'CUDAExecutionProvider' in availables:
-                providers = ['CUDAExecutionProvider']
-            elif 'DmlExecutionProvider' in availables:
-                providers = ['DmlExecutionProvider']
-            else:
-                providers = ['CPUExecutionProvider']
-                log.warning('未找到GPU执行提供程序，回退到CPU')
-        else:
-            providers = ['CPUExecutionProvider']
-
         onnx_path = os.path.join(self.model_dir_path, 'model.onnx')
-        log.info('加载模型 %s', onnx_path)
-
-        self.session = ort.InferenceSession(
-            onnx_path,
-            providers=providers,
-        )
+        self.session = onnx_session_factory.get_session(onnx_path, gpu=self.gpu)
         self.get_input_details()
         self.get_output_details()
+        self.init_io_buffers()
 
     def get_input_details(self):
         model_inputs = self.session.get_inputs()
@@ -160,3 +153,52 @@ class OnnxModelLoader:
     def get_output_details(self):
         model_outputs = self.session.get_outputs()
         self.output_names = [model_outputs[i].name for i in range(len(model_outputs))]
+
+    def init_io_buffers(self) -> None:
+        """
+        预分配输入张量 并使用 IO binding 绑定输出
+        输出形状固定时 直接绑定到预分配的数组上 推理结果不再需要重新分配内存
+        :return:
+        """
+        self.input_buffer = onnx_utils.ScaleInputBuffer(self.onnx_input_width, self.onnx_input_height)
+        self.io_binding = None
+        self.output_buffers = None
+
+        try:
+            io_binding = self.session.io_binding()
+            output_buffers: List[np.ndarray] = []
+            for model_output in self.session.get_outputs():
+                shape = model_output.shape
+                if model_output.type != 'tensor(float)' or not all(isinstance(i, int) for i in shape):
+                    output_buffers = None
+                    break
+                output_buffers.append(np.empty(shape, dtype=np.float32))
+
+            if output_buffers is not None:
+                for name, buffer in zip(self.output_names, output_buffers):
+                    io_binding.bind_output(name, 'cpu', 0, np.float32, list(buffer.shape), buffer.ctypes.data)
+            else:  # 动态形状 由onnxruntime分配
+                for name in self.output_names:
+                    io_binding.bind_output(name, 'cpu')
+
+            self.io_binding = io_binding
+            self.output_buffers = output_buffers
+        except Exception:
+            log.warning('模型 %s 无法使用IO binding 使用普通推理', self.model_name, exc_info=True)
+
+    def run_session(self, input_tensor: np.ndarray) -> List[np.ndarray]:
+        """
+        使用模型进行推理
+        使用 IO binding 时 返回的结果可能是预分配的内存 会在下一次推理时被覆盖 需要在 run_lock 内使用完
+        :param input_tensor: 输入张量
+        :return: 模型的输出
+        """
+        if self.io_binding is None:
+            return self.session.run(self.output_names, {self.input_names[0]: input_tensor})
+
+        self.io_binding.bind_cpu_input(self.input_names[0], input_tensor)
+        self.session.run_with_iobinding(self.io_binding)
+        if self.output_buffers is not None:
+            return self.output_buffers
+        else:
+            return self.io_binding.copy_outputs_to_cpu()
@@ -38,3 +38,56 @@ def scale_input_image_u(image: MatLike, onnx_input_width: int, onnx_input_height
     input_tensor = input_img[np.newaxis, :, :, :].astype(np.float32)
 
     return input_tensor, scale_height, scale_width
+
+
+class ScaleInputBuffer:
+
+    def __init__(self, onnx_input_width: int, onnx_input_height: int):
+        """
+        预先分配好的模型输入 每次推理复用同一块内存
+        按 scale_input_image_u 的方式缩放 但缩放结果直接写入画布 归一化直接写入输入张量
+        同一时间只能给一个推理使用 返回的张量会在下一次调用时被覆盖
+        :param onnx_input_width: 模型需要的图片宽度
+        :param onnx_input_height: 模型需要的图片高度
+        """
+        self.onnx_input_width: int = onnx_input_width
+        self.onnx_input_height: int = onnx_input_height
+
+        self.canvas: np.ndarray = np.full(shape=(onnx_input_height, onnx_input_width, 3),
+                                          fill_value=114, dtype=np.uint8)  # 缩放后的图片 未覆盖的部分是padding
+        self.input_tensor: np.ndarray = np.empty(shape=(1, 3, onnx_input_height, onnx_input_width),
+                                                 dtype=np.float32)  # 输入模型的张量
+        self._scale_size: Tuple[int, int] = (onnx_input_width, onnx_input_height)  # 上一次缩放后的尺寸 用于判断padding是否需要重置
+
+    def scale_input_image(self, image: MatLike) -> Tuple[np.ndarray, int, int]:
+        """
+        将图片缩放至模型使用的大小 并写入预分配的输入张量
+        :param image: 输入的图片 RBG通道
+        :return: 输入张量、缩放后的高度、缩放后的宽度
+        """
+        img_height, img_width = image.shape[:2]
+
+        # 将图像缩放到模型的输入尺寸中较短的一边
+        min_scale = min(self.onnx_input_height / img_height, self.onnx_input_width / img_width)
+
+        # 未进行padding之前的尺寸
+        scale_height = int(round(img_height * min_scale))
+        scale_width = int(round(img_width * min_scale))
+
+        # 缩放尺寸变化时 上一次的图片可能残留在padding区域
+        if (scale_width, scale_height) != self._scale_size:
+            self.canvas.fill(114)
+            self._scale_size = (scale_width, scale_height)
+
+        if self.onnx_input_height != img_height or self.onnx_input_width != img_width:  # 需要缩放
+            cv2.resize(image, (scale_width, scale_height),
+                       dst=self.canvas[0:scale_height, 0:scale_width, :],
+                       interpolation=cv2.INTER_LINEAR)
+        else:
+            np.copyto(self.canvas, image)
+
+        # 归一化和转置一次完成 直接写入输入张量
+        np.multiply(self.canvas.transpose(2, 0, 1), np.float32(1 / 255.0),
+                    out=self.input_tensor[0], casting='unsafe')
+
+        return self.input_tensor, scale_height, scale_width
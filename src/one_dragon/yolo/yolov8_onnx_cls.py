@@ -4,7 +4,6 @@ import numpy as np
 from cv2.typing import MatLike
 from typing import Optional, List
 
-from one_dragon.yolo import onnx_utils
 from one_dragon.yolo.onnx_model_loader import OnnxModelLoader
 
 
@@ -93,14 +92,16 @@ class Yolov8Classifier(OnnxModelLoader):
         context = RunContext(image, run_time)
         context.conf = conf
 
-        input_tensor = self.prepare_input(context)
-        t2 = time.time()
+        # 输入输出使用预分配的内存 需要在锁内完成后处理
+        with self.run_lock:
+            input_tensor = self.prepare_input(context)
+            t2 = time.time()
 
-        outputs = self.inference(input_tensor)
-        t3 = time.time()
+            outputs = self.inference(input_tensor)
+            t3 = time.time()
 
-        result = self.process_output(outputs, context)
-        t4 = time.time()
+            result = self.process_output(outputs, context)
+            t4 = time.time()
 
         # log.info(f'识别完毕 预处理耗时 {t2 - t1:.3f}s, 推理耗时 {t3 - t2:.3f}s, 后处理耗时 {t4 - t3:.3f}s')
 
@@ -111,7 +112,7 @@ class Yolov8Classifier(OnnxModelLoader):
         """
         推理前的预处理
         """
-        input_tensor, scale_height, scale_width = onnx_utils.scale_input_image_u(context.img, self.onnx_input_width, self.onnx_input_height)
+        input_tensor, scale_height, scale_width = self.input_buffer.scale_input_image(context.img)
         context.scale_height = scale_height
         context.scale_width = scale_width
         return input_tensor
@@ -122,7 +123,7 @@ class Yolov8Classifier(OnnxModelLoader):
         :param input_tensor: 输入模型的图片 RGB通道
         :return: onnx模型推理得到的结果
         """
-        outputs = self.session.run(self.output_names, {self.input_names[0]: input_tensor})
+        outputs = self.run_session(input_tensor)
         return outputs
 
     def process_output(self, output, context: RunContext) -> ClassificationResult:
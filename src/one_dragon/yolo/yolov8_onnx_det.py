@@ -6,9 +6,8 @@ import os
 from cv2.typing import MatLike
 from typing import Optional, List
 
-from one_dragon.yolo import onnx_utils
 from one_dragon.yolo.detect_utils import DetectFrameResult, DetectClass, DetectContext, DetectObjectResult, xywh2xyxy, \
-    multiclass_nms
+    multiclass_nms, DETECT_RESULT_DTYPE
 from one_dragon.yolo.onnx_model_loader import OnnxModelLoader
 
 
@@ -23,7 +22,8 @@ class Yolov8Detector(OnnxModelLoader):
                  personal_proxy: Optional[str] = None,
                  gpu: bool = False,
                  backup_model_name: Optional[str] = None,
-                 keep_result_seconds: float = 2
+                 keep_result_seconds: float = 2,
+                 lazy_result: bool = True,
                  ):
         """
         yolov8 detect 导出 onnx 后使用
@@ -33,6 +33,7 @@ class Yolov8Detector(OnnxModelLoader):
         :param model_parent_dir_path: 放置所有模型的根目录
         :param gpu: 是否启用GPU运算
         :param keep_result_seconds: 保留多长时间的识别结果
+        :param lazy_result: 识别结果先保存为结构化数组 使用时才构建 DetectObjectResult
         """
         OnnxModelLoader.__init__(
             self,
@@ -47,6 +48,7 @@ class Yolov8Detector(OnnxModelLoader):
         )
 
         self.keep_result_seconds: float = keep_result_seconds  # 保留识别结果的秒数
+        self.lazy_result: bool = lazy_result  # 识别结果是否延迟构建
         self.run_result_history: List[DetectFrameResult] = []  # 历史识别结果
         self.overlay_debug_bus = None
 
@@ -85,24 +87,29 @@ class Yolov8Detector(OnnxModelLoader):
         context.label_list = label_list
         context.category_list = category_list
 
-        input_tensor = self.prepare_input(context)
-        t2 = time.time()
+        # 输入输出使用预分配的内存 需要在锁内完成后处理
+        with self.run_lock:
+            input_tensor = self.prepare_input(context)
+            t2 = time.time()
 
-        outputs = self.inference(input_tensor)
-        t3 = time.time()
+            outputs = self.inference(input_tensor)
+            t3 = time.time()
 
-        results = self.process_output(outputs, context)
-        t4 = time.time()
+            result_array = self.process_output_array(outputs, context)
+            t4 = time.time()
 
-        # log.info(f'识别完毕 得到结果 {len(results)}个。预处理耗时 {t2 - t1:.3f}s, 推理耗时 {t3 - t2:.3f}s, 后处理耗时 {t4 - t3:.3f}s')
+        # log.info(f'识别完毕 得到结果 {len(result_array)}个。预处理耗时 {t2 - t1:.3f}s, 推理耗时 {t3 - t2:.3f}s, 后处理耗时 {t4 - t3:.3f}s')
 
-        frame_result = self.record_result(context, results)
+        if self.lazy_result:
+            frame_result = self.record_result_array(context, result_array)
+        else:
+            frame_result = self.record_result(context, self.to_result_list(result_array))
         self._emit_overlay_vision(frame_result)
         self._emit_overlay_perf_and_timeline(
             preprocess_ms=(t2 - t1) * 1000.0,
             infer_ms=(t3 - t2) * 1000.0,
             postprocess_ms=(t4 - t3) * 1000.0,
-            result_count=len(results),
+            result_count=len(result_array),
         )
         return frame_result
 
@@ -110,7 +117,7 @@ class Yolov8Detector(OnnxModelLoader):
         """
         推理前的预处理
         """
-        input_tensor, scale_height, scale_width = onnx_utils.scale_input_image_u(context.img, self.onnx_input_width, self.onnx_input_height)
+        input_tensor, scale_height, scale_width = self.input_buffer.scale_input_image(context.img)
         context.scale_height = scale_height
         context.scale_width = scale_width
         return input_tensor
@@ -121,7 +128,7 @@ class Yolov8Detector(OnnxModelLoader):
         :param input_tensor: 输入模型的图片 RGB通道
         :return: onnx模型推理得到的结果
         """
-        outputs = self.session.run(self.output_names, {self.input_names[0]: input_tensor})
+        outputs = self.run_session(input_tensor)
         return outputs
 
     def process_output(self, output, context: DetectContext) -> List[DetectObjectResult]:
@@ -130,6 +137,14 @@ class Yolov8Detector(OnnxModelLoader):
         :param context: 上下文
         :return: 最终得到的识别结果
         """
+        return self.to_result_list(self.process_output_array(output, context))
+
+    def process_output_array(self, output, context: DetectContext) -> np.ndarray:
+        """
+        :param output: 推理结果
+        :param context: 上下文
+        :return: 最终得到的识别结果 结构化数组 dtype=DETECT_RESULT_DTYPE
+        """
         predictions = np.squeeze(output[0]).T
 
         keep = np.ones(shape=(predictions.shape[1]), dtype=bool)
@@ -154,9 +169,8 @@ class Yolov8Detector(OnnxModelLoader):
         predictions = predictions[scores > context.conf, :]
         scores = scores[scores > context.conf]
 
-        results: List[DetectObjectResult] = []
         if len(scores) == 0:
-            return results
+            return np.zeros((0,), dtype=DETECT_RESULT_DTYPE)
 
         # 选择置信度最高的类别
         class_ids = np.argmax(predictions[:, 4:], axis=1)
@@ -171,14 +185,23 @@ class Yolov8Detector(OnnxModelLoader):
         # 进行NMS 获取最后的结果
         indices = multiclass_nms(boxes, scores, class_ids, context.iou)
 
-        for idx in indices:
-            result = DetectObjectResult(rect=boxes[idx].tolist(),
-                                        score=float(scores[idx]),
-                                        detect_class=self.idx_2_class[int(class_ids[idx])]
-                                        )
-            results.append(result)
+        result_array = np.empty((len(indices),), dtype=DETECT_RESULT_DTYPE)
+        result_array['x1'] = boxes[indices, 0]
+        result_array['y1'] = boxes[indices, 1]
+        result_array['x2'] = boxes[indices, 2]
+        result_array['y2'] = boxes[indices, 3]
+        result_array['score'] = scores[indices]
+        result_array['class_id'] = class_ids[indices]
 
-        return results
+        return result_array
+
+    def to_result_list(self, result_array: np.ndarray) -> List[DetectObjectResult]:
+        """
+        将结构化数组转化为识别结果
+        :param result_array: 结构化数组 dtype=DETECT_RESULT_DTYPE
+        :return: 识别结果
+        """
+        return DetectFrameResult(raw_image=None, result_array=result_array, idx_2_class=self.idx_2_class).results
 
     def record_result(self, context: DetectContext, results: List[DetectObjectResult]) -> DetectFrameResult:
         """
@@ -198,6 +221,25 @@ class Yolov8Detector(OnnxModelLoader):
 
         return new_frame
 
+    def record_result_array(self, context: DetectContext, result_array: np.ndarray) -> DetectFrameResult:
+        """
+        记录本帧识别结果 DetectObjectResult 在使用时才构建
+        :param context: 识别上下文
+        :param result_array: 识别结果 结构化数组
+        :return: 组合结果
+        """
+        new_frame = DetectFrameResult(
+            raw_image=context.img,
+            run_time=context.run_time,
+            result_array=result_array,
+            idx_2_class=self.idx_2_class,
+        )
+        self.run_result_history.append(new_frame)
+        self.run_result_history = [i for i in self.run_result_history
+                                   if context.run_time - i.run_time <= self.keep_result_seconds]
+
+        return new_frame
+
     def _emit_overlay_vision(self, frame_result: DetectFrameResult) -> None:
         bus = getattr(self, "overlay_debug_bus", None)
         if bus is None or frame_result is None:
@@ -36,6 +36,8 @@ _DEFAULT_PERFORMANCE_METRIC_ENABLED: dict[str, bool] = {
     "yolo_ms": True,
     "cv_pipeline_ms": True,
     "operation_round_ms": True,
+    "frame_reuse_rate": True,
+    "battle_check_p95_ms": True,
     "overlay_refresh_ms": True,
 }
 
@@ -25,6 +25,8 @@ _CORE_METRIC_ORDER = [
     "yolo_ms",
     "cv_pipeline_ms",
     "operation_round_ms",
+    "frame_reuse_rate",
+    "battle_check_p95_ms",
     "overlay_refresh_ms",
 ]
 
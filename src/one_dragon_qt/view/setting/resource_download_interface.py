@@ -13,6 +13,8 @@ from one_dragon_qt.widgets.download_card.onnx_model_download_card import (
 )
 from one_dragon_qt.widgets.log_display_card import LogDisplayCard
 from one_dragon_qt.widgets.setting_card.help_card import HelpCard
+from one_dragon_qt.widgets.setting_card.spin_box_setting_card import SpinBoxSettingCard
+from one_dragon_qt.widgets.setting_card.switch_setting_card import SwitchSettingCard
 from one_dragon_qt.widgets.vertical_scroll_interface import VerticalScrollInterface
 
 
@@ -63,6 +65,20 @@ class ResourceDownloadInterface(VerticalScrollInterface):
 
         self._add_model_cards(group)
 
+        self.onnx_threads_opt = SpinBoxSettingCard(
+            icon=FluentIcon.SETTING, title='模型推理线程数',
+            content='0为自动 修改后新加载的模型生效', maximum=32,
+        )
+        self.onnx_threads_opt.value_changed.connect(self.on_onnx_session_config_changed)
+        group.addSettingCard(self.onnx_threads_opt)
+
+        self.onnx_cache_opt = SwitchSettingCard(
+            icon=FluentIcon.SAVE, title='缓存优化后的模型',
+            content='仅CPU推理时生效 加快模型加载',
+        )
+        self.onnx_cache_opt.value_changed.connect(self.on_onnx_session_config_changed)
+        group.addSettingCard(self.onnx_cache_opt)
+
         return group
 
     def _add_model_cards(self, group: SettingCardGroup) -> None:
@@ -82,9 +98,15 @@ class ResourceDownloadInterface(VerticalScrollInterface):
         self.ocr_opt.gpu_opt.setChecked(self.ctx.model_config.ocr_gpu)
         self.ocr_opt.blockSignals(False)
 
+        self.onnx_threads_opt.init_with_adapter(self.ctx.model_config.get_prop_adapter('onnx_intra_op_num_threads'))
+        self.onnx_cache_opt.init_with_adapter(self.ctx.model_config.get_prop_adapter('onnx_cache_optimized_model'))
+
     def on_ocr_changed(self, index: int, value: CommonDownloaderParam) -> None:
         self.ctx.model_config.ocr = value.save_file_name[:-4]
 
     def on_ocr_gpu_changed(self, value: bool) -> None:
         self.ctx.model_config.ocr_gpu = value
         self.ctx.init_ocr()
+
+    def on_onnx_session_config_changed(self, value) -> None:
+        self.ctx.init_onnx_session_config()
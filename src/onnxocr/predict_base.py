@@ -1,22 +1,12 @@
-import onnxruntime
+from one_dragon.utils import onnx_session_factory
 
 class PredictBase(object):
     def __init__(self):
         pass
 
     def get_onnx_session(self, model_dir, use_gpu):
-        availables = onnxruntime.get_available_providers()
-        if use_gpu:
-            if 'CUDAExecutionProvider' in availables:
-                providers = ['CUDAExecutionProvider']
-            elif 'DmlExecutionProvider' in availables:
-                providers = ['DmlExecutionProvider']
-            else:
-                providers = ['CPUExecutionProvider']
-        else:
-            providers = ['CPUExecutionProvider']
-
-        onnx_session = onnxruntime.InferenceSession(model_dir, providers=providers)
+        # 使用统一的session工厂 相同模型共享session 并记录推理耗时
+        onnx_session = onnx_session_factory.get_session(model_dir, gpu=use_gpu)
 
         # print("providers:", onnxruntime.get_device())
         return onnx_session
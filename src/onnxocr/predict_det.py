@@ -35,6 +35,7 @@ class TextDetector(PredictBase):
         postprocess_params["use_dilation"] = args.use_dilation
         postprocess_params["score_mode"] = args.det_db_score_mode
         postprocess_params["box_type"] = args.det_box_type
+        postprocess_params["use_fast_box"] = args.det_db_fast_box
 
         # 实例化预处理操作类
         self.preprocess_op = create_operators(pre_process_list)
@@ -58,14 +59,49 @@ class TextDetector(PredictBase):
         rect[3] = tmp[np.argmax(diff)]
         return rect
 
+    def order_points_clockwise_batch(self, pts):
+        """
+        order_points_clockwise 的批量版本
+        :param pts: (N, 4, 2)
+        :return: (N, 4, 2) 左上 右上 右下 左下
+        """
+        idx = np.arange(pts.shape[0])
+        s = pts.sum(axis=2)
+        tl_idx = np.argmin(s, axis=1)
+        br_idx = np.argmax(s, axis=1)
+        # 剩下的两个点中 y-x 较小的是右上 较大的是左下
+        diff = (pts[:, :, 1] - pts[:, :, 0]).astype(np.float64)
+        tr_diff = diff.copy()
+        tr_diff[idx, tl_idx] = np.inf
+        tr_diff[idx, br_idx] = np.inf
+        bl_diff = diff.copy()
+        bl_diff[idx, tl_idx] = -np.inf
+        bl_diff[idx, br_idx] = -np.inf
+        rect = np.stack([
+            pts[idx, tl_idx],
+            pts[idx, np.argmin(tr_diff, axis=1)],
+            pts[idx, br_idx],
+            pts[idx, np.argmax(bl_diff, axis=1)],
+        ], axis=1)
+        return rect.astype("float32")
+
     def clip_det_res(self, points, img_height, img_width):
-        for pno in range(points.shape[0]):
-            points[pno, 0] = int(min(max(points[pno, 0], 0), img_width - 1))
-            points[pno, 1] = int(min(max(points[pno, 1], 0), img_height - 1))
+        points[..., 0] = np.clip(points[..., 0], 0, img_width - 1).astype(np.int32)
+        points[..., 1] = np.clip(points[..., 1], 0, img_height - 1).astype(np.int32)
         return points
 
     def filter_tag_det_res(self, dt_boxes, image_shape):
         img_height, img_width = image_shape[0:2]
+        if isinstance(dt_boxes, np.ndarray) and dt_boxes.ndim == 3 and dt_boxes.shape[1] == 4:
+            if dt_boxes.shape[0] == 0:
+                return np.zeros((0, 4, 2), dtype="float32")
+            # 所有框一起处理
+            boxes = self.order_points_clockwise_batch(dt_boxes)
+            boxes = self.clip_det_res(boxes, img_height, img_width)
+            rect_width = np.linalg.norm(boxes[:, 0] - boxes[:, 1], axis=1).astype(np.int32)
+            rect_height = np.linalg.norm(boxes[:, 0] - boxes[:, 3], axis=1).astype(np.int32)
+            return boxes[(rect_width > 3) & (rect_height > 3)]
+
         dt_boxes_new = []
         for box in dt_boxes:
             if type(box) is list:
@@ -276,7 +276,12 @@ class TextRecognizer(PredictBase):
 
         return img
 
-    def __call__(self, img_list):
+    def __call__(self, img_list, batch_num=None):
+        """
+        :param img_list: 待识别的文本行图片
+        :param batch_num: 每次送入模型的图片数量 默认使用 rec_batch_num
+        :return: [(text, score)]
+        """
         img_num = len(img_list)
         # Calculate the aspect ratio of all text bars
         width_list = []
@@ -285,7 +290,8 @@ class TextRecognizer(PredictBase):
         # Sorting can speed up the recognition process
         indices = np.argsort(np.array(width_list))
         rec_res = [["", 0.0]] * img_num
-        batch_num = self.rec_batch_num
+        if batch_num is None or batch_num <= 0:
+            batch_num = self.rec_batch_num
 
         for beg_img_no in range(0, img_num, batch_num):
             end_img_no = min(img_num, beg_img_no + batch_num)
@@ -1,6 +1,7 @@
 import os
 import cv2
 import copy
+import numpy as np
 import onnxocr.predict_det as predict_det
 import onnxocr.predict_cls as predict_cls
 import onnxocr.predict_rec as predict_rec
@@ -71,6 +72,76 @@ class TextSystem(object):
 
         return filter_boxes, filter_rec_res
 
+    def ocr_regions(self, img_list, region_list, cls=True, rec_batch_num=None):
+        """
+        对多个区域进行识别
+        每张图片只进行一次文字检测，所有区域的文本行合并后一次送入识别模型
+
+        :param img_list: 图片列表
+        :param region_list: 区域列表 每个元素为 (图片下标, (x1, y1, x2, y2)) 区域为None时代表整张图片
+        :param cls: 是否使用方向分类
+        :param rec_batch_num: 识别模型每批的图片数量 默认所有文本行填充到同一批中一次识别
+        :return: 每个区域对应的结果列表 [[box, (text, score)]] box坐标相对区域左上角
+        """
+        # 文字检测 只检测被区域使用的图片
+        dt_boxes_map = {}
+        for img_idx, _ in region_list:
+            if img_idx in dt_boxes_map:
+                continue
+            dt_boxes = self.text_detector(img_list[img_idx])
+            if dt_boxes is None or len(dt_boxes) == 0:
+                dt_boxes_map[img_idx] = []
+            else:
+                dt_boxes_map[img_idx] = sorted_boxes(dt_boxes)
+
+        # 按区域裁剪文本行
+        img_crop_list = []
+        crop_owner_list = []  # (区域下标, 区域内的box)
+        for region_idx, (img_idx, region) in enumerate(region_list):
+            img = img_list[img_idx]
+            if region is None:
+                x1, y1, x2, y2 = 0, 0, img.shape[1], img.shape[0]
+            else:
+                x1, y1, x2, y2 = region
+            for box in dt_boxes_map[img_idx]:
+                tmp_box = np.array(box, dtype=np.float32)
+                # 只保留区域内的部分 相当于先裁剪区域再检测
+                tmp_box[:, 0] = np.clip(tmp_box[:, 0], x1, x2 - 1)
+                tmp_box[:, 1] = np.clip(tmp_box[:, 1], y1, y2 - 1)
+                if (
+                    np.max(tmp_box[:, 0]) - np.min(tmp_box[:, 0]) <= 3
+                    or np.max(tmp_box[:, 1]) - np.min(tmp_box[:, 1]) <= 3
+                ):
+                    continue
+                if self.args.det_box_type == "quad":
+                    img_crop = get_rotate_crop_image(img, tmp_box.copy())
+                else:
+                    img_crop = get_minarea_rect_crop(img, tmp_box.copy())
+                img_crop_list.append(img_crop)
+                tmp_box[:, 0] -= x1
+                tmp_box[:, 1] -= y1
+                crop_owner_list.append((region_idx, tmp_box))
+
+        result_list = [[] for _ in region_list]
+        if len(img_crop_list) == 0:
+            return result_list
+
+        # 方向分类
+        if self.use_angle_cls and cls:
+            img_crop_list, angle_list = self.text_classifier(img_crop_list)
+
+        # 图像识别 所有区域合并识别
+        if rec_batch_num is None:
+            rec_batch_num = len(img_crop_list)
+        rec_res = self.text_recognizer(img_crop_list, batch_num=rec_batch_num)
+
+        for (region_idx, box), rec_result in zip(crop_owner_list, rec_res):
+            text, score = rec_result
+            if score >= self.drop_score:
+                result_list[region_idx].append([box, rec_result])
+
+        return result_list
+
 
 def sorted_boxes(dt_boxes):
     """
@@ -81,6 +152,20 @@ def sorted_boxes(dt_boxes):
         sorted boxes(array) with shape [4, 2]
     """
     num_boxes = dt_boxes.shape[0]
+    if dt_boxes.ndim == 3 and num_boxes > 0:
+        # 与下面的逐个交换一致 只是先取出左上角坐标 在下标上交换 避免每次比较都索引三维数组
+        order = list(np.lexsort((dt_boxes[:, 0, 0], dt_boxes[:, 0, 1])))
+        y_list = list(dt_boxes[:, 0, 1])
+        x_list = list(dt_boxes[:, 0, 0])
+        for i in range(num_boxes - 1):
+            for j in range(i, -1, -1):
+                a, b = order[j], order[j + 1]
+                if abs(y_list[b] - y_list[a]) < 10 and x_list[b] < x_list[a]:
+                    order[j], order[j + 1] = b, a
+                else:
+                    break
+        return [dt_boxes[i] for i in order]
+
     sorted_boxes = sorted(dt_boxes, key=lambda x: (x[0][1], x[0][0]))
     _boxes = list(sorted_boxes)
 
@@ -94,20 +94,52 @@ class CTCLabelDecode(BaseRecLabelDecode):
 
     def __init__(self, character_dict_path=None, use_space_char=False, **kwargs):
         super(CTCLabelDecode, self).__init__(character_dict_path, use_space_char)
+        # 字符表的numpy形式 用于按下标批量取字符
+        self.character_array = np.array(self.character, dtype=object)
 
     def __call__(self, preds, label=None, *args, **kwargs):
         if isinstance(preds, tuple) or isinstance(preds, list):
             preds = preds[-1]
         # if isinstance(preds, paddle.Tensor):
         #     preds = preds.numpy()
-        preds_idx = preds.argmax(axis=2)
-        preds_prob = preds.max(axis=2)
-        text = self.decode(preds_idx, preds_prob, is_remove_duplicate=True)
+        text = self.decode_batch(preds)
         if label is None:
             return text
         label = self.decode(label)
         return text, label
 
+    def decode_batch(self, preds):
+        """
+        CTC贪心解码 整个 (N, T, C) 输出一次性向量化处理 与 decode(is_remove_duplicate=True) 结果一致
+        :param preds: 识别模型输出 (N, T, C)
+        :return: [(text, score)]
+        """
+        preds_idx = preds.argmax(axis=2)
+        # 直接按下标取概率 避免再对整个输出求一次max
+        preds_prob = np.take_along_axis(preds, preds_idx[:, :, np.newaxis], axis=2)[:, :, 0]
+
+        # 去除重复字符和空白字符
+        selection = preds_idx != 0
+        selection[:, 1:] &= preds_idx[:, 1:] != preds_idx[:, :-1]
+
+        char_cnt = selection.sum(axis=1)
+        prob_sum = np.where(selection, preds_prob, 0).sum(axis=1, dtype=np.float64)
+        score_list = np.divide(
+            prob_sum, char_cnt, out=np.zeros(len(char_cnt), dtype=np.float64), where=char_cnt > 0
+        ).tolist()
+
+        # 按每行的字符数量切分
+        char_list = self.character_array[preds_idx[selection]]
+        char_split = np.split(char_list, np.cumsum(char_cnt)[:-1])
+
+        result_list = []
+        for chars, score in zip(char_split, score_list):
+            text = "".join(chars)
+            if self.reverse:  # for arabic rec
+                text = self.pred_reverse(text)
+            result_list.append((text, score))
+        return result_list
+
     def add_special_char(self, dict_character):
         dict_character = ["blank"] + dict_character
         return dict_character
@@ -896,3 +928,55 @@ class CANLabelDecode(BaseRecLabelDecode):
             return text
         label = self.decode(label)
         return text, label
+
+
+def __debug():
+    """
+    对比 decode 与 decode_batch 的耗时
+    使用ppocrv5字典大小构造的模拟输出
+    """
+    import os
+    import time
+
+    from one_dragon.utils import os_utils
+
+    dict_path = os.path.join(os_utils.get_work_dir(), 'assets', 'models', 'onnx_ocr', 'ppocrv5', 'ppocrv5_dict.txt')
+    if os.path.exists(dict_path):
+        decoder = CTCLabelDecode(character_dict_path=dict_path, use_space_char=True)
+    else:
+        # 没有下载模型时 使用相同大小的模拟字典 (ppocrv5 共18383个字符 + 空格 + 空白)
+        decoder = CTCLabelDecode()
+        decoder.character = ["blank"] + [chr(0x4E00 + i) for i in range(18383)] + [" "]
+        decoder.character_array = np.array(decoder.character, dtype=object)
+    class_num = len(decoder.character)
+
+    rng = np.random.default_rng(0)
+    for batch_size, time_step in [(1, 40), (6, 40), (6, 160), (32, 80)]:
+        # 模拟softmax输出: 大部分时间步是空白 少数时间步是字符
+        logits = rng.random((batch_size, time_step, class_num), dtype=np.float32)
+        logits[:, :, 0] += rng.random((batch_size, time_step), dtype=np.float32) * 2
+        preds = logits / logits.sum(axis=2, keepdims=True)
+
+        loop_times = 50
+        t1 = time.perf_counter()
+        for _ in range(loop_times):
+            old_result = decoder.decode(preds.argmax(axis=2), preds.max(axis=2), is_remove_duplicate=True)
+        t2 = time.perf_counter()
+        for _ in range(loop_times):
+            new_result = decoder.decode_batch(preds)
+        t3 = time.perf_counter()
+
+        same = all(
+            o[0] == n[0] and abs(o[1] - n[1]) < 1e-5
+            for o, n in zip(old_result, new_result)
+        )
+        print('N=%d T=%d C=%d decode %.3fms decode_batch %.3fms 结果一致 %s' % (
+            batch_size, time_step, class_num,
+            (t2 - t1) * 1000 / loop_times,
+            (t3 - t2) * 1000 / loop_times,
+            same,
+        ))
+
+
+if __name__ == '__main__':
+    __debug()
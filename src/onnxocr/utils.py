@@ -281,6 +281,7 @@ def infer_args():
     parser.add_argument("--max_batch_size", type=int, default=10)
     parser.add_argument("--use_dilation", type=str2bool, default=False)
     parser.add_argument("--det_db_score_mode", type=str, default="fast")
+    parser.add_argument("--det_db_fast_box", type=str2bool, default=True)
 
     # EAST parmas
     parser.add_argument("--det_east_score_thresh", type=float, default=0.8)
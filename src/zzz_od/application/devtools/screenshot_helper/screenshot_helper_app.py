@@ -4,7 +4,6 @@ from typing import Optional
 from one_dragon.base.operation.application import application_const
 from one_dragon.base.operation.context_event_bus import ContextEventItem
 from one_dragon.base.operation.one_dragon_context import ContextKeyboardEventEnum
-from one_dragon.base.operation.operation_base import OperationResult
 from one_dragon.base.operation.operation_edge import node_from
 from one_dragon.base.operation.operation_node import operation_node
 from one_dragon.base.operation.operation_round_result import OperationRoundResult
@@ -52,8 +51,6 @@ class ScreenshotHelperApp(ZApplication):
         ZApplication.handle_init(self)
         length_second = self.config.length_second
         freq_second = self.config.frequency_second
-        self.ctx.controller.screenshot_alive_seconds = length_second + 1
-        self.ctx.controller.max_screenshot_cnt = length_second // freq_second + 5
         self.cache_max_count = length_second // freq_second + 1
         self.screenshot_cache = []
         self.cache_start_time = time.time()
@@ -142,8 +139,3 @@ class ScreenshotHelperApp(ZApplication):
             next_time = self.config.frequency_second
             return self.round_wait(wait_round_time=next_time)
         return self.round_success()
-
-    def after_operation_done(self, result: OperationResult):
-        ZApplication.after_operation_done(self, result)
-
-        self.ctx.controller.max_screenshot_cnt = 0
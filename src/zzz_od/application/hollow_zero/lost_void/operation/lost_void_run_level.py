@@ -12,6 +12,7 @@ from one_dragon.base.operation.operation_notify import NotifyTiming, node_notify
 from one_dragon.base.operation.operation_round_result import OperationRoundResult
 from one_dragon.base.screen import screen_utils
 from one_dragon.utils import cv2_utils, gpu_executor, str_utils, log_utils
+from one_dragon.utils.gpu_executor import GpuTaskPriority
 from one_dragon.utils.i18_utils import gt
 from one_dragon.utils.log_utils import log
 from one_dragon.yolo.detect_utils import DetectFrameResult
@@ -723,7 +724,8 @@ class LostVoidRunLevel(ZOperation):
                     try:
                         # 为了不随意打断战斗 这里的识别阈值要高一点
                         if self.ctx.model_config.lost_void_det_gpu:
-                            f = gpu_executor.submit(
+                            f = gpu_executor.submit_with_priority(
+                                GpuTaskPriority.LOW,
                                 self.detector.run,
                                 image=self.last_screenshot,
                                 conf=0.9,
@@ -747,7 +749,8 @@ class LostVoidRunLevel(ZOperation):
                 if not no_in_battle:
                     area = self.ctx.screen_loader.get_area('迷失之地-大世界', '区域-文本提示')
                     if self.ctx.model_config.ocr_gpu:
-                        f = gpu_executor.submit(
+                        f = gpu_executor.submit_with_priority(
+                            GpuTaskPriority.LOW,
                             screen_utils.find_by_ocr,
                             ctx=self.ctx,
                             screen=self.last_screenshot,
@@ -793,7 +796,8 @@ class LostVoidRunLevel(ZOperation):
                     '迷失之地-战斗失败'
                 ]
                 if self.ctx.model_config.ocr_gpu:
-                    f = gpu_executor.submit(
+                    f = gpu_executor.submit_with_priority(
+                        GpuTaskPriority.LOW,
                         self.check_and_update_current_screen,
                         screen=self.last_screenshot,
                         screen_name_list=no_in_battle_screen_name_list
@@ -805,7 +809,8 @@ class LostVoidRunLevel(ZOperation):
                 # 以下情况会出现确认对话框
                 # 1. 所有战术棱镜均已升级
                 if self.ctx.model_config.ocr_gpu:
-                    f = gpu_executor.submit(
+                    f = gpu_executor.submit_with_priority(
+                        GpuTaskPriority.LOW,
                         self.round_by_find_and_click_area,
                         screen=self.last_screenshot,
                         screen_name='迷失之地-大世界',
@@ -50,10 +50,13 @@ class ShiyuDefenseBattle(ZOperation):
             sub_dir='auto_battle',
             op_name=self.ctx.battle_assistant_config.auto_battle_config if self.team_config is None else self.team_config.auto_battle,
         )
+        # 战斗中每帧都要识别 只用到轮廓 使用编译后的流水线
+        for pipeline_name in ['防卫战倒计时', '防卫战倒计时-精英', '防卫战空洞传送点']:
+            self.ctx.cv_service.enable_compiled_pipeline(pipeline_name, outputs=('contours',))
         return self.round_success()
 
     @node_from(from_name='加载自动战斗指令')
-    @operation_node(name='等待战斗画面加载', node_max_retry_times=60)
+    @operation_node(name='等待战斗画面加载', node_max_retry_times=60, reuse_unchanged_frame=True)
     def wait_battle_screen(self) -> OperationRoundResult:
         result = self.round_by_find_area(self.last_screenshot, '战斗画面', '按键-普通攻击', retry_wait_round=1)
         return result
@@ -1,13 +1,19 @@
+from __future__ import annotations
+
 import cv2
 import numpy as np
 from cv2.typing import MatLike
-from typing import Optional
+from typing import List, Optional, Tuple, TYPE_CHECKING
 
+from one_dragon.base.cv_process.frame_image_cache import FrameImageCache
+from one_dragon.base.geometry.rectangle import Rect
 from one_dragon.utils import cv2_utils
-from zzz_od.context.zzz_context import ZContext
-from zzz_od.game_data.agent import AgentStateDef
+from zzz_od.game_data.agent import AgentStateCheckWay, AgentStateDef
 from one_dragon.utils.log_utils import log
 
+if TYPE_CHECKING:
+    from zzz_od.context.zzz_context import ZContext
+
 def get_template(ctx: ZContext, state_def: AgentStateDef,
                  total: Optional[int] = None, pos: Optional[int] = None):
     """
@@ -34,7 +40,8 @@ def check_cnt_by_color_range(
         screen: MatLike,
         state_def: AgentStateDef,
         total: Optional[int] = None,
-        pos: Optional[int] = None
+        pos: Optional[int] = None,
+        frame_cache: Optional[FrameImageCache] = None,
 ) -> int:
     """
     在指定区域内，按颜色判断连通块有多少个
@@ -43,15 +50,13 @@ def check_cnt_by_color_range(
     :param state_def: 角色状态定义
     :param total: 总角色数量
     :param pos: 角色位置 从1开始
+    :param frame_cache: 同一帧截图的派生图片缓存 传入时相同区域的裁剪和颜色转换只计算一次
     :return:
     """
     template = get_template(ctx, state_def, total, pos)
     if template is None:
         return 0
-    part = cv2_utils.crop_image_only(screen, template.get_template_rect_by_point())
-    to_check = cv2.bitwise_and(part, part, mask=template.mask)
-
-    mask = filter_by_color(to_check, state_def)
+    mask = _filter_by_color_with_mask(screen, template.get_template_rect_by_point(), template.mask, state_def, frame_cache)
     mask = cv2_utils.dilate(mask, 2)
     # cv2_utils.show_image(mask, wait=0)
 
@@ -72,7 +77,8 @@ def check_exist_by_color_range(
         screen: MatLike,
         state_def: AgentStateDef,
         total: Optional[int] = None,
-        pos: Optional[int] = None
+        pos: Optional[int] = None,
+        frame_cache: Optional[FrameImageCache] = None,
 ) -> int:
     """
     在指定区域内，按颜色判断是否有出现
@@ -81,9 +87,10 @@ def check_exist_by_color_range(
     :param state_def: 角色状态定义
     :param total: 总角色数量
     :param pos: 角色位置 从1开始
+    :param frame_cache: 同一帧截图的派生图片缓存 传入时相同区域的裁剪和颜色转换只计算一次
     :return 存在返回1 不存在返回0
     """
-    cnt = check_cnt_by_color_range(ctx, screen, state_def, total, pos)
+    cnt = check_cnt_by_color_range(ctx, screen, state_def, total, pos, frame_cache)
     return 1 if cnt > 0 else 0
 
 
@@ -92,7 +99,8 @@ def check_length_by_background_gray(
         screen: MatLike,
         state_def: AgentStateDef,
         total: Optional[int] = None,
-        pos: Optional[int] = None
+        pos: Optional[int] = None,
+        frame_cache: Optional[FrameImageCache] = None,
 ) -> int:
     """
     在指定区域内，按背景的灰度色来反推横条的长度
@@ -101,16 +109,14 @@ def check_length_by_background_gray(
     :param state_def: 角色状态定义
     :param total: 总角色数量
     :param pos: 角色位置 从1开始
+    :param frame_cache: 同一帧截图的派生图片缓存 传入时相同区域的裁剪和颜色转换只计算一次
     :return: 0~100
     """
     template = get_template(ctx, state_def, total, pos)
     if template is None:
         return 0
-    part = cv2_utils.crop_image_only(screen, template.get_template_rect_by_point())
     # 模版需要保证高度是1
-    to_check = part
-
-    gray = cv2.cvtColor(to_check, cv2.COLOR_RGB2GRAY).mean(axis=0)
+    gray = _get_gray(screen, template.get_template_rect_by_point(), frame_cache).mean(axis=0)
     mask = (gray >= state_def.lower_color) & (gray <= state_def.upper_color)
     bg_mask_idx = np.where(mask)
     fg_mask_idx = np.where(~mask)
@@ -149,7 +155,8 @@ def check_length_by_foreground_gray(
         screen: MatLike,
         state_def: AgentStateDef,
         total: Optional[int] = None,
-        pos: Optional[int] = None
+        pos: Optional[int] = None,
+        frame_cache: Optional[FrameImageCache] = None,
 ) -> int:
     """
     在指定区域内，按背景的灰度色来反推横条的长度
@@ -158,14 +165,14 @@ def check_length_by_foreground_gray(
     :param state_def: 角色状态定义
     :param total: 总角色数量
     :param pos: 角色位置 从1开始
+    :param frame_cache: 同一帧截图的派生图片缓存 传入时相同区域的裁剪和颜色转换只计算一次
     :return: 0~100
     """
     template = get_template(ctx, state_def, total, pos)
     if template is None:
         return 0
-    part = cv2_utils.crop_image_only(screen, template.get_template_rect_by_point())
     # 模版需要保证高度是1
-    gray = cv2.cvtColor(part, cv2.COLOR_RGB2GRAY).mean(axis=0)
+    gray = _get_gray(screen, template.get_template_rect_by_point(), frame_cache).mean(axis=0)
     if state_def.split_color_range is not None:
         split_mask = (gray >= state_def.split_color_range[0]) & (gray <= state_def.split_color_range[1])
         gray = gray[np.where(split_mask == False)]
@@ -191,7 +198,8 @@ def check_length_by_foreground_color(
         screen: MatLike,
         state_def: AgentStateDef,
         total: Optional[int] = None,
-        pos: Optional[int] = None
+        pos: Optional[int] = None,
+        frame_cache: Optional[FrameImageCache] = None,
 ) -> int:
     """
     在指定区域内，按前景色(彩色)来计算横条的长度
@@ -200,15 +208,13 @@ def check_length_by_foreground_color(
     :param state_def: 角色状态定义
     :param total: 总角色数量
     :param pos: 角色位置 从1开始
+    :param frame_cache: 同一帧截图的派生图片缓存 传入时相同区域的裁剪和颜色转换只计算一次
     :return: 0~100
     """
     template = get_template(ctx, state_def, total, pos)
     if template is None:
         return 0
-    part = cv2_utils.crop_image_only(screen, template.get_template_rect_by_point())
-    to_check = part
-
-    mask = filter_by_color(to_check, state_def)
+    mask = _filter_by_color_with_mask(screen, template.get_template_rect_by_point(), None, state_def, frame_cache)
     # 查找所有非零（白色）像素的坐标
     white_pixels_coords = cv2.findNonZero(mask)
 
@@ -220,7 +226,7 @@ def check_length_by_foreground_color(
         _, _, w, _ = cv2.boundingRect(white_pixels_coords)
         fg_cnt = w # 我们需要的长度就是这个矩形的宽度
 
-    total_cnt = part.shape[1] # 裁剪区域的总宽度，即横条可能达到的最大水平长度
+    total_cnt = mask.shape[1] # 裁剪区域的总宽度，即横条可能达到的最大水平长度
 
     # 边界检查
     if fg_cnt < 0:
@@ -237,7 +243,8 @@ def check_template_not_found(
         screen: MatLike,
         state_def: AgentStateDef,
         total: Optional[int] = None,
-        pos: Optional[int] = None
+        pos: Optional[int] = None,
+        frame_cache: Optional[FrameImageCache] = None,
 ) -> int:
     """
     在指定区域内，找不到对应模板
@@ -246,12 +253,13 @@ def check_template_not_found(
     :param state_def: 角色状态定义
     :param total: 总角色数量
     :param pos: 角色位置 从1开始
+    :param frame_cache: 同一帧截图的派生图片缓存 传入时相同区域的裁剪和颜色转换只计算一次
     :return: 找不到对应模板返回1 否则返回0
     """
     template = get_template(ctx, state_def, total, pos)
     if template is None:
         return False
-    to_check = cv2_utils.crop_image_only(screen, template.get_template_rect_by_point())
+    to_check = _crop(screen, template.get_template_rect_by_point(), frame_cache)
     mrl = cv2_utils.match_template(source=to_check, template=template.raw, mask=template.mask,
                                    threshold=state_def.template_threshold)
 
@@ -263,7 +271,8 @@ def check_template_found(
         screen: MatLike,
         state_def: AgentStateDef,
         total: Optional[int] = None,
-        pos: Optional[int] = None
+        pos: Optional[int] = None,
+        frame_cache: Optional[FrameImageCache] = None,
 ) -> int:
     """
     在指定区域内，找到对应模板
@@ -272,12 +281,13 @@ def check_template_found(
     :param state_def: 角色状态定义
     :param total: 总角色数量
     :param pos: 角色位置 从1开始
+    :param frame_cache: 同一帧截图的派生图片缓存 传入时相同区域的裁剪和颜色转换只计算一次
     :return: 找不到对应模板返回1 否则返回0
     """
     template = get_template(ctx, state_def, total, pos)
     if template is None:
         return False
-    to_check = cv2_utils.crop_image_only(screen, template.get_template_rect_by_point())
+    to_check = _crop(screen, template.get_template_rect_by_point(), frame_cache)
     mrl = cv2_utils.match_template(source=to_check, template=template.raw, mask=template.mask,
                                    threshold=state_def.template_threshold)
 
@@ -289,7 +299,8 @@ def check_cnt_by_color_channel_max_range(
         screen: MatLike,
         state_def: AgentStateDef,
         total: Optional[int] = None,
-        pos: Optional[int] = None
+        pos: Optional[int] = None,
+        frame_cache: Optional[FrameImageCache] = None,
 ) -> int:
     """
     在指定区域内，按颜色通道的最大值判断连通块有多少个
@@ -298,12 +309,13 @@ def check_cnt_by_color_channel_max_range(
     :param state_def: 角色状态定义
     :param total: 总角色数量
     :param pos: 角色位置 从1开始
+    :param frame_cache: 同一帧截图的派生图片缓存 传入时相同区域的裁剪和颜色转换只计算一次
     :return:
     """
     template = get_template(ctx, state_def, total, pos)
     if template is None:
         return 0
-    part = cv2_utils.crop_image_only(screen, template.get_template_rect_by_point())
+    part = _crop(screen, template.get_template_rect_by_point(), frame_cache)
     to_check = cv2.bitwise_and(part, part, mask=template.mask)
 
     r, g, b = cv2.split(to_check)
@@ -328,7 +340,8 @@ def check_exist_by_color_channel_max_range(
         screen: MatLike,
         state_def: AgentStateDef,
         total: Optional[int] = None,
-        pos: Optional[int] = None
+        pos: Optional[int] = None,
+        frame_cache: Optional[FrameImageCache] = None,
 ) -> int:
     """
     在指定区域内，按颜色通道的最大值判断是否有出现
@@ -337,8 +350,9 @@ def check_exist_by_color_channel_max_range(
     :param state_def: 角色状态定义
     :param total: 总角色数量
     :param pos: 角色位置 从1开始
+    :param frame_cache: 同一帧截图的派生图片缓存 传入时相同区域的裁剪和颜色转换只计算一次
     """
-    cnt = check_cnt_by_color_channel_max_range(ctx, screen, state_def, total, pos)
+    cnt = check_cnt_by_color_channel_max_range(ctx, screen, state_def, total, pos, frame_cache)
     return 1 if cnt > 0 else 0
 
 
@@ -347,13 +361,14 @@ def check_cnt_by_color_channel_equal_range(
         screen: MatLike,
         state_def: AgentStateDef,
         total: Optional[int] = None,
-        pos: Optional[int] = None
+        pos: Optional[int] = None,
+        frame_cache: Optional[FrameImageCache] = None,
 ) -> int:
     # 1. 获取模板并裁剪目标区域
     template = get_template(ctx, state_def, total, pos)
     if template is None:
         return 0
-    part = cv2_utils.crop_image_only(screen, template.get_template_rect_by_point())
+    part = _crop(screen, template.get_template_rect_by_point(), frame_cache)
     to_check = cv2.bitwise_and(part, part, mask=template.mask)
 
     # 2. 分离并检查RGB三通道
@@ -373,7 +388,8 @@ def check_exist_by_color_channel_equal_range(
         screen: MatLike,
         state_def: AgentStateDef,
         total: Optional[int] = None,
-        pos: Optional[int] = None
+        pos: Optional[int] = None,
+        frame_cache: Optional[FrameImageCache] = None,
 ) -> int:
     """
     在指定区域内，按颜色通道相等性判断是否有出现
@@ -382,11 +398,220 @@ def check_exist_by_color_channel_equal_range(
     :param state_def: 角色状态定义
     :param total: 总角色数量
     :param pos: 角色位置 从1开始
+    :param frame_cache: 同一帧截图的派生图片缓存 传入时相同区域的裁剪和颜色转换只计算一次
     :return: 存在返回1 不存在返回0
     """
     # 直接返回check_cnt_by_color_channel_equal_range的结果
     # 因为它已经返回了1或0（当点数量大于等于阈值时返回1，否则返回0）
-    return check_cnt_by_color_channel_equal_range(ctx, screen, state_def, total, pos)
+    return check_cnt_by_color_channel_equal_range(ctx, screen, state_def, total, pos, frame_cache)
+
+
+_LENGTH_CHECK_WAYS = (
+    AgentStateCheckWay.BACKGROUND_GRAY_RANGE_LENGTH,
+    AgentStateCheckWay.FOREGROUND_GRAY_RANGE_LENGTH,
+    AgentStateCheckWay.FOREGROUND_COLOR_RANGE_LENGTH,
+)
+
+
+def check_length_in_batch(
+        ctx: ZContext,
+        screen: MatLike,
+        state_list: List[Tuple[AgentStateDef, Optional[int], Optional[int]]],
+        frame_cache: Optional[FrameImageCache] = None,
+) -> List[Optional[int]]:
+    """
+    批量计算所有横条长度类的状态 (前台和后台角色的能量、特殊技、终结技等)
+    结果与逐个调用 check_length_by_xxx 一致
+    :param ctx: 上下文
+    :param screen: 游戏画面
+    :param state_list: 需要识别的状态 (角色状态定义, 总角色数量, 角色位置)
+    :param frame_cache: 同一帧截图的派生图片缓存
+    :return: 每个状态的值 不是横条长度类的状态 (或无法批量计算的) 为 None 需要单独识别
+    """
+    if frame_cache is None or frame_cache.image is not screen:
+        frame_cache = FrameImageCache(screen)
+
+    result: List[Optional[int]] = [None] * len(state_list)
+    idx_list: List[int] = []
+    part_list: List[MatLike] = []
+    state_def_list: List[AgentStateDef] = []
+    for idx, (state_def, total, pos) in enumerate(state_list):
+        if state_def.check_way not in _LENGTH_CHECK_WAYS:
+            continue
+        template = get_template(ctx, state_def, total, pos)
+        if template is None:
+            result[idx] = 0
+            continue
+        idx_list.append(idx)
+        part_list.append(frame_cache.crop(template.get_template_rect_by_point()))
+        state_def_list.append(state_def)
+
+    for idx, value in zip(idx_list, measure_length_in_batch(part_list, state_def_list)):
+        result[idx] = value
+
+    return result
+
+
+def measure_length_in_batch(part_list: List[MatLike], state_def_list: List[AgentStateDef]) -> List[Optional[int]]:
+    """
+    在裁剪好的横条区域上 批量计算长度
+    相同高度的区域横向拼接成一张图 只做一次灰度、HSV转换和颜色范围判断 每个区域的结果用分段的列归约计算
+    :param part_list: 每个状态裁剪好的区域
+    :param state_def_list: 每个状态的定义 需要是横条长度类的
+    :return: 每个状态的值 无法批量计算的为 None
+    """
+    result: List[Optional[int]] = [None] * len(part_list)
+    gray_groups: dict[int, List[int]] = {}  # key=区域高度 value=下标
+    color_groups: dict[int, List[int]] = {}
+    for idx, (part, state_def) in enumerate(zip(part_list, state_def_list)):
+        if part.ndim != 3 or part.shape[0] == 0 or part.shape[1] == 0:  # 空区域 单独识别时会报错
+            continue
+        if state_def.check_way == AgentStateCheckWay.FOREGROUND_COLOR_RANGE_LENGTH:
+            color_groups.setdefault(part.shape[0], []).append(idx)
+        else:
+            gray_groups.setdefault(part.shape[0], []).append(idx)
+
+    for group in gray_groups.values():
+        values = _measure_gray_length([part_list[i] for i in group], [state_def_list[i] for i in group])
+        for idx, value in zip(group, values):
+            result[idx] = value
+
+    for group in color_groups.values():
+        values = _measure_color_length([part_list[i] for i in group], [state_def_list[i] for i in group])
+        for idx, value in zip(group, values):
+            result[idx] = value
+
+    return result
+
+
+def _measure_gray_length(part_list: List[MatLike], state_def_list: List[AgentStateDef]) -> List[Optional[int]]:
+    """
+    批量计算 按背景灰度 和 按前景灰度 的横条长度 与 check_length_by_background_gray / check_length_by_foreground_gray 一致
+    """
+    widths = np.array([part.shape[1] for part in part_list])
+    starts = np.concatenate(([0], np.cumsum(widths)[:-1]))
+    gray = cv2.cvtColor(np.concatenate(part_list, axis=1), cv2.COLOR_RGB2GRAY).mean(axis=0)
+
+    # 分隔条的颜色 没有分隔条的 使用一个不会命中的范围
+    split_range = np.array([
+        state_def.split_color_range
+        if state_def.check_way == AgentStateCheckWay.FOREGROUND_GRAY_RANGE_LENGTH and state_def.split_color_range is not None
+        else (1, 0)
+        for state_def in state_def_list
+    ], dtype=np.float64)
+    color_range = np.array([(state_def.lower_color, state_def.upper_color) for state_def in state_def_list], dtype=np.float64)
+    split_range = np.repeat(split_range, widths, axis=0)
+    color_range = np.repeat(color_range, widths, axis=0)
+
+    # 去掉分隔条后 每列在各自区域内的下标
+    keep = ~((gray >= split_range[:, 0]) & (gray <= split_range[:, 1]))
+    keep_cnt = np.cumsum(keep)
+    keep_before = keep_cnt[starts] - keep[starts]
+    local_idx = keep_cnt - np.repeat(keep_before, widths) - 1
+    total_cnt = np.add.reduceat(keep.astype(np.int64), starts)
+
+    in_range = keep & (gray >= color_range[:, 0]) & (gray <= color_range[:, 1])
+    out_range = keep & ~in_range
+    in_left = _segment_min(local_idx, in_range, starts, widths, total_cnt + 1)
+    in_right = _segment_max(local_idx, in_range, starts, widths, 0)
+    out_left = _segment_min(local_idx, out_range, starts, widths, total_cnt + 1)
+    out_right = _segment_max(local_idx, out_range, starts, widths, 0)
+
+    result: List[Optional[int]] = []
+    for i, state_def in enumerate(state_def_list):
+        total = int(total_cnt[i])
+        if total == 0:
+            result.append(None)
+            continue
+        if state_def.check_way == AgentStateCheckWay.BACKGROUND_GRAY_RANGE_LENGTH:
+            # 背景色在前景色左边时 说明前景色是分隔条 用背景色来判断长度
+            if in_left[i] < out_left[i]:
+                bg_cnt = min(max(int(in_right[i] - in_left[i] + 1), 0), total)
+                fg_cnt = total - bg_cnt
+            else:
+                fg_cnt = min(max(int(out_right[i] - out_left[i] + 1), 0), total)
+            result.append(int(fg_cnt * 100.0 / total))
+        else:
+            fg_cnt = min(max(int(in_right[i] - in_left[i] + 1), 0), total)
+            result.append(int(fg_cnt * state_def.max_length / total))
+
+    return result
+
+
+def _measure_color_length(part_list: List[MatLike], state_def_list: List[AgentStateDef]) -> List[Optional[int]]:
+    """
+    批量计算 按前景色 的横条长度 与 check_length_by_foreground_color 一致
+    每列使用各自状态的颜色范围 HSV范围在H通道回绕时拆成两个范围
+    """
+    widths = np.array([part.shape[1] for part in part_list])
+    starts = np.concatenate(([0], np.cumsum(widths)[:-1]))
+    strip = np.concatenate(part_list, axis=1)
+
+    never = (np.full(3, 255, dtype=np.uint8), np.zeros(3, dtype=np.uint8))  # 不会命中的范围
+    use_hsv_list: List[bool] = []
+    supported_list: List[bool] = []
+    range_list: List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = []
+    for state_def in state_def_list:
+        use_hsv, use_rgb = _get_color_mode(state_def)
+        if use_hsv:
+            ranges = cv2_utils.get_hsv_range_list(state_def.hsv_color, state_def.hsv_color_diff)
+        elif use_rgb:
+            ranges = [(np.array(state_def.lower_color, dtype=np.uint8), np.array(state_def.upper_color, dtype=np.uint8))]
+        else:  # 没有过滤条件 全部通过
+            ranges = [(np.zeros(3, dtype=np.uint8), np.full(3, 255, dtype=np.uint8))]
+        # 单个数值的范围 cv2.inRange 只判断第一个通道 不批量计算
+        supported = all(r.shape == (3,) for pair in ranges for r in pair)
+        if not supported:
+            ranges = [never]
+        if len(ranges) == 1:
+            ranges = [ranges[0], never]
+        use_hsv_list.append(use_hsv)
+        supported_list.append(supported)
+        range_list.append((ranges[0][0], ranges[0][1], ranges[1][0], ranges[1][1]))
+
+    # 每列的颜色范围 (列, 通道)
+    bounds = [np.repeat(np.array([r[i] for r in range_list]), widths, axis=0) for i in range(4)]
+    if any(use_hsv_list):
+        hsv = cv2.cvtColor(strip, cv2.COLOR_RGB2HSV)
+        source = np.where(np.repeat(use_hsv_list, widths)[None, :, None], hsv, strip)
+    else:
+        source = strip
+    mask = (
+        np.all((source >= bounds[0]) & (source <= bounds[1]), axis=2)
+        | np.all((source >= bounds[2]) & (source <= bounds[3]), axis=2)
+    )
+    column_hit = mask.any(axis=0)
+
+    local_idx = np.arange(len(column_hit)) - np.repeat(starts, widths)
+    left = _segment_min(local_idx, column_hit, starts, widths, widths)
+    right = _segment_max(local_idx, column_hit, starts, widths, -1)
+
+    result: List[Optional[int]] = []
+    for i, state_def in enumerate(state_def_list):
+        if not supported_list[i]:
+            result.append(None)
+            continue
+        total = int(widths[i])
+        fg_cnt = int(right[i] - left[i] + 1) if right[i] >= 0 else 0  # 所有命中像素的外接矩形宽度
+        result.append(int(min(fg_cnt, total) * state_def.max_length / total))
+
+    return result
+
+
+def _segment_min(values: np.ndarray, mask: np.ndarray, starts: np.ndarray, widths: np.ndarray, initial) -> np.ndarray:
+    """
+    每个分段内 mask 为真的 values 的最小值 没有时为 initial
+    """
+    fill = np.repeat(np.broadcast_to(initial, widths.shape), widths)
+    return np.minimum.reduceat(np.where(mask, values, fill), starts)
+
+
+def _segment_max(values: np.ndarray, mask: np.ndarray, starts: np.ndarray, widths: np.ndarray, initial) -> np.ndarray:
+    """
+    每个分段内 mask 为真的 values 的最大值 没有时为 initial
+    """
+    fill = np.repeat(np.broadcast_to(initial, widths.shape), widths)
+    return np.maximum.reduceat(np.where(mask, values, fill), starts)
 
 
 def filter_by_color(
@@ -402,18 +627,7 @@ def filter_by_color(
     :param color_mode:  颜色模式 auto/rgb/hsv
     :return:            二值化的 mask 图像。白色为符合条件，黑色为不符合。
     """
-    use_hsv = False
-    use_rgb = False
-
-    if color_mode == 'auto':
-        if state_def.hsv_color is not None and state_def.hsv_color_diff is not None:
-            use_hsv = True
-        elif state_def.lower_color is not None and state_def.upper_color is not None:
-            use_rgb = True
-    elif color_mode == 'hsv':
-        use_hsv = True
-    elif color_mode == 'rgb':
-        use_rgb = True
+    use_hsv, use_rgb = _get_color_mode(state_def, color_mode)
 
     if use_hsv:
         return cv2_utils.filter_by_color(
@@ -432,3 +646,79 @@ def filter_by_color(
     else:
         # 没有任何过滤条件，返回一个全白的mask，表示全部通过
         return np.full((image.shape[0], image.shape[1]), 255, dtype=np.uint8)
+
+
+def _get_color_mode(state_def: AgentStateDef, color_mode: str = 'auto') -> tuple[bool, bool]:
+    """
+    颜色过滤使用的模式
+    :param state_def: 状态定义
+    :param color_mode: 颜色模式 auto/rgb/hsv
+    :return: 是否使用HSV 是否使用RGB
+    """
+    use_hsv = False
+    use_rgb = False
+
+    if color_mode == 'auto':
+        if state_def.hsv_color is not None and state_def.hsv_color_diff is not None:
+            use_hsv = True
+        elif state_def.lower_color is not None and state_def.upper_color is not None:
+            use_rgb = True
+    elif color_mode == 'hsv':
+        use_hsv = True
+    elif color_mode == 'rgb':
+        use_rgb = True
+
+    return use_hsv, use_rgb
+
+
+_BLACK_PIXEL = np.zeros((1, 1, 3), dtype=np.uint8)
+
+
+def _crop(screen: MatLike, rect: Rect, frame_cache: Optional[FrameImageCache]) -> MatLike:
+    if frame_cache is not None:
+        return frame_cache.crop(rect)
+    return cv2_utils.crop_image_only(screen, rect)
+
+
+def _get_gray(screen: MatLike, rect: Rect, frame_cache: Optional[FrameImageCache]) -> MatLike:
+    if frame_cache is not None:
+        return frame_cache.gray(rect)
+    return cv2.cvtColor(cv2_utils.crop_image_only(screen, rect), cv2.COLOR_RGB2GRAY)
+
+
+def _filter_by_color_with_mask(
+        screen: MatLike,
+        rect: Rect,
+        template_mask: Optional[MatLike],
+        state_def: AgentStateDef,
+        frame_cache: Optional[FrameImageCache],
+) -> MatLike:
+    """
+    对区域先使用模板掩码 再按颜色过滤
+    使用帧缓存时 直接过滤原图区域 再把掩码外的部分设置为黑色像素的过滤结果 结果与先使用掩码一致
+    :param screen: 游戏画面
+    :param rect: 区域
+    :param template_mask: 模板掩码 为 None 时不使用
+    :param state_def: 状态定义
+    :param frame_cache: 同一帧截图的派生图片缓存
+    :return: 二值化的 mask 图像
+    """
+    if frame_cache is None:
+        part = cv2_utils.crop_image_only(screen, rect)
+        to_check = part if template_mask is None else cv2.bitwise_and(part, part, mask=template_mask)
+        return filter_by_color(to_check, state_def)
+
+    use_hsv, use_rgb = _get_color_mode(state_def)
+    if use_hsv:
+        mask = frame_cache.filter_hsv(rect, state_def.hsv_color, state_def.hsv_color_diff)
+    elif use_rgb:
+        mask = frame_cache.in_range(rect, state_def.lower_color, state_def.upper_color)
+    else:
+        part = frame_cache.crop(rect)
+        mask = np.full((part.shape[0], part.shape[1]), 255, dtype=np.uint8)
+
+    if template_mask is None:
+        return mask
+    if filter_by_color(_BLACK_PIXEL, state_def)[0, 0] > 0:  # 掩码外的黑色像素也满足颜色条件
+        return np.where(template_mask > 0, mask, 255).astype(np.uint8)
+    return cv2.bitwise_and(mask, mask, mask=template_mask)
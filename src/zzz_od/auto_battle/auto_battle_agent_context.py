@@ -7,6 +7,7 @@ from typing import Optional, List, Union, Tuple, Callable, TYPE_CHECKING
 from cv2.typing import MatLike
 
 from one_dragon.base.conditional_operation.state_recorder import StateRecord, StateRecorder
+from one_dragon.base.cv_process.frame_image_cache import FrameImageCache
 from one_dragon.base.screen.screen_area import ScreenArea
 from one_dragon.utils import cv2_utils, cal_utils
 from one_dragon.utils.log_utils import log
@@ -343,9 +344,13 @@ class AutoBattleAgentContext:
         else:
             return [(i.agent, i.matched_template_id) for i in self.team_info.agent_list if i.agent is not None]
 
-    def check_agent_related(self, screen: MatLike, screenshot_time: float) -> None:
+    def check_agent_related(self, screen: MatLike, screenshot_time: float,
+                            frame_cache: Optional[FrameImageCache] = None) -> None:
         """
         判断角色相关内容 并发送事件
+        :param screen: 游戏画面
+        :param screenshot_time: 截图时间
+        :param frame_cache: 同一帧截图的派生图片缓存 不传入时新建
         :return:
         """
         if not self._check_agent_lock.acquire(blocking=False):
@@ -356,9 +361,12 @@ class AutoBattleAgentContext:
                 # 还没有达到识别间隔
                 return
             self._last_check_agent_time = screenshot_time
+            if frame_cache is None or frame_cache.image is not screen:
+                frame_cache = FrameImageCache(screen)
 
             screen_agent_list = self._check_agent_in_parallel(screen)
-            energy_state_list, special_state_list, ultimate_state_list, other_state_list = self._check_all_agent_state(screen, screenshot_time, screen_agent_list)
+            energy_state_list, special_state_list, ultimate_state_list, other_state_list = self._check_all_agent_state(
+                screen, screenshot_time, screen_agent_list, frame_cache)
 
             update_state_record_list = []
             # 尝试更新代理人列表 成功的话 更新状态记录
@@ -454,57 +462,63 @@ class AutoBattleAgentContext:
             匹配命中的代理人和对应的皮肤模板
         """
         # 代理人和皮肤多了之后 容易有头像相似度高 因此需要匹配度最高的 见 issue #1695
-        best_agent: Agent | None = None
-        best_template_id: str | None = None
-        best_confidence: float = 0
-
         prefix = "avatar_1_" if is_front else "avatar_2_"
         # 构造待匹配的模板列表
         # 1. 优先使用上次成功匹配的ID
         # 2. 其他所有可用的模板
-        priority_list: list[list[tuple[Agent, str]]] = [[], []]
+        candidate_list: list[tuple[Agent, str]] = []
+        priority_list: list[list[int]] = [[], []]
         for agent, specific_template_id in possible_agents:
             for t_id in agent.template_id_list:
                 if specific_template_id is not None and t_id == specific_template_id:
-                    priority_list[0].append((agent, t_id))
+                    priority_list[0].append(len(candidate_list))
                 else:
-                    priority_list[1].append((agent, t_id))
-
-        # 按优先级进行匹配
-        for agent_template_list in priority_list:
-            for agent, template_id in agent_template_list:
-                template_name = prefix + template_id
-                mrl = self.ctx.tm.match_template(img, "battle", template_name, threshold=0.8)
-                if mrl.max is None:
-                    continue
-                if mrl.max.confidence < best_confidence:
-                    continue
+                    priority_list[1].append(len(candidate_list))
+                candidate_list.append((agent, t_id))
 
-                best_agent = agent
-                best_template_id = template_id
-                best_confidence = mrl.max.confidence
+        # 所有模板一次性匹配
+        bank = self.ctx.tm.get_template_bank("battle", [prefix + t_id for _, t_id in candidate_list])
+        score_list = bank.match(img)
 
-            if best_agent is not None:
-                return best_agent, best_template_id
+        # 按优先级选出匹配度最高的
+        for idx_list in priority_list:
+            if len(idx_list) == 0:
+                continue
+            best_idx = max(idx_list, key=lambda idx: score_list[idx])
+            if score_list[best_idx] >= 0.8:
+                return candidate_list[best_idx]
 
         return None, None
 
-    def _check_agent_state_in_parallel(self, screen: MatLike, screenshot_time: float, agent_state_list: List[CheckAgentState]) -> List[StateRecord]:
+    def _check_agent_state_in_batch(self, screen: MatLike, screenshot_time: float, agent_state_list: List[CheckAgentState],
+                                    frame_cache: Optional[FrameImageCache] = None) -> List[StateRecord]:
         """
-        并行识别多个角色状态
+        批量识别多个角色状态
+        横条长度类的状态 (能量、特殊技、终结技等) 拼接在一起 用一组数组运算算出
+        其余的状态 在当前线程逐个识别 都是很小的区域 不再每个状态提交一次线程池
         :param screen: 游戏画面
         :param screenshot_time: 截图时间
         :param agent_state_list: 需要识别的状态列表
+        :param frame_cache: 同一帧截图的派生图片缓存
         :return:
         """
-        future_list: List[Future] = []
-        for state in agent_state_list:
-            future_list.append(_battle_agent_context_executor.submit(self._check_agent_state, screen, screenshot_time, state))
+        try:
+            value_list: List[Optional[int]] = agent_state_checker.check_length_in_batch(
+                self.ctx, screen,
+                [(to_check.state, to_check.total, to_check.pos) for to_check in agent_state_list],
+                frame_cache=frame_cache,
+            )
+        except Exception:
+            log.error('批量识别角色状态失败', exc_info=True)
+            value_list = [None] * len(agent_state_list)
 
-        result_list: List[Optional[StateRecord]] = []
-        for future in future_list:
+        result_list: List[StateRecord] = []
+        for to_check, value in zip(agent_state_list, value_list):
             try:
-                record = future.result()
+                if value is None:
+                    record = self._check_agent_state(screen, screenshot_time, to_check, frame_cache)
+                else:
+                    record = self._to_state_record(to_check.state, screenshot_time, value)
                 if record is not None:
                     result_list.append(record)
             except Exception:
@@ -512,19 +526,32 @@ class AutoBattleAgentContext:
 
         return result_list
 
-    def _check_agent_state(self, screen: MatLike, screenshot_time: float, to_check: CheckAgentState) -> Optional[StateRecord]:
+    def _check_agent_state(self, screen: MatLike, screenshot_time: float, to_check: CheckAgentState,
+                           frame_cache: Optional[FrameImageCache] = None) -> Optional[StateRecord]:
         """
         识别一个角色状态
         :param screen:
         :param screenshot_time:
         :param to_check: 需要识别的状态
+        :param frame_cache: 同一帧截图的派生图片缓存
         :return:
         """
-        value: int = -1
         state = to_check.state
         check_method = _agent_state_check_method[state.check_way]
-        value = check_method(ctx=self.ctx, screen=screen, state_def=state, total=to_check.total, pos=to_check.pos)
+        value = check_method(ctx=self.ctx, screen=screen, state_def=state, total=to_check.total, pos=to_check.pos,
+                             frame_cache=frame_cache)
+
+        return self._to_state_record(state, screenshot_time, value)
 
+    @staticmethod
+    def _to_state_record(state: AgentStateDef, screenshot_time: float, value: int) -> Optional[StateRecord]:
+        """
+        识别结果转化为状态记录
+        :param state: 角色状态定义
+        :param screenshot_time: 截图时间
+        :param value: 识别的值
+        :return: 未达到触发值时返回 None
+        """
         if value > -1 and value >= state.min_value_trigger_state:
             # 对于切人-冷却和格挡破碎，值为0时视为清除信号
             should_clear = False
@@ -536,7 +563,8 @@ class AutoBattleAgentContext:
             return StateRecord(state.state_name, screenshot_time, value, is_clear=should_clear)
 
     def _check_all_agent_state(self, screen: MatLike, screenshot_time: float,
-                               screen_agent_list: List[Tuple[Agent, Optional[str]]]
+                               screen_agent_list: List[Tuple[Agent, Optional[str]]],
+                               frame_cache: Optional[FrameImageCache] = None,
                                ) -> Tuple[List[StateRecord], List[StateRecord], List[StateRecord], List[StateRecord]]:
         """
         识别所有需要的角色状态
@@ -546,6 +574,7 @@ class AutoBattleAgentContext:
         :param screen: 游戏画面
         :param screenshot_time: 截图时间
         :param screen_agent_list: 当前截图的角色列表
+        :param frame_cache: 同一帧截图的派生图片缓存
         :return: 三个状态记录 能量、终结技、角色状态
         """
 
@@ -621,7 +650,7 @@ class AutoBattleAgentContext:
             state = CommonAgentStateEnum.LIFE_DEDUCTION_21.value
         to_check_list.append(CheckAgentState(state))
 
-        all_state_result_list = self._check_agent_state_in_parallel(screen, screenshot_time, to_check_list)
+        all_state_result_list = self._check_agent_state_in_batch(screen, screenshot_time, to_check_list, frame_cache)
         energy_len = len(energy_state_list)
         special_len = len(special_state_list)
         ultimate_len = len(ultimate_state_list)
@@ -1,18 +1,22 @@
 from __future__ import annotations
 
+import os
 import threading
 import time
 from concurrent.futures import Future, ThreadPoolExecutor
-from typing import TYPE_CHECKING
+from functools import partial
+from typing import TYPE_CHECKING, Callable
 
 from cv2.typing import MatLike
 
 from one_dragon.base.conditional_operation.state_recorder import StateRecord
+from one_dragon.base.cv_process.frame_image_cache import FrameImageCache
 from one_dragon.base.matcher.match_result import MatchResult
 from one_dragon.base.screen import screen_utils
 from one_dragon.base.screen.screen_area import ScreenArea
 from one_dragon.base.screen.screen_utils import FindAreaResultEnum
-from one_dragon.utils import cal_utils, cv2_utils, gpu_executor, str_utils, thread_utils
+from one_dragon.utils import cal_utils, cv2_utils, gpu_executor, onnx_session_factory, str_utils, thread_utils
+from one_dragon.utils.gpu_executor import GpuTaskPriority
 from one_dragon.utils.log_utils import log
 from zzz_od.auto_battle.atomic_op.atomic_op_factory import AtomicOpFactory
 from zzz_od.auto_battle.auto_battle_agent_context import AutoBattleAgentContext
@@ -24,6 +28,11 @@ from zzz_od.auto_battle.auto_battle_state_record_service import (
     AutoBattleStateRecordService,
 )
 from zzz_od.auto_battle.auto_battle_target_context import AutoBattleTargetContext
+from zzz_od.auto_battle.battle_check_scheduler import (
+    BattleCheckDef,
+    BattleCheckPriority,
+    BattleCheckScheduler,
+)
 from zzz_od.game_data.agent import Agent, AgentEnum
 
 if TYPE_CHECKING:
@@ -79,6 +88,21 @@ class AutoBattleContext:
         # 自动释放终结技开关
         self.auto_ultimate_enabled: bool = True  # 是否在终结技可用时自动释放
 
+        # 每帧识别任务的调度 帧耗时过长时推迟低优先级的识别 保证闪避不用排队
+        self.check_scheduler: BattleCheckScheduler = BattleCheckScheduler()
+        for check_def in [
+            BattleCheckDef('闪避-声音', BattleCheckPriority.CRITICAL),
+            BattleCheckDef('闪避-画面', BattleCheckPriority.CRITICAL),
+            BattleCheckDef('角色状态', BattleCheckPriority.HIGH),
+            BattleCheckDef('连携技', BattleCheckPriority.HIGH, lambda: self._check_chain_interval),
+            BattleCheckDef('快速支援', BattleCheckPriority.NORMAL, lambda: self._check_quick_interval),
+            BattleCheckDef('目标状态', BattleCheckPriority.NORMAL),
+            BattleCheckDef('距离', BattleCheckPriority.LOW, lambda: self._check_distance_interval, max_defer_seconds=5),
+            BattleCheckDef('战斗结束', BattleCheckPriority.LOW, lambda: self._check_end_interval, max_defer_seconds=2),
+        ]:
+            self.check_scheduler.register(check_def)
+        self._last_emit_check_perf_time: float = 0  # 上一次输出识别耗时统计的时间
+
     def init_auto_op(
         self,
         op_name: str,
@@ -197,6 +221,11 @@ class AutoBattleContext:
         self.with_distance_times: int = 0  # 有显示距离的次数
         self.last_check_distance = -1
 
+        self.check_scheduler.reset()
+
+        # 连携条每帧都要识别 只用到轮廓 使用编译后的流水线
+        self.ctx.cv_service.enable_compiled_pipeline('战斗-连携条', outputs=('contours',))
+
     def init_screen_area(self) -> None:
         """
         初始化识别区域 不要每次用的时候再读取
@@ -400,6 +429,48 @@ class AutoBattleContext:
             )
         )
 
+    def _emit_overlay_check_perf(self) -> None:
+        """
+        输出各个识别从帧开始到完成的耗时 取最慢的 p95 附带GPU排队和各个模型的推理耗时
+        """
+        bus = getattr(self.ctx, "overlay_debug_bus", None)
+        if bus is None:
+            return
+        try:
+            from one_dragon.base.operation.overlay_debug_bus import PerfMetricSample
+        except Exception:
+            return
+        stats = self.check_scheduler.get_stats()
+        if len(stats) == 0:
+            return
+        meta = {name: f"{i['latency_p95_ms']:.1f}ms deferred={i['deferred']}" for name, i in stats.items()}
+        gpu_stats = gpu_executor.get_stats()
+        meta['GPU排队'] = f"depth={gpu_stats['queue_depth']} wait_p95={gpu_stats['wait_p95_ms']:.1f}ms stale={gpu_stats['stale']}"
+        for model_path, session_stats in onnx_session_factory.get_all_session_stats().items():
+            if session_stats['count'] == 0:
+                continue
+            model_name = f'{os.path.basename(os.path.dirname(model_path))}/{os.path.basename(model_path)}'
+            meta[f'模型-{model_name}'] = f"p95={session_stats['p95_ms']:.1f}ms count={session_stats['count']}"
+        bus.add_performance(
+            PerfMetricSample(
+                metric="battle_check_p95_ms",
+                value=max(i['latency_p95_ms'] for i in stats.values()),
+                unit="ms",
+                ttl_seconds=20.0,
+                meta=meta,
+            )
+        )
+
+    @staticmethod
+    def _gpu_submit_fn(priority: GpuTaskPriority, check_name: str, screenshot_time: float) -> Callable[..., Future]:
+        """
+        按优先级提交到GPU执行器的方法 同一个识别还在排队的旧截图任务会被取消
+        :param priority: 优先级
+        :param check_name: 识别名称
+        :param screenshot_time: 截图时间
+        """
+        return partial(gpu_executor.submit_with_priority, priority, stale_key=check_name, frame_time=screenshot_time)
+
     def move_w(self, press: bool = False, press_time: float | None = None, release: bool = False):
         if press:
             e = BattleStateEnum.BTN_MOVE_W.value + '-按下'
@@ -530,50 +601,73 @@ class AutoBattleContext:
         in_battle = self.is_normal_attack_btn_available(screen)
         self.last_check_in_battle = in_battle
 
-        future_list: list[Future] = []
+        future_list: list[Future | None] = []
+        scheduler = self.check_scheduler
+        scheduler.new_frame(screenshot_time)
+        check_executor = _battle_state_check_executor.submit
+        # 这一帧的裁剪、颜色转换、颜色过滤结果 各个识别共用 识别完后随帧丢弃
+        frame_cache = FrameImageCache(screen)
 
-        # 统一提交检测任务
+        # 统一提交检测任务 按优先级从高到低
         if in_battle:
             # 闪避相关
-            audio_future = _battle_state_check_executor.submit(self.dodge_context.check_dodge_audio, screenshot_time)
+            audio_future = scheduler.submit('闪避-声音', check_executor, self.dodge_context.check_dodge_audio, screenshot_time)
             future_list.append(audio_future)
             if self.ctx.model_config.flash_classifier_gpu:
-                future_list.append(gpu_executor.submit(self.dodge_context.check_dodge_flash, screen, screenshot_time, audio_future))
+                gpu_submit = self._gpu_submit_fn(GpuTaskPriority.CRITICAL, '闪避-画面', screenshot_time)
+                future_list.append(scheduler.submit('闪避-画面', gpu_submit, self.dodge_context.check_dodge_flash,
+                                                    screen, screenshot_time, audio_future,
+                                                    single_worker=True, executor_key=gpu_executor))
             else:
-                future_list.append(_battle_state_check_executor.submit(self.dodge_context.check_dodge_flash, screen, screenshot_time, audio_future))
+                future_list.append(scheduler.submit('闪避-画面', check_executor, self.dodge_context.check_dodge_flash,
+                                                    screen, screenshot_time, audio_future))
 
             # 角色状态
-            future_list.append(_battle_state_check_executor.submit(self.agent_context.check_agent_related, screen, screenshot_time))
-
-            # 目标状态
-            future_list.append(_battle_state_check_executor.submit(self.target_context.run_all_checks, screen, screenshot_time))
+            future_list.append(scheduler.submit('角色状态', check_executor, self.agent_context.check_agent_related,
+                                                screen, screenshot_time, frame_cache))
 
             # 快速支援
-            future_list.append(_battle_state_check_executor.submit(self.check_quick_assist, screen, screenshot_time))
+            future_list.append(scheduler.submit('快速支援', check_executor, self.check_quick_assist, screen, screenshot_time))
+
+            # 目标状态
+            future_list.append(scheduler.submit('目标状态', check_executor, self.target_context.run_all_checks,
+                                                screen, screenshot_time, frame_cache))
 
             # 距离
             if check_distance:
                 if self.ctx.model_config.ocr_gpu:
-                    future_list.append(gpu_executor.submit(self._check_distance_with_lock, screen, screenshot_time))
+                    gpu_submit = self._gpu_submit_fn(GpuTaskPriority.LOW, '距离', screenshot_time)
+                    future_list.append(scheduler.submit('距离', gpu_submit, self._check_distance_with_lock,
+                                                        screen, screenshot_time,
+                                                        single_worker=True, executor_key=gpu_executor))
                 else:
-                    future_list.append(_battle_state_check_executor.submit(self._check_distance_with_lock, screen, screenshot_time))
+                    future_list.append(scheduler.submit('距离', check_executor, self._check_distance_with_lock, screen, screenshot_time))
         else:
             # 连携
-            future_list.append(_battle_state_check_executor.submit(self.check_chain_attack, screen, screenshot_time))
+            future_list.append(scheduler.submit('连携技', check_executor, self.check_chain_attack,
+                                                screen, screenshot_time, frame_cache))
 
             # 战斗结束
             check_battle_end = check_battle_end_normal_result or check_battle_end_hollow_result or check_battle_end_defense_result
             if check_battle_end:
                 if self.ctx.model_config.ocr_gpu:
-                    executor = gpu_executor
+                    submit_fn = self._gpu_submit_fn(GpuTaskPriority.LOW, '战斗结束', screenshot_time)
+                    single_worker, executor_key = True, gpu_executor
                 else:
-                    executor = _battle_state_check_executor
-                future_list.append(executor.submit(
+                    submit_fn, single_worker, executor_key = check_executor, False, None
+                future_list.append(scheduler.submit(
+                    '战斗结束', submit_fn,
                     self._check_battle_end,
                     screen, screenshot_time,
-                    check_battle_end_normal_result, check_battle_end_hollow_result, check_battle_end_defense_result
+                    check_battle_end_normal_result, check_battle_end_hollow_result, check_battle_end_defense_result,
+                    single_worker=single_worker, executor_key=executor_key,
                 ))
 
+        future_list = [i for i in future_list if i is not None]
+        if screenshot_time - self._last_emit_check_perf_time > 1:
+            self._last_emit_check_perf_time = screenshot_time
+            self._emit_overlay_check_perf()
+
         # 统一处理结果
         for future in future_list:
             future.add_done_callback(thread_utils.handle_future_result)
@@ -584,9 +678,12 @@ class AutoBattleContext:
 
         return in_battle
 
-    def check_chain_attack(self, screen: MatLike, screenshot_time: float) -> None:
+    def check_chain_attack(self, screen: MatLike, screenshot_time: float, frame_cache: FrameImageCache | None = None) -> None:
         """
         识别连携技
+        :param screen: 游戏画面
+        :param screenshot_time: 截图时间
+        :param frame_cache: 同一帧截图的派生图片缓存
         """
         if not self._check_chain_lock.acquire(blocking=False):
             return
@@ -597,13 +694,13 @@ class AutoBattleContext:
                 return
             self._last_check_chain_time = screenshot_time
 
-            self._check_chain_attack_in_parallel(screen, screenshot_time)
+            self._check_chain_attack_in_parallel(screen, screenshot_time, frame_cache)
         except Exception:
             log.error('识别连携技出错', exc_info=True)
         finally:
             self._check_chain_lock.release()
 
-    def _check_chain_attack_in_parallel(self, screen: MatLike, screenshot_time: float):
+    def _check_chain_attack_in_parallel(self, screen: MatLike, screenshot_time: float, frame_cache: FrameImageCache | None = None):
         """
         并行识别连携技角色
         """
@@ -619,7 +716,7 @@ class AutoBattleContext:
         future_list.append(_battle_state_check_executor.submit(self._match_chain_agent_in, c2, possible_agents))
 
         # 连携条检测（独立运行，结果在方法内部处理）
-        _battle_state_check_executor.submit(self._check_chain_bar, screen, screenshot_time)
+        _battle_state_check_executor.submit(self._check_chain_bar, screen, screenshot_time, frame_cache)
 
         for future in future_list:
             try:
@@ -702,9 +799,10 @@ class AutoBattleContext:
 
         return None
 
-    def _check_chain_bar(self, screen: MatLike, screenshot_time: float) -> bool:
+    def _check_chain_bar(self, screen: MatLike, screenshot_time: float, frame_cache: FrameImageCache | None = None) -> bool:
         """
         检测连携条的轮廓
+        :param frame_cache: 同一帧截图的派生图片缓存
         :return: 是否检测到轮廓
         """
         try:
@@ -714,7 +812,8 @@ class AutoBattleContext:
                 screen,
                 debug_mode=False,
                 start_time=screenshot_time,
-                timeout=1.0
+                timeout=1.0,
+                frame_cache=frame_cache,
             )
 
             # 检查是否有轮廓
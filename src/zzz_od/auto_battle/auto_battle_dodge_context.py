@@ -9,12 +9,12 @@ from typing import TYPE_CHECKING
 import librosa
 import numpy as np
 from cv2.typing import MatLike
-from scipy.signal import butter, correlate, filtfilt
-from sklearn.preprocessing import scale
+from scipy.signal import butter
 
 from one_dragon.base.conditional_operation.state_recorder import StateRecord
 from one_dragon.utils import cal_utils, os_utils, thread_utils, yolo_config_utils
 from one_dragon.utils.log_utils import log
+from zzz_od.auto_battle.dodge_audio_matcher import DodgeAudioMatcher
 from zzz_od.context.zzz_context import ZContext
 from zzz_od.yolo.flash_classifier import FlashClassifier
 
@@ -46,16 +46,20 @@ class AudioRecorder:
         self._cut_off = 1000  # Hz,截止频率,对该频率一下的声音进行滤波,若需要识别人声可适当降低
 
         # Butterworth高通滤波
-        self.filter_b, self.filter_a = butter(
+        self.filter_sos = butter(
             self._filter_degree,
             self._cut_off,
             btype='highpass',
-            output='ba',
+            output='sos',
             fs=self._sample_rate
         )
 
-        self.latest_audio = np.empty(shape=(0,), dtype=np.float64)  # 存储最新的音频数据
-        self._update_audio_lock = threading.Lock()
+        # 最新0.5秒的音频 录制时流式滤波和计算与模板的相关性
+        self.audio_matcher: DodgeAudioMatcher = DodgeAudioMatcher(int(self._sample_rate // 2), self.filter_sos)
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
 
     def start_running_async(self) -> None:
         """
@@ -67,7 +71,7 @@ class AudioRecorder:
 
             self.running = True
 
-        self.latest_audio = np.zeros(int(self._sample_rate // 2))  # 初始化音频数据缓冲区，长度为0.5秒
+        self.audio_matcher.clear()
         future = _dodge_check_executor.submit(self._record_loop)
         future.add_done_callback(thread_utils.handle_future_result)
 
@@ -92,10 +96,7 @@ class AudioRecorder:
                 else:
                     stream_data = stream_data.T
 
-                with self._update_audio_lock:
-                    # 更新 latest_audio
-                    self.latest_audio[:-len(stream_data)] = self.latest_audio[len(stream_data):]
-                    self.latest_audio[-len(stream_data):] = stream_data
+                self.audio_matcher.append(stream_data)
 
     def stop_running(self) -> None:
         """
@@ -107,8 +108,7 @@ class AudioRecorder:
         """
         清楚当前录音
         """
-        with self._update_audio_lock:
-            self.latest_audio = np.zeros(int(self._sample_rate // 2))
+        self.audio_matcher.clear()
 
 
 class YoloStateEventEnum(Enum):
@@ -138,7 +138,7 @@ class AutoBattleDodgeContext:
 
         # 识别间隔
         self._check_dodge_interval: float | list[float] = 0
-        self._check_audio_interval: float = 0.02
+        self._check_audio_interval: float = 0  # 录制时已经流式计算好 每帧都可以识别
 
         # 上一次识别的时间
         self._last_check_dodge_time: float = 0
@@ -156,7 +156,7 @@ class AutoBattleDodgeContext:
         加载自动战斗操作器时的动作
         """
         self._check_dodge_interval = auto_op.check_dodge_interval
-        self._check_audio_interval = 0.02
+        self._check_audio_interval = 0
 
         use_gpu = self.ctx.model_config.flash_classifier_gpu
         if self._flash_model is None or self._flash_model.gpu != use_gpu:
@@ -190,12 +190,13 @@ class AutoBattleDodgeContext:
         if self._audio_template is not None:
             return
         log.info('加载声音模板中')
-        self._audio_template, _ = librosa.load(os.path.join(
+        audio_template, _ = librosa.load(os.path.join(
             os_utils.get_path_under_work_dir('assets', 'template', 'dodge_audio'),
             'template_1.wav'
-        ), sr=32000)
+        ), sr=self._audio_recorder.sample_rate)
 
-        self._audio_template = self._get_filter_wave(self._audio_template)  # 滤波
+        self._audio_recorder.audio_matcher.set_template(audio_template)  # 滤波和频谱在这里预先计算
+        self._audio_template = audio_template
 
         log.info('加载声音模板完成')
 
@@ -256,10 +257,7 @@ class AutoBattleDodgeContext:
                 return False
             self._last_check_audio_time = screenshot_time
 
-            if self._audio_recorder.latest_audio.size == 0:
-                return False
-
-            corr = self.get_max_corr(self._audio_template, self._audio_recorder.latest_audio)
+            corr = self._audio_recorder.audio_matcher.get_max_corr()
             # log.debug('声音相似度 %.2f' % corr)
 
             # 事件去重逻辑
@@ -275,40 +273,6 @@ class AutoBattleDodgeContext:
         finally:
             self._check_audio_lock.release()
 
-    def get_max_corr(self, x: np.ndarray, y: np.ndarray):
-        """
-        计算两个音频信号的最大相关性。
-        :param x: 音频信号x
-        :param y: 音频信号y
-        :return: 最大相关性系数
-        """
-        y = self._get_filter_wave(y)  # 滤波
-
-        # 标准化
-        wx = scale(x, with_mean=False)
-        wy = scale(y, with_mean=False)
-
-        # 计算NCC
-        if wx.shape[0] > wy.shape[0]:
-            correlation = correlate(wx, wy, mode='same', method='fft') / wx.shape[0]
-        else:
-            correlation = correlate(wy, wx, mode='same', method='fft') / wy.shape[0]
-
-        max_corr = np.max(correlation)
-
-        return max_corr
-
-    def _get_filter_wave(self, x: np.ndarray):
-        """
-        音频滤波。
-        :param x: 音频信号x
-        :return: 滤波后波形
-        """
-        wx = filtfilt(self._audio_recorder.filter_b,
-                      self._audio_recorder.filter_a,
-                      x)
-        return wx
-
     def start_context_async(self) -> None:
         """
         启动上下文，启动音频录制。
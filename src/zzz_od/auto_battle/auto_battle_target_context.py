@@ -7,6 +7,7 @@ from typing import List, Any, Tuple, Dict, TYPE_CHECKING
 from cv2.typing import MatLike
 
 from one_dragon.base.conditional_operation.state_recorder import StateRecord
+from one_dragon.base.cv_process.frame_image_cache import FrameImageCache
 from one_dragon.utils.log_utils import log
 from zzz_od.auto_battle.target_state.target_state_checker import TargetStateChecker
 from zzz_od.context.zzz_context import ZContext
@@ -73,10 +74,13 @@ class AutoBattleTargetContext:
         # 更新当前的计时器间隔
         self._current_intervals: Dict[str, float] = {task.task_id: task.interval for task in self.tasks}
 
-    def run_all_checks(self, screen: MatLike, screenshot_time: float):
+    def run_all_checks(self, screen: MatLike, screenshot_time: float, frame_cache: FrameImageCache | None = None):
         """
         遍历所有检测任务，并执行到期的任务。
         这是模块的主入口，由外部的统一战斗循环在每一帧调用。
+        :param screen: 屏幕截图
+        :param screenshot_time: 截图时间
+        :param frame_cache: 同一帧截图的派生图片缓存
         """
         if not self._check_lock.acquire(blocking=False):
             return
@@ -84,9 +88,10 @@ class AutoBattleTargetContext:
         try:
             now = screenshot_time
             records_to_update: List[StateRecord] = []
-            futures: Dict[Future, DetectionTask] = {}
+            sync_tasks: List[DetectionTask] = []
+            async_tasks: List[DetectionTask] = []
 
-            # 遍历并执行所有到期的任务
+            # 找出所有到期的任务
             for task in self.tasks:
                 interval = self._current_intervals[task.task_id]
                 if interval <= 0:  # 间隔为0或负数时，不执行此任务
@@ -95,16 +100,27 @@ class AutoBattleTargetContext:
                 if now - self._last_check_times[task.task_id] >= interval:
                     self._last_check_times[task.task_id] = now
                     if task.is_async:
-                        future = _target_context_executor.submit(self.checker.run_task, screen, task)
-                        futures[future] = task
+                        async_tasks.append(task)
                     else:
-                        cv_ctx, sync_results = self.checker.run_task(screen, task)
-                        self._handle_results(records_to_update, sync_results, screenshot_time, task)
+                        sync_tasks.append(task)
+
+            # 异步任务 (例如OCR) 耗时较长 各自单独执行 互不影响
+            futures: Dict[Future, DetectionTask] = {}
+            for task in async_tasks:
+                future = _target_context_executor.submit(self.checker.run_tasks, screen, [task], False, frame_cache, screenshot_time)
+                futures[future] = task
+
+            # 同步任务批量执行 相同的裁剪、颜色过滤只执行一次 每个流水线单独计算超时和出错
+            if sync_tasks:
+                sync_result_list = self.checker.run_tasks(screen, sync_tasks, frame_cache=frame_cache,
+                                                          screenshot_time=screenshot_time)
+                for task, (_cv_ctx, sync_results) in zip(sync_tasks, sync_result_list):
+                    self._handle_results(records_to_update, sync_results, screenshot_time, task)
 
             # 处理异步任务结果
             for future, task in futures.items():
                 try:
-                    _cv_ctx, async_results = future.result(timeout=1)
+                    _cv_ctx, async_results = future.result(timeout=1)[0]
                     self._handle_results(records_to_update, async_results, screenshot_time, task)
                 except Exception:
                     log.error(f"异步检测任务失败 [task_id={task.task_id}]", exc_info=True)
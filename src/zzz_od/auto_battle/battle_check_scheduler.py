@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, Callable
+
+import numpy as np
+
+
+class BattleCheckPriority(IntEnum):
+
+    LOW = 0  # 战斗结束、距离 晚一点识别影响不大
+    NORMAL = 1  # 目标状态、快速支援
+    HIGH = 2  # 角色状态、连携技
+    CRITICAL = 3  # 闪避 不会被推迟
+
+
+@dataclass
+class BattleCheckDef:
+
+    name: str  # 名称 用于统计
+    priority: BattleCheckPriority  # 优先级
+    interval_getter: Callable[[], float | list[float]] | None = None  # 配置的识别间隔 未到间隔最小值时不提交
+    max_defer_seconds: float = 1  # 连续被推迟超过这个时间后 忽略预算执行一次 避免一直不识别
+
+
+class _BattleCheckStats:
+
+    def __init__(self, check_def: BattleCheckDef, recent_size: int):
+        self.check_def: BattleCheckDef = check_def
+        self.in_flight: bool = False  # 上一次提交的是否还没执行完
+        self.submit_perf_time: float = 0  # 上一次提交的时间 perf_counter
+        self.last_submit_time: float = 0  # 上一次提交时的截图时间
+        self.first_defer_time: float | None = None  # 开始被连续推迟的截图时间
+        # 预计的执行耗时 识别内部还有自己的间隔判断 部分执行会直接返回 所以使用最近耗时的 p90 而不是平均值
+        self.estimated_cost_ms: float = 0
+
+        self.run_count: int = 0  # 执行次数
+        self.defer_count: int = 0  # 因为预算不足被推迟的次数
+        self.busy_count: int = 0  # 上一次还没执行完 跳过的次数
+        self.recent_run_ms: deque[float] = deque(maxlen=recent_size)  # 最近的执行耗时
+        self.recent_latency_ms: deque[float] = deque(maxlen=recent_size)  # 最近从帧开始到执行完的耗时
+
+
+class BattleCheckScheduler:
+
+    def __init__(self, budget_ratio: float = 2, default_frame_interval: float = 0.05,
+                 recent_size: int = 200):
+        """
+        战斗中每帧识别任务的调度
+        - 每帧的预算为 最近的帧间隔 * budget_ratio 减去 之前帧还在执行的任务预计剩余的耗时
+        - 按优先级提交 每个任务使用最近的实际耗时作为预计耗时 预算不足时推迟低优先级的任务
+        - 闪避 (CRITICAL) 不会被推迟 其它任务连续推迟超过 max_defer_seconds 后 忽略预算执行一次
+        - 上一次还没执行完的任务不会重复提交 避免排队
+        - 单线程的执行器 (GPU) 有任务在执行时 不再提交非 CRITICAL 的任务 避免闪避排在OCR后面
+        budget_ratio 大于1 是因为各个识别在不同的线程并行执行 大部分时间在 numpy/onnx 中 不受GIL限制
+        :param budget_ratio: 预算相对帧间隔的比例
+        :param default_frame_interval: 还没有测量到帧间隔时使用的帧间隔 秒
+        :param recent_size: 统计耗时分位数使用的最近次数
+        """
+        self.budget_ratio: float = budget_ratio
+        self.default_frame_interval: float = default_frame_interval
+        self.recent_size: int = recent_size
+
+        self._stats: dict[str, _BattleCheckStats] = {}
+        self._in_flight_by_executor: dict[Any, int] = {}  # key=执行器 默认为提交方法 value=执行中的任务数量
+        self._lock = threading.Lock()
+
+        self.frame_interval: float = default_frame_interval  # 帧间隔的指数移动平均 秒
+        self._last_frame_time: float | None = None  # 上一帧的截图时间
+        self._frame_time: float = 0  # 当前帧的截图时间
+        self._frame_start: float = 0  # 当前帧开始的时间 perf_counter
+        self._frame_remaining_ms: float = 0  # 当前帧剩余的预算
+
+    def register(self, check_def: BattleCheckDef) -> None:
+        """
+        注册一个识别任务 重复注册时更新定义 保留统计
+        """
+        with self._lock:
+            stats = self._stats.get(check_def.name)
+            if stats is None:
+                self._stats[check_def.name] = _BattleCheckStats(check_def, self.recent_size)
+            else:
+                stats.check_def = check_def
+
+    def reset(self) -> None:
+        """
+        进入新的战斗时调用 重置帧间隔和推迟状态 保留耗时统计
+        """
+        with self._lock:
+            self.frame_interval = self.default_frame_interval
+            self._last_frame_time = None
+            for stats in self._stats.values():
+                stats.last_submit_time = 0
+                stats.first_defer_time = None
+
+    def new_frame(self, screenshot_time: float) -> None:
+        """
+        开始新的一帧 计算这一帧的预算
+        :param screenshot_time: 截图时间
+        """
+        now = time.perf_counter()
+        with self._lock:
+            if self._last_frame_time is not None:
+                interval = screenshot_time - self._last_frame_time
+                if 0 < interval < 1:  # 暂停等情况的间隔不计入
+                    self.frame_interval = self.frame_interval * 0.9 + interval * 0.1
+            self._last_frame_time = screenshot_time
+            self._frame_time = screenshot_time
+            self._frame_start = now
+
+            # 之前帧还在执行的任务 会占用这一帧的预算
+            spillover_ms = 0
+            for stats in self._stats.values():
+                if stats.in_flight:
+                    elapsed_ms = (now - stats.submit_perf_time) * 1000
+                    spillover_ms += max(stats.estimated_cost_ms - elapsed_ms, 0)
+            self._frame_remaining_ms = self.frame_interval * 1000 * self.budget_ratio - spillover_ms
+
+    def submit(self, name: str, submit_fn: Callable[..., Future], fn: Callable, *args,
+               single_worker: bool = False, executor_key: Any = None) -> Future | None:
+        """
+        在当前帧提交一个识别任务 需要先调用 new_frame 并按优先级从高到低提交
+        :param name: 任务名称 需要先注册
+        :param submit_fn: 执行器的提交方法 例如 ThreadPoolExecutor.submit 或 gpu_executor.submit
+        :param fn: 识别方法
+        :param args: 识别方法的参数
+        :param single_worker: 执行器是否只有一个线程
+        :param executor_key: 统计执行器中执行中任务数量使用的key 默认为 submit_fn 同一执行器的不同提交方法 (例如不同优先级) 需要传入相同的key
+        :return: 提交的任务 没有提交时返回 None
+        """
+        if executor_key is None:
+            executor_key = submit_fn
+        with self._lock:
+            stats = self._stats[name]
+            check_def = stats.check_def
+            critical = check_def.priority >= BattleCheckPriority.CRITICAL
+
+            if stats.in_flight:
+                stats.busy_count += 1
+                return None
+
+            if check_def.interval_getter is not None:
+                interval = check_def.interval_getter()
+                min_interval = min(interval) if isinstance(interval, list) else interval
+                if self._frame_time - stats.last_submit_time < min_interval:
+                    return None
+
+            if not critical:
+                starved = (stats.first_defer_time is not None
+                           and self._frame_time - stats.first_defer_time >= check_def.max_defer_seconds)
+                over_budget = stats.estimated_cost_ms > self._frame_remaining_ms
+                executor_busy = single_worker and self._in_flight_by_executor.get(executor_key, 0) > 0
+                if (over_budget or executor_busy) and not starved:
+                    stats.defer_count += 1
+                    if stats.first_defer_time is None:
+                        stats.first_defer_time = self._frame_time
+                    return None
+
+            stats.in_flight = True
+            stats.first_defer_time = None
+            stats.last_submit_time = self._frame_time
+            stats.submit_perf_time = time.perf_counter()
+            self._frame_remaining_ms -= stats.estimated_cost_ms
+            self._in_flight_by_executor[executor_key] = self._in_flight_by_executor.get(executor_key, 0) + 1
+            frame_start = self._frame_start
+
+        try:
+            future = submit_fn(self._run, stats, executor_key, frame_start, fn, *args)
+        except Exception:
+            self._on_done(stats, executor_key, None, None)
+            raise
+        future.add_done_callback(lambda f: self._on_cancelled(f, stats, executor_key))
+        return future
+
+    def _run(self, stats: _BattleCheckStats, executor_key: Any, frame_start: float,
+             fn: Callable, *args) -> Any:
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            end = time.perf_counter()
+            self._on_done(stats, executor_key, (end - start) * 1000, (end - frame_start) * 1000)
+
+    def _on_cancelled(self, future: Future, stats: _BattleCheckStats, executor_key: Any) -> None:
+        """
+        执行器关闭 或 任务过期被取消时 还没开始执行的任务不会调用 _run
+        """
+        if future.cancelled():
+            self._on_done(stats, executor_key, None, None)
+
+    def _on_done(self, stats: _BattleCheckStats, executor_key: Any,
+                 run_ms: float | None, latency_ms: float | None) -> None:
+        with self._lock:
+            stats.in_flight = False
+            self._in_flight_by_executor[executor_key] = max(self._in_flight_by_executor.get(executor_key, 0) - 1, 0)
+            if run_ms is not None:
+                stats.run_count += 1
+                stats.recent_run_ms.append(run_ms)
+                stats.recent_latency_ms.append(latency_ms)
+                stats.estimated_cost_ms = float(np.percentile(stats.recent_run_ms, 90))
+
+    def get_stats(self) -> dict[str, dict[str, float]]:
+        """
+        Returns:
+            各个任务的统计 耗时单位毫秒 分位数按最近的执行计算
+            latency 为从帧开始到执行完的耗时 包括排队的时间
+        """
+        with self._lock:
+            snapshot = [
+                (name, stats.run_count, stats.defer_count, stats.busy_count,
+                 np.array(stats.recent_run_ms, dtype=np.float64),
+                 np.array(stats.recent_latency_ms, dtype=np.float64))
+                for name, stats in self._stats.items()
+            ]
+
+        result: dict[str, dict[str, float]] = {}
+        for name, run_count, defer_count, busy_count, run_ms, latency_ms in snapshot:
+            has_data = len(run_ms) > 0
+            result[name] = {
+                'count': run_count,
+                'deferred': defer_count,
+                'busy': busy_count,
+                'run_p50_ms': float(np.percentile(run_ms, 50)) if has_data else 0,
+                'run_p95_ms': float(np.percentile(run_ms, 95)) if has_data else 0,
+                'latency_p50_ms': float(np.percentile(latency_ms, 50)) if has_data else 0,
+                'latency_p95_ms': float(np.percentile(latency_ms, 95)) if has_data else 0,
+            }
+        return result
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import threading
+
+import numpy as np
+from scipy import fft
+from scipy.signal import sosfilt
+
+
+class DodgeAudioMatcher:
+
+    def __init__(self, window_len: int, filter_sos: np.ndarray):
+        """
+        流式计算最近一段音频与模板的相关性 用于闪避声音识别
+        结果与对整段窗口 filtfilt 滤波、标准化后使用 correlate(mode='same') 计算一致 (只有滤波的边缘效应差别)
+
+        - 音频保存在环形缓冲区中 每次录制只写入新的部分 不移动已有数据
+        - 使用带状态的因果滤波 正反两次滤波 (filtfilt) 的幅频响应等于同一个滤波器串联两次 模板也使用同样的滤波 相关性的结果不变
+        - 每个模板对齐位置的相关性保存在累加器中 新音频进入时加上它的贡献 离开窗口的音频减去它的贡献 (overlap-save)
+          模板的频谱按FFT长度预先计算 每块音频只需要一次正变换和一次逆变换
+        所以每次录制的耗时只与这块音频的长度有关 每次识别只需要在累加器中取最大值
+        :param window_len: 窗口长度 即参与计算的最近的采样数
+        :param filter_sos: 滤波器 second-order sections 格式
+        """
+        self.window_len: int = window_len
+        self._sos: np.ndarray = np.vstack([filter_sos, filter_sos])  # 串联两次 与 filtfilt 的幅频响应一致
+        self._zi: np.ndarray = np.zeros((self._sos.shape[0], 2))  # 滤波器状态 在音频块之间传递
+
+        self._buffer: np.ndarray = np.zeros(window_len)  # 滤波后的音频 环形缓冲区
+        self._total_len: int = 0  # 累计写入的采样数 下一个写入位置为 _total_len % window_len
+        self._valid_len: int = 0  # 上次清空后写入的采样数 缓冲区中其余部分为0
+
+        self._template: np.ndarray | None = None  # 滤波后的模板
+        self._template_std: float = 0  # 模板的标准差
+        self._template_spectrum: dict[int, np.ndarray] = {}  # key=FFT长度 value=模板的频谱
+        # 每个对齐位置的相关性 对齐位置 a 表示模板开头对应的采样下标 保存在 a % len 的位置
+        # 只保留与窗口有重叠的对齐位置 长度为 window_len + 模板长度 - 1
+        self._corr: np.ndarray | None = None
+
+        self._lock = threading.Lock()
+
+    def set_template(self, template: np.ndarray) -> None:
+        """
+        设置模板 会使用当前窗口内的音频重新计算相关性
+        :param template: 未滤波的模板音频 采样率需要与录制时一致
+        """
+        filtered = sosfilt(self._sos, np.asarray(template, dtype=np.float64))
+        with self._lock:
+            self._template = filtered
+            self._template_std = float(np.std(filtered))
+            self._template_spectrum = {}
+            self._corr = np.zeros(self.window_len + len(filtered) - 1)
+            if self._valid_len > 0:
+                self._add_corr(self._get_window(), self._total_len - self.window_len, 1)
+
+    def append(self, chunk: np.ndarray) -> None:
+        """
+        写入新录制的一块音频
+        :param chunk: 单声道音频
+        """
+        with self._lock:
+            filtered, self._zi = sosfilt(self._sos, np.asarray(chunk, dtype=np.float64), zi=self._zi)
+            chunk_len = len(filtered)
+            if chunk_len == 0:
+                return
+
+            if chunk_len >= self.window_len:  # 整个窗口都被替换 直接重新计算
+                self._total_len += chunk_len
+                self._valid_len = self.window_len
+                self._buffer = np.roll(filtered[-self.window_len:], self._total_len % self.window_len)
+                if self._corr is not None:
+                    self._corr[:] = 0
+                    self._add_corr(filtered[-self.window_len:], self._total_len - self.window_len, 1)
+                return
+
+            start = self._total_len
+            idx = np.arange(start, start + chunk_len) % self.window_len
+            if self._corr is not None:
+                if self._valid_len + chunk_len > self.window_len:  # 离开窗口的音频 减去它的贡献
+                    self._add_corr(self._buffer[idx], start - self.window_len, -1)
+                # 模板开头在新写入位置的对齐位置 开始与窗口重叠 它们复用刚离开窗口的对齐位置 需要清零
+                _ring_set(self._corr, start, chunk_len, 0)
+                self._add_corr(filtered, start, 1)
+
+            self._buffer[idx] = filtered
+            self._total_len += chunk_len
+            self._valid_len = min(self._valid_len + chunk_len, self.window_len)
+
+    def clear(self) -> None:
+        """
+        清空当前窗口内的音频 滤波器状态保留 避免下一块音频出现滤波的瞬态
+        """
+        with self._lock:
+            self._buffer[:] = 0
+            self._valid_len = 0
+            if self._corr is not None:
+                self._corr[:] = 0
+
+    def get_max_corr(self) -> float:
+        """
+        当前窗口与模板的最大相关性
+        与 correlate(wx, wy, mode='same') / max(len(wx), len(wy)) 的最大值一致 wx wy 为除以标准差后的模板和窗口
+        :return: 最大相关性系数 没有设置模板时为0
+        """
+        with self._lock:
+            if self._corr is None or self._valid_len == 0:
+                return 0
+
+            window_len = self.window_len
+            template_len = len(self._template)
+            window_std = float(np.std(self._buffer))
+            if window_std == 0 or self._template_std == 0:
+                return 0
+
+            # correlate 的 same 模式 取较长一方长度的中间部分
+            if template_len > window_len:
+                start = self._total_len - (window_len - 1) // 2 - template_len
+            else:
+                start = self._total_len - window_len - template_len + 1 + (template_len - 1) // 2
+            max_corr = _ring_max(self._corr, start, max(template_len, window_len))
+            return max_corr / (self._template_std * window_std * max(template_len, window_len))
+
+    def _get_window(self) -> np.ndarray:
+        """
+        按时间顺序返回窗口内的音频
+        """
+        return np.roll(self._buffer, -(self._total_len % self.window_len))
+
+    def _add_corr(self, samples: np.ndarray, sample_start: int, sign: int) -> None:
+        """
+        把一段音频与模板的相关性 累加到各个对齐位置上
+        :param samples: 滤波后的音频
+        :param sample_start: 音频第一个采样的下标
+        :param sign: 1为加上 -1为减去
+        """
+        template_len = len(self._template)
+        sample_len = len(samples)
+        fft_len = fft.next_fast_len(template_len + sample_len - 1, real=True)
+        spectrum = self._template_spectrum.get(fft_len)
+        if spectrum is None:
+            spectrum = fft.rfft(self._template, fft_len)
+            self._template_spectrum[fft_len] = spectrum
+
+        # r[m] = sum(template[j + m] * samples[j]) 负数的 m 在末尾
+        r = fft.irfft(spectrum * np.conj(fft.rfft(samples, fft_len)), fft_len)
+        # 对齐位置 a = sample_start - m 从小到大 即 m 从 template_len - 1 到 -(sample_len - 1)
+        values = np.concatenate((r[template_len - 1::-1], r[fft_len - sample_len + 1:][::-1]))
+        if sign < 0:
+            values = -values
+        _ring_add(self._corr, sample_start - template_len + 1, values)
+
+
+def _ring_slices(ring_len: int, start: int, length: int) -> tuple[slice, slice]:
+    """
+    环形数组中 从 start 开始 length 个位置对应的两段切片
+    """
+    start %= ring_len
+    end = start + length
+    if end <= ring_len:
+        return slice(start, end), slice(0, 0)
+    return slice(start, ring_len), slice(0, end - ring_len)
+
+
+def _ring_add(ring: np.ndarray, start: int, values: np.ndarray) -> None:
+    first, second = _ring_slices(len(ring), start, len(values))
+    first_len = first.stop - first.start
+    ring[first] += values[:first_len]
+    ring[second] += values[first_len:]
+
+
+def _ring_set(ring: np.ndarray, start: int, length: int, value: float) -> None:
+    first, second = _ring_slices(len(ring), start, length)
+    ring[first] = value
+    ring[second] = value
+
+
+def _ring_max(ring: np.ndarray, start: int, length: int) -> float:
+    first, second = _ring_slices(len(ring), start, length)
+    if second.stop == 0:
+        return float(np.max(ring[first]))
+    return max(float(np.max(ring[first])), float(np.max(ring[second])))
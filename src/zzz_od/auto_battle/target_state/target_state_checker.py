@@ -6,6 +6,7 @@ import cv2
 from cv2.typing import MatLike
 
 from one_dragon.base.cv_process.cv_pipeline import CvPipelineContext
+from one_dragon.base.cv_process.frame_image_cache import FrameImageCache
 from one_dragon.utils import str_utils
 from one_dragon.utils.log_utils import log
 from zzz_od.context.zzz_context import ZContext
@@ -59,6 +60,41 @@ class TargetStateChecker:
 
         return cv_result, results
 
+    def run_tasks(self, screen: MatLike, task_list: List[DetectionTask], debug_mode: bool = False,
+                  frame_cache: FrameImageCache | None = None,
+                  screenshot_time: float | None = None) -> List[Tuple[CvPipelineContext, List[Tuple[str, Any]]]]:
+        """
+        在同一帧上运行多个检测任务组 各个流水线相同的开头步骤 (裁剪、颜色过滤等) 只执行一次
+        :param screen: 屏幕截图
+        :param task_list: 检测任务组列表
+        :param debug_mode: 是否开启CV流水线的调试模式
+        :param frame_cache: 同一帧截图的派生图片缓存 与其它识别共用相同区域的颜色转换
+        :param screenshot_time: 截图时间 有更新的截图时 还在GPU排队的旧截图识别会被取消
+        :return: 每个任务组的 (CV结果上下文, 状态元组列表) 顺序与 task_list 一致
+        """
+        if len(task_list) == 0:
+            return []
+
+        start_time = time.time()
+        cv_result_list = self.ctx.cv_service.run_pipelines(
+            [task.pipeline_name for task in task_list],
+            screen,
+            debug_mode=debug_mode,
+            start_time=start_time,
+            timeout=1.0,  # 自动战斗要求1秒超时
+            frame_cache=frame_cache,
+            frame_time=screenshot_time,
+        )
+
+        task_result_list = []
+        for task, cv_result in zip(task_list, cv_result_list):
+            results = [
+                (state_def.state_name, self._interpret_result(cv_result, state_def))
+                for state_def in task.state_definitions
+            ]
+            task_result_list.append((cv_result, results))
+        return task_result_list
+
     def _interpret_result(self, cv_result: CvPipelineContext, state_def: TargetStateDef) -> Any:
         """
         根据单个状态定义，解读一份CV结果。
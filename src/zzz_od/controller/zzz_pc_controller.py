@@ -46,7 +46,7 @@ class ZPcController(PcControllerBase):
 
     def fill_uid_black(self, screen: MatLike) -> MatLike:
         """
-        遮挡UID 由子类实现
+        遮挡UID 截图是每次新生成的 直接在原图上修改 不再复制整张截图
         """
         rect = ScreenNormalWorldEnum.UID.value.rect
 
@@ -54,7 +54,7 @@ class ZPcController(PcControllerBase):
             screen,
             pos=[rect.x1, rect.y1, rect.width, rect.height],
             color=game_const.YOLO_DEFAULT_COLOR,
-            new_image=True
+            new_image=False
         )
 
     def enable_keyboard(self):
@@ -27,6 +27,8 @@ class SettingOverlayInterface(VerticalScrollInterface):
         ("YOLO 耗时", "yolo_ms"),
         ("CV Pipeline 耗时", "cv_pipeline_ms"),
         ("节点轮次耗时", "operation_round_ms"),
+        ("画面未变化复用率", "frame_reuse_rate"),
+        ("战斗识别 P95 延迟", "battle_check_p95_ms"),
         ("Overlay 刷新耗时", "overlay_refresh_ms"),
     )
 
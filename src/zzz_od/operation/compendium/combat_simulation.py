@@ -267,7 +267,7 @@ class CombatSimulation(ZOperation):
         return self.round_success()
 
     @node_from(from_name='加载自动战斗指令')
-    @operation_node(name='等待战斗画面加载', node_max_retry_times=60)
+    @operation_node(name='等待战斗画面加载', node_max_retry_times=60, reuse_unchanged_frame=True)
     def wait_battle_screen(self) -> OperationRoundResult:
         return self.round_by_find_area(self.last_screenshot, '战斗画面', '按键-普通攻击', retry_wait_round=1)
 
@@ -0,0 +1,164 @@
+"""
+测试主循环不轮询 只在任务结束、用到的状态更新、状态判断结果到期、停止运行时被唤醒
+"""
+
+import threading
+import time
+
+import pytest
+
+from one_dragon.base.conditional_operation import operator as operator_module
+from one_dragon.base.conditional_operation.atomic_op import AtomicOp
+from one_dragon.base.conditional_operation.operation_def import OperationDef
+from one_dragon.base.conditional_operation.operator import ConditionalOperator
+from one_dragon.base.conditional_operation.scene import Scene
+from one_dragon.base.conditional_operation.state_record_service import StateRecordService
+from one_dragon.base.conditional_operation.state_recorder import StateRecord, StateRecorder
+
+
+class _StateRecordService(StateRecordService):
+
+    def __init__(self):
+        StateRecordService.__init__(self)
+        self.recorder_map: dict[str, StateRecorder] = {}
+
+    def get_state_recorder(self, state_name: str) -> StateRecorder | None:
+        return self.recorder_map.setdefault(state_name, StateRecorder(state_name))
+
+
+class _WaitOp(AtomicOp):
+
+    def __init__(self, op_name: str):
+        AtomicOp.__init__(self, op_name)
+        self.execute_time_list: list[float] = []
+        self.release: threading.Event = threading.Event()  # 设置后指令才执行完
+        self.release.set()
+
+    def execute(self):
+        self.execute_time_list.append(time.time())
+        self.release.wait()
+
+
+class _TestOperator(ConditionalOperator):
+
+    def __init__(self, states: str):
+        ConditionalOperator.__init__(
+            self,
+            sub_dir=[],
+            template_name='',
+            operation_template_sub_dir=[],
+            state_handler_template_sub_dir=[],
+            state_record_service=_StateRecordService(),
+        )
+        self.states: str = states
+        self.op: _WaitOp = _WaitOp('等待')
+        self.match_cnt: int = 0  # 主场景的判断次数
+
+    def load(self) -> None:
+        self.scenes = [Scene({
+            'interval': 0,
+            'handlers': [{'states': self.states, 'operations': [{'op_name': '等待'}]}],
+        })]
+
+    def build(self) -> None:
+        ConditionalOperator.build(self)
+        match_execution = self.normal_scene.match_execution
+
+        def count_match_execution(trigger_time: float):
+            self.match_cnt += 1
+            return match_execution(trigger_time)
+
+        self.normal_scene.match_execution = count_match_execution
+
+    def get_atomic_op(self, op_def: OperationDef) -> AtomicOp:
+        return self.op
+
+    def start_loop(self) -> threading.Thread:
+        """
+        在自己的线程中运行主循环 方便判断循环是否已退出
+        """
+        self.is_running = True
+        thread = threading.Thread(target=self._normal_scene_loop, daemon=True)
+        thread.start()
+        return thread
+
+
+def _wait_until(condition, timeout: float = 2) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture(autouse=True)
+def no_fallback_wake(monkeypatch):
+    """兜底的等待时间调大 测试中的唤醒都来自通知或到期时间"""
+    monkeypatch.setattr(operator_module, '_NORMAL_SCENE_MAX_WAIT_SECONDS', 60)
+
+
+class TestConditionalOperator:
+
+    def test_wake_on_task_done(self):
+        op = _TestOperator('')
+        op.init()
+        op.op.release.clear()
+        thread = op.start_loop()
+
+        assert _wait_until(lambda: len(op.op.execute_time_list) == 1)
+        time.sleep(0.2)
+        assert len(op.op.execute_time_list) == 1  # 任务运行中 不会再次判断
+
+        release_time = time.time()
+        op.op.release.set()
+        assert _wait_until(lambda: len(op.op.execute_time_list) >= 2)
+        assert op.op.execute_time_list[1] - release_time < 1
+
+        op.stop_running()
+        thread.join(1)
+        assert not thread.is_alive()
+
+    def test_wake_on_observed_state(self):
+        op = _TestOperator('[观察]')
+        op.init()
+        thread = op.start_loop()
+        assert _wait_until(lambda: op.match_cnt == 1)
+
+        # 主场景没用到的状态 不唤醒
+        op.state_record_service.batch_update_states([StateRecord('其他', time.time())])
+        time.sleep(0.3)
+        assert op.match_cnt == 1
+
+        op.state_record_service.batch_update_states([StateRecord('观察', time.time())])
+        assert _wait_until(lambda: len(op.op.execute_time_list) > 0, timeout=1)
+
+        op.stop_running()
+        thread.join(1)
+        assert not thread.is_alive()
+
+    def test_wake_on_expire(self):
+        op = _TestOperator('![观察, 0, 0.3]')
+        op.init()
+        record_time = time.time()
+        op.state_record_service.get_state_recorder('观察').update_state_record(StateRecord('观察', record_time))
+        thread = op.start_loop()
+
+        # 状态判断的结果到期后 不需要状态更新也会重新判断
+        assert _wait_until(lambda: len(op.op.execute_time_list) > 0, timeout=1)
+        assert op.op.execute_time_list[0] - record_time >= 0.3
+
+        op.stop_running()
+        thread.join(1)
+        assert not thread.is_alive()
+
+    def test_wake_on_stop(self):
+        op = _TestOperator('[观察]')
+        op.init()
+        thread = op.start_loop()
+        assert _wait_until(lambda: op.match_cnt == 1)
+
+        op.stop_running()
+        thread.join(1)
+        assert not thread.is_alive()
+        assert op.match_cnt == 1
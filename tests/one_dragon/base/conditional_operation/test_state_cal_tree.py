@@ -0,0 +1,54 @@
+"""
+测试编译后的状态判断与逐层遍历的结果一致
+"""
+
+import random
+
+from one_dragon.base.conditional_operation.state_cal_tree import construct_state_cal_tree
+from one_dragon.base.conditional_operation.state_recorder import StateRecorder, StateRecord
+
+
+class TestStateCalEvaluator:
+
+    def test_same_result(self):
+        recorder_map: dict[str, StateRecorder] = {}
+        tree_list = [
+            construct_state_cal_tree(expr, lambda name: recorder_map.setdefault(name, StateRecorder(name)))
+            for expr in [
+                '',
+                '[a]',
+                '[a, 0.1, 0.3] & ![b, 0, 0.5]',
+                '([a, 0, 1]{1, 2} | [b, 0.2, 0.4]) & ![c]{0}',
+                '[a, 0, 0.1] | ([b, 0.05, 999] & [c, 0, 0.2]{2})',
+            ]
+        ]
+        assert len(tree_list[3].evaluator.recorder_list) == 3
+
+        rng = random.Random(0)
+        now = 100.0
+        for _ in range(2000):
+            now += 0.02
+            recorder = recorder_map[rng.choice(['a', 'b', 'c'])]
+            action = rng.random()
+            if action < 0.1:
+                recorder.update_state_record(StateRecord(recorder.state_name, now, value=rng.randint(0, 3)))
+            elif action < 0.15:
+                recorder.clear_state_record()
+            elif action < 0.17:
+                recorder.update_state_record(StateRecord(recorder.state_name, trigger_time_add=0.05))
+
+            for tree in tree_list:
+                assert tree.evaluator.in_time_range(now) == tree.in_time_range(now)
+
+        # 状态没有变化时 大部分判断直接复用结果
+        assert tree_list[2].evaluator.hit_cnt > tree_list[2].evaluator.cal_cnt
+
+    def test_boundary(self):
+        recorder = StateRecorder('a')
+        tree = construct_state_cal_tree('[a, 1, 2]', lambda name: recorder)
+        evaluator = tree.evaluator
+        assert not evaluator.in_time_range(10)
+
+        recorder.update_state_record(StateRecord('a', 10))
+        for now in [10, 10.5, 11, 11.5, 12, 12.5, 11.5]:
+            assert evaluator.in_time_range(now) == tree.in_time_range(now), now
@@ -0,0 +1,63 @@
+"""
+测试录制的截图可以被 ReplayController 回放
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from one_dragon.base.controller.pc_screenshot.replay_screencapper import ReplayFrameSource
+from one_dragon.base.controller.replay_controller import ReplayController
+from one_dragon.base.controller.screenshot_recorder import ScreenshotRecorder
+
+
+class TestReplayController:
+
+    def test_record_and_replay(self, tmp_path):
+        recorder = ScreenshotRecorder(str(tmp_path))
+        recorder.start()
+        screen = np.zeros((36, 64, 3), dtype=np.uint8)
+        for i in range(3):
+            screen[:] = i * 10  # 复用同一张截图 录制的内容不受之后的修改影响
+            recorder.record(screen, 100.0 + i)
+        screen[:] = 255
+        recorder.stop()
+
+        controller = ReplayController(str(tmp_path), standard_width=64, standard_height=36, realtime=False)
+        assert controller.init_before_context_run()
+        assert controller.screencapper.source.time_list == [100.0, 101.0, 102.0]
+
+        value_list = []
+        while not controller.finished:
+            _, screen = controller.screenshot()
+            value_list.append(int(screen[0, 0, 0]))
+        assert value_list == [0, 10, 20]
+
+        # 游戏操作只记录
+        controller.dodge(press=True)
+        controller.btn_controller.tap('a')
+        assert controller.get_stats()['action_cnt'] == {'dodge': 1, 'btn_controller.tap': 1}
+
+        # 不是游戏操作的属性 照常报错
+        with pytest.raises(AttributeError):
+            controller.not_an_action()
+        assert not hasattr(controller, 'center_point')
+        assert controller.get_stats()['action_cnt'] == {'dodge': 1, 'btn_controller.tap': 1}
+
+        controller.cleanup_after_app_shutdown()
+
+    @pytest.mark.parametrize('file_name_list, expected_order, expected_time_list', [
+        (['10.png', '2.png', '1.png'], ['1.png', '2.png', '10.png'], [1.0, 2.0, 10.0]),  # 按解析出的时间排序
+        (['100.5.png', '100.25.png'], ['100.25.png', '100.5.png'], [100.25, 100.5]),
+        (['frame_10.png', 'frame_2.png', 'frame_1.png'], ['frame_1.png', 'frame_2.png', 'frame_10.png'],
+         [0, 1 / 30.0, 2 / 30.0]),  # 不全是时间时 自然排序
+    ])
+    def test_image_dir_order(self, tmp_path, file_name_list, expected_order, expected_time_list):
+        for file_name in file_name_list:
+            (tmp_path / file_name).touch()
+
+        source = ReplayFrameSource(str(tmp_path))
+        assert source.open()
+        assert [os.path.basename(i) for i in source.image_path_list] == expected_order
+        assert source.time_list == pytest.approx(expected_time_list)
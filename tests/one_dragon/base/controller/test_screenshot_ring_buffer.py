@@ -0,0 +1,69 @@
+"""
+测试 ScreenshotRingBuffer 的覆盖、按时间查找和只读视图
+"""
+
+import numpy as np
+import pytest
+
+from one_dragon.base.controller.screenshot_ring_buffer import ScreenshotRingBuffer
+
+
+def _frame(value: int) -> np.ndarray:
+    return np.full((4, 6, 3), value, dtype=np.uint8)
+
+
+class TestScreenshotRingBuffer:
+
+    def test_push_and_overwrite(self):
+        ring = ScreenshotRingBuffer(3)
+        for i in range(5):
+            ring.push(_frame(i), float(i))
+
+        assert len(ring) == 3
+        assert [t for t, _ in ring.get_all()] == [2.0, 3.0, 4.0]
+        assert [int(img[0, 0, 0]) for _, img in ring.get_all()] == [2, 3, 4]
+
+        # 复用预先分配的内存
+        slot_ids = {id(img.base) for _, img in ring.get_all()}
+        ring.push(_frame(5), 5.0)
+        assert {id(img.base) for _, img in ring.get_all()} == slot_ids
+
+    def test_get_by_time(self):
+        ring = ScreenshotRingBuffer(4)
+        for i in range(4):
+            ring.push(_frame(i), i * 10.0)
+
+        assert ring.get_by_time(-1) is None
+        assert ring.get_by_time(10)[0] == 10.0
+        assert ring.get_by_time(25)[0] == 20.0
+        assert ring.get_by_time(100)[0] == 30.0
+        assert [t for t, _ in ring.get_by_time_range(5, 25)] == [10.0, 20.0]
+
+        ring.expire(15)
+        assert [t for t, _ in ring.get_all()] == [20.0, 30.0]
+
+    def test_read_only_copy(self):
+        ring = ScreenshotRingBuffer(2)
+        source = _frame(1)
+        view = ring.push(source, 0)
+        source[:] = 9  # 修改原图不影响保存的截图
+        assert int(view[0, 0, 0]) == 1
+        with pytest.raises(ValueError):
+            view[0, 0, 0] = 2
+
+    def test_set_capacity(self):
+        ring = ScreenshotRingBuffer(4)
+        for i in range(4):
+            ring.push(_frame(i), float(i))
+
+        ring.set_capacity(2)
+        assert [t for t, _ in ring.get_all()] == [2.0, 3.0]
+
+        ring.set_capacity(3)
+        ring.push(_frame(4), 4.0)
+        ring.push(_frame(5), 5.0)
+        assert [t for t, _ in ring.get_all()] == [3.0, 4.0, 5.0]
+
+        ring.set_capacity(0)
+        assert ring.push(_frame(6), 6.0) is None
+        assert len(ring) == 0
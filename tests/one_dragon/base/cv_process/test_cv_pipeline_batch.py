@@ -0,0 +1,101 @@
+"""
+测试批量执行流水线时 共用的步骤只执行一次 且结果与单独执行一致
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from one_dragon.base.cv_process.cv_pipeline import CvPipeline
+from one_dragon.base.cv_process.cv_pipeline_batch import CvPipelineBatch
+from one_dragon.base.cv_process.cv_step import CvPipelineContext, CvStep
+from one_dragon.base.cv_process.steps import (
+    CvStepFilterByHSV, CvErodeStep, CvDilateStep, CvFindContoursStep,
+)
+
+
+class _SleepStep(CvStep):
+
+    def __init__(self, seconds: float, fail: bool = False):
+        CvStep.__init__(self, '等待')
+        self.params.update(seconds=seconds, fail=fail)
+
+    def _execute(self, context: CvPipelineContext, seconds: float = 0, fail: bool = False, **kwargs):
+        time.sleep(seconds)
+        if fail:
+            raise ValueError('fail')
+
+
+def _step_pipeline(step_list: list) -> CvPipeline:
+    pipeline = CvPipeline()
+    pipeline.steps = step_list
+    return pipeline
+
+
+def _pipeline(hsv_color: tuple, morph_step_list: list) -> CvPipeline:
+    hsv = CvStepFilterByHSV()
+    hsv.params.update(hsv_color=hsv_color, hsv_diff=(10, 80, 80))
+    pipeline = CvPipeline()
+    pipeline.steps = [hsv] + morph_step_list + [CvFindContoursStep()]
+    return pipeline
+
+
+class TestCvPipelineBatch:
+
+    def test_shared_prefix(self):
+        rng = np.random.default_rng(0)
+        image = cv2.GaussianBlur(rng.integers(0, 256, (120, 160, 3), dtype=np.uint8), (0, 0), 2)
+
+        pipeline_list = [
+            _pipeline((0, 200, 200), [CvErodeStep()]),
+            _pipeline((0, 200, 200), [CvDilateStep()]),
+            _pipeline((0, 200, 200), [CvErodeStep()]),
+            _pipeline((60, 200, 200), []),
+        ]
+        batch = CvPipelineBatch(pipeline_list)
+        # 第二条与第一条共用颜色过滤 第三条与第一条完全相同
+        assert batch.shared_step_cnt == 1 + 3
+
+        result_list = batch.execute(image)
+        assert len(result_list) == len(pipeline_list)
+        for pipeline, actual in zip(pipeline_list, result_list):
+            expected = pipeline.execute(image, debug_mode=False)
+            assert actual.is_success == expected.is_success
+            assert np.array_equal(actual.mask_image, expected.mask_image)
+            assert len(actual.contours) == len(expected.contours)
+            assert [name for name, _ in actual.step_execution_times] == [step.name for step in pipeline.steps]
+
+        # 分叉后的上下文互不影响
+        assert result_list[0] is not result_list[2]
+        assert result_list[0].analysis_results is not result_list[2].analysis_results
+
+    def test_timeout_per_pipeline(self):
+        """每条流水线只计算自己经过的步骤的耗时"""
+        image = np.zeros((10, 10, 3), dtype=np.uint8)
+        batch = CvPipelineBatch([
+            _step_pipeline([_SleepStep(0), _SleepStep(0.2)]),
+            _step_pipeline([_SleepStep(0), _SleepStep(0.01), _SleepStep(0.01)]),
+            _step_pipeline([_SleepStep(0.2), _SleepStep(0)]),
+        ])
+        result_list = batch.execute(image, start_time=time.time(), timeout=0.1)
+
+        assert result_list[0].is_success
+        assert result_list[1].is_success
+        assert len(result_list[1].step_execution_times) == 3
+        assert not result_list[2].is_success  # 自身的步骤超时
+        assert len(result_list[2].step_execution_times) == 1
+
+    def test_error_per_pipeline(self):
+        """一个步骤出错 只影响经过它的流水线"""
+        image = np.zeros((10, 10, 3), dtype=np.uint8)
+        batch = CvPipelineBatch([
+            _step_pipeline([_SleepStep(0), _SleepStep(0, fail=True), _SleepStep(0)]),
+            _step_pipeline([_SleepStep(0), _SleepStep(0, fail=True)]),
+            _step_pipeline([_SleepStep(0), _SleepStep(0.01)]),
+        ])
+        result_list = batch.execute(image)
+
+        assert not result_list[0].is_success
+        assert not result_list[1].is_success
+        assert result_list[2].is_success
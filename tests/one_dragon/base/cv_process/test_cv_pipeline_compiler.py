@@ -0,0 +1,71 @@
+"""
+测试编译后的流水线与逐步执行的结果一致
+"""
+
+import cv2
+import numpy as np
+
+from one_dragon.base.cv_process.cv_pipeline import CvPipeline
+from one_dragon.base.cv_process.cv_pipeline_compiler import CompiledCvPipeline
+from one_dragon.base.cv_process.steps import (
+    CvStepFilterByHSV, CvErodeStep, CvDilateStep, CvFindContoursStep, CvStepFilterByArea,
+)
+
+
+def _pipeline(hsv_color: tuple, hsv_diff: tuple) -> CvPipeline:
+    hsv = CvStepFilterByHSV()
+    hsv.params.update(hsv_color=hsv_color, hsv_diff=hsv_diff)
+    erode = CvErodeStep()
+    dilate = CvDilateStep()
+    dilate.params.update(kernel_size=5, iterations=2)
+    area = CvStepFilterByArea()
+    area.params.update(min_area=50, max_area=5000)
+
+    pipeline = CvPipeline()
+    pipeline.steps = [hsv, erode, dilate, CvFindContoursStep(), area]
+    return pipeline
+
+
+def _image(seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    image = cv2.GaussianBlur(rng.integers(0, 256, (240, 320, 3), dtype=np.uint8), (0, 0), 2)
+    red = cv2.cvtColor(np.uint8([[[2, 200, 200]]]), cv2.COLOR_HSV2RGB)[0, 0].tolist()
+    for _ in range(30):
+        x, y = (int(i) for i in rng.integers(0, 300, 2))
+        cv2.rectangle(image, (x, y), (x + int(rng.integers(2, 40)), y + int(rng.integers(2, 30))), red, -1)
+    return image
+
+
+class TestCvPipelineCompiler:
+
+    def test_same_result(self):
+        # H 通道回绕的颜色范围
+        pipeline = _pipeline((2, 200, 200), (8, 60, 60))
+        compiled = CompiledCvPipeline(pipeline, outputs=('contours', 'mask_image', 'display_image'))
+        assert len(compiled.stage_list) == 1
+
+        for seed in range(5):
+            image = _image(seed)
+            expected = pipeline.execute(image, debug_mode=False)
+            actual = compiled.execute(image, debug_mode=False)
+
+            assert actual.is_success == expected.is_success
+            assert len(actual.contours) == len(expected.contours)
+            for c1, c2 in zip(actual.contours, expected.contours):
+                assert np.array_equal(c1, c2)
+            assert np.array_equal(actual.mask_image, expected.mask_image)
+            assert np.array_equal(actual.display_image, expected.display_image)
+
+    def test_skip_unused_outputs(self):
+        pipeline = _pipeline((2, 200, 200), (8, 60, 60))
+        compiled = CompiledCvPipeline(pipeline, outputs=('mask_image',))
+        # 只需要掩码时 不再查找和过滤轮廓
+        assert compiled.stage_list[0].name == '+'.join(step.name for step in pipeline.steps[:3])
+
+        image = _image(0)
+        first = compiled.execute(image, debug_mode=False)
+        second = compiled.execute(_image(1), debug_mode=False)
+        # 输出的掩码不能是下次执行会被覆盖的缓冲区
+        assert np.array_equal(first.mask_image, pipeline.execute(image, debug_mode=False).mask_image)
+        assert not np.may_share_memory(first.mask_image, second.mask_image)
+        assert first.contours == []
@@ -0,0 +1,111 @@
+"""
+测试运行用的流水线缓存 文件没有变化时复用 保存、重命名、删除、文件修改后重新加载
+"""
+
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from one_dragon.base.cv_process.cv_pipeline import CvPipeline
+from one_dragon.base.cv_process.steps import CvStepFilterByHSV, CvFindContoursStep
+
+# 尝试导入项目依赖类
+IMPORTS_AVAILABLE = False
+try:
+    from one_dragon.base.cv_process.cv_service import CvService
+    IMPORTS_AVAILABLE = True
+except ImportError:
+    # 依赖不可用时，IMPORTS_AVAILABLE保持False
+    pass
+
+pytestmark = pytest.mark.skipif(not IMPORTS_AVAILABLE, reason='因缺少核心CV模块而跳过此测试套件')
+
+
+def _pipeline() -> CvPipeline:
+    hsv = CvStepFilterByHSV()
+    hsv.params.update(hsv_color=(0, 200, 200), hsv_diff=(10, 80, 80))
+    pipeline = CvPipeline()
+    pipeline.steps = [hsv, CvFindContoursStep()]
+    return pipeline
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch) -> 'CvService':
+    monkeypatch.setattr(CvService, 'PIPELINE_DIR', str(tmp_path))
+    service = CvService(od_ctx=SimpleNamespace(ocr=None, template_loader=None))
+    service.save_pipeline('a', _pipeline())
+    service.save_pipeline('b', _pipeline())
+    service.enable_compiled_pipeline('a')
+    return service
+
+
+def _run(service: 'CvService') -> None:
+    """
+    非调试模式运行 生成编译后的流水线和批量执行的缓存
+    """
+    image = np.zeros((20, 20, 3), dtype=np.uint8)
+    assert service.run_pipeline('a', image).error_str is None
+    assert all(i.error_str is None for i in service.run_pipelines(['a', 'b'], image))
+    assert 'a' in service._compiled_cache
+    assert ('a', 'b') in service._batch_cache
+
+
+def _assert_dropped(service: 'CvService', name: str) -> None:
+    assert name not in service._pipeline_cache
+    assert name not in service._compiled_cache
+    assert all(name not in key for key in service._batch_cache)
+
+
+class TestCvService:
+
+    def test_reuse(self, service):
+        pipeline = service.get_pipeline('a')
+        assert pipeline is not None
+        assert service.get_pipeline('a') is pipeline
+
+        _run(service)
+        compiled = service._compiled_cache['a'][1]
+        _run(service)
+        assert service._compiled_cache['a'][1] is compiled
+
+    def test_file_changed(self, service):
+        pipeline = service.get_pipeline('a')
+        _run(service)
+        compiled = service._compiled_cache['a'][1]
+
+        file_path = os.path.join(service.PIPELINE_DIR, 'a.yml')
+        mtime = os.stat(file_path).st_mtime_ns
+        os.utime(file_path, ns=(mtime + 10 ** 9, mtime + 10 ** 9))
+
+        new_pipeline = service.get_pipeline('a')
+        assert new_pipeline is not pipeline
+        _run(service)
+        assert service._compiled_cache['a'][1] is not compiled
+
+    def test_save(self, service):
+        pipeline = service.get_pipeline('a')
+        _run(service)
+
+        service.save_pipeline('a', _pipeline())
+        _assert_dropped(service, 'a')
+        assert service.get_pipeline('a') is not pipeline
+
+    def test_rename(self, service):
+        service.get_pipeline('a')
+        _run(service)
+
+        service.rename_pipeline('a', 'c')
+        _assert_dropped(service, 'a')
+        assert service.get_pipeline('a') is None
+        assert service.get_pipeline('c') is not None
+
+    def test_delete(self, service):
+        service.get_pipeline('a')
+        _run(service)
+
+        service.delete_pipeline('a')
+        _assert_dropped(service, 'a')
+        assert service.get_pipeline('a') is None
+        assert service.run_pipeline('a', np.zeros((20, 20, 3), dtype=np.uint8)).error_str is not None
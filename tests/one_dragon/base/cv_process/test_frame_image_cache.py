@@ -0,0 +1,72 @@
+"""
+测试同一帧的派生图片缓存 结果与直接计算一致 相同的转换只计算一次
+"""
+
+import cv2
+import numpy as np
+
+from one_dragon.base.cv_process.cv_pipeline import CvPipeline
+from one_dragon.base.cv_process.cv_pipeline_compiler import CompiledCvPipeline
+from one_dragon.base.cv_process.frame_image_cache import FrameImageCache
+from one_dragon.base.cv_process.steps import CvFindContoursStep, CvStepFilterByHSV
+from one_dragon.base.geometry.rectangle import Rect
+from one_dragon.utils import cv2_utils
+
+
+def _image() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return cv2.GaussianBlur(rng.integers(0, 256, (120, 160, 3), dtype=np.uint8), (0, 0), 2)
+
+
+class TestFrameImageCache:
+
+    def test_same_result(self):
+        image = _image()
+        cache = FrameImageCache(image)
+        rect = Rect(10, 20, 90, 60)
+        part = cv2_utils.crop_image_only(image, rect)
+
+        assert np.array_equal(cache.crop(rect), part)
+        assert np.array_equal(cache.hsv(rect), cv2.cvtColor(part, cv2.COLOR_RGB2HSV))
+        assert np.array_equal(cache.gray(rect), cv2.cvtColor(part, cv2.COLOR_RGB2GRAY))
+        assert np.array_equal(cache.in_range(rect, (50, 50, 50), (200, 200, 200)),
+                              cv2_utils.filter_by_color(part, 'rgb', lower_rgb=(50, 50, 50), upper_rgb=(200, 200, 200)))
+        # H 通道回绕的颜色范围
+        for hsv_color in [(2, 150, 150), (90, 150, 150)]:
+            assert np.array_equal(cache.filter_hsv(rect, hsv_color, (10, 100, 100)),
+                                  cv2_utils.filter_by_color(part, 'hsv', hsv_color=hsv_color, hsv_diff=(10, 100, 100)))
+
+    def test_reuse(self):
+        cache = FrameImageCache(_image())
+        rect = Rect(10, 20, 90, 60)
+        first = cache.filter_hsv(rect, (90, 150, 150), (10, 100, 100))
+        cal_cnt = cache.cal_cnt
+        # 相同的区域和参数 直接使用缓存
+        assert cache.filter_hsv(Rect(10, 20, 90, 60), (90, 150, 150), (10, 100, 100)) is first
+        assert cache.hsv(rect) is cache.hsv(Rect(10, 20, 90, 60))
+        assert cache.cal_cnt == cal_cnt
+
+    def test_crop_rect(self):
+        image = _image()
+        cache = FrameImageCache(image)
+        assert cache.get_crop_rect(image[20:60, 10:90]).__repr__() == '(10, 20, 90, 60)'
+        assert cache.get_crop_rect(image[20:60, 10:90].copy()) is None
+        assert cache.get_crop_rect(image[20:60:2, 10:90]) is None
+
+    def test_pipeline(self):
+        image = _image()
+        hsv = CvStepFilterByHSV()
+        hsv.params.update(hsv_color=(90, 150, 150), hsv_diff=(10, 100, 100))
+        pipeline = CvPipeline()
+        pipeline.steps = [hsv, CvFindContoursStep()]
+        compiled = CompiledCvPipeline(pipeline, outputs=('contours', 'mask_image'))
+
+        expected = pipeline.execute(image, debug_mode=False)
+        cache = FrameImageCache(image)
+        for result in [pipeline.execute(image, debug_mode=False, frame_cache=cache),
+                       compiled.execute(image, debug_mode=False, frame_cache=cache)]:
+            assert np.array_equal(result.mask_image, expected.mask_image)
+            assert len(result.contours) == len(expected.contours)
+        # 两次执行共用同一个HSV转换 只计算了一次裁剪和一次转换
+        assert cache.cal_cnt == 2
+        assert cache.hit_cnt == 1
@@ -0,0 +1,74 @@
+"""
+测试OCR步骤使用GPU时 有更新的截图 还在排队的旧截图识别会被取消
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from one_dragon.base.cv_process.cv_pipeline import CvPipeline
+from one_dragon.base.cv_process.steps.step_ocr import CvStepOcr
+from one_dragon.utils import gpu_executor
+from one_dragon.utils.gpu_executor import GpuTaskPriority
+
+
+class _FakeOcr:
+
+    def __init__(self):
+        self.run_times: int = 0
+
+    def is_use_gpu(self) -> bool:
+        return True
+
+    def run_ocr(self, image) -> dict:
+        self.run_times += 1
+        return {'文本': []}
+
+
+class _FakeService:
+
+    def __init__(self):
+        self.ocr = _FakeOcr()
+
+
+def _wait_queue_depth(depth: int) -> None:
+    deadline = time.time() + 5
+    while gpu_executor._executor.queue_depth < depth:
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+class TestCvStepOcr:
+
+    def test_cancel_stale_frame(self):
+        service = _FakeService()
+        pipeline = CvPipeline()
+        pipeline.steps = [CvStepOcr()]
+
+        # 占住GPU线程 让后面的识别都在排队
+        started = threading.Event()
+        blocker = threading.Event()
+        gpu_executor.submit_with_priority(GpuTaskPriority.CRITICAL, lambda: started.set() or blocker.wait())
+        started.wait()
+
+        result_list = [None, None]
+
+        def run(idx: int, frame_time: float) -> None:
+            image = np.zeros((10, 10, 3), dtype=np.uint8)
+            result_list[idx] = pipeline.execute(image, service=service, debug_mode=False, frame_time=frame_time)
+
+        old_thread = threading.Thread(target=run, args=(0, 1.0))
+        old_thread.start()
+        _wait_queue_depth(1)
+        new_thread = threading.Thread(target=run, args=(1, 2.0))
+        new_thread.start()
+        _wait_queue_depth(2)
+
+        blocker.set()
+        old_thread.join()
+        new_thread.join()
+
+        assert not result_list[0].is_success
+        assert result_list[1].is_success
+        assert service.ocr.run_times == 1
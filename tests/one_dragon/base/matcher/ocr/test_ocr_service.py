@@ -0,0 +1,224 @@
+"""
+测试 OcrService 的内容哈希缓存
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from one_dragon.base.geometry.rectangle import Rect
+from one_dragon.base.matcher.ocr.ocr_match_result import OcrMatchResult
+from one_dragon.base.matcher.ocr.ocr_matcher import OcrMatcher
+from one_dragon.base.matcher.ocr.ocr_service import OcrRequest, OcrService
+
+
+class FakeOcrMatcher(OcrMatcher):
+
+    def __init__(self):
+        OcrMatcher.__init__(self)
+        self.call_count: int = 0
+        self.rec_count: int = 0
+        self.rec_text: str = '文本'
+        self.rec_score: float = 0.95
+
+    def ocr(self, image, threshold: float = 0, merge_line_distance: float = -1) -> list[OcrMatchResult]:
+        self.call_count += 1
+        return [OcrMatchResult(0.9, 0, 0, 10, 10, data='文本')]
+
+    def ocr_without_det(self, image_list) -> list[tuple[str, float]]:
+        self.rec_count += 1
+        return [(self.rec_text, self.rec_score) for _ in image_list]
+
+
+class TestOcrServiceCache:
+
+    @pytest.fixture
+    def matcher(self) -> FakeOcrMatcher:
+        return FakeOcrMatcher()
+
+    @pytest.fixture
+    def service(self, matcher) -> OcrService:
+        return OcrService(ocr_matcher=matcher, max_cache_size=4, cache_ttl=0)
+
+    def test_same_content_new_array_hit(self, service, matcher):
+        """像素相同的新截图应命中缓存"""
+        image = np.full((100, 100, 3), 50, dtype=np.uint8)
+        service.get_ocr_result_list(image)
+        service.get_ocr_result_list(image.copy())
+
+        assert matcher.call_count == 1
+        stats = service.get_cache_stats()
+        assert stats['hit'] == 1
+        assert stats['miss'] == 1
+
+    def test_changed_content_miss(self, service, matcher):
+        """像素变化后应重新识别"""
+        image = np.full((100, 100, 3), 50, dtype=np.uint8)
+        service.get_ocr_result_list(image)
+        changed = image.copy()
+        changed[0, 0, 0] = 51
+        service.get_ocr_result_list(changed)
+
+        assert matcher.call_count == 2
+
+    def test_change_outside_crop_hit(self, service, matcher):
+        """先裁剪时 区域外的变化不影响缓存"""
+        rect = Rect(0, 0, 50, 50)
+        image = np.full((100, 100, 3), 50, dtype=np.uint8)
+        service.get_ocr_result_list(image, rect=rect)
+        changed = image.copy()
+        changed[80, 80, 0] = 0
+        result_list = service.get_ocr_result_list(changed, rect=rect)
+
+        assert matcher.call_count == 1
+        assert len(result_list) == 1
+
+    def test_color_filter_in_key(self, service, matcher):
+        """颜色过滤后相同的区域应命中缓存 不同的过滤参数不应命中"""
+        color_range = [[200, 200, 200], [255, 255, 255]]
+        image = np.full((100, 100, 3), 50, dtype=np.uint8)
+        service.get_ocr_result_list(image, color_range=color_range)
+        # 过滤范围外的像素变化 过滤后的图片不变
+        service.get_ocr_result_list(np.full((100, 100, 3), 60, dtype=np.uint8), color_range=color_range)
+        assert matcher.call_count == 1
+
+        service.get_ocr_result_list(image, color_range=[[0, 0, 0], [100, 100, 100]])
+        assert matcher.call_count == 2
+
+    def test_lru_eviction(self, service, matcher):
+        """超出缓存大小后最久未使用的条目被淘汰"""
+        image_list = [np.full((10, 10, 3), i, dtype=np.uint8) for i in range(5)]
+        for image in image_list:
+            service.get_ocr_result_list(image)
+        assert matcher.call_count == 5
+
+        service.get_ocr_result_list(image_list[4].copy())
+        assert matcher.call_count == 5
+
+        service.get_ocr_result_list(image_list[0].copy())
+        assert matcher.call_count == 6
+
+    def test_ttl_expired(self, matcher):
+        """超过有效时间的缓存不再使用"""
+        service = OcrService(ocr_matcher=matcher, cache_ttl=0.01)
+        image = np.full((10, 10, 3), 1, dtype=np.uint8)
+        service.get_ocr_result_list(image)
+
+        time.sleep(0.02)
+        service.get_ocr_result_list(image.copy())
+        assert matcher.call_count == 2
+
+
+class TestOcrServiceBatch:
+
+    @pytest.fixture
+    def matcher(self) -> FakeOcrMatcher:
+        return FakeOcrMatcher()
+
+    @pytest.fixture
+    def service(self, matcher) -> OcrService:
+        return OcrService(ocr_matcher=matcher, max_cache_size=16, cache_ttl=0)
+
+    def test_batch_same_as_single(self, service, matcher):
+        """批量识别的结果与逐个识别一致 文本行合并识别 所以不共用缓存"""
+        image = np.full((100, 100, 3), 50, dtype=np.uint8)
+        rect_list = [Rect(0, 0, 40, 40), Rect(50, 50, 100, 100)]
+        result_list = service.get_ocr_result_list_batch([OcrRequest(image=image, rect=rect) for rect in rect_list])
+
+        assert len(result_list) == 2
+        assert result_list[1][0].x == 50
+        assert result_list[1][0].y == 50
+
+        single_result_list = service.get_ocr_result_list(image.copy(), rect=rect_list[1])
+        assert matcher.call_count == 3
+        assert single_result_list[0].rect == result_list[1][0].rect
+
+        # 各自的缓存都可以命中
+        service.get_ocr_result_list(image.copy(), rect=rect_list[1])
+        service.get_ocr_result_list_batch([OcrRequest(image=image.copy(), rect=rect) for rect in rect_list])
+        assert matcher.call_count == 3
+
+    def test_batch_dedup_and_threshold(self, service, matcher):
+        """相同请求只识别一次 阈值按请求过滤"""
+        image = np.full((100, 100, 3), 50, dtype=np.uint8)
+        result_list = service.get_ocr_result_list_batch([
+            OcrRequest(image=image),
+            OcrRequest(image=image),
+            OcrRequest(image=image, threshold=0.95),
+            OcrRequest(image=image, rect=Rect(200, 200, 300, 300)),
+        ])
+
+        assert matcher.call_count == 2
+        assert len(result_list[0]) == 1
+        assert len(result_list[1]) == 1
+        assert len(result_list[2]) == 0
+        assert len(result_list[3]) == 0
+
+
+class TestOcrServiceTextLine:
+
+    @pytest.fixture
+    def matcher(self) -> FakeOcrMatcher:
+        return FakeOcrMatcher()
+
+    @pytest.fixture
+    def service(self, matcher) -> OcrService:
+        return OcrService(ocr_matcher=matcher, cache_ttl=0, text_line_stable_times=2)
+
+    def test_learn_then_skip_det(self, service, matcher):
+        """连续检测结果一致后 跳过文本检测"""
+        rect = Rect(0, 0, 50, 50)
+        for i in range(4):
+            image = np.full((100, 100, 3), i, dtype=np.uint8)
+            result_list = service.get_ocr_result_list_by_text_line(image, rect, line_key='area')
+            assert len(result_list) == 1
+            assert result_list[0].data == '文本'
+
+        assert matcher.call_count == 2
+        assert matcher.rec_count == 2
+
+    def test_low_confidence_fallback(self, service, matcher):
+        """识别置信度过低时 回退到完整识别"""
+        rect = Rect(0, 0, 50, 50)
+        line_rect_list = [Rect(0, 0, 10, 10)]
+        matcher.rec_score = 0.1
+        result_list = service.get_ocr_result_list_by_text_line(
+            np.zeros((100, 100, 3), dtype=np.uint8), rect, line_key='area', line_rect_list=line_rect_list,
+        )
+
+        assert matcher.rec_count == 1
+        assert matcher.call_count == 1
+        assert result_list[0].confidence == 0.9
+
+    def test_preset_fail_backoff(self, service, matcher):
+        """预设的文本行位置识别失败后 退避期间只使用完整识别 之后再重试"""
+        rect = Rect(0, 0, 50, 50)
+        line_rect_list = [Rect(0, 0, 10, 10)]
+        matcher.rec_score = 0.1
+
+        def run(i: int) -> None:
+            service.get_ocr_result_list_by_text_line(
+                np.full((100, 100, 3), i, dtype=np.uint8), rect, line_key='area', line_rect_list=line_rect_list,
+            )
+
+        run(0)
+        assert (matcher.rec_count, matcher.call_count) == (1, 1)
+
+        # 第一次失败后退避2次
+        run(1)
+        run(2)
+        assert (matcher.rec_count, matcher.call_count) == (1, 3)
+
+        # 再次失败 退避4次
+        run(3)
+        assert (matcher.rec_count, matcher.call_count) == (2, 4)
+        for i in range(4, 8):
+            run(i)
+        assert (matcher.rec_count, matcher.call_count) == (2, 8)
+
+        # 恢复后重新跳过文本检测
+        matcher.rec_score = 0.95
+        run(8)
+        run(9)
+        assert (matcher.rec_count, matcher.call_count) == (4, 8)
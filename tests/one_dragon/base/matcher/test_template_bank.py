@@ -0,0 +1,52 @@
+"""
+测试 TemplateBank 与逐个 cv2.matchTemplate 的结果一致
+"""
+
+import cv2
+import numpy as np
+
+from one_dragon.base.matcher.template_bank import TemplateBank
+
+
+def _make_templates(count: int, shape: tuple[int, ...], seed: int) -> list[np.ndarray]:
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, size=shape, dtype=np.uint8) for _ in range(count)]
+
+
+class TestTemplateBank:
+
+    def test_same_as_cv2(self):
+        rng = np.random.default_rng(0)
+        mask = np.zeros((20, 30), dtype=np.uint8)
+        cv2.circle(mask, (15, 10), 9, 255, -1)
+        image_list = _make_templates(5, (20, 30, 3), 1) + _make_templates(3, (16, 24, 3), 2)
+        mask_list = [mask] * 5 + [None] * 3
+
+        # 原图里放入第2个模板 加一点噪声
+        source = rng.integers(0, 256, size=(40, 60, 3), dtype=np.uint8)
+        source[7:27, 11:41] = image_list[2]
+        source = np.clip(source.astype(np.int32) + rng.integers(-10, 10, size=source.shape), 0, 255).astype(np.uint8)
+
+        bank = TemplateBank([f't{i}' for i in range(8)], image_list, mask_list)
+        scores = bank.match(source)
+
+        for idx, (image, mask) in enumerate(zip(image_list, mask_list)):
+            expected = cv2.matchTemplate(source, image, cv2.TM_CCOEFF_NORMED, mask=mask).max()
+            assert abs(scores[idx] - expected) < 1e-4
+
+        template_id, score = bank.match_best(source, threshold=0.8)
+        assert template_id == 't2'
+        assert score > 0.9
+
+    def test_missing_and_oversize_template(self):
+        image_list = _make_templates(2, (20, 20, 3), 3)
+        bank = TemplateBank(['small', 'missing', 'large'], [image_list[0], None, np.zeros((50, 50, 3), np.uint8)],
+                            [None, None, None])
+        scores = bank.match(image_list[1][:20, :20])
+
+        assert np.isfinite(scores[0])
+        assert scores[1] == -np.inf
+        assert scores[2] == -np.inf
+
+        template_id, _ = bank.match_best(image_list[0], threshold=0.99)
+        assert template_id == 'small'
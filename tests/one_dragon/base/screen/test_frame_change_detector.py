@@ -0,0 +1,49 @@
+"""
+测试 FrameChangeDetector 只在区域完全一致时复用结果
+"""
+
+import numpy as np
+
+from one_dragon.base.geometry.rectangle import Rect
+from one_dragon.base.screen.frame_change_detector import FrameChangeDetector
+
+
+class TestFrameChangeDetector:
+
+    def test_reuse_when_area_unchanged(self):
+        detector = FrameChangeDetector()
+        rect = Rect(10, 10, 30, 30)
+        screen = np.zeros((60, 60, 3), dtype=np.uint8)
+        calls = []
+
+        def run():
+            calls.append(1)
+            return len(calls)
+
+        assert detector.get_or_run(('a',), screen, rect, run) == 1
+
+        # 区域外变化 复用
+        screen[50, 50] = 255
+        assert detector.get_or_run(('a',), screen, rect, run) == 1
+
+        # 区域内变化 重新识别
+        screen[15, 15] = 255
+        assert detector.get_or_run(('a',), screen, rect, run) == 2
+
+        # 不同的key 重新识别
+        assert detector.get_or_run(('b',), screen, rect, run) == 3
+
+        # 原截图被修改后 保存的区域不受影响
+        screen[15, 15] = 0
+        assert detector.get_or_run(('a',), screen, rect, run) == 4
+
+        stats = detector.get_stats()
+        assert stats['hit'] == 1
+        assert stats['miss'] == 4
+
+    def test_clear(self):
+        detector = FrameChangeDetector()
+        screen = np.zeros((20, 20), dtype=np.uint8)
+        assert detector.get_or_run(('a',), screen, None, lambda: 1) == 1
+        detector.clear()
+        assert detector.get_or_run(('a',), screen, None, lambda: 2) == 2
@@ -0,0 +1,202 @@
+"""
+测试画面识别器 按优先级判断画面 以及OCR标识的批量识别
+"""
+
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+from one_dragon.base.geometry.rectangle import Rect
+from one_dragon.base.matcher.match_result import MatchResult, MatchResultList
+from one_dragon.base.matcher.ocr.ocr_match_result import OcrMatchResult
+from one_dragon.base.matcher.ocr.ocr_matcher import OcrMatcher
+from one_dragon.base.matcher.ocr.ocr_service import OcrRequest, OcrService
+from one_dragon.base.screen.screen_area import ScreenArea
+from one_dragon.base.screen.screen_classifier import ScreenClassifier
+from one_dragon.base.screen.screen_info import ScreenInfo
+
+
+class FakeOcrMatcher(OcrMatcher):
+
+    DET_LIMIT_SIDE_LEN: int = 960  # 与文字检测模型一致 超过时缩小图片
+    DET_MIN_SIZE: int = 8  # 缩小后文字高度低于这个值就检测不到
+
+    def __init__(self, text_map: dict[int, str]):
+        """
+        模拟文字检测和识别 截图中每个文本是一个填充了特定灰度值的矩形
+        :param text_map: key=灰度值 value=文本
+        """
+        OcrMatcher.__init__(self)
+        self.text_map: dict[int, str] = text_map
+        self.ocr_count: int = 0
+        self.batch_count: int = 0
+        self.det_shape_list: list[tuple[int, int]] = []  # 送入文字检测的图片大小
+
+    def _det(self, image) -> list[tuple[int, Rect]]:
+        self.det_shape_list.append(image.shape[:2])
+        scale = min(1.0, self.DET_LIMIT_SIDE_LEN / max(image.shape[:2]))
+        gray = image[:, :, 0] if image.ndim == 3 else image
+        box_list = []
+        for value in self.text_map:
+            ys, xs = np.where(gray == value)
+            if len(ys) == 0 or (ys.max() - ys.min() + 1) * scale < self.DET_MIN_SIZE:
+                continue
+            box_list.append((value, Rect(int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1)))
+        return box_list
+
+    def _to_result(self, value: int, rect: Rect) -> OcrMatchResult:
+        return OcrMatchResult(1, rect.x1, rect.y1, rect.width, rect.height, data=self.text_map[value])
+
+    def ocr(self, image, threshold: float = 0, merge_line_distance: float = -1) -> list[OcrMatchResult]:
+        self.ocr_count += 1
+        return [self._to_result(value, rect) for value, rect in self._det(image)]
+
+    def ocr_batch(self, image_list, region_list, threshold: float = 0) -> list[list[OcrMatchResult]]:
+        """与 TextSystem.ocr_regions 一样 每张图片检测一次 文本框裁剪到区域内"""
+        self.batch_count += 1
+        det_map = {}
+        result_list = []
+        for image_idx, region in region_list:
+            if image_idx not in det_map:
+                det_map[image_idx] = self._det(image_list[image_idx])
+            image = image_list[image_idx]
+            region = region or Rect(0, 0, image.shape[1], image.shape[0])
+            ocr_result_list = []
+            for value, rect in det_map[image_idx]:
+                x1, y1 = max(rect.x1, region.x1), max(rect.y1, region.y1)
+                x2, y2 = min(rect.x2, region.x2), min(rect.y2, region.y2)
+                if x2 - x1 <= 3 or y2 - y1 <= 3:
+                    continue
+                ocr_result_list.append(self._to_result(value, Rect(x1 - region.x1, y1 - region.y1,
+                                                                   x2 - region.x1, y2 - region.y1)))
+            result_list.append(ocr_result_list)
+        return result_list
+
+
+def _load_screen_info(screen_name: str) -> ScreenInfo:
+    merged_path = Path(__file__).parents[4] / 'assets' / 'game_data' / 'screen_info' / '_od_merged.yml'
+    with merged_path.open('r', encoding='utf-8') as file:
+        data_list = yaml.safe_load(file)
+    return ScreenInfo(next(i for i in data_list if i['screen_name'] == screen_name))
+
+
+def _draw_text(screen: np.ndarray, rect: Rect, value: int) -> None:
+    """在区域中间画一个高度为10的文本"""
+    cx, cy = rect.center.x, rect.center.y
+    screen[cy - 5:cy + 5, cx - 20:cx + 20] = value
+
+
+class FakeTemplateMatcher:
+
+    def __init__(self, matched_id_list: list[str]):
+        self.matched_id_list: list[str] = matched_id_list  # 能匹配上的模板
+        self.match_id_list: list[str] = []  # 按顺序记录匹配过的模板
+
+    def crop_and_match_template(self, source, rect: Rect, template_sub_dir: str, template_id: str,
+                                threshold: float = 0.5) -> MatchResultList:
+        self.match_id_list.append(template_id)
+        mrl = MatchResultList()
+        if template_id in self.matched_id_list:
+            mrl.append(MatchResult(1, rect.x1, rect.y1, rect.width, rect.height))
+        return mrl
+
+
+class FakeContext:
+
+    def __init__(self, ocr_matcher: OcrMatcher, tm: FakeTemplateMatcher | None = None):
+        self.ocr_service: OcrService = OcrService(ocr_matcher=ocr_matcher, cache_ttl=0)
+        self.tm: FakeTemplateMatcher | None = tm
+
+
+def _screen_info(screen_name: str, area_list: list[ScreenArea]) -> ScreenInfo:
+    screen_info = ScreenInfo({'screen_name': screen_name})
+    screen_info.area_list = area_list
+    return screen_info
+
+
+def _template_area(template_id: str) -> ScreenArea:
+    return ScreenArea(area_name=template_id, pc_rect=Rect(0, 0, 40, 20),
+                      template_sub_dir='test', template_id=template_id, id_mark=True)
+
+
+class TestScreenClassifier:
+
+    def test_match_in_order(self):
+        """按优先级逐个判断 匹配到后 后面的画面不再识别"""
+        tm = FakeTemplateMatcher(['b', 'c'])
+        ctx = FakeContext(FakeOcrMatcher({}), tm)
+        classifier = ScreenClassifier([
+            _screen_info('画面A', [_template_area('a')]),
+            _screen_info('画面B', [_template_area('b')]),
+            _screen_info('画面B2', [_template_area('b')]),
+            _screen_info('画面C', [_template_area('c')]),
+        ])
+        screen = np.zeros((100, 100, 3), dtype=np.uint8)
+
+        assert classifier.match_first(ctx, screen, ['画面A', '画面B', '画面C']) == '画面B'
+        assert tm.match_id_list == ['a', 'b']
+
+        # 相同的模板标识只匹配一次
+        tm.match_id_list.clear()
+        assert classifier.match_first(ctx, screen, ['画面A', '画面B2', '画面B', '画面C']) == '画面B2'
+        assert tm.match_id_list == ['a', 'b']
+
+    def test_batch_ocr_marks(self):
+        """一个画面的多个OCR标识 合并成一次批量识别"""
+        matcher = FakeOcrMatcher({10: '标题', 20: '按钮'})
+        ctx = FakeContext(matcher)
+        classifier = ScreenClassifier([
+            _screen_info('画面', [
+                ScreenArea(area_name='标题', pc_rect=Rect(0, 0, 40, 20), text='标题', id_mark=True),
+                ScreenArea(area_name='按钮', pc_rect=Rect(50, 50, 90, 70), text='按钮', id_mark=True),
+            ]),
+        ])
+        screen = np.zeros((100, 100, 3), dtype=np.uint8)
+        screen[5:15, 0:40] = 10
+        screen[55:65, 50:90] = 20
+
+        assert classifier.match_first(ctx, screen, ['画面']) == '画面'
+        assert matcher.batch_count == 1
+        assert matcher.ocr_count == 0
+
+    def test_batch_same_as_single_on_real_screen(self):
+        """真实画面的多个OCR标识 批量识别与逐个区域识别结果一致"""
+        screen_info = _load_screen_info('迷失之地-武备选择')
+        area_list = [i for i in screen_info.area_list if i.id_mark and i.is_text_area]
+        assert len(area_list) > 1
+
+        text_map = {}
+        screen = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        for idx, area in enumerate(area_list):
+            value = (idx + 1) * 10
+            text_map[value] = area.text
+            _draw_text(screen, area.rect, value)
+        # 区域外的文本 不能被裁剪到区域内
+        text_map[200] = '其他'
+        screen[500:510, 900:960] = 200
+
+        matcher = FakeOcrMatcher(text_map)
+        ctx = FakeContext(matcher)
+        request_list = [
+            OcrRequest(image=screen, rect=area.rect, color_range=area.color_range)
+            for area in area_list
+        ]
+        batch_result_list = ctx.ocr_service.get_ocr_result_list_batch(request_list)
+        single_result_list = [
+            ctx.ocr_service.get_ocr_result_list(screen, rect=area.rect, color_range=area.color_range)
+            for area in area_list
+        ]
+
+        for area, batch_result, single_result in zip(area_list, batch_result_list, single_result_list):
+            assert [i.data for i in batch_result] == [area.text]
+            assert [(i.data, i.rect) for i in batch_result] == [(i.data, i.rect) for i in single_result]
+        # 文字检测的图片 没有超过检测模型的大小限制
+        assert all(max(i) <= FakeOcrMatcher.DET_LIMIT_SIDE_LEN for i in matcher.det_shape_list)
+
+        matcher = FakeOcrMatcher(text_map)
+        ctx = FakeContext(matcher)
+        classifier = ScreenClassifier([screen_info])
+        assert classifier.match_first(ctx, screen, [screen_info.screen_name]) == screen_info.screen_name
+        assert matcher.batch_count == 1
+        assert matcher.ocr_count == 0
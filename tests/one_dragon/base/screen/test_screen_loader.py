@@ -0,0 +1,45 @@
+"""
+测试画面跳转路径 新增画面后重新计算
+"""
+
+from pathlib import Path
+
+import yaml
+
+from one_dragon.base.screen.screen_loader import ScreenContext
+
+
+def _write_screen(dir_path: Path, screen_name: str, goto_list: list[str]) -> None:
+    dir_path.mkdir(parents=True, exist_ok=True)
+    data = {
+        'screen_id': screen_name,
+        'screen_name': screen_name,
+        'area_list': [
+            {'area_name': f'前往{i}', 'pc_rect': [0, 0, 10, 10], 'goto_list': [i]}
+            for i in goto_list
+        ],
+    }
+    with (dir_path / f'{screen_name}.yml').open('w', encoding='utf-8') as file:
+        yaml.safe_dump(data, file, allow_unicode=True)
+
+
+class TestScreenContext:
+
+    def test_route_after_load_extra_screen(self, tmp_path: Path):
+        ctx = ScreenContext()
+        _write_screen(tmp_path / 'base', 'A', ['B'])
+        _write_screen(tmp_path / 'base', 'B', ['A'])
+        ctx.load_extra_screen_dir(str(tmp_path / 'base'))
+
+        route = ctx.get_screen_route('A', 'B')
+        assert [i.to_screen for i in route.node_list] == ['B']
+        assert ctx.get_screen_route('A', 'C') is None
+
+        _write_screen(tmp_path / 'plugin', 'C', ['B'])
+        ctx.load_extra_screen_dir(str(tmp_path / 'plugin'))
+
+        # 已计算过的出发画面 也能获取到新画面的路径
+        route = ctx.get_screen_route('A', 'C')
+        assert route is not None and not route.can_go
+        route = ctx.get_screen_route('C', 'A')
+        assert [i.to_screen for i in route.node_list] == ['B', 'A']
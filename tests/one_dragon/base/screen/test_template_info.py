@@ -0,0 +1,38 @@
+"""
+测试模板二值化图的缓存 按模板和阈值区分
+"""
+
+import numpy as np
+
+from one_dragon.base.screen.template_info import TemplateInfo
+from one_dragon.base.screen.template_variant_cache import TemplateVariantCache
+from one_dragon.utils import cv2_utils
+
+
+def _template(template_id: str, cache: TemplateVariantCache) -> TemplateInfo:
+    template = TemplateInfo('_test', template_id)
+    template.raw = np.arange(48, dtype=np.uint8).reshape((4, 4, 3)) * 5
+    template.variant_cache = cache
+    return template
+
+
+class TestTemplateInfo:
+
+    def test_binary_cache(self):
+        cache = TemplateVariantCache()
+        t1 = _template('t1', cache)
+        t2 = _template('t2', cache)
+
+        result = t1.get_binary(threshold=100)
+        assert np.array_equal(result, cv2_utils.to_binary(t1.raw, threshold=100))
+        assert t1.get_binary(threshold=100) is result
+        assert cache.get_stats()['hit'] == 1
+
+        # 不同阈值 或 不同模板 分开缓存
+        assert np.array_equal(t1.get_binary(threshold=50), cv2_utils.to_binary(t1.raw, threshold=50))
+        assert t2.get_binary(threshold=100) is not result
+        assert cache.get_stats()['size'] == 3
+
+        # 没有缓存时 每次重新计算
+        t1.variant_cache = None
+        assert t1.get_binary(threshold=100) is not result
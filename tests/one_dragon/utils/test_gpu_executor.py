@@ -0,0 +1,92 @@
+"""
+测试GPU执行器 按优先级执行 过期任务取消 相同任务合并
+"""
+
+import threading
+
+from one_dragon.utils.gpu_executor import GpuTaskPriority, PriorityGpuExecutor
+
+
+def _block(executor: PriorityGpuExecutor) -> threading.Event:
+    """
+    提交一个占住线程的任务 等它开始执行后返回 set 之后结束
+    """
+    started = threading.Event()
+    blocker = threading.Event()
+
+    def run():
+        started.set()
+        blocker.wait()
+
+    executor.submit(GpuTaskPriority.NORMAL, run)
+    started.wait()
+    return blocker
+
+
+class TestPriorityGpuExecutor:
+
+    def test_priority(self):
+        executor = PriorityGpuExecutor(thread_name='test_gpu')
+        blocker = _block(executor)  # 占住线程 让后面的任务都在排队
+
+        order: list[str] = []
+        futures = [
+            executor.submit(GpuTaskPriority.LOW, order.append, ('low',)),
+            executor.submit(GpuTaskPriority.NORMAL, order.append, ('normal_1',)),
+            executor.submit(GpuTaskPriority.CRITICAL, order.append, ('critical',)),
+            executor.submit(GpuTaskPriority.NORMAL, order.append, ('normal_2',)),
+        ]
+        assert executor.queue_depth == 4
+        blocker.set()
+        for f in futures:
+            f.result()
+
+        assert order == ['critical', 'normal_1', 'normal_2', 'low']
+        stats = executor.get_stats()
+        assert stats['count'] == 5
+        assert stats['max_queue_depth'] == 4
+        assert stats['wait_p95_ms'] > 0
+        executor.shutdown()
+
+    def test_stale(self):
+        executor = PriorityGpuExecutor(thread_name='test_gpu')
+        blocker = _block(executor)
+
+        old = executor.submit(GpuTaskPriority.LOW, lambda: 1, stale_key='distance', frame_time=1)
+        new = executor.submit(GpuTaskPriority.LOW, lambda: 2, stale_key='distance', frame_time=2)
+        older = executor.submit(GpuTaskPriority.LOW, lambda: 0, stale_key='distance', frame_time=0.5)
+        other = executor.submit(GpuTaskPriority.LOW, lambda: 3, stale_key='battle_end', frame_time=1)
+        assert old.cancelled()
+        assert older.cancelled()
+
+        blocker.set()
+        assert new.result() == 2
+        assert other.result() == 3
+        assert executor.get_stats()['stale'] == 2
+        executor.shutdown()
+
+    def test_coalesce(self):
+        executor = PriorityGpuExecutor(thread_name='test_gpu')
+        blocker = _block(executor)
+
+        run_times: list[int] = []
+
+        def run(x: int) -> int:
+            run_times.append(x)
+            return x * 2
+
+        f1 = executor.submit(GpuTaskPriority.LOW, run, (1,), coalesce_key=('model', 1))
+        f2 = executor.submit(GpuTaskPriority.HIGH, run, (1,), coalesce_key=('model', 1))
+        f3 = executor.submit(GpuTaskPriority.NORMAL, run, (2,), coalesce_key=('model', 2))
+        assert f1 is f2
+
+        blocker.set()
+        assert f1.result() == 2
+        assert f3.result() == 4
+        assert run_times == [1, 2]  # 合并后按更高的优先级执行
+
+        # 执行完之后 再提交的会重新执行
+        assert executor.submit(GpuTaskPriority.LOW, run, (1,), coalesce_key=('model', 1)).result() == 2
+        assert run_times == [1, 2, 1]
+        assert executor.get_stats()['coalesced'] == 1
+        executor.shutdown()
@@ -0,0 +1,80 @@
+"""
+测试共享的 ONNX session 复用和执行提供程序的选择
+"""
+
+import gc
+
+import numpy as np
+import onnxruntime as ort
+import pytest
+from onnxruntime.datasets import get_example
+
+from one_dragon.utils import onnx_session_factory
+
+
+@pytest.fixture
+def model_path() -> str:
+    return get_example('sigmoid.onnx')
+
+
+@pytest.fixture(autouse=True)
+def restore_config():
+    config = onnx_session_factory.get_config()
+    yield
+    onnx_session_factory._config = config
+
+
+class TestOnnxSessionFactory:
+
+    def test_reuse(self, model_path):
+        """相同模型和配置复用同一个session 配置变化后创建新的"""
+        session = onnx_session_factory.get_session(model_path)
+        assert onnx_session_factory.get_session(model_path) is session
+
+        onnx_session_factory.update_config(intra_op_num_threads=1)
+        other = onnx_session_factory.get_session(model_path)
+        assert other is not session
+        assert onnx_session_factory.get_session(model_path) is other
+
+    def test_release(self, model_path):
+        """所有使用方释放后回收"""
+        session = onnx_session_factory.get_session(model_path)
+        assert model_path in onnx_session_factory.get_all_session_stats()
+        del session
+        gc.collect()
+        assert model_path not in onnx_session_factory.get_all_session_stats()
+
+    def test_optimized_model_cache(self, model_path, tmp_path):
+        """CPU下保存优化后的模型 下次直接加载"""
+        onnx_session_factory.update_config(optimized_model_dir=str(tmp_path))
+        session = onnx_session_factory.get_session(model_path)
+        assert len(list(tmp_path.iterdir())) == 1
+
+        del session
+        gc.collect()
+        assert onnx_session_factory.get_session(model_path) is not None
+        assert len(list(tmp_path.iterdir())) == 1
+
+    def test_stats(self, model_path):
+        session = onnx_session_factory.get_session(model_path)
+        input_meta = session.get_inputs()[0]
+        shape = [1 if not isinstance(i, int) else i for i in input_meta.shape]
+        session.run(None, {input_meta.name: np.zeros(shape, dtype=np.float32)})
+
+        stats = onnx_session_factory.get_all_session_stats()[model_path]
+        assert stats['count'] >= 1
+        assert stats['max_ms'] >= stats['p50_ms'] >= 0
+
+    def test_providers(self, monkeypatch):
+        assert onnx_session_factory.get_providers(False) == ['CPUExecutionProvider']
+
+        monkeypatch.setattr(ort, 'get_available_providers',
+                            lambda: ['DmlExecutionProvider', 'CPUExecutionProvider'])
+        assert onnx_session_factory.get_providers(True) == ['DmlExecutionProvider']
+
+        monkeypatch.setattr(ort, 'get_available_providers',
+                            lambda: ['CUDAExecutionProvider', 'DmlExecutionProvider', 'CPUExecutionProvider'])
+        assert onnx_session_factory.get_providers(True) == ['CUDAExecutionProvider']
+
+        monkeypatch.setattr(ort, 'get_available_providers', lambda: ['CPUExecutionProvider'])
+        assert onnx_session_factory.get_providers(True) == ['CPUExecutionProvider']
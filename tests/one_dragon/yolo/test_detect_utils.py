@@ -0,0 +1,122 @@
+"""
+测试一次性的多类别NMS 结果与逐个类别NMS一致
+以及结构化数组构建的识别结果 与直接构建的识别结果一致
+"""
+
+import numpy as np
+import pytest
+
+from one_dragon.yolo.detect_utils import (
+    DETECT_RESULT_DTYPE,
+    DetectClass,
+    DetectFrameResult,
+    DetectObjectResult,
+    batched_nms,
+    multiclass_nms,
+    nms,
+    xywh2xyxy,
+)
+
+
+def _random_boxes(seed: int, object_cnt: int = 30, candidate_per_object: int = 20, class_cnt: int = 5):
+    """
+    随机生成检测框 模型对同一个目标会输出多个相近的候选框
+    部分目标的类别不同但位置重叠
+    :return: 框 xyxy, 得分, 类别
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(100, 600, size=(object_cnt, 2))
+    sizes = rng.uniform(30, 200, size=(object_cnt, 2))
+    xywh = np.repeat(np.concatenate([centers, sizes], axis=1), candidate_per_object, axis=0)
+    xywh += rng.normal(0, 10, size=xywh.shape)
+    boxes = xywh2xyxy(xywh).astype(np.float32)
+    scores = rng.uniform(0.5, 1, size=len(boxes)).astype(np.float32)
+    class_ids = np.repeat(rng.integers(0, class_cnt, size=object_cnt), candidate_per_object)
+    # 部分候选框随机换成其他类别
+    changed = rng.random(len(boxes)) < 0.2
+    class_ids[changed] = rng.integers(0, class_cnt, size=int(changed.sum()))
+    return boxes, scores, class_ids
+
+
+def _loop_multiclass_nms(boxes, scores, class_ids, iou_threshold) -> list:
+    """
+    逐个类别进行NMS 下标先按类别升序 同类别内按得分降序
+    """
+    keep_boxes = []
+    for class_id in np.unique(class_ids):
+        class_indices = np.where(class_ids == class_id)[0]
+        class_keep_boxes = nms(boxes[class_indices, :], scores[class_indices], iou_threshold)
+        keep_boxes.extend(int(i) for i in class_indices[class_keep_boxes])
+    return keep_boxes
+
+
+class TestBatchedNms:
+
+    @pytest.mark.parametrize('seed', range(5))
+    @pytest.mark.parametrize('iou_threshold', [0.3, 0.5, 0.7])
+    def test_same_as_per_class_nms(self, seed: int, iou_threshold: float):
+        boxes, scores, class_ids = _random_boxes(seed)
+        expected = _loop_multiclass_nms(boxes, scores, class_ids, iou_threshold)
+
+        keep = batched_nms(boxes, scores, class_ids, iou_threshold)
+        assert sorted(keep.tolist()) == sorted(expected)
+        assert np.all(np.diff(scores[keep]) <= 0)  # 按得分降序
+
+        assert multiclass_nms(boxes, scores, class_ids, iou_threshold) == expected
+
+    def test_empty(self):
+        boxes = np.zeros((0, 4), dtype=np.float32)
+        scores = np.zeros((0,), dtype=np.float32)
+        class_ids = np.zeros((0,), dtype=np.int64)
+        assert len(batched_nms(boxes, scores, class_ids, 0.5)) == 0
+        assert multiclass_nms(boxes, scores, class_ids, 0.5) == []
+
+
+class TestDetectFrameResult:
+
+    def test_result_array_same_as_results(self):
+        boxes, scores, class_ids = _random_boxes(0)
+        idx_2_class = {i: DetectClass(i, f'class_{i}', category='test') for i in range(5)}
+        indices = multiclass_nms(boxes, scores, class_ids, 0.5)
+
+        expected = [
+            DetectObjectResult(rect=boxes[i].tolist(), score=float(scores[i]), detect_class=idx_2_class[int(class_ids[i])])
+            for i in indices
+        ]
+
+        result_array = np.empty((len(indices),), dtype=DETECT_RESULT_DTYPE)
+        result_array['x1'] = boxes[indices, 0]
+        result_array['y1'] = boxes[indices, 1]
+        result_array['x2'] = boxes[indices, 2]
+        result_array['y2'] = boxes[indices, 3]
+        result_array['score'] = scores[indices]
+        result_array['class_id'] = class_ids[indices]
+
+        frame = DetectFrameResult(raw_image=None, result_array=result_array, idx_2_class=idx_2_class)
+        assert frame.result_count == len(expected)
+        assert frame.result_array is result_array
+
+        results = frame.results
+        assert len(results) == len(expected)
+        for result, expected_result in zip(results, expected):
+            assert (result.x1, result.y1, result.x2, result.y2) == (
+                expected_result.x1, expected_result.y1, expected_result.x2, expected_result.y2)
+            assert result.score == expected_result.score
+            assert result.detect_class is expected_result.detect_class
+        assert frame.results is results
+
+        # 从识别结果转化回结构化数组
+        eager_frame = DetectFrameResult(raw_image=None, results=expected)
+        eager_array = eager_frame.result_array
+        assert eager_frame.result_count == len(expected)
+        assert eager_array.dtype == DETECT_RESULT_DTYPE
+        for key in ['x1', 'y1', 'x2', 'y2']:
+            np.testing.assert_array_equal(eager_array[key], result_array[key].astype(np.int32))
+        np.testing.assert_array_equal(eager_array['score'], result_array['score'])
+        np.testing.assert_array_equal(eager_array['class_id'], result_array['class_id'])
+
+    def test_empty(self):
+        frame = DetectFrameResult(raw_image=None)
+        assert frame.result_count == 0
+        assert frame.results == []
+        assert len(frame.result_array) == 0
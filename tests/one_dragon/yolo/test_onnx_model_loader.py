@@ -0,0 +1,58 @@
+"""
+测试使用 IO binding 推理 结果与普通的 session.run 一致
+"""
+
+import os
+
+import numpy as np
+import onnx
+import pytest
+from onnx import TensorProto, helper
+
+from one_dragon.yolo.onnx_model_loader import OnnxModelLoader
+
+
+def _save_model(model_dir: str, batch_dim) -> None:
+    """
+    保存一个很小的模型 输入 NCHW 输出 sigmoid 和 按通道的平均值
+    :param batch_dim: 批次维度 为字符串时是动态形状
+    """
+    graph = helper.make_graph(
+        nodes=[
+            helper.make_node('Sigmoid', ['images'], ['sigmoid']),
+            helper.make_node('ReduceMean', ['images'], ['mean'], axes=[2, 3], keepdims=0),
+        ],
+        name='tiny',
+        inputs=[helper.make_tensor_value_info('images', TensorProto.FLOAT, [batch_dim, 3, 8, 16])],
+        outputs=[
+            helper.make_tensor_value_info('sigmoid', TensorProto.FLOAT, [batch_dim, 3, 8, 16]),
+            helper.make_tensor_value_info('mean', TensorProto.FLOAT, [batch_dim, 3]),
+        ],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 8
+    os.makedirs(model_dir, exist_ok=True)
+    onnx.save(model, os.path.join(model_dir, 'model.onnx'))
+
+
+class TestOnnxModelLoader:
+
+    @pytest.mark.parametrize('batch_dim', [1, 'batch'])
+    def test_run_session(self, tmp_path, batch_dim):
+        _save_model(str(tmp_path / 'tiny'), batch_dim)
+        loader = OnnxModelLoader(model_name='tiny', model_download_url='', model_parent_dir_path=str(tmp_path))
+        assert (loader.onnx_input_width, loader.onnx_input_height) == (16, 8)
+        assert loader.io_binding is not None
+        assert (loader.output_buffers is not None) == (batch_dim == 1)  # 固定形状时预分配输出
+
+        rng = np.random.default_rng(0)
+        for _ in range(3):
+            image = rng.integers(0, 256, (30, 50, 3), dtype=np.uint8)
+            input_tensor, _, _ = loader.input_buffer.scale_input_image(image)
+            expected = loader.session.run(loader.output_names, {loader.input_names[0]: input_tensor})
+            with loader.run_lock:
+                result = [i.copy() for i in loader.run_session(input_tensor)]
+
+            assert len(result) == len(expected)
+            for output, expected_output in zip(result, expected):
+                np.testing.assert_array_equal(output, expected_output)
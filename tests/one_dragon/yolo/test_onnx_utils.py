@@ -0,0 +1,31 @@
+"""
+测试预分配的模型输入 结果与 scale_input_image_u 一致
+"""
+
+import numpy as np
+
+from one_dragon.yolo.onnx_utils import ScaleInputBuffer, scale_input_image_u
+
+
+class TestScaleInputBuffer:
+
+    def test_same_as_scale_input_image_u(self):
+        rng = np.random.default_rng(0)
+        onnx_input_width, onnx_input_height = 64, 48
+        buffer = ScaleInputBuffer(onnx_input_width, onnx_input_height)
+
+        # 包括 不需要缩放、横向和纵向留白、放大 以及缩放尺寸变化后再次使用相同尺寸
+        size_list = [(48, 64), (96, 256), (200, 100), (48, 64), (20, 30), (200, 100), (200, 100), (96, 256)]
+        for height, width in size_list:
+            image = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+            expected_tensor, expected_height, expected_width = scale_input_image_u(
+                image, onnx_input_width, onnx_input_height)
+            input_tensor, scale_height, scale_width = buffer.scale_input_image(image)
+
+            assert (scale_height, scale_width) == (expected_height, expected_width)
+            assert input_tensor.shape == expected_tensor.shape
+            assert input_tensor.dtype == expected_tensor.dtype
+            np.testing.assert_allclose(input_tensor, expected_tensor, rtol=0, atol=1e-6)
+
+        # 返回的是同一块内存
+        assert buffer.scale_input_image(image)[0] is input_tensor
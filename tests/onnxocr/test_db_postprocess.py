@@ -0,0 +1,64 @@
+"""
+测试使用连通域的文本框计算 结果与逐个轮廓计算一致
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from onnxocr.db_postprocess import DBPostProcess
+
+
+def _pred_map(height: int, width: int, rect_list=(), poly_list=(), seed: int = 0) -> np.ndarray:
+    """
+    生成概率图 文本区域内 0.6~1 其余 0~0.2
+    """
+    rng = np.random.default_rng(seed)
+    pred = rng.uniform(0, 0.2, (height, width)).astype(np.float32)
+    mask = np.zeros((height, width), dtype=np.uint8)
+    for x1, y1, x2, y2 in rect_list:
+        mask[y1:y2, x1:x2] = 1
+    for poly in poly_list:
+        cv2.fillPoly(mask, [np.array(poly, dtype=np.int32)], 1)
+    pred[mask > 0] = rng.uniform(0.6, 1.0, int(mask.sum()))
+    return pred
+
+
+def _rotated_rect(center, size, angle) -> np.ndarray:
+    return cv2.boxPoints((center, size, angle)).astype(np.int32)
+
+
+def _sort_result(boxes, scores) -> list:
+    return sorted(zip([np.array(i).tolist() for i in boxes], scores))
+
+
+class TestDBPostProcess:
+
+    @pytest.mark.parametrize('pred', [
+        # 分开的水平文本
+        _pred_map(100, 200, rect_list=[(10, 10, 60, 22), (80, 40, 150, 55)]),
+        # 相接的文本 同一行左右相接 以及上下错开相接 (不是矩形 使用逐个轮廓的处理)
+        _pred_map(100, 200, rect_list=[(10, 10, 60, 22), (60, 10, 100, 22), (20, 40, 60, 52), (50, 52, 90, 64)]),
+        # 倾斜的文本
+        _pred_map(100, 200, poly_list=[_rotated_rect((100, 50), (80, 14), 20), _rotated_rect((40, 80), (50, 10), -8)]),
+        # 在图片边缘的文本
+        _pred_map(100, 200, rect_list=[(0, 0, 40, 12), (150, 88, 200, 100), (0, 50, 30, 62), (180, 20, 200, 34)]),
+        # 太小 或 得分太低的
+        _pred_map(100, 200, rect_list=[(10, 10, 12, 40), (100, 50, 103, 53)]),
+        # 没有文本
+        np.zeros((100, 200), dtype=np.float32),
+    ])
+    def test_same_as_contour(self, pred: np.ndarray):
+        post = DBPostProcess(thresh=0.3, box_thresh=0.4, unclip_ratio=1.5, use_fast_box=True)
+        bitmap = pred > post.thresh
+        dest_width, dest_height = 400, 200
+
+        expected = _sort_result(*post.boxes_from_bitmap(pred, bitmap, dest_width, dest_height))
+        result = _sort_result(*post.boxes_from_bitmap_fast(pred, bitmap, dest_width, dest_height))
+
+        assert len(result) == len(expected)
+        # unclip 时 pyclipper 会把扩展后的点取整 框的位置允许概率图上 1 个像素的误差
+        atol = max(dest_width / pred.shape[1], dest_height / pred.shape[0])
+        for (box, score), (expected_box, expected_score) in zip(result, expected):
+            assert np.allclose(box, expected_box, atol=atol)
+            assert score == pytest.approx(expected_score)
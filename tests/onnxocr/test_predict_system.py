@@ -0,0 +1,57 @@
+"""
+测试文本框排序 结果与原来逐个交换的实现一致
+"""
+
+import numpy as np
+
+from onnxocr.predict_system import sorted_boxes
+
+
+def _sorted_boxes_reference(dt_boxes):
+    """
+    原来的实现
+    """
+    num_boxes = dt_boxes.shape[0]
+    sorted_boxes = sorted(dt_boxes, key=lambda x: (x[0][1], x[0][0]))
+    _boxes = list(sorted_boxes)
+
+    for i in range(num_boxes - 1):
+        for j in range(i, -1, -1):
+            if abs(_boxes[j + 1][0][1] - _boxes[j][0][1]) < 10 and (
+                _boxes[j + 1][0][0] < _boxes[j][0][0]
+            ):
+                tmp = _boxes[j]
+                _boxes[j] = _boxes[j + 1]
+                _boxes[j + 1] = tmp
+            else:
+                break
+    return _boxes
+
+
+def _boxes(left_top_list) -> np.ndarray:
+    return np.array([[[x, y], [x + 20, y], [x + 20, y + 8], [x, y + 8]] for x, y in left_top_list],
+                    dtype=np.float32)
+
+
+def _assert_same(dt_boxes: np.ndarray) -> None:
+    result = sorted_boxes(dt_boxes)
+    expected = _sorted_boxes_reference(dt_boxes)
+    assert len(result) == len(expected)
+    for box, expected_box in zip(result, expected):
+        assert np.array_equal(box, expected_box)
+
+
+class TestSortedBoxes:
+
+    def test_chained_lines(self):
+        """y 逐个相差小于10 但首尾相差大于10 只比较相邻的框"""
+        _assert_same(_boxes([(30, 0), (20, 6), (10, 12)]))
+        _assert_same(_boxes([(10, 12), (30, 0), (20, 6), (5, 18)]))
+
+    def test_random_layout(self):
+        rng = np.random.default_rng(0)
+        for _ in range(2000):
+            n = int(rng.integers(0, 12))
+            left_top_list = np.stack([rng.integers(0, 200, n), rng.integers(0, 40, n)], axis=1)
+            dt_boxes = _boxes(left_top_list.tolist()) if n > 0 else np.zeros((0, 4, 2), dtype=np.float32)
+            _assert_same(dt_boxes)
@@ -0,0 +1,122 @@
+"""
+测试批量计算横条长度 结果与逐个状态识别一致
+"""
+
+import cv2
+import numpy as np
+
+from one_dragon.base.cv_process.frame_image_cache import FrameImageCache
+from one_dragon.base.geometry.rectangle import Rect
+from zzz_od.auto_battle.agent_state import agent_state_checker
+from zzz_od.game_data.agent import AgentStateCheckWay, AgentStateDef, CommonAgentStateEnum
+
+
+class _Template:
+
+    def __init__(self, rect: Rect):
+        self.rect: Rect = rect
+        self.mask = None
+
+    def get_template_rect_by_point(self) -> Rect:
+        return self.rect
+
+
+class _TemplateLoader:
+
+    def __init__(self, rect_map: dict[str, Rect]):
+        self.rect_map: dict[str, Rect] = rect_map
+
+    def get_template(self, sub_dir: str, template_id: str):
+        rect = self.rect_map.get(template_id)
+        return None if rect is None else _Template(rect)
+
+
+class _Ctx:
+
+    def __init__(self, rect_map: dict[str, Rect]):
+        self.template_loader = _TemplateLoader(rect_map)
+
+
+_SINGLE_CHECK = {
+    AgentStateCheckWay.BACKGROUND_GRAY_RANGE_LENGTH: agent_state_checker.check_length_by_background_gray,
+    AgentStateCheckWay.FOREGROUND_GRAY_RANGE_LENGTH: agent_state_checker.check_length_by_foreground_gray,
+    AgentStateCheckWay.FOREGROUND_COLOR_RANGE_LENGTH: agent_state_checker.check_length_by_foreground_color,
+}
+
+
+def _screen() -> np.ndarray:
+    """
+    随机背景上 画几条不同长度和颜色的横条 能量条中间有分隔
+    """
+    rng = np.random.default_rng(0)
+    screen = rng.integers(0, 80, (60, 200, 3), dtype=np.uint8)
+    screen[2, 10:150] = (200, 200, 200)
+    screen[2, 40:43] = (10, 10, 10)  # 分隔
+    screen[2, 90:93] = (10, 10, 10)
+    screen[10:14, 10:90] = (250, 200, 40)
+    screen[20:24, 10:130] = (255, 40, 60)
+    screen[30, 10:60] = (40, 40, 40)
+    screen[30, 60:170] = (180, 180, 180)
+    return screen
+
+
+def _state_list() -> list[AgentStateDef]:
+    return [
+        AgentStateDef('能量', AgentStateCheckWay.FOREGROUND_GRAY_RANGE_LENGTH, 'energy',
+                      lower_color=90, upper_color=255, split_color_range=[0, 30], max_length=120),
+        AgentStateDef('背景', AgentStateCheckWay.BACKGROUND_GRAY_RANGE_LENGTH, 'background',
+                      lower_color=100, upper_color=255),
+        AgentStateDef('RGB', AgentStateCheckWay.FOREGROUND_COLOR_RANGE_LENGTH, 'rgb',
+                      lower_color=(240, 150, 20), upper_color=(255, 255, 70)),
+        AgentStateDef('HSV回绕', AgentStateCheckWay.FOREGROUND_COLOR_RANGE_LENGTH, 'hsv',
+                      hsv_color=(2, 215, 255), hsv_color_diff=(5, 40, 40)),
+        AgentStateDef('单通道', AgentStateCheckWay.FOREGROUND_COLOR_RANGE_LENGTH, 'rgb',
+                      lower_color=200, upper_color=255),
+        CommonAgentStateEnum.GUARD_BREAK.value,
+        AgentStateDef('没有模板', AgentStateCheckWay.FOREGROUND_GRAY_RANGE_LENGTH, 'missing',
+                      lower_color=90, upper_color=255),
+    ]
+
+
+class TestAgentStateChecker:
+
+    def test_length_in_batch(self):
+        screen = _screen()
+        ctx = _Ctx({
+            'energy': Rect(0, 2, 180, 3),
+            'background': Rect(0, 30, 180, 31),
+            'rgb': Rect(0, 8, 180, 16),
+            'hsv': Rect(0, 18, 180, 26),
+        })
+        state_list = _state_list()
+        frame_cache = FrameImageCache(screen)
+        result = agent_state_checker.check_length_in_batch(ctx, screen, [(i, None, None) for i in state_list],
+                                                           frame_cache=frame_cache)
+
+        # 单通道的颜色范围 和 不是横条的状态 需要单独识别
+        assert result[4] is None
+        assert result[5] is None
+        assert result[6] == 0
+
+        for state_def, value in zip(state_list, result):
+            if value is None:
+                continue
+            expected = _SINGLE_CHECK[state_def.check_way](ctx, screen, state_def)
+            assert value == expected, state_def.state_name
+        assert result[0] > 0 and result[2] > 0 and result[3] > 0
+
+    def test_random_bars(self):
+        rng = np.random.default_rng(1)
+        state_list = [i for i in _state_list()[:4]]
+        for _ in range(20):
+            part_list = []
+            for state_def in state_list:
+                height = 1 if state_def.check_way != AgentStateCheckWay.FOREGROUND_COLOR_RANGE_LENGTH else 4
+                part = rng.integers(0, 256, (height, int(rng.integers(5, 60)), 3), dtype=np.uint8)
+                part = cv2.GaussianBlur(part, (0, 0), 1)
+                part_list.append(part)
+
+            result = agent_state_checker.measure_length_in_batch(part_list, state_list)
+            for part, state_def, value in zip(part_list, state_list, result):
+                ctx = _Ctx({state_def.template_id: Rect(0, 0, part.shape[1], part.shape[0])})
+                assert value == _SINGLE_CHECK[state_def.check_way](ctx, part, state_def), state_def.state_name
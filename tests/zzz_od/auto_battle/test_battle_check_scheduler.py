@@ -0,0 +1,87 @@
+"""
+测试战斗识别的调度 预算不足时推迟低优先级的识别 闪避不受影响
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from zzz_od.auto_battle.battle_check_scheduler import (
+    BattleCheckDef,
+    BattleCheckPriority,
+    BattleCheckScheduler,
+)
+
+
+def _sleep(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+class TestBattleCheckScheduler:
+
+    def test_defer_low_priority(self):
+        executor = ThreadPoolExecutor(max_workers=4)
+        scheduler = BattleCheckScheduler(budget_ratio=1, default_frame_interval=0.02)
+        scheduler.register(BattleCheckDef('dodge', BattleCheckPriority.CRITICAL))
+        scheduler.register(BattleCheckDef('target', BattleCheckPriority.NORMAL, max_defer_seconds=0.5))
+
+        # 先测量耗时
+        scheduler.new_frame(0)
+        scheduler.submit('dodge', executor.submit, _sleep, 0.03).result()
+        scheduler.submit('target', executor.submit, _sleep, 0.01).result()
+
+        # 闪避的耗时已经超过了整帧的预算 目标状态被推迟 闪避不受影响
+        for idx in range(1, 4):
+            scheduler.new_frame(idx * 0.02)
+            dodge = scheduler.submit('dodge', executor.submit, _sleep, 0.001)
+            assert dodge is not None
+            assert scheduler.submit('target', executor.submit, _sleep, 0.001) is None
+            dodge.result()
+
+        # 连续推迟超过 max_defer_seconds 后 忽略预算执行一次
+        scheduler.new_frame(0.6)
+        scheduler.submit('dodge', executor.submit, _sleep, 0.001).result()
+        target = scheduler.submit('target', executor.submit, _sleep, 0.001)
+        assert target is not None
+        target.result()
+
+        stats = scheduler.get_stats()
+        assert stats['dodge']['count'] == 5
+        assert stats['target']['count'] == 2
+        assert stats['target']['deferred'] == 3
+        executor.shutdown()
+
+    def test_busy_and_single_worker(self):
+        executor = ThreadPoolExecutor(max_workers=4)
+        gpu = ThreadPoolExecutor(max_workers=1)
+        scheduler = BattleCheckScheduler()
+        scheduler.register(BattleCheckDef('dodge', BattleCheckPriority.CRITICAL))
+        scheduler.register(BattleCheckDef('distance', BattleCheckPriority.LOW, lambda: [5, 6]))
+        scheduler.register(BattleCheckDef('agent', BattleCheckPriority.HIGH))
+
+        event = threading.Event()
+        scheduler.new_frame(100)
+        agent = scheduler.submit('agent', executor.submit, event.wait)
+        dodge = scheduler.submit('dodge', gpu.submit, event.wait, single_worker=True)
+        # 单线程的执行器有任务时 不提交低优先级的任务
+        assert scheduler.submit('distance', gpu.submit, _sleep, 0, single_worker=True) is None
+
+        # 上一次还没执行完 不重复提交
+        scheduler.new_frame(100.05)
+        assert scheduler.submit('agent', executor.submit, event.wait) is None
+        event.set()
+        agent.result()
+        dodge.result()
+
+        scheduler.new_frame(100.1)
+        distance = scheduler.submit('distance', gpu.submit, _sleep, 0, single_worker=True)
+        assert distance is not None
+        distance.result()
+        # 未到识别间隔
+        scheduler.new_frame(100.15)
+        assert scheduler.submit('distance', gpu.submit, _sleep, 0, single_worker=True) is None
+
+        assert scheduler.get_stats()['agent']['busy'] == 1
+        executor.shutdown()
+        gpu.shutdown()
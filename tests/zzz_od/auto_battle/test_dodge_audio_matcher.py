@@ -0,0 +1,81 @@
+"""
+测试流式计算的音频相关性 与对整个窗口滤波后计算的结果一致
+"""
+
+import numpy as np
+from scipy.signal import butter, chirp, correlate, filtfilt
+
+from zzz_od.auto_battle.dodge_audio_matcher import DodgeAudioMatcher
+
+_SAMPLE_RATE = 8000
+_WINDOW_LEN = 2000
+_CHUNK_LEN = 80
+
+
+def _scale(x: np.ndarray) -> np.ndarray:
+    std = np.std(x)
+    return x / (std if std != 0 else 1)
+
+
+def _expected_corr(template: np.ndarray, window: np.ndarray, b: np.ndarray, a: np.ndarray) -> float:
+    wx = _scale(filtfilt(b, a, template))
+    wy = _scale(filtfilt(b, a, window))
+    if wx.shape[0] > wy.shape[0]:
+        return float(np.max(correlate(wx, wy, mode='same', method='fft') / wx.shape[0]))
+    else:
+        return float(np.max(correlate(wy, wx, mode='same', method='fft') / wy.shape[0]))
+
+
+class TestDodgeAudioMatcher:
+
+    def test_same_result(self):
+        b, a = butter(4, 250, btype='highpass', output='ba', fs=_SAMPLE_RATE)
+        sos = butter(4, 250, btype='highpass', output='sos', fs=_SAMPLE_RATE)
+        t = np.arange(2400) / _SAMPLE_RATE
+        long_template = chirp(t, f0=400, f1=2000, t1=t[-1]) * np.hanning(len(t))
+
+        for template in [long_template, long_template[:900]]:  # 模板比窗口长 和 比窗口短
+            rng = np.random.default_rng(0)
+            stream = rng.normal(0, 0.05, _SAMPLE_RATE * 2)
+            stream[3000:3000 + len(template)] += template
+            stream[9000:9000 + 600] += template[200:800]
+
+            matcher = DodgeAudioMatcher(_WINDOW_LEN, sos)
+            window = np.zeros(_WINDOW_LEN)
+            max_diff = 0
+            max_expected = 0
+            for idx in range(0, len(stream), _CHUNK_LEN):
+                chunk = stream[idx:idx + _CHUNK_LEN]
+                if idx == 960:  # 录制一段时间后才加载好模板
+                    matcher.set_template(template)
+                if idx == 12000:
+                    matcher.clear()
+                    window[:] = 0
+                matcher.append(chunk)
+                window = np.concatenate((window[len(chunk):], chunk))
+                if idx < 960:
+                    assert matcher.get_max_corr() == 0
+                    continue
+
+                expected = _expected_corr(template, window, b, a)
+                max_diff = max(max_diff, abs(matcher.get_max_corr() - expected))
+                max_expected = max(max_expected, expected)
+
+            assert max_expected > 0.3
+            # 因果滤波与 filtfilt 只有边缘效应的差别
+            assert max_diff < 0.02
+
+    def test_long_chunk(self):
+        sos = butter(4, 250, btype='highpass', output='sos', fs=_SAMPLE_RATE)
+        template = np.random.default_rng(1).normal(0, 1, 500)
+        stream = np.random.default_rng(2).normal(0, 1, _WINDOW_LEN * 3)
+
+        incremental = DodgeAudioMatcher(_WINDOW_LEN, sos)
+        incremental.set_template(template)
+        for idx in range(0, len(stream), _CHUNK_LEN):
+            incremental.append(stream[idx:idx + _CHUNK_LEN])
+
+        once = DodgeAudioMatcher(_WINDOW_LEN, sos)
+        once.set_template(template)
+        once.append(stream)
+        assert np.isclose(incremental.get_max_corr(), once.get_max_corr())